@@ -156,3 +156,14 @@ class Run(object):
         flowserv.client.app.data.File
         """
         return self._files.get(key).load().open()
+
+    def steps(self) -> List[Dict]:
+        """Get progress information for the workflow commands that have been
+        executed (or that are currently running) at the time when the run
+        handle was retrieved.
+
+        Returns
+        -------
+        list of dict
+        """
+        return self.doc.get('steps', [])
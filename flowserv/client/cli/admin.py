@@ -48,3 +48,14 @@ def init(force=False):
     if connect_url is None:
         raise err.MissingConfigurationError('database Url')
     DB(connect_url=connect_url).init()
+
+
+@click.command()
+def upgrade():
+    """Upgrade an existing database to the current schema."""
+    # Raise errors if the database URL is not set.
+    config = env()
+    connect_url = config.get(FLOWSERV_DB)
+    if connect_url is None:
+        raise err.MissingConfigurationError('database Url')
+    DB(connect_url=connect_url).upgrade()
@@ -15,9 +15,9 @@ from typing import Dict
 import click
 import os
 
-from flowserv.client.cli.admin import configuration, init
+from flowserv.client.cli.admin import configuration, init, upgrade
 from flowserv.client.cli.app import cli_app
-from flowserv.client.cli.cleanup import cli_cleanup
+from flowserv.client.cli.cleanup import cli_cleanup, recover_runs
 from flowserv.client.cli.group import cli_group
 from flowserv.client.cli.repository import list_repository
 from flowserv.client.cli.run import cli_run
@@ -151,10 +151,12 @@ def cli_flowserv(ctx):
     )
 
 
-# Administrative tasks (init, config, and cleanup)
+# Administrative tasks (init, config, cleanup, and recover)
 cli_flowserv.add_command(configuration, name='config')
 cli_flowserv.add_command(init, name='init')
+cli_flowserv.add_command(upgrade, name='upgrade')
 cli_flowserv.add_command(cli_cleanup, name='cleanup')
+cli_flowserv.add_command(recover_runs, name='recover')
 
 # Applications
 cli_flowserv.add_command(cli_app, name='app')
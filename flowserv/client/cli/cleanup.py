@@ -6,12 +6,15 @@
 # flowServ is free software; you can redistribute it and/or modify it under the
 # terms of the MIT License; see LICENSE file for more details.
 
-"""Command line interface to list and delete old workflow runs."""
+"""Command line interface to list and delete old workflow runs and to recover
+orphaned workflow runs.
+"""
 
 import click
 
 from flowserv.client.api import service
 from flowserv.client.cli.table import ResultTable
+from flowserv.config import RUNSDIR, env
 from flowserv.model.parameter.base import PARA_STRING
 
 
@@ -61,6 +64,29 @@ def list_obsolete_runs(before, state):
         click.echo(line)
 
 
+@click.command()
+@click.option(
+    '-r', '--requeue',
+    is_flag=True,
+    default=False,
+    help='Re-queue running runs instead of setting them to error state.'
+)
+def recover_runs(requeue):
+    """Recover orphaned runs."""
+    table = ResultTable(headline=['ID', 'Submitted at', 'State'], types=[PARA_STRING] * 3)
+    # Queued runs are not dispatched by the command line tool. They are
+    # dispatched by the service that executes the workflow runs.
+    with service() as api:
+        run_ids = api.runs().recover_runs(requeue=requeue, runsdir=RUNSDIR(env()), dispatch=False)
+        for run_id in run_ids:
+            run = api.runs().run_manager.get_run(run_id)
+            table.add([run.run_id, run.created_at[:19], run.state_type])
+    click.echo('{} runs recovered.'.format(len(run_ids)))
+    if run_ids:
+        for line in table.format():
+            click.echo(line)
+
+
 # -- Command Group ------------------------------------------------------------
 
 @click.group()
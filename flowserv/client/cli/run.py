@@ -57,9 +57,9 @@ def delete_run(run):
 def download_result_archive(output, run):
     """Download archive of run result files."""
     with service() as api:
-        buf = api.runs().get_result_archive(run_id=run).open()
+        fh = api.runs().get_result_archive(run_id=run)
         with open(output, 'wb') as local_file:
-            local_file.write(buf.read())
+            fh.copy_to(local_file)
 
 
 @click.command()
@@ -74,9 +74,9 @@ def download_result_archive(output, run):
 def download_result_file(file, output, run):
     """Download a run result file."""
     with service() as api:
-        buf = api.runs().get_result_file(run_id=run, file_id=file).open()
+        fh = api.runs().get_result_file(run_id=run, file_id=file)
         with open(output, 'wb') as local_file:
-            local_file.write(buf.read())
+            fh.copy_to(local_file)
 
 
 # -- List runs ----------------------------------------------------------------
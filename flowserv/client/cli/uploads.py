@@ -10,6 +10,7 @@
 
 import click
 import os
+import shutil
 
 from flowserv.client.api import service
 from flowserv.client.cli.table import ResultTable
@@ -68,7 +69,7 @@ def download_file(ctx, group, file, output):
     with service() as api:
         buf = api.uploads().get_uploaded_file(group_id=group_id, file_id=file)
         with open(output, 'wb') as local_file:
-            local_file.write(buf.read())
+            shutil.copyfileobj(buf, local_file)
 
 
 # -- List files ---------------------------------------------------------------
@@ -112,9 +112,9 @@ def download_result_archive(ctx, output, workflow):
     if workflow_id is None:
         raise click.UsageError('no workflow specified')
     with service() as api:
-        buf = api.workflows().get_result_archive(workflow_id=workflow_id).open()
+        fh = api.workflows().get_result_archive(workflow_id=workflow_id)
         with open(output, 'wb') as local_file:
-            local_file.write(buf.read())
+            fh.copy_to(local_file)
 
 
 @click.command()
@@ -134,9 +134,8 @@ def download_result_file(ctx, file, output, workflow):
         raise click.UsageError('no workflow specified')
     with service() as api:
         fh = api.workflows().get_result_file(workflow_id=workflow_id, file_id=file)
-    buf = fh.open()
-    with open(output, 'wb') as local_file:
-        local_file.write(buf.read())
+        with open(output, 'wb') as local_file:
+            fh.copy_to(local_file)
 
 
 # -- Get workflow -------------------------------------------------------------
@@ -195,13 +194,23 @@ def list_workflows():
     default=False,
     help='Include all runs.'
 )
+@click.option(
+    '-n', '--limit',
+    type=int,
+    required=False,
+    help='Maximum number of entries.'
+)
 @click.option('-w', '--workflow', required=False, help='Workflow identifier')
 @click.pass_context
-def show_ranking(ctx, workflow, all):
+def show_ranking(ctx, workflow, all, limit):
     """Show ranking for workflow results."""
     workflow_id = ctx.obj.get_workflow(ctx.params)
     with service() as api:
-        doc = api.workflows().get_ranking(workflow_id=workflow_id, include_all=all)
+        doc = api.workflows().get_ranking(
+            workflow_id=workflow_id,
+            include_all=all,
+            limit=limit
+        )
     # Print ranking.
     headline = ['Rank', 'Name']
     types = [PARA_INT, PARA_STRING]
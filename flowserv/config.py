@@ -86,6 +86,27 @@ def API_URL(env: Dict) -> str:
     return '{}://{}{}'.format(protocol, host, path)
 
 
+def RUNSDIR(env: Dict) -> Optional[str]:
+    """Get the base directory for temporary run files from the environment
+    variable 'FLOWSERV_RUNSDIR'. Defaults to a subfolder of the API base
+    directory. The result is None if neither directory is set.
+
+    Parameters
+    ----------
+    env: dict
+        Configuration object that provides access to configuration
+        parameters in the environment.
+
+    Returns
+    -------
+    string
+    """
+    runsdir = env.get(FLOWSERV_RUNSDIR)
+    if runsdir is None and env.get(FLOWSERV_BASEDIR) is not None:
+        runsdir = os.path.join(env.get(FLOWSERV_BASEDIR), DEFAULT_RUNSDIR)
+    return runsdir
+
+
 # -- Application --------------------------------------------------------------
 
 """Names of environment variables that configure the application."""
@@ -136,6 +157,62 @@ DEFAULT_ASYNC = 'True'
 # Base directory to temporary run files
 FLOWSERV_RUNSDIR = 'FLOWSERV_RUNSDIR'
 DEFAULT_RUNSDIR = 'runs'
+# Maximum number of group runs that are dispatched to the workflow engine at
+# the same time. Additional runs remain in the persistent run queue. There is
+# no limit if the value is not set.
+FLOWSERV_MAX_ACTIVE_RUNS = 'FLOWSERV_MAXACTIVERUNS'
+# Flag indicating whether active runs that were dispatched by a process that is
+# no longer running are recovered when the service starts. Pending runs are
+# re-queued and running runs are set to error state.
+FLOWSERV_RECOVER_RUNS = 'FLOWSERV_RECOVERRUNS'
+# Maximum number of concurrent asynchronous workflow runs (i.e., the number of
+# worker processes) for the serial workflow engine. Defaults to the number of
+# CPUs on the local machine.
+FLOWSERV_WORKERS = 'FLOWSERV_WORKERS'
+# Number of runs that a worker process executes before it is replaced by a new
+# process. Worker processes are not recycled if the value is not set.
+FLOWSERV_WORKER_MAXRUNS = 'FLOWSERV_WORKERMAXRUNS'
+# Number of bytes at the end of the error output of a failed workflow step
+# that are included in the error messages of the run. The complete output of
+# each step is written to log files in the run directory.
+FLOWSERV_LOG_TAIL = 'FLOWSERV_LOGTAIL'
+DEFAULT_LOG_TAIL = 65536
+# Maximum total size (in bytes) of the cache for the outputs of serial workflow
+# steps. Steps are not cached if the value is not set. The cache is maintained
+# in a subfolder of the API base directory unless a different directory is
+# given.
+FLOWSERV_STEP_CACHE = 'FLOWSERV_STEPCACHE'
+FLOWSERV_STEP_CACHEDIR = 'FLOWSERV_STEPCACHEDIR'
+DEFAULT_STEP_CACHEDIR = 'stepcache'
+# Flag indicating whether the Docker workflow engine executes all commands of
+# a workflow step inside a single long-lived container (session). Idle session
+# containers are kept by each worker process for reuse by later steps and runs
+# up to the given maximum number of idle containers.
+FLOWSERV_DOCKER_SESSIONS = 'FLOWSERV_DOCKERSESSIONS'
+FLOWSERV_DOCKER_IDLE = 'FLOWSERV_DOCKERIDLE'
+DEFAULT_DOCKER_IDLE = 4
+# Global resource limits for each command of a workflow step: CPU time and wall
+# time in seconds and memory in bytes. Limits that are declared in workflow
+# templates can only lower these limits. There is no limit if the value is not
+# set.
+FLOWSERV_MAX_CPUTIME = 'FLOWSERV_MAXCPUTIME'
+FLOWSERV_MAX_MEMORY = 'FLOWSERV_MAXMEMORY'
+FLOWSERV_MAX_WALLTIME = 'FLOWSERV_MAXWALLTIME'
+# Maximum number of independent steps of a serial workflow run that are
+# executed concurrently. Defaults to the number of CPUs. Steps are executed one
+# after another if the value is 1.
+FLOWSERV_STEP_WORKERS = 'FLOWSERV_STEPWORKERS'
+
+# Parallel download of the result files of successful remote workflow runs.
+# Sets the maximum number of concurrent downloads and the number of times that
+# a failed download is retried. Result files are downloaded to a folder in the
+# runs directory (FLOWSERV_RUNSDIR). If the file store and the runs directory
+# are on the same file system, the 'hardlink' staging mode avoids copying the
+# downloaded files into the file store.
+FLOWSERV_REMOTE_WORKERS = 'FLOWSERV_REMOTEWORKERS'
+DEFAULT_REMOTE_WORKERS = 8
+FLOWSERV_REMOTE_RETRIES = 'FLOWSERV_REMOTERETRIES'
+DEFAULT_REMOTE_RETRIES = 3
 
 # Poll interval
 FLOWSERV_POLL_INTERVAL = 'FLOWSERV_POLLINTERVAL'
@@ -172,6 +249,43 @@ FLOWSERV_FILESTORE_MODULE = 'FLOWSERV_FILESTORE_MODULE'
 """Environment variable for unique bucket identifier."""
 FLOWSERV_S3BUCKET = 'FLOWSERV_S3BUCKET'
 
+"""Environment variables for parallel object transfers for bucket stores. Sets
+the maximum number of concurrent transfers and the number of times that a
+failed transfer is retried.
+"""
+FLOWSERV_S3_WORKERS = 'FLOWSERV_S3WORKERS'
+DEFAULT_S3_WORKERS = 8
+FLOWSERV_S3_RETRIES = 'FLOWSERV_S3RETRIES'
+DEFAULT_S3_RETRIES = 3
+
+"""Environment variable for the local directory that caches the content of
+bucket objects that are copied to run directories (e.g., static workflow
+files). The cache is disabled if the variable is not set.
+"""
+FLOWSERV_S3_CACHEDIR = 'FLOWSERV_S3CACHEDIR'
+
+"""Environment variable for the mode in which files are staged from the file
+store into run directories. In 'copy' mode all files are copied. In 'reflink'
+mode files are cloned (copy-on-write) if the file system supports it. In
+'hardlink' mode files are hard-linked (falling back to cloning and copying).
+Hard-linked files share their content with the file store. They are made
+read-only when they are staged into run directories. Workflow steps that modify
+their static files (or that run as root) should use 'copy' or 'reflink' mode.
+"""
+FLOWSERV_STAGING = 'FLOWSERV_STAGING'
+STAGING_COPY = 'copy'
+STAGING_HARDLINK = 'hardlink'
+STAGING_REFLINK = 'reflink'
+STAGING_MODES = [STAGING_COPY, STAGING_HARDLINK, STAGING_REFLINK]
+DEFAULT_STAGING = STAGING_COPY
+
+"""Environment variable for the maximum total size (in bytes) of the result
+archives for workflow runs that are cached in the file store. Archives are not
+cached if the value is zero.
+"""
+FLOWSERV_ARCHIVE_CACHE = 'FLOWSERV_ARCHIVECACHE'
+DEFAULT_ARCHIVE_CACHE = 1024 * 1024 * 1024
+
 
 # --
 # -- Configuration settings
@@ -197,6 +311,21 @@ class Config(dict):
         if defaults is not None:
             super(Config, self).__init__(**defaults)
 
+    def archive_cache(self, size: int) -> Config:
+        """Set the maximum total size of cached run result archives.
+
+        Parameters
+        ----------
+        size: int
+            Cache size in bytes. Caching is disabled if the size is zero.
+
+        Returns
+        -------
+        flowserv.config.Config
+        """
+        self[FLOWSERV_ARCHIVE_CACHE] = size
+        return self
+
     def auth(self) -> Config:
         """Set the authentication method to the default value that requires
         authentication.
@@ -250,6 +379,56 @@ class Config(dict):
         self[FLOWSERV_BACKEND_CLASS] = 'DockerWorkflowEngine'
         return self
 
+    def docker_sessions(self, idle: Optional[int] = None) -> Config:
+        """Execute the commands of each workflow step in a single long-lived
+        container when using the Docker workflow controller.
+
+        Parameters
+        ----------
+        idle: int, default=None
+            Maximum number of idle containers that are kept for reuse.
+
+        Returns
+        -------
+        flowserv.config.Config
+        """
+        self[FLOWSERV_DOCKER_SESSIONS] = True
+        if idle is not None:
+            self[FLOWSERV_DOCKER_IDLE] = idle
+        return self
+
+    def log_tail(self, size: int) -> Config:
+        """Set the number of bytes at the end of the error output of a failed
+        workflow step that are included in the run error messages.
+
+        Parameters
+        ----------
+        size: int
+            Number of bytes.
+
+        Returns
+        -------
+        flowserv.config.Config
+        """
+        self[FLOWSERV_LOG_TAIL] = size
+        return self
+
+    def max_active_runs(self, count: int) -> Config:
+        """Set the maximum number of group runs that are dispatched to the
+        workflow engine at the same time.
+
+        Parameters
+        ----------
+        count: int
+            Maximum number of active runs.
+
+        Returns
+        -------
+        flowserv.config.Config
+        """
+        self[FLOWSERV_MAX_ACTIVE_RUNS] = count
+        return self
+
     def multiprocess_engine(self) -> Config:
         """Set configuration to use the serial multi-porcess workflow controller
         as the default backend.
@@ -272,6 +451,38 @@ class Config(dict):
         self[FLOWSERV_AUTH] = AUTH_OPEN
         return self
 
+    def recover_runs(self) -> Config:
+        """Recover orphaned runs of a previous service instance when the
+        service starts.
+
+        Returns
+        -------
+        flowserv.config.Config
+        """
+        self[FLOWSERV_RECOVER_RUNS] = True
+        return self
+
+    def remote_downloads(self, workers: int, retries: Optional[int] = None) -> Config:
+        """Set the maximum number of concurrent downloads and the number of
+        retries for failed downloads of result files from remote workflow
+        engines.
+
+        Parameters
+        ----------
+        workers: int
+            Maximum number of concurrent downloads.
+        retries: int, default=None
+            Number of times that a failed download is retried.
+
+        Returns
+        -------
+        flowserv.config.Config
+        """
+        self[FLOWSERV_REMOTE_WORKERS] = workers
+        if retries is not None:
+            self[FLOWSERV_REMOTE_RETRIES] = retries
+        return self
+
     def run_async(self) -> Config:
         """Set the run asynchronous flag to True.
 
@@ -309,6 +520,121 @@ class Config(dict):
         self[FLOWSERV_S3BUCKET] = bucket
         return self
 
+    def s3_cache(self, basedir: str) -> Config:
+        """Set the local directory for the content cache of bucket objects
+        that are copied to run directories.
+
+        Parameters
+        ----------
+        basedir: string
+            Path to the cache directory.
+
+        Returns
+        -------
+        flowserv.config.Config
+        """
+        self[FLOWSERV_S3_CACHEDIR] = basedir
+        return self
+
+    def s3_transfers(self, workers: int, retries: Optional[int] = None) -> Config:
+        """Set the maximum number of concurrent object transfers and the number
+        of retries for failed transfers for bucket stores.
+
+        Parameters
+        ----------
+        workers: int
+            Maximum number of concurrent transfers.
+        retries: int, default=None
+            Number of times that a failed transfer is retried.
+
+        Returns
+        -------
+        flowserv.config.Config
+        """
+        self[FLOWSERV_S3_WORKERS] = workers
+        if retries is not None:
+            self[FLOWSERV_S3_RETRIES] = retries
+        return self
+
+    def staging(self, mode: str) -> Config:
+        """Set the mode for staging files from the file store into run
+        directories.
+
+        Parameters
+        ----------
+        mode: string
+            One of 'copy', 'hardlink', or 'reflink'.
+
+        Returns
+        -------
+        flowserv.config.Config
+        """
+        self[FLOWSERV_STAGING] = mode
+        return self
+
+    def step_cache(self, size: int, basedir: Optional[str] = None) -> Config:
+        """Enable the cache for the outputs of serial workflow steps.
+
+        Parameters
+        ----------
+        size: int
+            Maximum total size (in bytes) of all cached step outputs.
+        basedir: string, default=None
+            Base directory for the cache.
+
+        Returns
+        -------
+        flowserv.config.Config
+        """
+        self[FLOWSERV_STEP_CACHE] = size
+        if basedir is not None:
+            self[FLOWSERV_STEP_CACHEDIR] = basedir
+        return self
+
+    def step_limits(
+        self, cputime: Optional[float] = None, memory: Optional[int] = None,
+        walltime: Optional[float] = None
+    ) -> Config:
+        """Set global resource limits for each command of a workflow step.
+
+        Parameters
+        ----------
+        cputime: float, default=None
+            CPU time limit in seconds.
+        memory: int, default=None
+            Memory limit in bytes.
+        walltime: float, default=None
+            Wall time limit in seconds.
+
+        Returns
+        -------
+        flowserv.config.Config
+        """
+        for key, value in [
+            (FLOWSERV_MAX_CPUTIME, cputime),
+            (FLOWSERV_MAX_MEMORY, memory),
+            (FLOWSERV_MAX_WALLTIME, walltime)
+        ]:
+            if value is not None:
+                self[key] = value
+        return self
+
+    def step_workers(self, count: int) -> Config:
+        """Set the maximum number of independent workflow steps that are
+        executed concurrently within a workflow run.
+
+        Parameters
+        ----------
+        count: int
+            Maximum number of concurrently executed steps.
+
+        Returns
+        -------
+        flowserv.config.Config
+        """
+        self[FLOWSERV_STEP_WORKERS] = count
+        return self
+
     def token_timeout(self, timeout: int) -> Config:
         """Set the authentication token timeout interval.
 
@@ -329,6 +655,28 @@ class Config(dict):
         self[FLOWSERV_WEBAPP] = True
         return self
 
+    def workers(self, processes: int, max_runs: Optional[int] = None) -> Config:
+        """Set the maximum number of concurrent workflow runs for the serial
+        workflow engine and the number of runs after which a worker process is
+        replaced.
+
+        Parameters
+        ----------
+        processes: int
+            Maximum number of worker processes.
+        max_runs: int, default=None
+            Number of runs that are executed by each worker process before it
+            is replaced by a new process.
+
+        Returns
+        -------
+        flowserv.config.Config
+        """
+        self[FLOWSERV_WORKERS] = processes
+        if max_runs is not None:
+            self[FLOWSERV_WORKER_MAXRUNS] = max_runs
+        return self
+
 
 # -- Initialize configuration from environment variables ----------------------
 
@@ -405,6 +753,21 @@ ENV = [
     (FLOWSERV_BACKEND_CLASS, None, None),
     (FLOWSERV_BACKEND_MODULE, None, None),
     (FLOWSERV_RUNSDIR, None, None),
+    (FLOWSERV_MAX_ACTIVE_RUNS, None, to_int),
+    (FLOWSERV_RECOVER_RUNS, 'False', to_bool),
+    (FLOWSERV_WORKERS, None, to_int),
+    (FLOWSERV_WORKER_MAXRUNS, None, to_int),
+    (FLOWSERV_LOG_TAIL, DEFAULT_LOG_TAIL, to_int),
+    (FLOWSERV_STEP_CACHE, None, to_int),
+    (FLOWSERV_STEP_CACHEDIR, None, None),
+    (FLOWSERV_DOCKER_SESSIONS, 'False', to_bool),
+    (FLOWSERV_DOCKER_IDLE, DEFAULT_DOCKER_IDLE, to_int),
+    (FLOWSERV_MAX_CPUTIME, None, to_float),
+    (FLOWSERV_MAX_MEMORY, None, to_int),
+    (FLOWSERV_MAX_WALLTIME, None, to_float),
+    (FLOWSERV_STEP_WORKERS, None, to_int),
+    (FLOWSERV_REMOTE_WORKERS, DEFAULT_REMOTE_WORKERS, to_int),
+    (FLOWSERV_REMOTE_RETRIES, DEFAULT_REMOTE_RETRIES, to_int),
     (FLOWSERV_POLL_INTERVAL, DEFAULT_POLL_INTERVAL, to_float),
     (FLOWSERV_ACCESS_TOKEN, None, None),
     (FLOWSERV_CLIENT, LOCAL_CLIENT, None),
@@ -412,7 +775,12 @@ ENV = [
     (FLOWSERV_WEBAPP, 'False', to_bool),
     (FLOWSERV_FILESTORE_CLASS, None, None),
     (FLOWSERV_FILESTORE_MODULE, None, None),
-    (FLOWSERV_S3BUCKET, None, None)
+    (FLOWSERV_S3BUCKET, None, None),
+    (FLOWSERV_S3_WORKERS, DEFAULT_S3_WORKERS, to_int),
+    (FLOWSERV_S3_RETRIES, DEFAULT_S3_RETRIES, to_int),
+    (FLOWSERV_S3_CACHEDIR, None, None),
+    (FLOWSERV_STAGING, DEFAULT_STAGING, None),
+    (FLOWSERV_ARCHIVE_CACHE, DEFAULT_ARCHIVE_CACHE, to_int)
 ]
 
 
@@ -27,7 +27,7 @@ providing access to these files.
 """
 
 from abc import ABCMeta, abstractmethod
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 
 from flowserv.model.base import RunObject
 from flowserv.model.template.base import WorkflowTemplate
@@ -94,3 +94,60 @@ class WorkflowController(metaclass=ABCMeta):  # pragma: no cover
         flowserv.model.workflow.state.WorkflowState, string
         """
         raise NotImplementedError()  # pragma: no cover
+
+    def notify_run(self, run_id: str, doc: Dict) -> bool:
+        """Process a notification about a state change of the given run that
+        was pushed by an external workflow engine. Returns True if the
+        notification was accepted by the controller.
+
+        Controllers that do not monitor external workflow engines ignore all
+        notifications. The default implementation therefore returns False.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+        doc: dict
+            Notification content.
+
+        Returns
+        -------
+        bool
+        """
+        return False
+
+    def pop_progress(self, run_id: str) -> List[Dict]:
+        """Get (and remove) the progress reports for the commands of a
+        synchronously executed run. Progress reports of synchronous runs are
+        kept by the controller so that the caller can write them to the
+        database within its own session.
+
+        Controllers that report the progress of their runs via service
+        callbacks do not keep any progress reports. The default implementation
+        therefore returns an empty list.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+
+        Returns
+        -------
+        list of dict
+        """
+        return list()
+
+    def resume_runs(self) -> List[str]:
+        """Resume the execution (or monitoring) of active runs that were
+        started by a previous instance of the controller (e.g., before the
+        service was restarted). Returns the identifier of the resumed runs.
+
+        Controllers that do not maintain any information about their runs
+        outside of the process cannot resume runs. The default implementation
+        therefore returns an empty list.
+
+        Returns
+        -------
+        list of string
+        """
+        return list()
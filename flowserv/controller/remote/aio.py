@@ -0,0 +1,868 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Asynchronous version of the remote workflow controller. The controller uses
+an asynchronous remote client (flowserv.controller.remote.client.AsyncRemoteClient)
+to interact with the remote workflow engine. Workflow creation, cancellation,
+state polling, and result downloads are executed as coroutines on an asyncio
+event loop that runs in a separate thread of the controller. All asynchronous
+workflow runs are monitored by a single coroutine on the event loop. This
+allows a single process to supervise a large number of remote runs.
+
+Updates of the local run state (which use the blocking service API) are
+executed in the default executor of the event loop.
+
+The result files of successful runs are downloaded concurrently with a bounded
+number of simultaneous downloads. Failed downloads are retried without
+downloading the other files again.
+
+As for the threaded controller, the monitoring information for each run is
+stored in the database so that a restarted controller can resume monitoring
+active runs, and remote engines may push notifications about state changes of
+a run to the controller.
+"""
+
+from concurrent.futures import Future
+from functools import partial
+from threading import Lock, Thread
+from typing import Coroutine, Dict, List, Optional, Tuple
+
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from flowserv.config import DEFAULT_REMOTE_RETRIES, DEFAULT_REMOTE_WORKERS
+from flowserv.controller.base import WorkflowController
+from flowserv.controller.remote.client import AsyncRemoteClient
+from flowserv.controller.remote.monitor import (
+    MAX_BACKOFF, RemoteTask, download_options, store_task
+)
+from flowserv.model.workflow.state import StateSuccess, WorkflowState
+from flowserv.service.api import APIFactory
+
+import flowserv.error as err
+import flowserv.util as util
+
+
+class AsyncRemoteWorkflowController(WorkflowController):
+    """Workflow controller that executes workflow templates for a given set of
+    arguments using an external workflow engine and an asynchronous client.
+    All interactions with the remote engine are executed on the event loop of
+    the controller.
+    """
+    def __init__(
+        self, client: AsyncRemoteClient, poll_interval: float, is_async: bool,
+        service: Optional[APIFactory] = None,
+        max_poll_interval: Optional[float] = None,
+        fallback_interval: Optional[float] = None
+    ):
+        """Initialize the client that is used to interact with the remote
+        workflow engine.
+
+        Parameters
+        ----------
+        client: flowserv.controller.remote.client.AsyncRemoteClient
+            Engine-specific implementation of the asynchronous remote client
+            that is used by the controller to interact with the workflow
+            engine.
+        poll_interval: int or float
+            Frequency (in sec.) at which the remote workflow engine is polled.
+        is_async: bool
+            Flag that determines whether workflows execution is synchronous or
+            asynchronous by default.
+        service: flowserv.service.api.APIFactory, default=None
+            API factory for service callbach during asynchronous workflow
+            execution.
+        max_poll_interval: float, default=None
+            Maximum interval (in sec.) at which the remote workflow engine is
+            polled for runs whose state remains unchanged. By default, the
+            maximum interval is a multiple of the poll interval.
+        fallback_interval: float, default=None
+            Poll interval (in sec.) for asynchronous runs if the remote engine
+            pushes notifications about state changes (see notify_run). The
+            regular poll interval is used if no value is given.
+        """
+        self.client = client
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.fallback_interval = fallback_interval
+        self.is_async = is_async
+        self.service = service
+        # Dictionary of all running tasks. Maintains the remote workflow
+        # identifier for each run.
+        self.tasks = dict()
+        # Event loop and monitor for asynchronous workflow runs. Both are
+        # created when the first run is submitted.
+        self.loop = None
+        self.monitor = None
+        # Lock to manage asynchronous access to the event loop.
+        self.lock = Lock()
+
+    def cancel_run(self, run_id: str):
+        """Request to cancel execution of the given run. The state of the
+        workflow run is updated accordingly by the caller.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+        """
+        workflow_id = self.tasks.pop(run_id, None)
+        if workflow_id is None:
+            return
+        loop = self.get_loop()
+        loop.call(self.monitor.remove, run_id)
+        # Stop workflow execution at the engine. Ignore any errors that may be
+        # raised.
+        try:
+            loop.submit(self.client.stop_workflow(workflow_id)).result()
+        except Exception as ex:
+            logging.error(ex)
+            logging.debug('\n'.join(util.stacktrace(ex)))
+
+    def close(self):
+        """Stop the event loop of the controller. Runs that are monitored
+        asynchronously are not updated after the loop is stopped.
+        """
+        with self.lock:
+            if self.loop is not None:
+                self.loop.stop()
+                self.loop = None
+                self.monitor = None
+
+    def exec_workflow(self, run, template, arguments):
+        """Initiate the execution of a given workflow template for a set of
+        argument values. The workflow is created on the remote engine using
+        the event loop of the controller. Returns the state of the created
+        workflow for asynchronous runs and the final state of the workflow
+        otherwise.
+
+        If the state of the run handle is not pending, an error is raised.
+
+        Parameters
+        ----------
+        run: flowserv.model.base.RunObject
+            Handle for the run that is being executed.
+        template: flowserv.model.template.base.WorkflowTemplate
+            Workflow template containing the parameterized specification and
+            the parameter declarations.
+        arguments: dict
+            Dictionary of argument values for parameters in the template.
+
+        Returns
+        -------
+        flowserv.model.workflow.state.WorkflowState, string
+        """
+        # Get the run state. Ensure that the run is in pending state
+        if not run.is_pending():
+            raise RuntimeError("invalid run state '{}'".format(run.state()))
+        try:
+            # Raise an error if the service manager is not given.
+            if self.service is None:
+                raise ValueError('service manager not given')
+            loop = self.get_loop()
+            wf = loop.submit(self.client.create_workflow(
+                run=run,
+                template=template,
+                arguments=arguments
+            )).result()
+            if self.is_async:
+                self.tasks[run.run_id] = wf.workflow_id
+                # Add the run to the monitor on the event loop.
+                task = RemoteTask(
+                    run_id=run.run_id,
+                    workflow_id=wf.workflow_id,
+                    state=wf.state,
+                    output_files=wf.output_files(),
+                    interval=self.monitor.poll_interval
+                )
+                loop.call(self.monitor.add, task)
+                return wf.state, None
+            # Block the calling thread while the workflow is monitored on the
+            # event loop.
+            return loop.submit(monitor_workflow(
+                run_id=run.run_id,
+                state=wf.state,
+                workflow_id=wf.workflow_id,
+                output_files=wf.output_files(),
+                client=self.client,
+                poll_interval=self.poll_interval,
+                downloads=download_options(self.service)
+            )).result()
+        except Exception as ex:
+            # Set the workflow runinto an ERROR state
+            logging.error(ex)
+            strace = util.stacktrace(ex)
+            logging.debug('\n'.join(strace))
+            return run.state().error(messages=strace), None
+
+    def get_loop(self) -> 'EventLoop':
+        """Get the event loop of the controller. Starts the event loop thread
+        and the run monitor if they do not exist.
+
+        Returns
+        -------
+        flowserv.controller.remote.aio.EventLoop
+        """
+        with self.lock:
+            if self.loop is None:
+                self.loop = EventLoop()
+                self.loop.start()
+                poll_interval = self.poll_interval
+                if self.fallback_interval is not None:
+                    poll_interval = self.fallback_interval
+                self.monitor = AsyncMonitor(
+                    client=self.client,
+                    poll_interval=poll_interval,
+                    service=self.service,
+                    tasks=self.tasks,
+                    max_interval=self.max_poll_interval,
+                    downloads=download_options(self.service)
+                )
+                self.loop.submit(self.monitor.run())
+            return self.loop
+
+    def notify_run(self, run_id: str, doc: Dict) -> bool:
+        """Process a notification about a state change of the given run that
+        was pushed by the remote engine. The run is processed by the monitor
+        on the event loop immediately. Returns False if the run is not
+        monitored by the controller.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+        doc: dict
+            Notification content.
+
+        Returns
+        -------
+        bool
+        """
+        if run_id not in self.tasks:
+            return False
+        self.get_loop().call(self.monitor.notify, run_id, doc)
+        return True
+
+    def resume_runs(self) -> List[str]:
+        """Resume monitoring the active asynchronous runs of a previous
+        controller instance. The monitoring information for the runs is read
+        from the database. Runs are not re-submitted to the remote engine. Runs
+        that are monitored by the controller already are ignored. Returns the
+        identifier of the resumed runs.
+
+        Returns
+        -------
+        list of string
+        """
+        if self.service is None:
+            return list()
+        with self.service() as api:
+            tasks = api.runs().remote_tasks()
+        now = time.time()
+        run_ids = list()
+        for doc in tasks:
+            run_id = doc['run_id']
+            if run_id in self.tasks:
+                continue
+            logging.info('resume monitoring run {}'.format(run_id))
+            self.tasks[run_id] = doc['workflow_id']
+            task = RemoteTask(
+                run_id=run_id,
+                workflow_id=doc['workflow_id'],
+                state=doc['state'],
+                output_files=doc['output_files'],
+                interval=doc['interval'],
+                delay=max(0, doc['next_poll'] - now)
+            )
+            self.get_loop().call(self.monitor.add, task)
+            run_ids.append(run_id)
+        return run_ids
+
+
+class AsyncMonitor(object):
+    """Monitor for all asynchronous runs of the controller. The monitor is
+    executed as a coroutine on the event loop of the controller. Runs are
+    added and removed using callbacks on the event loop. The polling strategy
+    is the same as for the threaded monitor service (see
+    flowserv.controller.remote.monitor.MonitorService).
+    """
+    def __init__(
+        self, client: AsyncRemoteClient, poll_interval: float, service,
+        tasks: Dict, max_interval: Optional[float] = None,
+        downloads: Optional[Dict] = None
+    ):
+        """Initialize the client for the remote engine and the connection to
+        the local service API.
+
+        Parameters
+        ----------
+        client: flowserv.controller.remote.client.AsyncRemoteClient
+            Implementation of the asynchronous remote client that is used to
+            interact with the workflow engine.
+        poll_interval: float
+            Frequency (in sec.) at which the remote workflow engine is polled
+            for runs whose state has recently changed.
+        service: contextlib,contextmanager
+            Context manager to create an instance of the service API.
+        tasks: dict
+            Dictionary of active tasks of the workflow controller. Finished
+            runs are removed from the dictionary.
+        max_interval: float, default=None
+            Maximum poll interval (in sec.) for runs whose state remains
+            unchanged.
+        downloads: dict, default=None
+            Options for downloading result files (see
+            flowserv.controller.remote.monitor.download_options).
+        """
+        self.client = client
+        self.poll_interval = poll_interval
+        self.service = service
+        self.tasks = tasks
+        self.downloads = downloads if downloads is not None else dict()
+        if max_interval is None:
+            max_interval = poll_interval * MAX_BACKOFF
+        self.max_interval = max(poll_interval, max_interval)
+        # Active runs that are monitored.
+        self.runs = dict()
+        # Notifications that were pushed by the remote engine for monitored
+        # runs and that have not been processed yet.
+        self.pushed = dict()
+        # Background tasks that store monitoring information or that download
+        # the result files of successful runs.
+        self.pending = set()
+        # Event that wakes up the monitor when a run is added. The event is
+        # created on the event loop.
+        self.wakeup = None
+
+    def add(self, task: RemoteTask):
+        """Start monitoring the given workflow run. Has to be called on the
+        event loop. The monitoring information for the run is stored in the
+        database in the default executor of the event loop.
+
+        Parameters
+        ----------
+        task: flowserv.controller.remote.monitor.RemoteTask
+            Workflow run that is monitored.
+        """
+        self.runs[task.run_id] = task
+        future = asyncio.ensure_future(self.store(task))
+        self.pending.add(future)
+        future.add_done_callback(self.pending.discard)
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    async def finish(self, task: RemoteTask, state: WorkflowState):
+        """Download the result files of a successful run and update the run
+        state. Sets the run into error state if the files cannot be
+        downloaded.
+
+        Parameters
+        ----------
+        task: flowserv.controller.remote.monitor.RemoteTask
+            Monitored workflow run.
+        state: flowserv.model.workflow.state.WorkflowState
+            Success state of the remote workflow.
+        """
+        rundir = None
+        try:
+            state, rundir = await fetch_results(
+                workflow_id=task.workflow_id,
+                state=state,
+                output_files=task.output_files,
+                client=self.client,
+                **self.downloads
+            )
+        except Exception as ex:
+            logging.error(ex)
+            strace = util.stacktrace(ex)
+            logging.debug('\n'.join(strace))
+            state = task.state.error(messages=strace)
+        await update_run(
+            run_id=task.run_id,
+            workflow_id=task.workflow_id,
+            state=state,
+            rundir=rundir,
+            client=self.client,
+            service=self.service
+        )
+        logging.info('finished run {} = {}'.format(task.run_id, state.type_id))
+        self.tasks.pop(task.run_id, None)
+
+    def notify(self, run_id: str, doc: Dict):
+        """Process a notification that was pushed by the remote engine for the
+        given run. The run is processed immediately, independently of its poll
+        schedule. Has to be called on the event loop. Notifications for runs
+        that are not monitored are ignored.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+        doc: dict
+            Notification content.
+        """
+        if run_id not in self.runs:
+            return
+        self.pushed[run_id] = doc
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    async def poll(
+        self, tasks: List[RemoteTask], pushed: Optional[Dict] = None
+    ) -> Dict[str, WorkflowState]:
+        """Get the current state for the workflows of the given tasks. The
+        state of runs with pushed notifications is taken from the notification
+        if the client can translate it into a workflow state. The state of all
+        other workflows is requested using a single bulk request. If the bulk
+        request fails, the state of each workflow is requested individually.
+        Workflows for which the state cannot be retrieved are set to error
+        state.
+
+        Parameters
+        ----------
+        tasks: list(flowserv.controller.remote.monitor.RemoteTask)
+            Tasks that are due for a state check.
+        pushed: dict, default=None
+            Pushed notifications for runs (keyed by the run identifier).
+
+        Returns
+        -------
+        dict
+        """
+        result = dict()
+        if pushed:
+            polled = list()
+            for task in tasks:
+                state = None
+                if task.run_id in pushed:
+                    try:
+                        state = self.client.notification_state(
+                            workflow_id=task.workflow_id,
+                            current_state=task.state,
+                            doc=pushed[task.run_id]
+                        )
+                    except Exception as ex:
+                        logging.error(ex)
+                if state is not None:
+                    result[task.workflow_id] = state
+                else:
+                    polled.append(task)
+            tasks = polled
+        if not tasks:
+            return result
+        result.update(await self._poll(tasks))
+        return result
+
+    def remove(self, run_id: str):
+        """Stop monitoring the given workflow run. Has to be called on the
+        event loop.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+        """
+        self.runs.pop(run_id, None)
+
+    async def run(self):
+        """Poll the remote engine for the state of all active runs that are
+        due for a state check. The state of all runs that are due is updated
+        concurrently.
+        """
+        self.wakeup = asyncio.Event()
+        while True:
+            pushed, self.pushed = self.pushed, dict()
+            now = time.monotonic()
+            tasks = [t for t in self.runs.values() if t.next_poll <= now or t.run_id in pushed]
+            if not tasks:
+                timeout = None
+                if self.runs:
+                    timeout = min([t.next_poll for t in self.runs.values()]) - now
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            states = await self.poll(tasks, pushed=pushed)
+            results = await asyncio.gather(
+                *[self.update(t, states.get(t.workflow_id, t.state)) for t in tasks],
+                return_exceptions=True
+            )
+            for task, result in zip(tasks, results):
+                if isinstance(result, Exception):
+                    logging.error(result)
+                    logging.debug('\n'.join(util.stacktrace(result)))
+                    self.remove(task.run_id)
+                    self.tasks.pop(task.run_id, None)
+
+    async def store(self, task: RemoteTask):
+        """Store the monitoring information for the given run in the database.
+        The update is executed in the default executor of the event loop.
+
+        Parameters
+        ----------
+        task: flowserv.controller.remote.monitor.RemoteTask
+            Monitored workflow run.
+        """
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, partial(store_task, task, self.service))
+
+    async def update(self, task: RemoteTask, state: WorkflowState):
+        """Update the monitored run with the current state of the remote
+        workflow. Increases the poll interval if the state has not changed.
+        Finished runs are removed from the set of monitored runs.
+
+        Parameters
+        ----------
+        task: flowserv.controller.remote.monitor.RemoteTask
+            Monitored workflow run.
+        state: flowserv.model.workflow.state.WorkflowState
+            Current state of the remote workflow.
+        """
+        # Ignore runs that were removed (e.g., canceled) while the state was
+        # being polled.
+        if self.runs.get(task.run_id) is not task:
+            return
+        if state == task.state:
+            # The poll schedule is only stored if the interval changed.
+            interval = task.interval
+            task.backoff(self.max_interval)
+            if task.interval != interval:
+                await self.store(task)
+            return
+        logging.info('current state of {} is {}'.format(task.run_id, state))
+        if state.is_success():
+            # Download result files in a separate task to avoid delaying the
+            # state checks for other runs.
+            self.remove(task.run_id)
+            future = asyncio.ensure_future(self.finish(task, state))
+            self.pending.add(future)
+            future.add_done_callback(self.pending.discard)
+            return
+        updated = await update_run(
+            run_id=task.run_id,
+            workflow_id=task.workflow_id,
+            state=state,
+            rundir=None,
+            client=self.client,
+            service=self.service
+        )
+        if updated and state.is_active():
+            task.reset(state, self.poll_interval)
+            await self.store(task)
+            return
+        logging.info('finished run {} = {}'.format(task.run_id, state.type_id))
+        self.remove(task.run_id)
+        self.tasks.pop(task.run_id, None)
+
+    async def _poll(self, tasks: List[RemoteTask]) -> Dict[str, WorkflowState]:
+        """Request the current state for the workflows of the given tasks from
+        the remote engine.
+
+        Parameters
+        ----------
+        tasks: list(flowserv.controller.remote.monitor.RemoteTask)
+            Tasks that are due for a state check.
+
+        Returns
+        -------
+        dict
+        """
+        try:
+            return await self.client.get_workflow_states({t.workflow_id: t.state for t in tasks})
+        except Exception as ex:
+            logging.error(ex)
+        states = await asyncio.gather(
+            *[
+                self.client.get_workflow_state(workflow_id=t.workflow_id, current_state=t.state)
+                for t in tasks
+            ],
+            return_exceptions=True
+        )
+        result = dict()
+        for task, state in zip(tasks, states):
+            if isinstance(state, Exception):
+                logging.error(state)
+                state = task.state.error(messages=util.stacktrace(state))
+            result[task.workflow_id] = state
+        return result
+
+
+class EventLoop(Thread):
+    """Thread that runs an asyncio event loop. Coroutines and callbacks are
+    submitted to the loop from other threads.
+    """
+    def __init__(self):
+        """Create the event loop for the thread."""
+        Thread.__init__(self, daemon=True)
+        self.loop = asyncio.new_event_loop()
+
+    def call(self, func, *args):
+        """Schedule a callback on the event loop.
+
+        Parameters
+        ----------
+        func: callable
+            Callback function.
+        args: list
+            Arguments for the callback.
+        """
+        self.loop.call_soon_threadsafe(func, *args)
+
+    def run(self):
+        """Run the event loop until it is stopped."""
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def stop(self):
+        """Cancel all pending tasks and stop the event loop."""
+        async def shutdown():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.submit(shutdown()).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.join()
+        self.loop.close()
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Submit a coroutine for execution on the event loop. Returns a
+        future for the result of the coroutine.
+
+        Parameters
+        ----------
+        coro: coroutine
+            Coroutine that is executed on the event loop.
+
+        Returns
+        -------
+        concurrent.futures.Future
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+# -- Helper functions ---------------------------------------------------------
+
+async def fetch_results(
+    workflow_id: str, state: WorkflowState, output_files: List[str],
+    client: AsyncRemoteClient, workers: Optional[int] = DEFAULT_REMOTE_WORKERS,
+    retries: Optional[int] = DEFAULT_REMOTE_RETRIES,
+    basedir: Optional[str] = None, backoff: Optional[float] = 0.1
+) -> Tuple[WorkflowState, str]:
+    """Download the result files of a successful workflow run to a new
+    temporary directory. Files are downloaded concurrently with a bounded
+    number of simultaneous downloads. Returns a modified workflow state handle
+    that contains the workflow result files and the path to the temporary
+    directory.
+
+    Failed downloads are retried the given number of times. If a file cannot
+    be downloaded the temporary directory is removed and an error is raised.
+
+    Parameters
+    ----------
+    workflow_id: string
+        Unique identifier for the workflow on the remote engine.
+    state: flowserv.model.workflow.state.WorkflowState
+        Success state of the workflow run.
+    output_files: list(string)
+        Relative path of output files that are generated by the workflow
+        run.
+    client: flowserv.controller.remote.client.AsyncRemoteClient
+        Implementation of the asynchronous remote client that is used to
+        interact with the workflow engine.
+    workers: int, default=8
+        Maximum number of concurrent downloads.
+    retries: int, default=3
+        Number of times that a failed download is retried.
+    basedir: string, default=None
+        Parent folder for the temporary directory. Uses the default folder for
+        temporary files if not given.
+    backoff: float, default=0.1
+        Initial wait time (in seconds) before retrying a failed download. The
+        wait time doubles with every attempt.
+
+    Returns
+    -------
+    flowserv.model.workflow.state.WorkflowState, string
+
+    Raises
+    ------
+    flowserv.error.FileTransferError
+    """
+    if basedir is not None:
+        os.makedirs(basedir, exist_ok=True)
+    rundir = tempfile.mkdtemp(dir=basedir)
+    semaphore = asyncio.Semaphore(max(1, workers))
+
+    async def download(relative_path: str) -> Optional[Tuple[str, Exception]]:
+        attempt = 0
+        while True:
+            try:
+                async with semaphore:
+                    await client.download_file(
+                        workflow_id=workflow_id,
+                        source=relative_path,
+                        target=os.path.join(rundir, relative_path)
+                    )
+                return None
+            except err.FlowservError as ex:
+                return relative_path, ex
+            except Exception as ex:
+                if attempt >= max(0, retries):
+                    return relative_path, ex
+            if backoff:
+                await asyncio.sleep(backoff * 2 ** attempt)
+            attempt += 1
+
+    results = await asyncio.gather(*[download(key) for key in output_files])
+    errors = [r for r in results if r is not None]
+    if errors:
+        shutil.rmtree(rundir, ignore_errors=True)
+        raise err.FileTransferError(errors)
+    state = StateSuccess(
+        created_at=state.created_at,
+        started_at=state.started_at,
+        finished_at=state.finished_at,
+        files=list(output_files)
+    )
+    return state, rundir
+
+
+async def monitor_workflow(
+    run_id: str, state: WorkflowState, workflow_id: str,
+    output_files: List[str], client: AsyncRemoteClient, poll_interval: float,
+    downloads: Optional[Dict] = None
+) -> Tuple[WorkflowState, str]:
+    """Monitor a remote workflow run by continuous polling at a given interval.
+    This coroutine is used for synchronous workflow runs. The run state is
+    updated by the calling code.
+
+    Returns the state of the inactive workflow and the temporary directory that
+    contains the downloaded run result files. The run directory may be None for
+    unsuccessful runs.
+
+    Parameters
+    ----------
+    run_id: string
+        Unique run identifier.
+    state: flowserv.model.workflow.state.WorkflowState
+        Current workflow state (to access the timestamps).
+    workflow_id: string
+        Unique identifier for the workflow on the remote engine.
+    output_files: list(string)
+        Relative path of output files that are generated by the workflow
+        run.
+    client: flowserv.controller.remote.client.AsyncRemoteClient
+        Implementation of the asynchronous remote client that is used to
+        interact with the workflow engine.
+    poll_interval: float
+        Frequency (in sec.) at which the remote workflow engine is polled.
+    downloads: dict, default=None
+        Options for downloading result files (see
+        flowserv.controller.remote.monitor.download_options).
+
+    Returns
+    -------
+    flowserv.model.workflow.state.WorkflowState, string
+    """
+    logging.info('start monitoring workflow {}'.format(workflow_id))
+    rundir = None
+    try:
+        while state.is_active():
+            await asyncio.sleep(poll_interval)
+            curr_state = await client.get_workflow_state(
+                workflow_id=workflow_id,
+                current_state=state
+            )
+            if state == curr_state:
+                continue
+            state = curr_state
+            if state.is_success():
+                state, rundir = await fetch_results(
+                    workflow_id=workflow_id,
+                    state=state,
+                    output_files=output_files,
+                    client=client,
+                    **(downloads if downloads is not None else dict())
+                )
+    except Exception as ex:
+        logging.error(ex)
+        strace = util.stacktrace(ex)
+        logging.debug('\n'.join(strace))
+        state = state.error(messages=strace)
+    logging.info('finished run {} = {}'.format(run_id, state.type_id))
+    return state, rundir
+
+
+def store_run(run_id: str, state: WorkflowState, rundir: Optional[str], service):
+    """Update the state of a workflow run in the service API.
+
+    Parameters
+    ----------
+    run_id: string
+        Unique run identifier.
+    state: flowserv.model.workflow.state.WorkflowState
+        New workflow state.
+    rundir: string
+        Temporary directory that contains the downloaded run result files.
+    service: contextlib,contextmanager
+        Context manager to create an instance of the service API.
+    """
+    with service() as api:
+        api.runs().update_run(run_id, state, rundir=rundir)
+
+
+async def update_run(
+    run_id: str, workflow_id: str, state: WorkflowState, rundir: Optional[str],
+    client: AsyncRemoteClient, service
+) -> bool:
+    """Update the state of a workflow run in the service API. The update is
+    executed in the default executor of the event loop. Returns False if the
+    update failed. In this case the remote workflow is stopped if it is still
+    active (see flowserv.controller.remote.monitor.update_run).
+
+    Parameters
+    ----------
+    run_id: string
+        Unique run identifier.
+    workflow_id: string
+        Unique identifier for the workflow on the remote engine.
+    state: flowserv.model.workflow.state.WorkflowState
+        New workflow state.
+    rundir: string
+        Temporary directory that contains the downloaded run result files.
+    client: flowserv.controller.remote.client.AsyncRemoteClient
+        Implementation of the asynchronous remote client that is used to
+        interact with the workflow engine.
+    service: contextlib,contextmanager
+        Context manager to create an instance of the service API.
+
+    Returns
+    -------
+    bool
+    """
+    loop = asyncio.get_event_loop()
+    try:
+        await loop.run_in_executor(None, partial(store_run, run_id, state, rundir, service))
+        return True
+    except Exception as ex:
+        logging.error('attempt to update run {}'.format(run_id))
+        logging.error(ex)
+        if state.is_active():
+            try:
+                await client.stop_workflow(workflow_id)
+            except Exception as ex:
+                logging.error(ex)
+        return False
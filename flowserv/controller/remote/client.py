@@ -11,9 +11,22 @@ to interact with a workflow engine. Different workflow engines will implement
 their own version of the remote client. The client provides the functionality
 that is required by the workflow controller to execute workflows, cancel
 workflow execution, get workflow status, and to download workflow result files.
+
+The asynchronous remote client defines the same functionality as coroutines
+for clients that are used by the asynchronous workflow controller (see
+flowserv.controller.remote.aio).
+
+Remote engines may push notifications about state changes of a workflow to the
+controller (see WorkflowController.notify_run). The client translates these
+notifications into workflow states.
 """
 
 from abc import ABCMeta, abstractmethod
+from typing import Dict, Optional
+
+import asyncio
+
+from flowserv.model.workflow.state import WorkflowState
 
 
 class RemoteClient(metaclass=ABCMeta):  # pragma: no cover
@@ -85,6 +98,62 @@ class RemoteClient(metaclass=ABCMeta):  # pragma: no cover
         """
         raise NotImplementedError()
 
+    def get_workflow_states(self, workflows: Dict[str, WorkflowState]) -> Dict[str, WorkflowState]:
+        """Get the current state for a set of workflows. This method is used
+        by the workflow monitor to check the state of all active workflows with
+        a single request to the remote engine.
+
+        The default implementation calls get_workflow_state for each workflow.
+        Clients for engines that support bulk state queries should override
+        this method. Workflows that are missing from the result are considered
+        as unchanged.
+
+        Parameters
+        ----------
+        workflows: dict
+            Mapping of unique workflow identifiers to the last known state of
+            the workflow by the workflow controller.
+
+        Returns
+        -------
+        dict
+        """
+        result = dict()
+        for workflow_id, current_state in workflows.items():
+            result[workflow_id] = self.get_workflow_state(
+                workflow_id=workflow_id,
+                current_state=current_state
+            )
+        return result
+
+    def notification_state(
+        self, workflow_id: str, current_state: WorkflowState, doc: Dict
+    ) -> Optional[WorkflowState]:
+        """Get the workflow state from a notification that was pushed by the
+        remote engine for the given workflow.
+
+        The default implementation returns None. In this case the notification
+        only triggers an immediate state check for the workflow (i.e., the
+        notification content is not trusted). Clients for engines that send the
+        workflow state with their notifications may return the state directly.
+        These clients are responsible for verifying that the notification was
+        sent by the remote engine.
+
+        Parameters
+        ----------
+        workflow_id: string
+            Unique workflow identifier
+        current_state: flowserv.model.workflw.state.WorkflowState
+            Last known state of the workflow by the workflow controller
+        doc: dict
+            Notification content.
+
+        Returns
+        -------
+        flowserv.model.workflw.state.WorkflowState
+        """
+        return None
+
     @abstractmethod
     def stop_workflow(self, workflow_id):
         """Stop the execution of the workflow with the given identifier.
@@ -95,3 +164,129 @@ class RemoteClient(metaclass=ABCMeta):  # pragma: no cover
             Unique workflow identifier
         """
         raise NotImplementedError()
+
+
+class AsyncRemoteClient(metaclass=ABCMeta):  # pragma: no cover
+    """Asynchronous version of the remote client interface. All methods are
+    coroutines that are executed on the event loop of the asynchronous remote
+    workflow controller. Implementations should not block the event loop
+    (e.g., by using an asynchronous HTTP client).
+    """
+    @abstractmethod
+    async def create_workflow(self, run, template, arguments):
+        """Create a new instance of a workflow from the given workflow
+        template and user-provided arguments (see
+        RemoteClient.create_workflow).
+
+        Parameters
+        ----------
+        run: flowserv.model.base.RunObject
+            Handle for the run that is being executed.
+        template: flowserv.model.template.base.WorkflowTemplate
+            Workflow template containing the parameterized specification and
+            the parameter declarations.
+        arguments: dict
+            Dictionary of argument values for parameters in the template.
+
+        Returns
+        -------
+        flowserv.model.workflow.remote.RemoteWorkflowObject
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def download_file(self, workflow_id, source, target):
+        """Download file from relative location at remote engine to a given
+        target path.
+
+        Parameters
+        ----------
+        workflow_id: string
+            Unique workflow identifier.
+        source: string
+            Relative path to source file in workflow workspace at the remote
+            workflow engine.
+        target: string
+            Path to target file on local disk.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_workflow_state(self, workflow_id, current_state):
+        """Get information about the current state of a given workflow (see
+        RemoteClient.get_workflow_state).
+
+        Parameters
+        ----------
+        workflow_id: string
+            Unique workflow identifier
+        current_state: flowserv.model.workflw.state.WorkflowState
+            Last known state of the workflow by the workflow controller
+
+        Returns
+        -------
+        flowserv.model.workflw.state.WorkflowState
+        """
+        raise NotImplementedError()
+
+    async def get_workflow_states(self, workflows: Dict[str, WorkflowState]) -> Dict[str, WorkflowState]:
+        """Get the current state for a set of workflows (see
+        RemoteClient.get_workflow_states). The default implementation requests
+        the state of all workflows concurrently.
+
+        Parameters
+        ----------
+        workflows: dict
+            Mapping of unique workflow identifiers to the last known state of
+            the workflow by the workflow controller.
+
+        Returns
+        -------
+        dict
+        """
+        states = await asyncio.gather(*[
+            self.get_workflow_state(workflow_id=workflow_id, current_state=state)
+            for workflow_id, state in workflows.items()
+        ])
+        return dict(zip(workflows.keys(), states))
+
+    def notification_state(
+        self, workflow_id: str, current_state: WorkflowState, doc: Dict
+    ) -> Optional[WorkflowState]:
+        """Get the workflow state from a notification that was pushed by the
+        remote engine for the given workflow (see
+        RemoteClient.notification_state). The method is not a coroutine since
+        it is not expected to interact with the remote engine.
+
+        The default implementation returns None. In this case the notification
+        only triggers an immediate state check for the workflow (i.e., the
+        notification content is not trusted). Clients for engines that send the
+        workflow state with their notifications may return the state directly.
+        These clients are responsible for verifying that the notification was
+        sent by the remote engine.
+
+        Parameters
+        ----------
+        workflow_id: string
+            Unique workflow identifier
+        current_state: flowserv.model.workflw.state.WorkflowState
+            Last known state of the workflow by the workflow controller
+        doc: dict
+            Notification content.
+
+        Returns
+        -------
+        flowserv.model.workflw.state.WorkflowState
+        """
+        return None
+
+    @abstractmethod
+    async def stop_workflow(self, workflow_id):
+        """Stop the execution of the workflow with the given identifier.
+
+        Parameters
+        ----------
+        workflow_id: string
+            Unique workflow identifier
+        """
+        raise NotImplementedError()
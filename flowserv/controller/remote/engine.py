@@ -11,11 +11,23 @@
 execution. The controller provides functionality for workflow creation, start,
 stop, and monitpring using an (abstract) client class. For different types of
 workflow engines only the RemoteClient class needs to be implements.
+
+Asynchronous workflow runs are monitored by a single monitor thread per
+controller that polls the state of all active runs (see
+flowserv.controller.remote.monitor.MonitorService). The monitoring information
+is stored in the database so that a restarted controller can resume monitoring
+active runs (see resume_runs).
+
+Remote engines may push notifications about state changes of a run to the
+controller (see notify_run). For these engines a fallback poll interval can be
+set that is used instead of the regular poll interval.
 """
 
-from typing import Optional
+from threading import Lock
+from typing import Dict, List, Optional
 
 import logging
+import time
 
 from flowserv.controller.base import WorkflowController
 from flowserv.controller.remote.client import RemoteClient
@@ -27,12 +39,15 @@ import flowserv.util as util
 
 class RemoteWorkflowController(WorkflowController):
     """Workflow controller that executes workflow templates for a given set of
-    arguments using an external workflow engine. Each workflow is monitored by
-    a separate process that continuously polls the workflow state.
+    arguments using an external workflow engine. All asynchronous workflows
+    are monitored by a single thread that continuously polls the workflow
+    states.
     """
     def __init__(
         self, client: RemoteClient, poll_interval: float, is_async: bool,
-        service: Optional[APIFactory] = None
+        service: Optional[APIFactory] = None,
+        max_poll_interval: Optional[float] = None,
+        fallback_interval: Optional[float] = None
     ):
         """Initialize the client that is used to interact with the remote
         workflow engine.
@@ -50,15 +65,30 @@ class RemoteWorkflowController(WorkflowController):
         service: flowserv.service.api.APIFactory, default=None
             API factory for service callbach during asynchronous workflow
             execution.
+        max_poll_interval: float, default=None
+            Maximum interval (in sec.) at which the remote workflow engine is
+            polled for runs whose state remains unchanged. By default, the
+            maximum interval is a multiple of the poll interval.
+        fallback_interval: float, default=None
+            Poll interval (in sec.) for asynchronous runs if the remote engine
+            pushes notifications about state changes (see notify_run). Polling
+            is then only used as a fallback for lost notifications. The regular
+            poll interval is used if no value is given.
         """
         self.client = client
         self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.fallback_interval = fallback_interval
         self.is_async = is_async
         self.service = service
-        # Dictionary of all running tasks. Maintains tuples containing the
-        # multi-process pool object and the remote workflow identifier for
-        # each run.
+        # Dictionary of all running tasks. Maintains the remote workflow
+        # identifier for each run.
         self.tasks = dict()
+        # Monitor for asynchronous workflow runs. The monitor is created when
+        # the first run is submitted.
+        self.monitor = None
+        # Lock to manage asynchronous access to the monitor.
+        self.lock = Lock()
 
     def cancel_run(self, run_id):
         """Request to cancel execution of the given run. This method is usually
@@ -72,8 +102,8 @@ class RemoteWorkflowController(WorkflowController):
             Unique run identifier.
         """
         # Ensure that the run has not been removed already
-        if run_id in self.tasks:
-            workflow_id = self.tasks[run_id]
+        workflow_id = self.tasks.get(run_id)
+        if workflow_id is not None:
             # Stop workflow execution at the engine. Ignore any errors that
             # may be raised.
             try:
@@ -84,7 +114,11 @@ class RemoteWorkflowController(WorkflowController):
             # Delete the task from the dictionary. The state of the
             # respective run will be updated by the workflow engine that
             # uses this controller for workflow execution
-            del self.tasks[run_id]
+            self.tasks.pop(run_id, None)
+        with self.lock:
+            monitor = self.monitor
+        if monitor is not None:
+            monitor.remove(run_id)
 
     def exec_workflow(self, run, template, arguments):
         """Initiate the execution of a given workflow template for a set of
@@ -138,17 +172,13 @@ class RemoteWorkflowController(WorkflowController):
             # monitoring the workflow state or not.
             if self.is_async:
                 self.tasks[run.run_id] = workflow_id
-                # Start monitor tread for asynchronous monitoring.
-                monitor.WorkflowMonitor(
+                # Add the run to the asynchronous monitor.
+                self.get_monitor().add(
                     run_id=run.run_id,
-                    state=wf.state,
                     workflow_id=workflow_id,
-                    output_files=wf.output_files(),
-                    client=self.client,
-                    poll_interval=self.poll_interval,
-                    service=self.service,
-                    tasks=self.tasks
-                ).start()
+                    state=wf.state,
+                    output_files=wf.output_files()
+                )
                 return wf.state, None
             else:
                 # Run workflow synchronously. This will lock the calling thread
@@ -160,7 +190,8 @@ class RemoteWorkflowController(WorkflowController):
                     workflow_id=workflow_id,
                     output_files=wf.output_files(),
                     client=self.client,
-                    poll_interval=self.poll_interval
+                    poll_interval=self.poll_interval,
+                    downloads=monitor.download_options(self.service)
                 )
                 return state, rundir
         except Exception as ex:
@@ -169,3 +200,85 @@ class RemoteWorkflowController(WorkflowController):
             strace = util.stacktrace(ex)
             logging.debug('\n'.join(strace))
             return run.state().error(messages=strace), None
+
+    def get_monitor(self) -> monitor.MonitorService:
+        """Get the monitor for asynchronous workflow runs. Creates and starts
+        the monitor thread if it does not exist.
+
+        Returns
+        -------
+        flowserv.controller.remote.monitor.MonitorService
+        """
+        with self.lock:
+            if self.monitor is None:
+                poll_interval = self.poll_interval
+                if self.fallback_interval is not None:
+                    poll_interval = self.fallback_interval
+                self.monitor = monitor.MonitorService(
+                    client=self.client,
+                    poll_interval=poll_interval,
+                    service=self.service,
+                    tasks=self.tasks,
+                    max_interval=self.max_poll_interval,
+                    downloads=monitor.download_options(self.service)
+                )
+                self.monitor.start()
+            return self.monitor
+
+    def notify_run(self, run_id: str, doc: Dict) -> bool:
+        """Process a notification about a state change of the given run that
+        was pushed by the remote engine. The run is processed by the monitor
+        immediately. Returns False if the run is not monitored by the
+        controller.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+        doc: dict
+            Notification content.
+
+        Returns
+        -------
+        bool
+        """
+        with self.lock:
+            monitor = self.monitor
+        if monitor is None:
+            return False
+        return monitor.notify(run_id=run_id, doc=doc)
+
+    def resume_runs(self) -> List[str]:
+        """Resume monitoring the active asynchronous runs of a previous
+        controller instance. The monitoring information for the runs (remote
+        workflow identifier, last known state, and poll schedule) is read from
+        the database. Runs are not re-submitted to the remote engine. Runs that
+        are monitored by the controller already are ignored. Returns the
+        identifier of the resumed runs.
+
+        Returns
+        -------
+        list of string
+        """
+        if self.service is None:
+            return list()
+        with self.service() as api:
+            tasks = api.runs().remote_tasks()
+        now = time.time()
+        run_ids = list()
+        for task in tasks:
+            run_id = task['run_id']
+            if run_id in self.tasks:
+                continue
+            logging.info('resume monitoring run {}'.format(run_id))
+            self.tasks[run_id] = task['workflow_id']
+            self.get_monitor().add(
+                run_id=run_id,
+                workflow_id=task['workflow_id'],
+                state=task['state'],
+                output_files=task['output_files'],
+                interval=task['interval'],
+                delay=max(0, task['next_poll'] - now)
+            )
+            run_ids.append(run_id)
+        return run_ids
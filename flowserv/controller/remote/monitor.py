@@ -6,34 +6,75 @@
 # flowServ is free software; you can redistribute it and/or modify it under the
 # terms of the MIT License; see LICENSE file for more details.
 
-"""Monitor for remote workflow executions. The monitor is a separate thread
-that continously polls the remote workflow engine to update the workflow state
-in the local database.
+"""Monitor for remote workflow executions. Asynchronous workflow runs are
+monitored by a single thread that polls the remote workflow engine for the
+state of all active runs to update the workflow state in the local database.
+
+The state of all runs that are due for a check is requested from the remote
+engine in a single (bulk) request. The poll interval for each run is increased
+(up to a maximum interval) while the state of the run remains unchanged. The
+interval is reset when the state of the run changes.
+
+The result files of successful runs are downloaded concurrently (using a
+bounded number of workers) in a separate thread to avoid delaying the state
+checks for other runs. Failed downloads are retried without downloading the
+other files again. Files are downloaded to a folder in the runs directory.
+
+The remote workflow identifier and the poll schedule of each run are stored in
+the database (via the service API) by the monitor thread when the run is added
+and whenever the poll interval changes. This allows a restarted controller to
+resume monitoring the active runs without re-submitting them.
+
+Remote engines may push notifications about state changes of a run. A
+notification schedules the run for immediate processing by the monitor
+thread. The state is either taken from the notification (if the client can
+translate the notification into a workflow state) or requested from the
+remote engine. If the engine pushes state changes, polling is only used as a
+fallback with a longer poll interval.
 """
 
+from functools import partial
+from threading import Condition, Thread
+from typing import Dict, List, Optional, Tuple
+
 import logging
 import os
+import shutil
 import tempfile
 import time
 
-from threading import Thread
-
-from flowserv.model.workflow.state import StateSuccess
+from flowserv.config import (
+    FLOWSERV_BASEDIR, FLOWSERV_REMOTE_RETRIES, FLOWSERV_REMOTE_WORKERS,
+    FLOWSERV_RUNSDIR, DEFAULT_REMOTE_RETRIES, DEFAULT_REMOTE_WORKERS,
+    DEFAULT_RUNSDIR
+)
+from flowserv.controller.remote.client import RemoteClient
+from flowserv.model.files.transfer import TransferManager
+from flowserv.model.workflow.state import StateSuccess, WorkflowState
 
 import flowserv.util as util
 
 
-class WorkflowMonitor(Thread):
-    """Thread that monitors execution of an external workflow. Polls the state
-    of the workflow in regular intervals. Updates the local workflow state as
-    the remote state changes.
-    """
+"""Factor by which the poll interval of a run is increased while the state of
+the run remains unchanged.
+"""
+BACKOFF = 1.5
+"""Default maximum poll interval for a run (as a multiple of the poll
+interval).
+"""
+MAX_BACKOFF = 10
+
+
+class RemoteTask(object):
+    """Monitoring information for an active remote workflow run."""
     def __init__(
-        self, run_id, workflow_id, state, output_files, client, poll_interval,
-        service, tasks
+        self, run_id: str, workflow_id: str, state: WorkflowState,
+        output_files: List[str], interval: float,
+        delay: Optional[float] = None
     ):
-        """Initialize the workflow information and the connection to the local
-        service API.
+        """Initialize the object properties. The first poll for the run is
+        scheduled after the given delay. By default, the delay is the poll
+        interval.
 
         Parameters
         ----------
@@ -42,52 +83,487 @@ class WorkflowMonitor(Thread):
         workflow_id: string
             Unique identifier for the workflow on the remote engine.
         state: flowserv.model.workflow.state.WorkflowState
-            Current workflow state (to access the timestamps).
+            Last known state of the workflow run.
         output_files: list(string)
             Relative path of output files that are generated by the workflow
             run.
+        interval: float
+            Current poll interval (in sec.) for the run.
+        delay: float, default=None
+            Delay (in sec.) for the first poll.
+        """
+        self.run_id = run_id
+        self.workflow_id = workflow_id
+        self.state = state
+        self.output_files = output_files
+        self.interval = interval
+        self.next_poll = time.monotonic() + (delay if delay is not None else interval)
+
+    def backoff(self, max_interval: float):
+        """Increase the poll interval for a run whose state has not changed
+        and schedule the next state check.
+
+        Parameters
+        ----------
+        max_interval: float
+            Maximum poll interval (in sec.).
+        """
+        self.interval = min(self.interval * BACKOFF, max_interval)
+        self.next_poll = time.monotonic() + self.interval
+
+    def poll_at(self) -> float:
+        """Get the time of the next state check in seconds since the epoch.
+
+        Returns
+        -------
+        float
+        """
+        return time.time() + max(0, self.next_poll - time.monotonic())
+
+    def reset(self, state: WorkflowState, interval: float):
+        """Set the new state of the run after a state change. Resets the poll
+        interval and schedules the next state check.
+
+        Parameters
+        ----------
+        state: flowserv.model.workflow.state.WorkflowState
+            Current state of the workflow run.
+        interval: float
+            Poll interval (in sec.).
+        """
+        self.state = state
+        self.interval = interval
+        self.next_poll = time.monotonic() + interval
+
+
+class MonitorService(Thread):
+    """Thread that monitors the execution of all asynchronous runs of a remote
+    workflow controller. Polls the state of active workflows and updates the
+    local workflow state as the remote state changes.
+    """
+    def __init__(
+        self, client: RemoteClient, poll_interval: float, service,
+        tasks: Dict, max_interval: Optional[float] = None,
+        downloads: Optional[Dict] = None
+    ):
+        """Initialize the client for the remote engine and the connection to
+        the local service API.
+
+        Parameters
+        ----------
         client: flowserv.controller.remote.client.RemoteClient
             Implementation of the remote client that is used to interact with
             the workflow engine.
         poll_interval: float
-            Frequency (in sec.) at which the remote workflow engine is polled.
-        service: contextlib,contextmanager, default=None
+            Frequency (in sec.) at which the remote workflow engine is polled
+            for runs whose state has recently changed.
+        service: contextlib,contextmanager
             Context manager to create an instance of the service API.
+        tasks: dict
+            Dictionary of active tasks of the workflow controller. Finished
+            runs are removed from the dictionary.
+        max_interval: float, default=None
+            Maximum poll interval (in sec.) for runs whose state remains
+            unchanged.
+        downloads: dict, default=None
+            Options for downloading result files (see download_options).
         """
-        Thread.__init__(self)
-        self.run_id = run_id
-        self.workflow_id = workflow_id
-        self.state = state
-        self.output_files = output_files
+        Thread.__init__(self, daemon=True)
         self.client = client
         self.poll_interval = poll_interval
         self.service = service
         self.tasks = tasks
+        self.downloads = downloads if downloads is not None else dict()
+        if max_interval is None:
+            max_interval = poll_interval * MAX_BACKOFF
+        self.max_interval = max(poll_interval, max_interval)
+        # Active runs that are monitored by the service.
+        self.runs = dict()
+        # Runs that have been added but whose monitoring information has not
+        # been stored yet. The information is stored by the monitor thread
+        # since the caller may hold an open session of the service API.
+        self.added = list()
+        # Notifications that were pushed by the remote engine for monitored
+        # runs and that have not been processed yet.
+        self.pushed = dict()
+        self.cond = Condition()
+
+    def add(
+        self, run_id: str, workflow_id: str, state: WorkflowState,
+        output_files: List[str], interval: Optional[float] = None,
+        delay: Optional[float] = None
+    ):
+        """Start monitoring the given workflow run. The monitoring information
+        for the run is stored in the database by the monitor thread.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+        workflow_id: string
+            Unique identifier for the workflow on the remote engine.
+        state: flowserv.model.workflow.state.WorkflowState
+            Current workflow state.
+        output_files: list(string)
+            Relative path of output files that are generated by the workflow
+            run.
+        interval: float, default=None
+            Current poll interval (in sec.) for a resumed run. By default, the
+            poll interval of the monitor is used.
+        delay: float, default=None
+            Delay (in sec.) for the first poll. By default, the first poll is
+            scheduled after the poll interval.
+        """
+        task = RemoteTask(
+            run_id=run_id,
+            workflow_id=workflow_id,
+            state=state,
+            output_files=output_files,
+            interval=interval if interval is not None else self.poll_interval,
+            delay=delay
+        )
+        with self.cond:
+            self.runs[run_id] = task
+            self.added.append(task)
+            self.cond.notify()
+
+    def finish(self, task: RemoteTask, state: WorkflowState):
+        """Download the result files of a successful run and update the run
+        state. Sets the run into error state if the files cannot be
+        downloaded.
+
+        Parameters
+        ----------
+        task: flowserv.controller.remote.monitor.RemoteTask
+            Monitored workflow run.
+        state: flowserv.model.workflow.state.WorkflowState
+            Success state of the remote workflow.
+        """
+        rundir = None
+        try:
+            state, rundir = fetch_results(
+                workflow_id=task.workflow_id,
+                state=state,
+                output_files=task.output_files,
+                client=self.client,
+                **self.downloads
+            )
+        except Exception as ex:
+            logging.error(ex)
+            strace = util.stacktrace(ex)
+            logging.debug('\n'.join(strace))
+            state = task.state.error(messages=strace)
+        update_run(
+            run_id=task.run_id,
+            workflow_id=task.workflow_id,
+            state=state,
+            rundir=rundir,
+            client=self.client,
+            service=self.service
+        )
+        logging.info('finished run {} = {}'.format(task.run_id, state.type_id))
+        # Remove the workflow information form the task list.
+        self.tasks.pop(task.run_id, None)
+
+    def notify(self, run_id: str, doc: Dict) -> bool:
+        """Process a notification that was pushed by the remote engine for the
+        given run. The run is processed by the monitor thread immediately,
+        independently of its poll schedule. Returns False if the run is not
+        monitored.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+        doc: dict
+            Notification content.
+
+        Returns
+        -------
+        bool
+        """
+        with self.cond:
+            task = self.runs.get(run_id)
+            if task is None:
+                return False
+            self.pushed[run_id] = doc
+            self.cond.notify()
+        return True
+
+    def poll(
+        self, tasks: List[RemoteTask], pushed: Optional[Dict] = None
+    ) -> Dict[str, WorkflowState]:
+        """Get the current state for the workflows of the given tasks. The
+        state of runs with pushed notifications is taken from the notification
+        if the client can translate it into a workflow state. The state of all
+        other workflows is requested using a single bulk request. If the bulk
+        request fails, the state of each workflow is requested individually.
+        Workflows for which the state cannot be retrieved are set to error
+        state.
+
+        Parameters
+        ----------
+        tasks: list(flowserv.controller.remote.monitor.RemoteTask)
+            Tasks that are due for a state check.
+        pushed: dict, default=None
+            Pushed notifications for runs (keyed by the run identifier).
+
+        Returns
+        -------
+        dict
+        """
+        result = dict()
+        if pushed:
+            polled = list()
+            for task in tasks:
+                state = None
+                if task.run_id in pushed:
+                    try:
+                        state = self.client.notification_state(
+                            workflow_id=task.workflow_id,
+                            current_state=task.state,
+                            doc=pushed[task.run_id]
+                        )
+                    except Exception as ex:
+                        logging.error(ex)
+                if state is not None:
+                    result[task.workflow_id] = state
+                else:
+                    polled.append(task)
+            tasks = polled
+        if not tasks:
+            return result
+        result.update(self._poll(tasks))
+        return result
+
+    def remove(self, run_id: str):
+        """Stop monitoring the given workflow run.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+        """
+        with self.cond:
+            self.runs.pop(run_id, None)
 
     def run(self):
-        """Poll the remote server continuously until execution is finished."""
-        monitor_workflow(
-            run_id=self.run_id,
-            state=self.state,
-            workflow_id=self.workflow_id,
-            output_files=self.output_files,
+        """Poll the remote engine for the state of all active runs that are
+        due for a state check.
+        """
+        while True:
+            with self.cond:
+                added, self.added = self.added, list()
+                pushed, self.pushed = self.pushed, dict()
+                now = time.monotonic()
+                tasks = [t for t in self.runs.values() if t.next_poll <= now or t.run_id in pushed]
+                if not tasks and not added:
+                    timeout = None
+                    if self.runs:
+                        timeout = min([t.next_poll for t in self.runs.values()]) - now
+                    self.cond.wait(timeout)
+                    continue
+            for task in added:
+                store_task(task=task, service=self.service)
+            if not tasks:
+                continue
+            states = self.poll(tasks, pushed=pushed)
+            for task in tasks:
+                try:
+                    self.update(task, states.get(task.workflow_id, task.state))
+                except Exception as ex:
+                    logging.error(ex)
+                    logging.debug('\n'.join(util.stacktrace(ex)))
+                    self.remove(task.run_id)
+
+    def update(self, task: RemoteTask, state: WorkflowState):
+        """Update the monitored run with the current state of the remote
+        workflow. Increases the poll interval if the state has not changed.
+        Finished runs are removed from the set of monitored runs.
+
+        Parameters
+        ----------
+        task: flowserv.controller.remote.monitor.RemoteTask
+            Monitored workflow run.
+        state: flowserv.model.workflow.state.WorkflowState
+            Current state of the remote workflow.
+        """
+        with self.cond:
+            # Ignore runs that were removed (e.g., canceled) while the state
+            # was being polled.
+            if self.runs.get(task.run_id) is not task:
+                return
+        if state == task.state:
+            # Back-off if the workflow status hasn't changed. The poll schedule
+            # is only stored if the interval changed.
+            interval = task.interval
+            task.backoff(self.max_interval)
+            if task.interval != interval:
+                store_task(task=task, service=self.service)
+            return
+        logging.info('current state of {} is {}'.format(task.run_id, state))
+        if state.is_success():
+            # Download result files in a separate thread to avoid delaying
+            # the state checks for other runs.
+            self.remove(task.run_id)
+            Thread(target=self.finish, args=(task, state), daemon=True).start()
+            return
+        updated = update_run(
+            run_id=task.run_id,
+            workflow_id=task.workflow_id,
+            state=state,
+            rundir=None,
             client=self.client,
-            poll_interval=self.poll_interval,
             service=self.service
         )
+        if updated and state.is_active():
+            task.reset(state, self.poll_interval)
+            store_task(task=task, service=self.service)
+            return
+        logging.info('finished run {} = {}'.format(task.run_id, state.type_id))
+        self.remove(task.run_id)
         # Remove the workflow information form the task list.
+        self.tasks.pop(task.run_id, None)
+
+    def _poll(self, tasks: List[RemoteTask]) -> Dict[str, WorkflowState]:
+        """Request the current state for the workflows of the given tasks from
+        the remote engine.
+
+        Parameters
+        ----------
+        tasks: list(flowserv.controller.remote.monitor.RemoteTask)
+            Tasks that are due for a state check.
+
+        Returns
+        -------
+        dict
+        """
         try:
-            del self.tasks[self.run_id]
+            return self.client.get_workflow_states({t.workflow_id: t.state for t in tasks})
         except Exception as ex:
             logging.error(ex)
-            logging.debug('\n'.join(util.stacktrace(ex)))
+        result = dict()
+        for task in tasks:
+            try:
+                result[task.workflow_id] = self.client.get_workflow_state(
+                    workflow_id=task.workflow_id,
+                    current_state=task.state
+                )
+            except Exception as ex:
+                logging.error(ex)
+                strace = util.stacktrace(ex)
+                logging.debug('\n'.join(strace))
+                result[task.workflow_id] = task.state.error(messages=strace)
+        return result
 
 
 # -- Helper functions ---------------------------------------------------------
 
+def download_options(env: Optional[Dict] = None) -> Dict:
+    """Get the options for downloading the result files of remote workflow
+    runs from the given configuration. Result files are downloaded to a
+    folder in the runs directory.
+
+    Parameters
+    ----------
+    env: dict, default=None
+        Configuration object that provides access to configuration
+        parameters in the environment.
+
+    Returns
+    -------
+    dict
+    """
+    env = env if env is not None else dict()
+    basedir = env.get(FLOWSERV_RUNSDIR)
+    if basedir is None and env.get(FLOWSERV_BASEDIR) is not None:
+        basedir = os.path.join(env.get(FLOWSERV_BASEDIR), DEFAULT_RUNSDIR)
+    workers = env.get(FLOWSERV_REMOTE_WORKERS)
+    retries = env.get(FLOWSERV_REMOTE_RETRIES)
+    return {
+        'workers': workers if workers is not None else DEFAULT_REMOTE_WORKERS,
+        'retries': retries if retries is not None else DEFAULT_REMOTE_RETRIES,
+        'basedir': basedir
+    }
+
+
+def fetch_results(
+    workflow_id: str, state: WorkflowState, output_files: List[str],
+    client: RemoteClient, workers: Optional[int] = DEFAULT_REMOTE_WORKERS,
+    retries: Optional[int] = DEFAULT_REMOTE_RETRIES,
+    basedir: Optional[str] = None
+) -> Tuple[WorkflowState, str]:
+    """Download the result files of a successful workflow run to a new
+    temporary directory. Returns a modified workflow state handle that contains
+    the workflow result files and the path to the temporary directory.
+
+    Files are downloaded concurrently. Failed downloads are retried the given
+    number of times. If a file cannot be downloaded the temporary directory is
+    removed and an error is raised.
+
+    Parameters
+    ----------
+    workflow_id: string
+        Unique identifier for the workflow on the remote engine.
+    state: flowserv.model.workflow.state.WorkflowState
+        Success state of the workflow run.
+    output_files: list(string)
+        Relative path of output files that are generated by the workflow
+        run.
+    client: flowserv.controller.remote.client.RemoteClient
+        Implementation of the remote client that is used to interact with
+        the workflow engine.
+    workers: int, default=8
+        Maximum number of concurrent downloads.
+    retries: int, default=3
+        Number of times that a failed download is retried.
+    basedir: string, default=None
+        Parent folder for the temporary directory. Uses the default folder for
+        temporary files if not given.
+
+    Returns
+    -------
+    flowserv.model.workflow.state.WorkflowState, string
+
+    Raises
+    ------
+    flowserv.error.FileTransferError
+    """
+    # Create a temporary directory to download the run result files.
+    if basedir is not None:
+        os.makedirs(basedir, exist_ok=True)
+    rundir = tempfile.mkdtemp(dir=basedir)
+    # Download the result files. The state object is not expected to contain
+    # the resource file information.
+    tasks = list()
+    for relative_path in output_files:
+        func = partial(
+            client.download_file,
+            workflow_id=workflow_id,
+            source=relative_path,
+            target=os.path.join(rundir, relative_path)
+        )
+        tasks.append((relative_path, func))
+    try:
+        TransferManager(workers=workers, retries=retries).run(tasks)
+    except Exception:
+        shutil.rmtree(rundir, ignore_errors=True)
+        raise
+    files = list(output_files)
+    # Create a modified workflow state handle that contains the workflow
+    # result resources.
+    state = StateSuccess(
+        created_at=state.created_at,
+        started_at=state.started_at,
+        finished_at=state.finished_at,
+        files=files
+    )
+    return state, rundir
+
+
 def monitor_workflow(
     run_id, state, workflow_id, output_files, client, poll_interval,
-    service=None
+    service=None, downloads=None
 ):
     """Monitor a remote workflow run by continuous polling at a given interval.
     Updates the local workflow state as the remote state changes.
@@ -116,6 +592,8 @@ def monitor_workflow(
         Context manager to create an instance of the service API. If the value
         is None the monitor is running in synchronous mode. In this case the
         run state cannot be update by the monitor.
+    downloads: dict, default=None
+        Options for downloading result files (see download_options).
 
     Returns
     -------
@@ -139,49 +617,20 @@ def monitor_workflow(
                 continue
             state = curr_state
             if state.is_success():
-                # Create a temporary directory to download the run result
-                # files.
-                rundir = tempfile.mkdtemp()
-                # Download the result files. The curr_state object is not
-                # expected to contain the resource file information.
-                files = list()
-                for relative_path in output_files:
-                    target = os.path.join(rundir, relative_path)
-                    client.download_file(
-                        workflow_id=workflow_id,
-                        source=relative_path,
-                        target=target
-                    )
-                    files.append(relative_path)
-                # Create a modified workflow state handle that contains the
-                # workflow result resources.
-                state = StateSuccess(
-                    created_at=state.created_at,
-                    started_at=state.started_at,
-                    finished_at=state.finished_at,
-                    files=files
+                state, rundir = fetch_results(
+                    workflow_id=workflow_id,
+                    state=state,
+                    output_files=output_files,
+                    client=client,
+                    **(downloads if downloads is not None else dict())
                 )
             # Update the local state and the workflow state in the service
             # API. If the service object is None the run state will be updated
             # by the calling code.
             if service is None:
                 continue
-            try:
-                with service() as api:
-                    api.runs().update_run(run_id, state, rundir=rundir)
-            except Exception as ex:
-                # If the workflow is canceled for example, the state in the
-                # API will have been changed and this may cause an error
-                # here. If the remote workflow, however, remains active we
-                # notify the remote engine to stop the workflow.
-                logging.error('attempt to update run {}'.format(run_id))
-                logging.error(ex)
-                if state.is_active():
-                    try:
-                        client.stop_workflow(workflow_id)
-                    except Exception as ex:
-                        logging.error(ex)
-                # Stop the thread by exiting the run method.
+            if not update_run(run_id, workflow_id, state, rundir, client, service):
+                # Stop monitoring if the run state could not be updated.
                 return state, rundir
     except Exception as ex:
         logging.error(ex)
@@ -194,3 +643,75 @@ def monitor_workflow(
     msg = 'finished run {} = {}'.format(run_id, state.type_id)
     logging.info(msg)
     return state, rundir
+
+
+def store_task(task: RemoteTask, service):
+    """Store the monitoring information for a remote workflow run in the
+    database. Errors are logged and ignored. Monitoring continues even if the
+    information cannot be stored.
+
+    Parameters
+    ----------
+    task: flowserv.controller.remote.monitor.RemoteTask
+        Monitored workflow run.
+    service: contextlib,contextmanager
+        Context manager to create an instance of the service API.
+    """
+    try:
+        with service() as api:
+            api.runs().update_remote_task(
+                run_id=task.run_id,
+                workflow_id=task.workflow_id,
+                output_files=task.output_files,
+                interval=task.interval,
+                next_poll=task.poll_at()
+            )
+    except Exception as ex:
+        logging.error('attempt to store remote task for run {}'.format(task.run_id))
+        logging.error(ex)
+
+
+def update_run(
+    run_id: str, workflow_id: str, state: WorkflowState, rundir: Optional[str],
+    client: RemoteClient, service
+) -> bool:
+    """Update the state of a workflow run in the service API. Returns False if
+    the update failed.
+
+    If the workflow is canceled for example, the state in the API will have
+    been changed and this may cause an error. If the remote workflow, however,
+    remains active the remote engine is notified to stop the workflow.
+
+    Parameters
+    ----------
+    run_id: string
+        Unique run identifier.
+    workflow_id: string
+        Unique identifier for the workflow on the remote engine.
+    state: flowserv.model.workflow.state.WorkflowState
+        New workflow state.
+    rundir: string
+        Temporary directory that contains the downloaded run result files.
+    client: flowserv.controller.remote.client.RemoteClient
+        Implementation of the remote client that is used to interact with
+        the workflow engine.
+    service: contextlib,contextmanager
+        Context manager to create an instance of the service API.
+
+    Returns
+    -------
+    bool
+    """
+    try:
+        with service() as api:
+            api.runs().update_run(run_id, state, rundir=rundir)
+        return True
+    except Exception as ex:
+        logging.error('attempt to update run {}'.format(run_id))
+        logging.error(ex)
+        if state.is_active():
+            try:
+                client.stop_workflow(workflow_id)
+            except Exception as ex:
+                logging.error(ex)
+        return False
@@ -0,0 +1,281 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Cache for the outputs of serial workflow steps. The cache allows the serial
+workflow engine to skip steps that have been executed before with the same
+inputs (e.g., data download or pre-processing steps of runs that are submitted
+repeatedly).
+
+A step is identified by a fingerprint that is computed from the expanded step
+commands, the step environment, and the content hashes of the input files of
+the step. Input files are the files and folders that are listed in the optional
+'inputs' element of the step specification. If no inputs are specified, all
+files in the run directory before the step is executed are considered as step
+inputs.
+The step outputs are the files that were created or modified by the step
+(together with the list of files that the step deleted and the step logs).
+
+Cache entries are maintained as folders in the cache base directory. Each
+entry contains a manifest file. The modification time of the manifest is
+updated when an entry is accessed. Entries are evicted in least-recently-used
+order when the total size of all entries exceeds the cache size budget.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+from flowserv.model.workflow.serial import LOGS_DIR, Step
+
+import flowserv.util as util
+
+
+"""Name of the manifest file for cache entries."""
+MANIFEST_FILE = 'manifest.json'
+
+"""Type alias for run directory snapshots. A snapshot maps the relative path
+of each file in the run directory to a tuple of file size, modification time
+(in nanoseconds), and content hash.
+"""
+Snapshot = Dict[str, Tuple[int, int, str]]
+
+
+class StepCache(object):
+    """Cache for the outputs of serial workflow steps with a total size budget
+    on disk. The cache can be shared by multiple worker processes. Entries are
+    created in a temporary folder and then renamed to make them visible to
+    other processes.
+    """
+    def __init__(self, basedir: str, size: int):
+        """Initialize the cache base directory and the size budget.
+
+        Parameters
+        ----------
+        basedir: string
+            Base directory for cache entries.
+        size: int
+            Maximum total size (in bytes) of all cache entries.
+        """
+        self.basedir = os.path.abspath(basedir)
+        self.size = size
+
+    def evict(self):
+        """Remove the least recently used entries from the cache until the
+        total size of all entries is within the size budget.
+        """
+        entries = list()
+        total = 0
+        for key in os.listdir(self.basedir):
+            manifest = os.path.join(self.basedir, key, MANIFEST_FILE)
+            try:
+                accessed_at = os.stat(manifest).st_mtime_ns
+                size = util.read_object(manifest)['size']
+            except (OSError, ValueError, KeyError):
+                # Ignore incomplete entries and entries that are evicted by a
+                # different process.
+                continue
+            entries.append((accessed_at, key, size))
+            total += size
+        for _, key, size in sorted(entries):
+            if total <= self.size:
+                break
+            shutil.rmtree(os.path.join(self.basedir, key), ignore_errors=True)
+            total -= size
+
+    def fingerprint(self, step: Step, snapshot: Snapshot) -> str:
+        """Get the fingerprint for a workflow step that is executed for a run
+        directory with the given snapshot. Only files that are listed as step
+        inputs (if given) are included in the fingerprint.
+
+        Parameters
+        ----------
+        step: flowserv.model.workflow.serial.Step
+            Expanded workflow step.
+        snapshot: dict
+            Snapshot of the run directory before the step is executed.
+
+        Returns
+        -------
+        string
+        """
+        inputs = None
+        if step.inputs is not None:
+            inputs = [os.path.normpath(f).replace(os.sep, '/') for f in step.inputs]
+        files = list()
+        for key, (_, _, digest) in snapshot.items():
+            if inputs is None or any([key == f or key.startswith(f + '/') for f in inputs]):
+                files.append([key, digest])
+        doc = {'env': step.env, 'commands': step.commands, 'files': sorted(files)}
+        return hashlib.sha256(json.dumps(doc, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def restore(self, key: str, rundir: str, logs: Tuple[str, str]) -> bool:
+        """Restore the outputs of a cached workflow step into the given run
+        directory. Returns False if the cache does not contain an entry for the
+        given fingerprint.
+
+        Parameters
+        ----------
+        key: string
+            Fingerprint of the workflow step.
+        rundir: string
+            Path to the run directory.
+        logs: (string, string)
+            Relative paths of the log files for the standard output and the
+            error output of the step.
+
+        Returns
+        -------
+        bool
+        """
+        entrydir = os.path.join(self.basedir, key)
+        manifest_file = os.path.join(entrydir, MANIFEST_FILE)
+        try:
+            manifest = util.read_object(manifest_file)
+            # Mark the entry as recently used before copying the files to
+            # reduce the chance that the entry is evicted while it is read.
+            os.utime(manifest_file)
+            for filename in manifest['files']:
+                copy_file(os.path.join(entrydir, 'files', filename), os.path.join(rundir, filename))
+            for src, dst in zip(['stdout', 'stderr'], logs):
+                copy_file(os.path.join(entrydir, 'logs', src), os.path.join(rundir, dst))
+        except (OSError, ValueError, KeyError) as ex:
+            if os.path.isdir(entrydir):
+                logging.error('cannot restore cached step {}: {}'.format(key, ex))
+            return False
+        for filename in manifest['deleted']:
+            filename = os.path.join(rundir, filename)
+            if os.path.isfile(filename):
+                os.remove(filename)
+        return True
+
+    def snapshot(self, rundir: str, previous: Optional[Snapshot] = None) -> Snapshot:
+        """Get snapshot of the files in the run directory. Log files are not
+        included in the snapshot. Content hashes are only computed for files
+        that have changed since the previous snapshot (if given).
+
+        Parameters
+        ----------
+        rundir: string
+            Path to the run directory.
+        previous: dict, default=None
+            Previous snapshot of the run directory.
+
+        Returns
+        -------
+        dict
+        """
+        previous = previous if previous is not None else dict()
+        result = dict()
+        for root, dirs, files in os.walk(rundir):
+            if root == rundir and LOGS_DIR in dirs:
+                dirs.remove(LOGS_DIR)
+            for filename in files:
+                abspath = os.path.join(root, filename)
+                key = os.path.relpath(abspath, rundir).replace(os.sep, '/')
+                stat = os.stat(abspath)
+                prev = previous.get(key)
+                if prev is not None and prev[0] == stat.st_size and prev[1] == stat.st_mtime_ns:
+                    digest = prev[2]
+                else:
+                    digest = file_digest(abspath)
+                result[key] = (stat.st_size, stat.st_mtime_ns, digest)
+        return result
+
+    def store(self, key: str, rundir: str, before: Snapshot, logs: Tuple[str, str]) -> Snapshot:
+        """Add the outputs of an executed workflow step to the cache. Outputs
+        are all files that have been created or modified by the step. Returns
+        the snapshot of the run directory after the step was executed.
+
+        Outputs that exceed the cache size budget are not cached.
+
+        Parameters
+        ----------
+        key: string
+            Fingerprint of the workflow step.
+        rundir: string
+            Path to the run directory.
+        before: dict
+            Snapshot of the run directory before the step was executed.
+        logs: (string, string)
+            Relative paths of the log files for the standard output and the
+            error output of the step.
+
+        Returns
+        -------
+        dict
+        """
+        after = self.snapshot(rundir, previous=before)
+        files = [f for f, (_, _, digest) in after.items() if f not in before or before[f][2] != digest]
+        deleted = [f for f in before if f not in after]
+        logfiles = [os.path.join(rundir, f) for f in logs]
+        size = sum([after[f][0] for f in files] + [os.path.getsize(f) for f in logfiles])
+        if size > self.size or os.path.isdir(os.path.join(self.basedir, key)):
+            return after
+        os.makedirs(self.basedir, exist_ok=True)
+        tmpdir = tempfile.mkdtemp(dir=self.basedir, prefix='.tmp')
+        try:
+            for filename in files:
+                copy_file(os.path.join(rundir, filename), os.path.join(tmpdir, 'files', filename))
+            for src, dst in zip(logfiles, ['stdout', 'stderr']):
+                copy_file(src, os.path.join(tmpdir, 'logs', dst))
+            doc = {'files': files, 'deleted': deleted, 'size': size}
+            util.write_object(filename=os.path.join(tmpdir, MANIFEST_FILE), obj=doc)
+            # The rename fails if an entry for the step was created by a
+            # different process in the meantime.
+            os.rename(tmpdir, os.path.join(self.basedir, key))
+        except OSError as ex:
+            logging.info('cannot cache step {}: {}'.format(key, ex))
+            shutil.rmtree(tmpdir, ignore_errors=True)
+            return after
+        self.evict()
+        return after
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def copy_file(src: str, dst: str):
+    """Copy a file. Creates the parent folder of the target file if it does
+    not exist.
+
+    Parameters
+    ----------
+    src: string
+        Path to the source file.
+    dst: string
+        Path to the target file.
+    """
+    parent = os.path.dirname(dst)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    shutil.copyfile(src, dst)
+
+
+def file_digest(filename: str, chunk_size: Optional[int] = 1024 * 1024) -> str:
+    """Compute the SHA-256 content hash for a file.
+
+    Parameters
+    ----------
+    filename: string
+        Path to the file.
+    chunk_size: int, default=1MB
+        Number of bytes that are read at a time.
+
+    Returns
+    -------
+    string
+    """
+    h = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
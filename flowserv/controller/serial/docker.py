@@ -8,20 +8,78 @@
 
 """Implementation of a workflow controller for serial workflows that uses the
 local Docker daemon to execute workflow steps.
+
+By default, each workflow command is executed in a new container. If container
+sessions are enabled (FLOWSERV_DOCKERSESSIONS), all commands of a workflow step
+are executed inside a single long-lived container. Idle session containers are
+kept by each process for reuse by later steps and runs of the same workflow
+group that use the same image and the same set of run folders. Files that a
+run writes outside of the bound folders (e.g., in /tmp) remain in the
+container and are visible to later runs that reuse the container. Containers
+are therefore never shared between different groups (submissions) or between
+group runs and post-processing runs of a workflow. Session containers
+bind the folders of a session directory (in the parent folder of the run
+directories). The files of a run are moved into the session directory while a
+step is executed and moved back when the step is done. The output of the
+commands is written to the step log files in the run directory. Session
+containers are removed when the worker process that owns them exits. Stale
+session directories and session containers are removed when runs are
+recovered on service start.
+
+Resource limits for workflow steps are enforced as container limits (memory
+and CPU time). Containers are killed when a command exceeds the wall time
+limit. The wall time of each command is reported as part of the run progress.
+
+Independent workflow steps are executed concurrently in separate containers
+(FLOWSERV_STEPWORKERS). With container sessions, steps are always executed one
+after another.
 """
 
-from typing import Optional
+from functools import partial
+from typing import Callable, Dict, IO, List, Optional, Tuple
 
+import atexit
 import logging
+import math
 import os
+import shlex
+import shutil
+import tempfile
+import threading
+import time
 
-from flowserv.controller.serial.engine import SerialWorkflowEngine
+from flowserv.config import (
+    FLOWSERV_DOCKER_IDLE, FLOWSERV_DOCKER_SESSIONS, FLOWSERV_LOG_TAIL,
+    FLOWSERV_STEP_WORKERS, DEFAULT_DOCKER_IDLE, DEFAULT_LOG_TAIL
+)
+from flowserv.controller.serial.engine import SerialWorkflowEngine, read_tail, step_logs, step_progress
+from flowserv.controller.serial.limits import get_limits, merge_limits
+from flowserv.controller.serial.pool import on_exit, report
+from flowserv.controller.serial.scheduler import command_offsets, run_steps, synchronized
+from flowserv.model.base import RunObject
+from flowserv.model.workflow.serial import LIMIT_CPUTIME, LIMIT_MEMORY, LIMIT_WALLTIME, LOGS_DIR
 from flowserv.service.api import APIFactory
 
 import flowserv.model.workflow.state as serialize
 import flowserv.util as util
 
 
+"""Name of the folder for session directories in the parent folder of the run
+directories.
+"""
+SESSIONS_DIR = '.sessions'
+
+"""Label for session containers. The label value is the path to the parent
+folder of the session directories.
+"""
+SESSION_LABEL = 'flowserv.session'
+
+"""Exit code for commands that were killed because they exceeded the wall
+time limit.
+"""
+TIMEOUT_EXIT_CODE = 137
+
+
 class DockerWorkflowEngine(SerialWorkflowEngine):
     """The docker workflow engine is used to execute workflow templates for a
     given set of arguments using docker containers.
@@ -29,26 +87,440 @@ class DockerWorkflowEngine(SerialWorkflowEngine):
     the engine extends the multi-process controller for asynchronous execution.
     Workflow runs are executed by the docker_run() function.
     """
-    def __init__(self, service: Optional[APIFactory] = None):
+    def __init__(self, service: Optional[APIFactory] = None, client=None):
         """Initialize the super class using the docker_run execution function.
+        If container sessions are enabled in the configuration, the
+        docker_session_run function is used instead.
 
         Parameters
         ----------
         service: flowserv.service.api.APIFactory, default=None
             API factory for service callbach during asynchronous workflow
             execution.
+        client: docker.client.DockerClient, default=None
+            Client for the Docker daemon. By default, the client is created
+            from the environment. The client has to be serializable if runs
+            are executed asynchronously.
         """
+        limits = get_limits(service) if service is not None else None
+        self.client = client
+        self.use_sessions = service is not None and service.get(FLOWSERV_DOCKER_SESSIONS)
+        if self.use_sessions:
+            exec_func = partial(
+                docker_session_run,
+                client=client,
+                idle=service.get(FLOWSERV_DOCKER_IDLE, DEFAULT_DOCKER_IDLE),
+                limits=limits,
+                logtail=service.get(FLOWSERV_LOG_TAIL, DEFAULT_LOG_TAIL)
+            )
+        else:
+            exec_func = partial(
+                docker_run,
+                client=client,
+                limits=limits,
+                workers=service.get(FLOWSERV_STEP_WORKERS) if service is not None else None
+            )
         super(DockerWorkflowEngine, self).__init__(
             service=service,
-            exec_func=docker_run
+            exec_func=exec_func
         )
 
+    def exec_function(self, run: RunObject) -> Callable:
+        """Get the function that executes the workflow steps of the given run.
+        Container sessions are only reused by runs of the same workflow group.
+        The workflow and group identifier are therefore passed to the session
+        execution function.
+
+        Parameters
+        ----------
+        run: flowserv.model.base.RunObject
+            Handle for the run that is being executed.
+
+        Returns
+        -------
+        callable
+        """
+        if self.use_sessions:
+            return partial(self.exec_func, workflow_id=run.workflow_id, group_id=run.group_id)
+        return self.exec_func
+
+    def resume_runs(self) -> List[str]:
+        """Remove the session containers of a previous instance of the engine
+        (e.g., containers of worker processes that were killed). The session
+        directories of these containers are deleted when orphaned runs are
+        recovered. Docker runs cannot be resumed. The result is therefore
+        always an empty list.
+
+        Returns
+        -------
+        list of string
+        """
+        if self.use_sessions:
+            try:
+                remove_sessions(os.path.join(self.runsdir, SESSIONS_DIR), client=self.client)
+            except Exception as ex:
+                logging.error(ex)
+        return list()
+
+
+class ContainerSession(object):
+    """Long-lived container for the execution of workflow commands. The
+    container binds the folders in a session directory. Run files are moved
+    into the session directory while the container is attached to a run.
+    """
+    def __init__(
+        self, container, sessiondir: str, key: Tuple, api,
+        entrypoint: Optional[List[str]] = None
+    ):
+        """Initialize the session components.
+
+        Parameters
+        ----------
+        container: docker.models.containers.Container
+            Container that executes the workflow commands.
+        sessiondir: string
+            Path to the session directory.
+        key: tuple
+            Tuple of image name, the names of the bound folders, the container
+            resource limits, the workflow identifier, and the group identifier.
+        api: docker.api.client.APIClient
+            Low-level client for the Docker daemon that is used to execute
+            commands in the container.
+        entrypoint: list of string, default=None
+            Entrypoint of the container image.
+        """
+        self.container = container
+        self.sessiondir = sessiondir
+        self.key = key
+        self.api = api
+        self.entrypoint = entrypoint if entrypoint else list()
+        # Flag indicating whether the container was killed because a command
+        # exceeded the wall time limit.
+        self.killed = False
+
+    def attach(self, rundir: str):
+        """Move the files in the bound folders of the given run directory into
+        the session directory.
+
+        Parameters
+        ----------
+        rundir: string
+            Path to the working directory of the workflow run.
+        """
+        for folder in self.key[1]:
+            move_files(os.path.join(rundir, folder), os.path.join(self.sessiondir, folder))
+
+    def detach(self, rundir: str):
+        """Move the files in the session directory back to the given run
+        directory.
+
+        Parameters
+        ----------
+        rundir: string
+            Path to the working directory of the workflow run.
+        """
+        for folder in self.key[1]:
+            move_files(os.path.join(self.sessiondir, folder), os.path.join(rundir, folder))
+
+    def execute(self, cmd: str, stdout: IO, stderr: IO, walltime: Optional[float] = None) -> int:
+        """Execute a command in the session container. Returns the exit code
+        of the command. The command is passed as arguments to the entrypoint
+        of the container image (as for commands that are executed in a new
+        container). The output of the command is streamed to the given files.
+        The container is killed if the command exceeds the given wall time
+        limit.
+
+        Parameters
+        ----------
+        cmd: string
+            Command line statement.
+        stdout: file object
+            Binary file for the standard output of the command.
+        stderr: file object
+            Binary file for the error output of the command.
+        walltime: float, default=None
+            Wall time limit in seconds.
+
+        Returns
+        -------
+        int
+        """
+        if self.entrypoint:
+            cmd = self.entrypoint + shlex.split(cmd)
+        timer = None
+        if walltime is not None:
+            timer = threading.Timer(walltime, self.kill)
+            timer.start()
+        try:
+            exec_id = self.api.exec_create(self.container.id, cmd)['Id']
+            for out, err in self.api.exec_start(exec_id, stream=True, demux=True):
+                if out:
+                    stdout.write(out)
+                if err:
+                    stderr.write(err)
+            exit_code = self.api.exec_inspect(exec_id)['ExitCode']
+        finally:
+            if timer is not None:
+                timer.cancel()
+        if self.killed:
+            stderr.write(timeout_message(walltime).encode('utf-8'))
+            return TIMEOUT_EXIT_CODE
+        return exit_code
+
+    def kill(self):
+        """Kill the session container."""
+        self.killed = True
+        try:
+            self.container.kill()
+        except Exception as ex:
+            logging.error(ex)
+
+    def remove(self):
+        """Remove the session container and the session directory."""
+        try:
+            self.container.remove(force=True)
+        except Exception as ex:
+            logging.error(ex)
+        shutil.rmtree(self.sessiondir, ignore_errors=True)
+
+
+class ContainerSessions(object):
+    """Manager for session containers of a Docker client. Keeps track of the
+    images that have been pulled and of leased and idle session containers.
+    Idle containers are reused for steps of runs of the same workflow group
+    that use the same image and the same set of run folders.
+    """
+    def __init__(self, client, idle: Optional[int] = DEFAULT_DOCKER_IDLE):
+        """Initialize the Docker client and the maximum number of idle
+        containers.
+
+        Parameters
+        ----------
+        client: docker.client.DockerClient
+            Client for the Docker daemon.
+        idle: int, default=DEFAULT_DOCKER_IDLE
+            Maximum number of idle containers that are kept for reuse.
+        """
+        self.client = client
+        self.idle = idle
+        # Entrypoints of the images that have been pulled.
+        self.images = dict()
+        self.leased = list()
+        self.sessions = list()
+
+    def close(self):
+        """Remove all leased and idle session containers."""
+        sessions = self.leased + self.sessions
+        self.leased, self.sessions = list(), list()
+        for session in sessions:
+            session.remove()
+
+    def discard(self, session: ContainerSession):
+        """Remove a leased session container that cannot be reused.
+
+        Parameters
+        ----------
+        session: flowserv.controller.serial.docker.ContainerSession
+            Session that is no longer used by a workflow step.
+        """
+        if session in self.leased:
+            self.leased.remove(session)
+        session.remove()
+
+    def lease(
+        self, image: str, rundir: str, limits: Optional[Dict] = None,
+        workflow_id: Optional[str] = None, group_id: Optional[str] = None
+    ) -> ContainerSession:
+        """Get a session container for the given image that binds the folders
+        in the given run directory. Reuses an idle container of the same
+        workflow group if possible. The folder for step log files is not
+        bound.
+
+        Parameters
+        ----------
+        image: string
+            Name of the Docker image.
+        rundir: string
+            Path to the working directory of the workflow run.
+        limits: dict, default=None
+            Resource limits for the container. The wall time limit is ignored.
+        workflow_id: string, default=None
+            Unique identifier of the workflow that the run belongs to.
+        group_id: string, default=None
+            Unique identifier of the workflow group that the run belongs to.
+            The value is None for post-processing runs.
+
+        Returns
+        -------
+        flowserv.controller.serial.docker.ContainerSession
+        """
+        limits = {k: v for k, v in (limits if limits else dict()).items() if k != LIMIT_WALLTIME}
+        folders = sorted([
+            f for f in os.listdir(rundir) if f != LOGS_DIR and os.path.isdir(os.path.join(rundir, f))
+        ])
+        key = (image, tuple(folders), tuple(sorted(limits.items())), workflow_id, group_id)
+        for session in self.sessions:
+            if session.key == key:
+                self.sessions.remove(session)
+                self.leased.append(session)
+                return session
+        entrypoint = self.pull(image)
+        basedir = os.path.join(os.path.dirname(os.path.abspath(rundir)), SESSIONS_DIR)
+        os.makedirs(basedir, exist_ok=True)
+        sessiondir = tempfile.mkdtemp(dir=basedir)
+        volumes = dict()
+        for folder in folders:
+            os.makedirs(os.path.join(sessiondir, folder))
+            volumes[os.path.join(sessiondir, folder)] = {'bind': '/{}'.format(folder), 'mode': 'rw'}
+        try:
+            # Keep the container alive by running an interactive shell that
+            # waits for input.
+            container = self.client.containers.run(
+                image=image,
+                entrypoint='/bin/sh',
+                detach=True,
+                stdin_open=True,
+                tty=True,
+                volumes=volumes,
+                labels={SESSION_LABEL: basedir},
+                **container_limits(limits)
+            )
+        except Exception:
+            shutil.rmtree(sessiondir, ignore_errors=True)
+            raise
+        session = ContainerSession(
+            container=container,
+            sessiondir=sessiondir,
+            key=key,
+            api=self.client.api,
+            entrypoint=entrypoint
+        )
+        self.leased.append(session)
+        return session
+
+    def pull(self, image: str) -> List[str]:
+        """Pull the given image if it is not available locally. Returns the
+        entrypoint of the image. Images are only checked once.
+
+        Parameters
+        ----------
+        image: string
+            Name of the Docker image.
+
+        Returns
+        -------
+        list of string
+        """
+        if image in self.images:
+            return self.images[image]
+        from docker.errors import ImageNotFound
+        try:
+            obj = self.client.images.get(image)
+        except ImageNotFound:
+            logging.info('pull image {}'.format(image))
+            self.client.images.pull(image)
+            obj = self.client.images.get(image)
+        entrypoint = (obj.attrs.get('Config') or dict()).get('Entrypoint') or list()
+        self.images[image] = entrypoint
+        return entrypoint
+
+    def release(self, session: ContainerSession):
+        """Return a session container to the list of idle containers. If the
+        maximum number of idle containers is exceeded, the least recently used
+        container is removed.
+
+        Parameters
+        ----------
+        session: flowserv.controller.serial.docker.ContainerSession
+            Session that is no longer used by a workflow step.
+        """
+        if session in self.leased:
+            self.leased.remove(session)
+        self.sessions.append(session)
+        while len(self.sessions) > max(0, self.idle):
+            self.sessions.pop(0).remove()
+
 
 # -- Workflow execution function ----------------------------------------------
 
 
-def docker_run(run_id, rundir, state, output_files, steps):
+"""Container sessions for the Docker client that is used by the current
+process.
+"""
+_sessions = None
+
+
+def close_sessions():
+    """Remove all session containers of the current process."""
+    global _sessions
+    if _sessions is not None:
+        _sessions.close()
+        _sessions = None
+
+
+# Worker processes of the worker pool do not run atexit handlers.
+atexit.register(close_sessions)
+on_exit(close_sessions)
+
+
+def get_sessions(client=None, idle: Optional[int] = DEFAULT_DOCKER_IDLE) -> ContainerSessions:
+    """Get the container sessions for the given Docker client. Creates a new
+    session manager if the client differs from the client of the current
+    session manager. By default, the client is created from the environment.
+
+    Parameters
+    ----------
+    client: docker.client.DockerClient, default=None
+        Client for the Docker daemon.
+    idle: int, default=DEFAULT_DOCKER_IDLE
+        Maximum number of idle containers that are kept for reuse.
+
+    Returns
+    -------
+    flowserv.controller.serial.docker.ContainerSessions
+    """
+    global _sessions
+    if _sessions is not None and (client is None or _sessions.client is client):
+        _sessions.idle = idle
+        return _sessions
+    close_sessions()
+    if client is None:
+        import docker
+        client = docker.from_env()
+    _sessions = ContainerSessions(client=client, idle=idle)
+    return _sessions
+
+
+def container_limits(limits: Dict) -> Dict:
+    """Get keyword arguments for the creation of a container with the given
+    memory and CPU time limits.
+
+    Parameters
+    ----------
+    limits: dict
+        Resource limits for workflow commands.
+
+    Returns
+    -------
+    dict
+    """
+    kwargs = dict()
+    if LIMIT_MEMORY in limits:
+        kwargs['mem_limit'] = int(limits[LIMIT_MEMORY])
+    if LIMIT_CPUTIME in limits:
+        from docker.types import Ulimit
+        cputime = int(math.ceil(limits[LIMIT_CPUTIME]))
+        kwargs['ulimits'] = [Ulimit(name='cpu', soft=cputime, hard=cputime + 1)]
+    return kwargs
+
+
+def docker_run(
+    run_id, rundir, state, output_files, steps, progress=None, client=None,
+    limits=None, workers=None
+):
     """Execute a list of workflow steps synchronously using the Docker engine.
+    Independent workflow steps are executed concurrently (see
+    scheduler.run_steps).
 
     Returns a tuple containing the run identifier, the folder with the run
     files, and a serialization of the workflow state.
@@ -65,12 +537,27 @@ def docker_run(run_id, rundir, state, output_files, steps):
         Relative path of output files that are generated by the workflow run
     steps: list(flowserv.model.template.step.Step)
         List of expanded workflow steps from a template workflow specification
+    progress: callable, default=None
+        Function that is called with progress information when a command is
+        started and when it finishes. By default, progress is reported to the
+        worker pool.
+    client: docker.client.DockerClient, default=None
+        Client for the Docker daemon. By default, the client is created from
+        the environment.
+    limits: dict, default=None
+        Global resource limits for the commands of all workflow steps.
+    workers: int, default=None
+        Maximum number of independent workflow steps that are executed
+        concurrently. Defaults to the number of CPUs.
 
     Returns
     -------
     (string, string, dict)
     """
     logging.debug('start docker run {}'.format(run_id))
+    # Runs that were queued by the worker pool are started when a worker picks
+    # them up.
+    state = state.start() if state.is_pending() else state
     # Setup the workflow environment by obtaining volume information for all
     # directories in the run folder.
     volumes = dict()
@@ -83,17 +570,155 @@ def docker_run(run_id, rundir, state, output_files, steps):
     # to use Docker and therefore did not install the package.
     import docker
     from docker.errors import ContainerError, ImageNotFound, APIError
-    client = docker.from_env()
-    try:
-        for step in steps:
-            for cmd in step.commands:
-                logging.info('{}'.format(cmd))
-                client.containers.run(
+    client = client if client is not None else docker.from_env()
+    # Independent workflow steps are executed concurrently. Progress reports
+    # from concurrent steps are serialized.
+    progress = synchronized(progress if progress is not None else report)
+    offsets = command_offsets(steps)
+    errors = list()
+
+    def run_step(step_pos: int) -> bool:
+        step = steps[step_pos]
+        step_limits = merge_limits(step.limits, limits)
+        pos = offsets[step_pos]
+        for cmd in step.commands:
+            logging.info('{}'.format(cmd))
+            event = step_progress(run_id=run_id, pos=pos, step=step_pos, command=cmd)
+            progress(event)
+            start = time.monotonic()
+            try:
+                run_container(
+                    client=client,
                     image=step.env,
                     command=cmd,
-                    volumes=volumes
+                    volumes=volumes,
+                    limits=step_limits
                 )
-    except (ContainerError, ImageNotFound, APIError) as ex:
+            except (ContainerError, ImageNotFound, APIError) as ex:
+                logging.error(ex)
+                exit_code = ex.exit_status if isinstance(ex, ContainerError) else -1
+                progress(step_progress(exit_code=exit_code, **event))
+                strace = util.stacktrace(ex)
+                logging.debug('\n'.join(strace))
+                errors.append(strace)
+                return False
+            wall_time = time.monotonic() - start
+            progress(step_progress(exit_code=0, wall_time=wall_time, **event))
+            pos += 1
+        return True
+
+    if not run_steps(steps, run_step, workers=workers):
+        result_state = state.error(messages=errors[0])
+        return run_id, rundir, serialize.serialize_state(result_state)
+    # Create list of output files that were generated.
+    files = list()
+    for relative_path in output_files:
+        if os.path.exists(os.path.join(rundir, relative_path)):
+            files.append(relative_path)
+    # Workflow executed successfully
+    result_state = state.success(files=files)
+    logging.debug('finished run {} = {}'.format(run_id, result_state.type_id))
+    return run_id, rundir, serialize.serialize_state(result_state)
+
+
+def docker_session_run(
+    run_id, rundir, state, output_files, steps, progress=None, client=None,
+    idle=DEFAULT_DOCKER_IDLE, limits=None, logtail=DEFAULT_LOG_TAIL,
+    workflow_id=None, group_id=None
+):
+    """Execute a list of workflow steps synchronously using container sessions.
+    All commands of a workflow step are executed in the same container. The
+    container is returned to the idle containers of the current process when
+    the step is done. Since the run files are moved into the session directory
+    of the container while a step is executed, workflow steps are always
+    executed one after another (in the order of the workflow specification).
+
+    The output of each workflow step is written to log files in the run
+    directory (see engine.step_logs). For failed steps, the last bytes of the
+    error output are included in the error messages of the run.
+
+    Returns a tuple containing the run identifier, the folder with the run
+    files, and a serialization of the workflow state.
+
+    Parameters
+    ----------
+    run_id: string
+        Unique run identifier
+    rundir: string
+        Path to the working directory of the workflow run
+    state: flowserv.model.workflow.state.WorkflowState
+        Current workflow state (to access the timestamps)
+    output_files: list(string)
+        Relative path of output files that are generated by the workflow run
+    steps: list(flowserv.model.template.step.Step)
+        List of expanded workflow steps from a template workflow specification
+    progress: callable, default=None
+        Function that is called with progress information when a command is
+        started and when it finishes. By default, progress is reported to the
+        worker pool.
+    client: docker.client.DockerClient, default=None
+        Client for the Docker daemon. By default, the client is created from
+        the environment.
+    idle: int, default=DEFAULT_DOCKER_IDLE
+        Maximum number of idle containers that are kept for reuse.
+    limits: dict, default=None
+        Global resource limits for the commands of all workflow steps.
+    logtail: int, default=DEFAULT_LOG_TAIL
+        Number of bytes from the error output of a failed command that are
+        included in the error messages.
+    workflow_id: string, default=None
+        Unique identifier of the workflow that the run belongs to.
+    group_id: string, default=None
+        Unique identifier of the workflow group that the run belongs to.
+        Session containers are only reused by runs of the same workflow group.
+
+    Returns
+    -------
+    (string, string, dict)
+    """
+    logging.debug('start docker session run {}'.format(run_id))
+    state = state.start() if state.is_pending() else state
+    progress = progress if progress is not None else report
+    try:
+        os.makedirs(os.path.join(rundir, LOGS_DIR), exist_ok=True)
+        sessions = get_sessions(client=client, idle=idle)
+        offsets = command_offsets(steps)
+        for step_pos, step in enumerate(steps):
+            step_limits = merge_limits(step.limits, limits)
+            session = sessions.lease(
+                image=step.env,
+                rundir=rundir,
+                limits=step_limits,
+                workflow_id=workflow_id,
+                group_id=group_id
+            )
+            try:
+                session.attach(rundir)
+                messages = run_session_step(
+                    session=session,
+                    run_id=run_id,
+                    rundir=rundir,
+                    step=step,
+                    step_pos=step_pos,
+                    pos=offsets[step_pos],
+                    walltime=step_limits.get(LIMIT_WALLTIME),
+                    progress=progress,
+                    logtail=logtail
+                )
+            except Exception:
+                # Do not reuse containers that failed to execute a command.
+                session.detach(rundir)
+                sessions.discard(session)
+                raise
+            session.detach(rundir)
+            if session.killed:
+                sessions.discard(session)
+            else:
+                sessions.release(session)
+            if messages is not None:
+                result_state = state.error(messages=messages)
+                return run_id, rundir, serialize.serialize_state(result_state)
+    except Exception as ex:
         logging.error(ex)
         strace = util.stacktrace(ex)
         logging.debug('\n'.join(strace))
@@ -105,6 +730,178 @@ def docker_run(run_id, rundir, state, output_files, steps):
         if os.path.exists(os.path.join(rundir, relative_path)):
             files.append(relative_path)
     # Workflow executed successfully
-    result_state = state.success(files=files)
+    logfiles = [f for pos in range(len(steps)) for f in step_logs(pos)]
+    result_state = state.success(files=files + logfiles)
     logging.debug('finished run {} = {}'.format(run_id, result_state.type_id))
     return run_id, rundir, serialize.serialize_state(result_state)
+
+
+def move_files(src: str, dst: str):
+    """Move all files and folders in the source folder to the target folder.
+    Both folders are expected to exist.
+
+    Parameters
+    ----------
+    src: string
+        Path to the source folder.
+    dst: string
+        Path to the target folder.
+    """
+    for filename in os.listdir(src):
+        shutil.move(os.path.join(src, filename), os.path.join(dst, filename))
+
+
+def remove_sessions(sessionsdir: str, client=None):
+    """Remove all session containers whose session directories are in the
+    given folder (e.g., containers that were left by processes that were
+    killed). By default, the client is created from the environment.
+
+    Parameters
+    ----------
+    sessionsdir: string
+        Path to the parent folder of the session directories.
+    client: docker.client.DockerClient, default=None
+        Client for the Docker daemon.
+    """
+    if client is None:
+        import docker
+        client = docker.from_env()
+    label = '{}={}'.format(SESSION_LABEL, os.path.abspath(sessionsdir))
+    for container in client.containers.list(all=True, filters={'label': label}):
+        logging.info('remove session container {}'.format(container.id))
+        try:
+            container.remove(force=True)
+        except Exception as ex:
+            logging.error(ex)
+
+
+def run_container(client, image: str, command: str, volumes: Dict, limits: Dict):
+    """Execute a command in a new container with the given resource limits.
+    Raises an error if the command fails. If a wall time limit is given, the
+    container is killed and removed when the command exceeds the limit.
+
+    Parameters
+    ----------
+    client: docker.client.DockerClient
+        Client for the Docker daemon.
+    image: string
+        Name of the Docker image.
+    command: string
+        Command line statement.
+    volumes: dict
+        Volume bindings for the container.
+    limits: dict
+        Resource limits for the command.
+
+    Raises
+    ------
+    docker.errors.ContainerError
+    """
+    kwargs = container_limits(limits)
+    walltime = limits.get(LIMIT_WALLTIME)
+    if walltime is None:
+        client.containers.run(image=image, command=command, volumes=volumes, **kwargs)
+        return
+    from docker.errors import ContainerError
+    from requests.exceptions import RequestException
+    container = client.containers.run(
+        image=image,
+        command=command,
+        volumes=volumes,
+        detach=True,
+        **kwargs
+    )
+    try:
+        try:
+            exit_code = container.wait(timeout=walltime)['StatusCode']
+        except RequestException:
+            container.kill()
+            exit_code = TIMEOUT_EXIT_CODE
+            stderr = timeout_message(walltime).encode('utf-8')
+        else:
+            stderr = container.logs(stdout=False, stderr=True)
+        if exit_code != 0:
+            raise ContainerError(container, exit_code, command, image, stderr)
+    finally:
+        container.remove(force=True)
+
+
+def run_session_step(
+    session: ContainerSession, run_id: str, rundir: str, step, step_pos: int,
+    pos: int, walltime: Optional[float], progress: Callable, logtail: int
+) -> Optional[List[str]]:
+    """Execute the commands of a workflow step in a session container that is
+    attached to the run directory. The output of the commands is written to
+    the step log files. Returns None if all commands were executed
+    successfully. Otherwise, the tail of the error output of the failed
+    command is returned as the list of error messages.
+
+    Parameters
+    ----------
+    session: flowserv.controller.serial.docker.ContainerSession
+        Session container that is attached to the run directory.
+    run_id: string
+        Unique run identifier
+    rundir: string
+        Path to the working directory of the workflow run
+    step: flowserv.model.workflow.serial.Step
+        Workflow step that is executed.
+    step_pos: int
+        Position of the step in the workflow.
+    pos: int
+        Position of the first step command in the list of all workflow
+        commands.
+    walltime: float
+        Wall time limit in seconds for each command of the step.
+    progress: callable
+        Function that is called with progress information when a command is
+        started and when it finishes.
+    logtail: int
+        Number of bytes from the error output of a failed command that are
+        included in the error messages.
+
+    Returns
+    -------
+    list of string
+    """
+    stdout_log, stderr_log = step_logs(step_pos)
+    stderr_file = os.path.join(rundir, stderr_log)
+    offset = None
+    with open(os.path.join(rundir, stdout_log), 'wb') as fout, open(stderr_file, 'wb') as ferr:
+        for cmd in step.commands:
+            logging.info('{}'.format(cmd))
+            event = step_progress(run_id=run_id, pos=pos, step=step_pos, command=cmd)
+            progress(event)
+            start = time.monotonic()
+            cmd_offset = ferr.tell()
+            try:
+                exit_code = session.execute(cmd, stdout=fout, stderr=ferr, walltime=walltime)
+            except Exception:
+                progress(step_progress(exit_code=-1, **event))
+                raise
+            wall_time = time.monotonic() - start
+            progress(step_progress(exit_code=exit_code, wall_time=wall_time, **event))
+            pos += 1
+            if exit_code != 0:
+                offset = cmd_offset
+                break
+    if offset is None:
+        return None
+    # Keep the tail of the error output of the failed command for the error
+    # messages of the run.
+    return [read_tail(stderr_file, offset=offset, size=logtail)]
+
+
+def timeout_message(walltime: float) -> str:
+    """Get error message for commands that exceeded the wall time limit.
+
+    Parameters
+    ----------
+    walltime: float
+        Wall time limit in seconds.
+
+    Returns
+    -------
+    string
+    """
+    return 'command exceeded wall time limit of {} seconds\n'.format(walltime)
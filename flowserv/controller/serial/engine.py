@@ -13,20 +13,52 @@ steps within separate sub-processes.
 All workflow run files will be maintained in a (temporary) directory on the
 local file system. The base folder for these run files in configured using the
 environment variable FLOWSERV_RUNSDIR.
+
+Asynchronous workflow runs are executed by a pool of long-lived worker
+processes. The maximum number of concurrent runs is configured using the
+environment variable FLOWSERV_WORKERS. Runs that are submitted while all
+workers are busy remain in pending state until a worker becomes available.
+
+The output of workflow steps is written to log files in the run directory.
+Only the tail of the error output of a failed step (configured using the
+environment variable FLOWSERV_LOGTAIL) is kept in the run error messages.
+
+The outputs of workflow steps can be cached to avoid re-executing steps that
+were executed before with the same inputs. The cache is enabled by setting a
+size budget in the environment variable FLOWSERV_STEPCACHE.
+
+The commands of workflow steps are executed with the resource limits that are
+declared in the workflow template and the global limits in the configuration.
+The measured resource usage of each command is reported as part of the run
+progress.
+
+Independent workflow steps (see flowserv.model.workflow.serial) are executed
+concurrently by a pool of threads within the worker. The maximum number of
+concurrent steps is configured using the environment variable
+FLOWSERV_STEPWORKERS.
 """
 
 from functools import partial
-from multiprocessing import Lock, Pool
-from typing import Callable, Optional
+from multiprocessing import Lock
+from typing import Callable, Dict, List, Optional, Tuple
 
+import inspect
 import logging
 import os
-import subprocess
 
-from flowserv.config import FLOWSERV_ASYNC, FLOWSERV_BASEDIR, FLOWSERV_RUNSDIR, DEFAULT_RUNSDIR
+from flowserv.config import (
+    FLOWSERV_ASYNC, FLOWSERV_BASEDIR, FLOWSERV_LOG_TAIL, FLOWSERV_RUNSDIR,
+    FLOWSERV_STEP_CACHE, FLOWSERV_STEP_CACHEDIR, FLOWSERV_STEP_WORKERS,
+    FLOWSERV_WORKERS, FLOWSERV_WORKER_MAXRUNS, DEFAULT_LOG_TAIL,
+    DEFAULT_RUNSDIR, DEFAULT_STEP_CACHEDIR
+)
 from flowserv.controller.base import WorkflowController
+from flowserv.controller.serial.cache import StepCache
+from flowserv.controller.serial.limits import get_limits, merge_limits, run_command
+from flowserv.controller.serial.pool import WorkerPool, report
+from flowserv.controller.serial.scheduler import command_offsets, isolated, run_steps, synchronized
 from flowserv.model.files.factory import FS
-from flowserv.model.workflow.serial import SerialWorkflow
+from flowserv.model.workflow.serial import LOGS_DIR, SerialWorkflow
 from flowserv.service.api import APIFactory
 
 import flowserv.error as err
@@ -61,7 +93,16 @@ class SerialWorkflowEngine(WorkflowController):
         """
         self.fs = FS(env=service)
         self.service = service
-        self.exec_func = exec_func if exec_func is not None else run_workflow
+        if exec_func is None:
+            logtail = service.get(FLOWSERV_LOG_TAIL, DEFAULT_LOG_TAIL)
+            exec_func = partial(
+                run_workflow,
+                logtail=logtail,
+                cache=get_cache(service),
+                limits=get_limits(service),
+                workers=service.get(FLOWSERV_STEP_WORKERS)
+            )
+        self.exec_func = exec_func
         # The is_async flag controlls the default setting for asynchronous
         # execution. If the flag is False all workflow steps will be executed
         # in a sequentiall (blocking) manner.
@@ -71,10 +112,16 @@ class SerialWorkflowEngine(WorkflowController):
         if basedir is None:
             raise err.MissingConfigurationError('API base directory')
         self.runsdir = service.get(FLOWSERV_RUNSDIR, os.path.join(basedir, DEFAULT_RUNSDIR))
-        # Dictionary of all running tasks
-        self.tasks = dict()
-        # Lock to manage asynchronous access to the task dictionary
+        # Pool of worker processes for asynchronous workflow runs. The pool is
+        # created when the first run is submitted.
+        self.processes = service.get(FLOWSERV_WORKERS)
+        self.max_runs = service.get(FLOWSERV_WORKER_MAXRUNS)
+        self.pool = None
+        # Lock to manage asynchronous access to the worker pool
         self.lock = Lock()
+        # Progress reports of synchronous runs that have not been written to
+        # the database by the caller yet (see pop_progress).
+        self.progress = dict()
 
     def cancel_run(self, run_id):
         """Request to cancel execution of the given run. This method is usually
@@ -87,24 +134,42 @@ class SerialWorkflowEngine(WorkflowController):
         run_id: string
             Unique run identifier
         """
+        # Remove the run from the queue of the worker pool or terminate the
+        # worker that executes the run. The state of the respective run will
+        # be updated by the workflow engine that uses this controller for
+        # workflow execution.
         with self.lock:
-            # Ensure that the run has not been removed already
-            if run_id in self.tasks:
-                pool, _ = self.tasks[run_id]
-                # Close the pool and terminate any running processes
-                if pool is not None:
-                    pool.close()
-                    pool.terminate()
-                # Delete the task from the dictionary. The state of the
-                # respective run will be updated by the workflow engine that
-                # uses this controller for workflow execution
-                del self.tasks[run_id]
+            pool = self.pool
+        if pool is not None:
+            pool.cancel(run_id)
+
+    def exec_function(self, run) -> Callable:
+        """Get the function that executes the workflow steps of the given run.
+        The function is called with the run identifier, the run directory, the
+        run state, the list of output files, and the list of workflow steps.
+        By default, the execution function of the engine is used for all runs.
+
+        Parameters
+        ----------
+        run: flowserv.model.base.RunObject
+            Handle for the run that is being executed.
+
+        Returns
+        -------
+        callable
+        """
+        return self.exec_func
 
     def exec_workflow(self, run, template, arguments):
         """Initiate the execution of a given workflow template for a set of
         argument values. This will start a new process that executes a serial
         workflow asynchronously.
 
+        Asynchronous runs are submitted to the worker pool of the engine. If
+        all workers are busy the run is queued and the returned state is
+        PENDING. The run state is set to RUNNING when a worker starts executing
+        the run.
+
         The serial workflow engine executes workflows on the local machine and
         therefore uses the file system to store temporary run files. The path
         to the run folder is returned as the second value in the result tuple.
@@ -160,25 +225,17 @@ class SerialWorkflowEngine(WorkflowController):
             util.create_directories(basedir=rundir, files=outputs)
             # Get list of commands to execute.
             commands = wf.commands()
-            # Start a new process to run the workflow. Make sure to catch all
+            # Submit the run to the worker pool. Make sure to catch all
             # exceptions to set the run state properly
-            state = state.start()
             if self.is_async:
                 # Raise an error if the service manager is not given.
                 if self.service is None:
                     raise ValueError('service manager not given')
-                # Run steps asynchronously in a separate process
-                pool = Pool(processes=1)
-                task_callback_function = partial(
-                    callback_function,
-                    lock=self.lock,
-                    tasks=self.tasks,
-                    service=self.service
-                )
-                with self.lock:
-                    self.tasks[run.run_id] = (pool, state)
-                pool.apply_async(
-                    self.exec_func,
+                # Run steps asynchronously in one of the worker processes. The
+                # run remains pending if all workers are busy.
+                started = self.get_pool().submit(
+                    task_id=run.run_id,
+                    func=self.exec_function(run),
                     args=(
                         run.run_id,
                         rundir,
@@ -186,64 +243,274 @@ class SerialWorkflowEngine(WorkflowController):
                         wf.output_files(),
                         commands
                     ),
-                    callback=task_callback_function
+                    callback=partial(callback_function, service=self.service),
+                    error_callback=partial(
+                        error_callback,
+                        run_id=run.run_id,
+                        rundir=rundir,
+                        state=state,
+                        service=self.service
+                    ),
+                    start_callback=partial(
+                        start_callback,
+                        run_id=run.run_id,
+                        state=state,
+                        service=self.service
+                    ),
+                    progress_callback=partial(step_callback, service=self.service)
                 )
-                return state, rundir
+                return (state.start() if started else state), rundir
             else:
-                # Run steps synchronously and block the controller until done
-                _, _, state_dict = self.exec_func(
-                    run.run_id,
-                    rundir,
-                    state,
-                    wf.output_files(),
-                    commands
-                )
+                # Run steps synchronously and block the controller until done.
+                # Progress reports are kept in memory and written by the
+                # caller in its own session (see pop_progress). Opening a
+                # new service session here would close the (scoped) session
+                # of the caller. Execution functions that do not report
+                # progress are called without the progress argument.
+                state = state.start()
+                func = self.exec_function(run)
+                reports = list()
+                kwargs = {'progress': reports.append} if accepts_progress(func) else dict()
+                try:
+                    _, _, state_dict = func(
+                        run.run_id,
+                        rundir,
+                        state,
+                        wf.output_files(),
+                        commands,
+                        **kwargs
+                    )
+                finally:
+                    with self.lock:
+                        self.progress[run.run_id] = reports
                 return serialize.deserialize_state(state_dict), rundir
         except Exception as ex:
             # Set the workflow runinto an ERROR state
             logging.error(ex)
             return state.error(messages=util.stacktrace(ex)), rundir
 
+    def get_pool(self) -> WorkerPool:
+        """Get the worker pool for asynchronous workflow runs. Creates the pool
+        if it does not exist.
+
+        Returns
+        -------
+        flowserv.controller.serial.pool.WorkerPool
+        """
+        with self.lock:
+            if self.pool is None:
+                self.pool = WorkerPool(processes=self.processes, max_runs=self.max_runs)
+            return self.pool
+
+    def pop_progress(self, run_id: str) -> List[Dict]:
+        """Get (and remove) the progress reports for the commands of a
+        synchronously executed run.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+
+        Returns
+        -------
+        list of dict
+        """
+        with self.lock:
+            return self.progress.pop(run_id, list())
+
 
 # -- Helper Methods -----------------------------------------------------------
 
-def callback_function(result, lock, tasks, service):
-    """Callback function for executed tasks.Removes the task from the task
-    index and updates the run state in the underlying database.
+def accepts_progress(func: Callable) -> bool:
+    """Test if the given workflow execution function accepts the progress
+    callback as a keyword argument.
+
+    Parameters
+    ----------
+    func: callable
+        Function that executes the steps of a workflow run.
+
+    Returns
+    -------
+    bool
+    """
+    try:
+        params = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    for para in params:
+        if para.kind == inspect.Parameter.VAR_KEYWORD:
+            return True
+        if para.name == 'progress' and para.kind != inspect.Parameter.POSITIONAL_ONLY:
+            return True
+    return False
+
+
+def callback_function(result, service):
+    """Callback function for executed tasks. Updates the run state in the
+    underlying database.
 
     Parameters
     ----------
     result: (string, dict)
         Tuple of task identifier and serialized state of the workflow run
-    lock: multiprocessing.Lock
-        Lock for concurrency control
-    tasks: dict
-        Task index of the backend
-        service: contextlib,contextmanager
-            Context manager to create an instance of the service API.
+    service: contextlib,contextmanager
+        Context manager to create an instance of the service API.
     """
     run_id, rundir, state_dict = result
     logging.info('finished run {} with {}'.format(run_id, state_dict))
-    with lock:
-        if run_id in tasks:
-            # Close the pool and remove the entry from the task index
-            pool, _ = tasks[run_id]
-            pool.close()
-            del tasks[run_id]
     state = serialize.deserialize_state(state_dict)
-    try:
-        with service() as api:
-            api.runs().update_run(run_id=run_id, state=state, rundir=rundir)
-    except Exception as ex:
-        logging.error(ex)
-        logging.debug('\n'.join(util.stacktrace(ex)))
+    update_run(run_id=run_id, state=state, rundir=rundir, service=service)
+
+
+def error_callback(messages: List[str], run_id: str, rundir: str, state, service):
+    """Callback function for tasks that failed in the worker pool (e.g., if
+    the worker process terminated unexpectedly). Sets the run into error state.
 
+    Parameters
+    ----------
+    messages: list of string
+        Error messages.
+    run_id: string
+        Unique run identifier
+    rundir: string
+        Path to the working directory of the workflow run
+    state: flowserv.model.workflow.state.WorkflowState
+        State of the workflow run when it was submitted.
+    service: contextlib,contextmanager
+        Context manager to create an instance of the service API.
+    """
+    state = state.start() if state.is_pending() else state
+    update_run(run_id=run_id, state=state.error(messages=messages), rundir=rundir, service=service)
+
+
+def get_cache(env: Dict) -> Optional[StepCache]:
+    """Get the cache for the outputs of workflow steps. The result is None if
+    the step cache is not enabled in the given configuration.
+
+    Parameters
+    ----------
+    env: dict
+        Configuration object that provides access to configuration
+        parameters in the environment.
+
+    Returns
+    -------
+    flowserv.controller.serial.cache.StepCache
+    """
+    size = env.get(FLOWSERV_STEP_CACHE)
+    if not size:
+        return None
+    basedir = env.get(FLOWSERV_STEP_CACHEDIR)
+    if basedir is None:
+        basedir = os.path.join(env.get(FLOWSERV_BASEDIR), DEFAULT_STEP_CACHEDIR)
+    return StepCache(basedir=basedir, size=size)
+
+
+def read_tail(filename: str, offset: Optional[int] = 0, size: Optional[int] = None) -> str:
+    """Read the last bytes of a log file. Only bytes after the given offset
+    are read. If the size is None all bytes after the offset are returned.
+
+    Parameters
+    ----------
+    filename: string
+        Path to the log file.
+    offset: int, default=0
+        Position in the file where reading may start.
+    size: int, default=None
+        Maximum number of bytes that are read.
 
-def run_workflow(run_id, rundir, state, output_files, steps):
+    Returns
+    -------
+    string
+    """
+    with open(filename, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        start = offset if size is None else max(offset, end - size)
+        f.seek(start)
+        return f.read().decode('utf-8', errors='replace')
+
+
+def run_step_commands(
+    run_id: str, rundir: str, step, step_pos: int, pos: int, limits: Dict,
+    progress: Callable, logtail: int
+) -> Optional[str]:
+    """Execute the commands of a workflow step. Each command is expected to
+    be a shell command that is executed in a sub-process. The output of the
+    commands is written directly to the step log files. Returns None if all
+    commands were executed successfully. Otherwise, the tail of the error
+    output of the failed command is returned.
+
+    Parameters
+    ----------
+    run_id: string
+        Unique run identifier
+    rundir: string
+        Path to the working directory of the workflow run
+    step: flowserv.model.workflow.serial.Step
+        Workflow step that is executed.
+    step_pos: int
+        Position of the step in the workflow.
+    pos: int
+        Position of the first step command in the list of all workflow
+        commands.
+    limits: dict
+        Resource limits for the step commands.
+    progress: callable
+        Function that is called with progress information when a command is
+        started and when it finishes.
+    logtail: int
+        Number of bytes from the error output of a failed command that are
+        returned.
+
+    Returns
+    -------
+    string
+    """
+    stdout_log, stderr_log = step_logs(step_pos)
+    stderr_file = os.path.join(rundir, stderr_log)
+    with open(os.path.join(rundir, stdout_log), 'wb') as fout, open(stderr_file, 'wb') as ferr:
+        for cmd in step.commands:
+            logging.info('{}'.format(cmd))
+            event = step_progress(run_id=run_id, pos=pos, step=step_pos, command=cmd)
+            progress(event)
+            offset = ferr.tell()
+            returncode, usage = run_command(
+                cmd,
+                cwd=rundir,
+                stdout=fout,
+                stderr=ferr,
+                limits=limits
+            )
+            progress(step_progress(exit_code=returncode, **usage, **event))
+            pos += 1
+            if returncode != 0:
+                break
+        else:
+            return None
+    # Keep the tail of the error output of the failed command for the error
+    # messages of the run.
+    return read_tail(stderr_file, offset=offset, size=logtail)
+
+
+def run_workflow(
+    run_id, rundir, state, output_files, steps, logtail=DEFAULT_LOG_TAIL,
+    progress=None, cache=None, limits=None, workers=None
+):
     """Execute a list of workflow steps synchronously. This is the worker
     function for asynchronous workflow executions. Starts by copying input
     files and then executes the workflow synchronously.
 
+    Progress information for each command is reported when the command is
+    started and when it finishes (see step_progress). The output of each
+    workflow step is written to log files in the run directory (see step_logs).
+    The log files are included in the result files of successful runs. For
+    failed steps, the last bytes of the error output are included in the error
+    messages of the run. Commands are executed with the resource limits of
+    their step (see limits.run_command). The measured resource usage is
+    included in the progress information for finished commands. Independent
+    workflow steps are executed concurrently (see scheduler.run_steps).
+
     Returns a tuple containing the run identifier, the folder with the run
     files, and a serialization of the workflow state.
 
@@ -259,61 +526,96 @@ def run_workflow(run_id, rundir, state, output_files, steps):
         Relative path of output files that are generated by the workflow run
     steps: list(flowserv.model.template.step.Step)
         List of expanded workflow steps from a template workflow specification
+    logtail: int, default=DEFAULT_LOG_TAIL
+        Number of bytes from the error output of a failed command that are
+        included in the error messages.
+    progress: callable, default=None
+        Function that is called with progress information when a command is
+        started and when it finishes. By default, progress is reported to the
+        worker pool.
+    cache: flowserv.controller.serial.cache.StepCache, default=None
+        Cache for the outputs of workflow steps. Steps are always executed if
+        no cache is given.
+    limits: dict, default=None
+        Global resource limits for the commands of all workflow steps.
+    workers: int, default=None
+        Maximum number of independent workflow steps that are executed
+        concurrently. Defaults to the number of CPUs.
 
     Returns
     -------
     (string, string, dict)
     """
     logging.info('start run {}'.format(run_id))
+    # Runs that were queued by the worker pool are started when a worker picks
+    # them up.
+    state = state.start() if state.is_pending() else state
     try:
-        # The serial controller ignores the command environments. We start by
-        # creating a list of all command statements
-        statements = list()
-        for step in steps:
-            statements.extend(step.commands)
-        # Run workflow step-by-step
-        for cmd in statements:
-            logging.info('{}'.format(cmd))
-            # Each command is expected to be a shell command that is executed
-            # using the subprocess package. The subprocess.run() method is
-            # preferred for capturing output to STDERR but it does not exist
-            # in Python3.6.
-            try:
-                proc = subprocess.run(
-                    cmd,
-                    cwd=rundir,
-                    shell=True,
-                    capture_output=True
+        # The serial controller ignores the command environments. Independent
+        # workflow steps are executed concurrently. Progress reports from
+        # concurrent steps are serialized.
+        progress = synchronized(progress if progress is not None else report)
+        os.makedirs(os.path.join(rundir, LOGS_DIR), exist_ok=True)
+        offsets = command_offsets(steps)
+        # The step cache is only used for steps that are not executed
+        # concurrently with other steps (since the fingerprint of a step
+        # depends on the state of the whole run directory).
+        cacheable = isolated(steps)
+        snapshot = dict()
+        errors = list()
+
+        def run_step(step_pos: int) -> bool:
+            step = steps[step_pos]
+            stdout_log, stderr_log = step_logs(step_pos)
+            pos = offsets[step_pos]
+            # Restore the outputs of a step that was executed before with the
+            # same inputs instead of executing the step commands.
+            use_cache = cache is not None and cacheable[step_pos]
+            if use_cache:
+                snapshot['files'] = cache.snapshot(rundir, previous=snapshot.get('files'))
+                key = cache.fingerprint(step, snapshot['files'])
+                if cache.restore(key, rundir, logs=(stdout_log, stderr_log)):
+                    logging.info('restored cached step {}'.format(step_pos))
+                    for cmd in step.commands:
+                        event = step_progress(run_id=run_id, pos=pos, step=step_pos, command=cmd)
+                        progress(step_progress(exit_code=0, **event))
+                        pos += 1
+                    return True
+            error = run_step_commands(
+                run_id=run_id,
+                rundir=rundir,
+                step=step,
+                step_pos=step_pos,
+                pos=pos,
+                limits=merge_limits(step.limits, limits),
+                progress=progress,
+                logtail=logtail
+            )
+            if error is not None:
+                errors.append(error)
+                return False
+            if use_cache:
+                snapshot['files'] = cache.store(
+                    key,
+                    rundir,
+                    before=snapshot['files'],
+                    logs=(stdout_log, stderr_log)
                 )
-                if proc.returncode != 0:
-                    # Return error state. Include STDERR in result
-                    messages = list()
-                    messages.append(proc.stderr.decode('utf-8'))
-                    result_state = state.error(messages=messages)
-                    doc = serialize.serialize_state(result_state)
-                    return run_id, rundir, doc
-            except (AttributeError, TypeError):
-                try:
-                    subprocess.check_output(
-                        cmd,
-                        cwd=rundir,
-                        shell=True,
-                        stderr=subprocess.STDOUT
-                    )
-                except subprocess.CalledProcessError as ex:
-                    logging.error(ex)
-                    strace = util.stacktrace(ex)
-                    logging.debug('\n'.join(strace))
-                    result_state = state.error(messages=strace)
-                    doc = serialize.serialize_state(result_state)
-                    return run_id, rundir, doc
+            return True
+
+        if not run_steps(steps, run_step, workers=workers):
+            # Return error state. Include the tail of the error output of the
+            # (first) failed command in the result.
+            result_state = state.error(messages=errors[:1])
+            return run_id, rundir, serialize.serialize_state(result_state)
         # Create list of output files that were generated.
         files = list()
         for relative_path in output_files:
             if os.path.exists(os.path.join(rundir, relative_path)):
                 files.append(relative_path)
         # Workflow executed successfully
-        result_state = state.success(files=files)
+        logfiles = [f for pos in range(len(steps)) for f in step_logs(pos)]
+        result_state = state.success(files=files + logfiles)
     except Exception as ex:
         logging.error(ex)
         strace = util.stacktrace(ex)
@@ -321,3 +623,132 @@ def run_workflow(run_id, rundir, state, output_files, steps):
         result_state = state.error(messages=strace)
     logging.info('finished run {}: {}'.format(run_id, result_state.type_id))
     return run_id, rundir, serialize.serialize_state(result_state)
+
+
+def start_callback(run_id: str, state, service):
+    """Callback function for queued runs that are dispatched to a worker.
+    Sets the run into running state.
+
+    Parameters
+    ----------
+    run_id: string
+        Unique run identifier
+    state: flowserv.model.workflow.state.WorkflowState
+        Pending state of the workflow run.
+    service: contextlib,contextmanager
+        Context manager to create an instance of the service API.
+    """
+    update_run(run_id=run_id, state=state.start(), rundir=None, service=service)
+
+
+def step_callback(progress: Dict, service):
+    """Callback function for progress reports of workflow runs. Updates the
+    progress information for the reported command in the underlying database.
+    Errors are logged but not raised.
+
+    Parameters
+    ----------
+    progress: dict
+        Progress information for a workflow command (see step_progress).
+    service: contextlib,contextmanager
+        Context manager to create an instance of the service API.
+    """
+    try:
+        with service() as api:
+            api.runs().update_step(**progress)
+    except Exception as ex:
+        logging.error(ex)
+        logging.debug('\n'.join(util.stacktrace(ex)))
+
+
+def step_logs(pos: int) -> Tuple[str, str]:
+    """Get the relative paths of the log files for the standard output and
+    the error output of the workflow step at the given position.
+
+    Parameters
+    ----------
+    pos: int
+        Position of the step in the workflow.
+
+    Returns
+    -------
+    string, string
+    """
+    prefix = '{}/step{}'.format(LOGS_DIR, pos)
+    return '{}.out.log'.format(prefix), '{}.err.log'.format(prefix)
+
+
+def step_progress(
+    run_id: str, pos: int, step: int, command: str,
+    started_at: Optional[str] = None, exit_code: Optional[int] = None,
+    cpu_time: Optional[float] = None, max_memory: Optional[int] = None,
+    wall_time: Optional[float] = None
+) -> Dict:
+    """Get progress information for a workflow command. If the exit code is
+    given the command is reported as finished at the current time. If no
+    start time is given the current time is used. Resource usage values are
+    only included if they are given.
+
+    Parameters
+    ----------
+    run_id: string
+        Unique run identifier.
+    pos: int
+        Position of the command in the list of all workflow commands.
+    step: int
+        Position of the workflow step that contains the command.
+    command: string
+        Command line statement.
+    started_at: string, default=None
+        Timestamp when the command was started.
+    exit_code: int, default=None
+        Exit code of a finished command.
+    cpu_time: float, default=None
+        CPU time (in seconds) that was used by a finished command.
+    max_memory: int, default=None
+        Peak memory usage (in bytes) of a finished command.
+    wall_time: float, default=None
+        Wall time (in seconds) of a finished command.
+
+    Returns
+    -------
+    dict
+    """
+    now = util.utc_now()
+    doc = {
+        'run_id': run_id,
+        'pos': pos,
+        'step': step,
+        'command': command,
+        'started_at': started_at if started_at is not None else now
+    }
+    if exit_code is not None:
+        doc['finished_at'] = now
+        doc['exit_code'] = exit_code
+    for key, value in [('cpu_time', cpu_time), ('max_memory', max_memory), ('wall_time', wall_time)]:
+        if value is not None:
+            doc[key] = value
+    return doc
+
+
+def update_run(run_id: str, state, rundir: Optional[str], service):
+    """Update the state of a workflow run using the service API. Errors are
+    logged but not raised.
+
+    Parameters
+    ----------
+    run_id: string
+        Unique run identifier
+    state: flowserv.model.workflow.state.WorkflowState
+        New workflow state
+    rundir: string
+        Path to the working directory of the workflow run
+    service: contextlib,contextmanager
+        Context manager to create an instance of the service API.
+    """
+    try:
+        with service() as api:
+            api.runs().update_run(run_id=run_id, state=state, rundir=rundir)
+    except Exception as ex:
+        logging.error(ex)
+        logging.debug('\n'.join(util.stacktrace(ex)))
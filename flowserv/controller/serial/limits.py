@@ -0,0 +1,211 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Resource limits and resource accounting for the commands of serial workflow
+steps.
+
+Limits are declared in workflow templates (for all steps or for individual
+steps) and globally in the configuration. The effective limit for a step is the
+minimum of the declared and the global limit. Commands that are executed as
+sub-processes are limited by a shell wrapper that sets the CPU time and address
+space limits (ulimit) before it executes the command, and are killed when they
+exceed the wall time limit. The limits are not set in the forked process before
+exec (preexec_fn) since that is unsafe when steps are executed by multiple
+threads. The CPU time, peak memory usage, and wall time of each command are
+measured using the resource usage information of the terminated sub-process.
+"""
+
+from typing import Dict, IO, List, Optional, Tuple
+
+import math
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from flowserv.config import FLOWSERV_MAX_CPUTIME, FLOWSERV_MAX_MEMORY, FLOWSERV_MAX_WALLTIME
+from flowserv.model.workflow.serial import LIMIT_CPUTIME, LIMIT_MEMORY, LIMIT_WALLTIME
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+
+"""Keys for the resource usage of executed commands."""
+USAGE_CPUTIME = 'cpu_time'
+USAGE_MEMORY = 'max_memory'
+USAGE_WALLTIME = 'wall_time'
+
+
+def get_limits(env: Dict) -> Dict:
+    """Get the global resource limits from the given configuration.
+
+    Parameters
+    ----------
+    env: dict
+        Configuration object that provides access to configuration
+        parameters in the environment.
+
+    Returns
+    -------
+    dict
+    """
+    limits = dict()
+    for key, var in [
+        (LIMIT_CPUTIME, FLOWSERV_MAX_CPUTIME),
+        (LIMIT_MEMORY, FLOWSERV_MAX_MEMORY),
+        (LIMIT_WALLTIME, FLOWSERV_MAX_WALLTIME)
+    ]:
+        value = env.get(var)
+        if value is not None:
+            limits[key] = value
+    return limits
+
+
+def kill(pid: int):
+    """Kill the process group of the given process. Ignores errors if the
+    process has terminated already.
+
+    Parameters
+    ----------
+    pid: int
+        Process identifier.
+    """
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:  # pragma: no cover
+        pass
+
+
+def merge_limits(limits: Dict, caps: Optional[Dict] = None) -> Dict:
+    """Get the effective resource limits for a workflow step. The result
+    contains the minimum of the step limit and the global limit for each
+    resource.
+
+    Parameters
+    ----------
+    limits: dict
+        Resource limits that are declared for a workflow step.
+    caps: dict, default=None
+        Global resource limits.
+
+    Returns
+    -------
+    dict
+    """
+    result = dict(limits)
+    for key, value in (caps if caps is not None else dict()).items():
+        result[key] = min(result[key], value) if key in result else value
+    return result
+
+
+def rlimits(limits: Dict) -> List[str]:
+    """Get the shell statements that set the CPU time and memory limits for a
+    command. The statements are executed by the shell that runs the command.
+
+    Parameters
+    ----------
+    limits: dict
+        Resource limits for the command.
+
+    Returns
+    -------
+    list of string
+    """
+    def clamp(res: int, value: int) -> int:
+        # Limits cannot be raised above the current hard limit.
+        _, current = resource.getrlimit(res)
+        return min(value, current) if current != resource.RLIM_INFINITY else value
+
+    statements = list()
+    if LIMIT_CPUTIME in limits:
+        # The process receives SIGXCPU when the soft limit is reached and is
+        # killed when the hard limit is reached.
+        cputime = int(math.ceil(limits[LIMIT_CPUTIME]))
+        # The soft limit cannot exceed the hard limit. It is set first.
+        statements.append('ulimit -S -t {}'.format(clamp(resource.RLIMIT_CPU, cputime)))
+        statements.append('ulimit -H -t {}'.format(clamp(resource.RLIMIT_CPU, cputime + 1)))
+    if LIMIT_MEMORY in limits:
+        # The address space limit is given in kilobytes.
+        memory = clamp(resource.RLIMIT_AS, int(limits[LIMIT_MEMORY]))
+        statements.append('ulimit -v {}'.format(max(1, memory // 1024)))
+    return statements
+
+
+def run_command(
+    cmd: str, cwd: str, stdout: IO, stderr: IO, limits: Optional[Dict] = None
+) -> Tuple[int, Dict]:
+    """Execute a shell command in a sub-process with the given resource limits.
+    Returns the exit code of the command and the measured resource usage. If
+    the command is killed because it exceeded the wall time limit, a message is
+    written to the error output.
+
+    Parameters
+    ----------
+    cmd: string
+        Command line statement.
+    cwd: string
+        Working directory for the command.
+    stdout: file object
+        File for the standard output of the command.
+    stderr: file object
+        File for the error output of the command.
+    limits: dict, default=None
+        Resource limits for the command.
+
+    Returns
+    -------
+    int, dict
+    """
+    limits = limits if limits is not None else dict()
+    walltime = limits.get(LIMIT_WALLTIME)
+    args = cmd
+    if resource is not None and (LIMIT_CPUTIME in limits or LIMIT_MEMORY in limits):
+        # Set the limits in the shell and replace the shell with a new shell
+        # that executes the command. The command is passed as a positional
+        # argument to avoid quoting issues.
+        statements = rlimits(limits) + ['exec /bin/sh -c "$1"']
+        args = [' && '.join(statements), 'sh', cmd]
+    start = time.monotonic()
+    proc = subprocess.Popen(
+        args,
+        cwd=cwd,
+        shell=True,
+        stdout=stdout,
+        stderr=stderr,
+        start_new_session=walltime is not None
+    )
+    timer = None
+    if walltime is not None:
+        # Kill the process group of the command if the wall time limit is
+        # exceeded.
+        timer = threading.Timer(walltime, kill, args=(proc.pid,))
+        timer.start()
+    usage = dict()
+    try:
+        if resource is not None:
+            _, status, rusage = os.wait4(proc.pid, 0)
+            proc.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+            # The peak memory usage is given in kilobytes on Linux and in bytes
+            # on macOS.
+            scale = 1 if sys.platform == 'darwin' else 1024
+            usage[USAGE_CPUTIME] = rusage.ru_utime + rusage.ru_stime
+            usage[USAGE_MEMORY] = rusage.ru_maxrss * scale
+        else:  # pragma: no cover
+            proc.wait()
+    finally:
+        if timer is not None:
+            timer.cancel()
+    usage[USAGE_WALLTIME] = time.monotonic() - start
+    if walltime is not None and proc.returncode == -signal.SIGKILL and usage[USAGE_WALLTIME] >= walltime:
+        stderr.write('command exceeded wall time limit of {} seconds\n'.format(walltime).encode('utf-8'))
+        stderr.flush()
+    return proc.returncode, usage
@@ -0,0 +1,534 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Pool of long-lived worker processes for the asynchronous execution of
+workflow runs by the serial workflow engine.
+
+The pool starts worker processes on demand up to a given maximum. Each worker
+executes one task at a time. Tasks that are submitted while all workers are
+busy are queued and dispatched in the order of their submission. Each worker
+communicates with the pool through its own pipe. This allows the pool to
+terminate an individual worker (e.g., when a task is canceled) without
+affecting any of the other workers. Workers can be recycled after they
+executed a given number of tasks.
+
+Task functions can report progress while they are executed using the report()
+function. Progress reports are sent to the pool via the worker pipe and passed
+to the progress callback of the respective task.
+
+Worker processes do not run atexit handlers. Functions that release resources
+of a worker (e.g., containers) are registered using the on_exit() function.
+They are called when the worker is stopped or terminated by the pool.
+"""
+
+from collections import deque
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection, wait
+from typing import Any, Callable, List, Optional, Tuple
+
+import logging
+import os
+import signal
+import threading
+
+import flowserv.util as util
+
+
+class Task(object):
+    """Task that is executed by a worker in the pool. Maintains the task
+    function and arguments together with the callbacks for the task result.
+    """
+    def __init__(
+        self, task_id: str, func: Callable, args: Tuple, callback: Callable,
+        error_callback: Optional[Callable] = None,
+        start_callback: Optional[Callable] = None,
+        progress_callback: Optional[Callable] = None
+    ):
+        """Initialize the task components.
+
+        Parameters
+        ----------
+        task_id: string
+            Unique task identifier.
+        func: callable
+            Task function.
+        args: tuple
+            Arguments for the task function.
+        callback: callable
+            Function that is called with the result of the task function.
+        error_callback: callable, default=None
+            Function that is called with a list of error messages if the task
+            function or the worker process failed.
+        start_callback: callable, default=None
+            Function that is called (without arguments) when a queued task is
+            dispatched to a worker.
+        progress_callback: callable, default=None
+            Function that is called with the progress reports of the task
+            function.
+        """
+        self.task_id = task_id
+        self.func = func
+        self.args = args
+        self.callback = callback
+        self.error_callback = error_callback
+        self.start_callback = start_callback
+        self.progress_callback = progress_callback
+
+
+class Worker(object):
+    """Handle for a worker process in the pool. The worker receives tasks and
+    sends results via a dedicated pipe.
+    """
+    def __init__(self):
+        """Start the worker process."""
+        self.conn, child_conn = Pipe()
+        self.process = Process(target=worker_loop, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        # Currently executed task and the number of tasks that were executed.
+        self.task = None
+        self.runs = 0
+
+    def execute(self, task: Task):
+        """Send the given task to the worker process.
+
+        Parameters
+        ----------
+        task: flowserv.controller.serial.pool.Task
+            Task that is executed by the worker.
+        """
+        self.conn.send((task.func, task.args))
+        self.task = task
+        self.runs += 1
+
+    def stop(self):
+        """Signal the worker process to exit after it finished its current
+        task.
+        """
+        try:
+            self.conn.send(None)
+        except OSError:  # pragma: no cover
+            pass
+        self.conn.close()
+
+    def terminate(self):
+        """Terminate the worker process immediately."""
+        self.process.terminate()
+        self.process.join()
+        self.conn.close()
+
+
+class WorkerPool(object):
+    """Pool of worker processes with a bounded number of workers. Results of
+    executed tasks are collected by a background thread that calls the task
+    callbacks and dispatches queued tasks to idle workers.
+    """
+    def __init__(self, processes: Optional[int] = None, max_runs: Optional[int] = None):
+        """Initialize the maximum number of workers and the number of tasks
+        that a worker executes before it is replaced.
+
+        Parameters
+        ----------
+        processes: int, default=None
+            Maximum number of worker processes. Defaults to the number of CPUs.
+        max_runs: int, default=None
+            Number of tasks that each worker executes before it is replaced by
+            a new process. Workers are not recycled if the value is None.
+        """
+        self.processes = max(1, processes if processes else (os.cpu_count() or 1))
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+        # Queue of tasks that wait for an idle worker and an index of all
+        # queued and running tasks.
+        self._queue = deque()
+        self._tasks = dict()
+        self._workers = list()
+        # Pipe to wake up the collector thread when the list of workers
+        # changes.
+        self._wakeup_r, self._wakeup_w = Pipe(duplex=False)
+        self._signaled = False
+        self._collector = None
+        self._closed = False
+
+    def cancel(self, task_id: str) -> bool:
+        """Cancel the task with the given identifier. Queued tasks are removed
+        from the queue. If the task is running, the worker that executes the
+        task is terminated and replaced. Returns False if the task is unknown.
+
+        Parameters
+        ----------
+        task_id: string
+            Unique task identifier.
+
+        Returns
+        -------
+        bool
+        """
+        with self._lock:
+            task = self._tasks.pop(task_id, None)
+            if task is None:
+                return False
+            worker = self._find_worker(task)
+            if worker is None:
+                self._queue.remove(task)
+                return True
+            self._workers.remove(worker)
+            worker.terminate()
+            started, failed = self._schedule()
+            self._wakeup()
+        self._notify(started=started, failed=failed)
+        return True
+
+    def close(self):
+        """Terminate all worker processes and the collector thread. Queued
+        tasks are discarded.
+        """
+        with self._lock:
+            self._closed = True
+            for worker in self._workers:
+                worker.terminate()
+            self._workers = list()
+            self._queue.clear()
+            self._tasks = dict()
+            self._wakeup()
+        if self._collector is not None:
+            self._collector.join()
+
+    def pending(self) -> List[str]:
+        """Get identifier for the queued tasks in order of their submission.
+
+        Returns
+        -------
+        list of string
+        """
+        with self._lock:
+            return [t.task_id for t in self._queue]
+
+    def running(self) -> List[str]:
+        """Get identifier for the tasks that are currently executed.
+
+        Returns
+        -------
+        list of string
+        """
+        with self._lock:
+            return [w.task.task_id for w in self._workers if w.task is not None]
+
+    def submit(
+        self, task_id: str, func: Callable, args: Tuple, callback: Callable,
+        error_callback: Optional[Callable] = None,
+        start_callback: Optional[Callable] = None,
+        progress_callback: Optional[Callable] = None
+    ) -> bool:
+        """Submit a task for execution. The task is dispatched immediately if
+        there is an idle worker or if the maximum number of workers has not
+        been reached. Otherwise, the task is queued. The result is True if the
+        task was dispatched and False if it was queued.
+
+        Parameters
+        ----------
+        task_id: string
+            Unique task identifier.
+        func: callable
+            Task function. The function and its arguments have to be
+            serializable.
+        args: tuple
+            Arguments for the task function.
+        callback: callable
+            Function that is called with the result of the task function.
+        error_callback: callable, default=None
+            Function that is called with a list of error messages if the task
+            function or the worker process failed.
+        start_callback: callable, default=None
+            Function that is called (without arguments) when a queued task is
+            dispatched to a worker.
+        progress_callback: callable, default=None
+            Function that is called with the progress reports of the task
+            function.
+
+        Returns
+        -------
+        bool
+
+        Raises
+        ------
+        ValueError
+        """
+        task = Task(
+            task_id=task_id,
+            func=func,
+            args=args,
+            callback=callback,
+            error_callback=error_callback,
+            start_callback=start_callback,
+            progress_callback=progress_callback
+        )
+        with self._lock:
+            if self._closed:
+                raise ValueError('worker pool is closed')
+            if task_id in self._tasks:
+                raise ValueError("duplicate task '{}'".format(task_id))
+            worker = self._idle_worker() if not self._queue else None
+            if worker is not None:
+                worker.execute(task)
+            else:
+                self._queue.append(task)
+            self._tasks[task_id] = task
+            self._start_collector()
+            self._wakeup()
+        return worker is not None
+
+    def _collect(self):
+        """Collect task results from the worker processes. This is the target
+        function for the collector thread.
+        """
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                workers = list(self._workers)
+            conns = {w.conn: w for w in workers}
+            sentinels = {w.process.sentinel: w for w in workers}
+            try:
+                ready = wait(list(conns) + list(sentinels) + [self._wakeup_r])
+            except (OSError, ValueError):  # pragma: no cover
+                # A worker connection was closed while waiting.
+                continue
+            for obj in ready:
+                if obj is self._wakeup_r:
+                    with self._lock:
+                        self._wakeup_r.recv_bytes()
+                        self._signaled = False
+                elif obj in conns:
+                    self._receive(conns[obj])
+                elif obj in sentinels:
+                    worker = sentinels[obj]
+                    # Read any result that the worker sent before it exited.
+                    if worker.conn.closed or not worker.conn.poll():
+                        self._finish(worker, None)
+
+    def _find_worker(self, task: Task) -> Optional[Worker]:
+        """Get the worker that executes the given task. The result is None if
+        the task is queued. Expects that the caller holds the pool lock.
+        """
+        for worker in self._workers:
+            if worker.task is task:
+                return worker
+        return None
+
+    def _finish(self, worker: Worker, result: Optional[Tuple[bool, object]]):
+        """Process the result that was received from a worker. The result is
+        None if the worker process terminated unexpectedly. Calls the task
+        callbacks and dispatches queued tasks.
+        """
+        with self._lock:
+            if worker not in self._workers:
+                # The worker was terminated when its task was canceled.
+                return
+            task = worker.task
+            worker.task = None
+            if task is not None:
+                self._tasks.pop(task.task_id, None)
+            if result is None:
+                self._workers.remove(worker)
+                worker.terminate()
+            elif self.max_runs is not None and worker.runs >= self.max_runs:
+                self._workers.remove(worker)
+                worker.stop()
+            started, failed = self._schedule()
+        if task is not None:
+            if result is None:
+                failed.append((task, ['worker process terminated unexpectedly']))
+            elif result[0]:
+                try:
+                    task.callback(result[1])
+                except Exception as ex:
+                    logging.error(ex)
+            else:
+                failed.append((task, result[1]))
+        self._notify(started=started, failed=failed)
+
+    def _idle_worker(self) -> Optional[Worker]:
+        """Get an idle worker. Starts a new worker if there is no idle worker
+        and the maximum number of workers has not been reached. Returns None if
+        all workers are busy. Expects that the caller holds the pool lock.
+        """
+        for worker in self._workers:
+            if worker.task is None:
+                return worker
+        if len(self._workers) < self.processes:
+            worker = Worker()
+            self._workers.append(worker)
+            return worker
+        return None
+
+    def _notify(self, started: List[Task], failed: List[Tuple[Task, List[str]]]):
+        """Call the start callbacks for dispatched tasks and the error callbacks
+        for failed tasks.
+        """
+        for task in started:
+            if task.start_callback is not None:
+                try:
+                    task.start_callback()
+                except Exception as ex:
+                    logging.error(ex)
+        for task, messages in failed:
+            logging.error('task {} failed: {}'.format(task.task_id, messages))
+            if task.error_callback is not None:
+                try:
+                    task.error_callback(messages)
+                except Exception as ex:
+                    logging.error(ex)
+
+    def _receive(self, worker: Worker):
+        """Receive the result or a progress report from a worker connection.
+        Progress reports are passed to the progress callback of the task that
+        is executed by the worker.
+        """
+        try:
+            result = worker.conn.recv()
+        except (EOFError, OSError):
+            result = None
+        if result is not None and result[0] is None:
+            task = worker.task
+            if task is not None and task.progress_callback is not None:
+                try:
+                    task.progress_callback(result[1])
+                except Exception as ex:
+                    logging.error(ex)
+            return
+        self._finish(worker, result)
+
+    def _schedule(self) -> Tuple[List[Task], List[Tuple[Task, List[str]]]]:
+        """Dispatch queued tasks to idle workers. Returns the list of tasks
+        that were dispatched and the list of tasks that could not be sent to
+        a worker together with the error messages. Expects that the caller
+        holds the pool lock.
+        """
+        started, failed = list(), list()
+        while self._queue and not self._closed:
+            worker = self._idle_worker()
+            if worker is None:
+                break
+            task = self._queue.popleft()
+            try:
+                worker.execute(task)
+                started.append(task)
+            except Exception as ex:
+                self._tasks.pop(task.task_id, None)
+                failed.append((task, util.stacktrace(ex)))
+        return started, failed
+
+    def _start_collector(self):
+        """Start the collector thread if it is not running. Expects that the
+        caller holds the pool lock.
+        """
+        if self._collector is None:
+            self._collector = threading.Thread(target=self._collect, daemon=True)
+            self._collector.start()
+
+    def _wakeup(self):
+        """Wake up the collector thread. Expects that the caller holds the
+        pool lock.
+        """
+        if not self._signaled:
+            self._wakeup_w.send_bytes(b'')
+            self._signaled = True
+
+
+# -- Worker process -----------------------------------------------------------
+
+"""Connection to the worker pool in worker processes. The value is None in
+processes that are not pool workers.
+"""
+_pool_conn = None
+
+"""Functions that are called when a worker process exits (see on_exit)."""
+_exit_funcs = list()
+
+
+def exit_worker(signum, frame):
+    """Signal handler for worker processes that are terminated by the pool.
+    Raises SystemExit to ensure that the exit functions of the worker are
+    called.
+    """
+    raise SystemExit(1)
+
+
+def on_exit(func: Callable):
+    """Register a function that is called (without arguments) when a worker
+    process exits. In contrast to atexit handlers, the function is called
+    when the worker is stopped (e.g., when it is recycled) and when it is
+    terminated by the pool (e.g., when its task is canceled or when the pool
+    is closed). Has no effect in processes that are not pool workers.
+
+    Parameters
+    ----------
+    func: callable
+        Function that releases resources of the worker process.
+    """
+    if func not in _exit_funcs:
+        _exit_funcs.append(func)
+
+
+def report(progress: Any):
+    """Send a progress report for the current task to the worker pool. Has no
+    effect if the function is not called by a task function that is executed
+    by a pool worker.
+
+    Parameters
+    ----------
+    progress: any
+        Serializable progress report.
+    """
+    if _pool_conn is not None:
+        _pool_conn.send((None, progress))
+
+
+def worker_loop(conn: Connection):
+    """Main loop for worker processes. Receives tasks from the given
+    connection and sends the result for each task. A task is a tuple of
+    function and arguments. The result is a tuple of a success flag and the
+    function result or the list of error messages. Progress reports that are
+    sent by the task function (see report) have None as the first element. The
+    loop ends if None is received, if the connection is closed, or if the
+    worker is terminated. The registered exit functions (see on_exit) are
+    called when the loop ends.
+
+    Parameters
+    ----------
+    conn: multiprocessing.connection.Connection
+        Connection to the worker pool.
+    """
+    global _pool_conn
+    _pool_conn = conn
+    # Workers are terminated by the pool with SIGTERM.
+    signal.signal(signal.SIGTERM, exit_worker)
+    try:
+        while True:
+            try:
+                task = conn.recv()
+            except EOFError:
+                return
+            if task is None:
+                return
+            func, args = task
+            try:
+                result = (True, func(*args))
+            except Exception as ex:
+                result = (False, util.stacktrace(ex))
+            conn.send(result)
+    finally:
+        # Do not interrupt the exit functions if the worker is terminated
+        # while it is stopping.
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        for func in _exit_funcs:
+            try:
+                func()
+            except Exception as ex:
+                logging.error(ex)
@@ -0,0 +1,231 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Scheduler for the steps of serial workflows. Steps are executed as soon as
+all the steps that they depend on have finished successfully. Independent
+steps are executed concurrently by a bounded pool of threads. Workflows where
+each step depends on its predecessor are executed sequentially in the calling
+thread.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, List, Optional
+
+import os
+import threading
+
+from flowserv.model.workflow.serial import Step
+
+
+def command_offsets(steps: List[Step]) -> List[int]:
+    """Get the position of the first command of each workflow step in the
+    list of all workflow commands.
+
+    Parameters
+    ----------
+    steps: list(flowserv.model.workflow.serial.Step)
+        List of workflow steps.
+
+    Returns
+    -------
+    list of int
+    """
+    result = list()
+    pos = 0
+    for step in steps:
+        result.append(pos)
+        pos += len(step.commands)
+    return result
+
+
+def dependencies(steps: List[Step]) -> List[List[int]]:
+    """Get the positions of the steps that each workflow step depends on.
+    Steps without explicit dependencies depend on the preceding step. Steps
+    can only depend on steps that precede them in the workflow.
+
+    Parameters
+    ----------
+    steps: list(flowserv.model.workflow.serial.Step)
+        List of workflow steps.
+
+    Returns
+    -------
+    list of list of int
+
+    Raises
+    ------
+    ValueError
+    """
+    result = list()
+    for pos, step in enumerate(steps):
+        if step.depends is not None:
+            for d in step.depends:
+                if d < 0 or d >= pos:
+                    raise ValueError("invalid dependency '{}' for step '{}'".format(d, pos))
+            result.append(list(step.depends))
+        else:
+            result.append([pos - 1] if pos > 0 else [])
+    return result
+
+
+def isolated(steps: List[Step]) -> List[bool]:
+    """Identify the workflow steps that are never executed concurrently with
+    any other step, i.e., steps where every other step is either an ancestor
+    or a descendant of the step.
+
+    Parameters
+    ----------
+    steps: list(flowserv.model.workflow.serial.Step)
+        List of workflow steps.
+
+    Returns
+    -------
+    list of bool
+
+    Raises
+    ------
+    ValueError
+    """
+    ancestors = list()
+    for deps in dependencies(steps):
+        anc = set(deps)
+        for d in deps:
+            anc.update(ancestors[d])
+        ancestors.append(anc)
+    result = list()
+    for pos in range(len(steps)):
+        before = all([p in ancestors[pos] for p in range(pos)])
+        after = all([pos in ancestors[p] for p in range(pos + 1, len(steps))])
+        result.append(before and after)
+    return result
+
+
+def run_concurrent(steps: List[Step], func: Callable, workers: int) -> bool:
+    """Execute the given workflow steps concurrently by a pool of threads. A
+    step is started when all the steps that it depends on were executed
+    successfully. Returns True if all steps were executed successfully (see
+    run_steps).
+
+    Parameters
+    ----------
+    steps: list(flowserv.model.workflow.serial.Step)
+        List of workflow steps.
+    func: callable
+        Function that executes a workflow step.
+    workers: int
+        Maximum number of concurrently executed steps.
+
+    Returns
+    -------
+    bool
+    """
+    deps = dependencies(steps)
+    pending = list(range(len(steps)))
+    done = set()
+    running = dict()
+    failed, errors = False, list()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            if not failed:
+                for pos in list(pending):
+                    if all([d in done for d in deps[pos]]):
+                        running[executor.submit(func, pos)] = pos
+                        pending.remove(pos)
+            if not running:
+                break
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                pos = running.pop(future)
+                if step_result(future, errors):
+                    done.add(pos)
+                else:
+                    failed = True
+    if errors:
+        raise errors[0]
+    return not failed
+
+
+def run_steps(steps: List[Step], func: Callable, workers: Optional[int] = None) -> bool:
+    """Execute the given workflow steps in the order of their dependencies.
+    The function is called with the position of each step and returns True
+    if the step was executed successfully. No further steps are started after
+    a step failed. Returns True if all steps were executed successfully.
+
+    Errors that are raised by the step function are raised after all running
+    steps have finished.
+
+    Parameters
+    ----------
+    steps: list(flowserv.model.workflow.serial.Step)
+        List of workflow steps.
+    func: callable
+        Function that executes a workflow step.
+    workers: int, default=None
+        Maximum number of concurrently executed steps. Defaults to the number
+        of CPUs.
+
+    Returns
+    -------
+    bool
+
+    Raises
+    ------
+    ValueError
+    """
+    workers = max(1, workers if workers else (os.cpu_count() or 1))
+    if workers == 1 or all(isolated(steps)):
+        for pos in range(len(steps)):
+            if not func(pos):
+                return False
+        return True
+    return run_concurrent(steps=steps, func=func, workers=workers)
+
+
+def step_result(future: Future, errors: List[Exception]) -> bool:
+    """Get the result of a finished step. Errors that were raised by the step
+    function are added to the given list. The result is False for steps that
+    raised an error.
+
+    Parameters
+    ----------
+    future: concurrent.futures.Future
+        Future for a finished step.
+    errors: list of Exception
+        Errors that were raised by step functions.
+
+    Returns
+    -------
+    bool
+    """
+    try:
+        return future.result()
+    except Exception as ex:
+        errors.append(ex)
+        return False
+
+
+def synchronized(func: Callable) -> Callable:
+    """Get a wrapper for the given function that serializes calls from
+    multiple threads (e.g., for progress reports of concurrent steps).
+
+    Parameters
+    ----------
+    func: callable
+        Function that is not thread-safe.
+
+    Returns
+    -------
+    callable
+    """
+    lock = threading.Lock()
+
+    def wrapper(*args, **kwargs):
+        with lock:
+            return func(*args, **kwargs)
+
+    return wrapper
@@ -435,3 +435,27 @@ class UnknownWorkflowGroupError(UnknownObjectError):
             obj_id=group_id,
             type_name='group'
         )
+
+
+# -- File transfers -----------------------------------------------------------
+
+class FileTransferError(FlowservError):
+    """Exception indicating that one or more files could not be transferred
+    to or from a file store. Maintains the list of failed transfers as tuples
+    of file key and the error that was raised by the last transfer attempt.
+    """
+    def __init__(self, errors):
+        """Initialize error message and the list of failed transfers.
+
+        Parameters
+        ----------
+        errors: list of (string, Exception)
+            File keys and errors for failed transfers.
+        """
+        self.errors = errors
+        super(FileTransferError, self).__init__(
+            message='transfer failed for {} file(s): {}'.format(
+                len(errors),
+                ', '.join(['{} ({})'.format(key, ex) for key, ex in errors])
+            )
+        )
@@ -0,0 +1,242 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Generator and cache for compressed archives of the result files of workflow
+runs. Cached archives are maintained in the file store next to the respective
+run folder. The database keeps track of the cached archives, their size, and
+the time of their last access. When the total size of the cached archives
+exceeds the configured limit, the least recently used archives are removed.
+The files of removed archives are deleted from the file store only after the
+database transaction has been committed (see ArchiveCache.purge).
+"""
+
+from sqlalchemy.sql.expression import func
+from typing import Iterator, List, Optional, Tuple
+
+import hashlib
+import os
+import tarfile
+import zlib
+
+from flowserv.model.base import RunArchive, RunObject
+from flowserv.model.files.base import DEFAULT_CHUNK_SIZE, FileStore, IOHandle, IOStream
+
+import flowserv.util as util
+
+
+class ArchiveCache(object):
+    """Cache for compressed archives of run result files. Archives are created
+    on the first request and re-used until the run is deleted, the archive is
+    evicted from the cache, or the list of run files changes.
+    """
+    def __init__(self, session, fs: FileStore, size: int):
+        """Initialize the database session, the file store, and the maximum
+        cache size.
+
+        Parameters
+        ----------
+        session: sqlalchemy.orm.session.Session
+            Database session.
+        fs: flowserv.model.files.FileStore
+            File store for run files and cached archives.
+        size: int
+            Maximum total size (in bytes) of all cached archives. Archives are
+            not cached if the size is zero.
+        """
+        self.session = session
+        self.fs = fs
+        self.size = size if size is not None else 0
+        # File store keys of archives that were removed from the cache. The
+        # files are deleted after the transaction has been committed.
+        self.obsolete = list()
+
+    def delete_archive(self, run: RunObject) -> Optional[str]:
+        """Remove the cached archive for the given run from the cache. Returns
+        the file store key of the deleted archive or None if no archive was
+        cached for the run.
+
+        Note that the archive file is not deleted from the file store. This
+        allows to delete the file after the database transaction has been
+        committed.
+
+        Parameters
+        ----------
+        run: flowserv.model.base.RunObject
+            Handle for a workflow run.
+
+        Returns
+        -------
+        string
+        """
+        archive = run.archive
+        if archive is None:
+            return None
+        run.archive = None
+        self.session.flush()
+        return archive.key
+
+    def evict(self, size: int):
+        """Remove the least recently used archives from the cache until an
+        archive of the given size fits into the cache. The archive files are
+        deleted by purge.
+
+        Parameters
+        ----------
+        size: int
+            Size of the archive that is added to the cache.
+        """
+        total = self.session.query(func.sum(RunArchive.size)).scalar() or 0
+        if total + size <= self.size:
+            return
+        archives = self.session\
+            .query(RunArchive)\
+            .order_by(RunArchive.accessed_at, RunArchive.run_id)\
+            .all()
+        for archive in archives:
+            if total + size <= self.size:
+                break
+            total -= archive.size
+            self.obsolete.append(archive.key)
+            self.session.delete(archive)
+        self.session.flush()
+
+    def get_archive(self, run: RunObject, files: List[Tuple[IOHandle, str, int]]) -> IOHandle:
+        """Get file object for the compressed archive of the given run files.
+        Returns the cached archive if it exists for the same list of files.
+        Otherwise, the archive is generated and added to the cache (unless it
+        is larger than the cache). Archives whose members are larger than the
+        cache in total are streamed without being written to the file store.
+
+        Each entry in the file list is a tuple of file object, the name of the
+        archive member, and the file size.
+
+        Parameters
+        ----------
+        run: flowserv.model.base.RunObject
+            Handle for a successful workflow run.
+        files: list of (flowserv.model.files.base.IOHandle, string, int)
+            Run result files.
+
+        Returns
+        -------
+        flowserv.model.files.base.IOHandle
+        """
+        stream = IOStream(lambda: archive_chunks(files))
+        if self.size <= 0:
+            return stream
+        digest = archive_digest(files)
+        archive = run.archive
+        if archive is not None and archive.digest == digest:
+            archive.accessed_at = util.utc_now()
+            return self.fs.load_file(archive.key)
+        # Remove an outdated archive for the run before creating a new one.
+        key = self.delete_archive(run)
+        if key is not None:
+            self.obsolete.append(key)
+        # Do not generate the archive twice if it is not going to fit into the
+        # cache. The archive may still be larger than the cache if the files
+        # cannot be compressed.
+        if sum([size for _, _, size in files]) > self.size:
+            return stream
+        key = self.fs.run_archivefile(run.workflow_id, run.run_id, digest)
+        dirname, filename = os.path.split(key)
+        self.fs.store_files(files=[(stream, filename)], dst=dirname)
+        file = self.fs.load_file(key)
+        size = file.size()
+        if size > self.size:
+            self.fs.delete_file(key)
+            return stream
+        self.evict(size)
+        run.archive = RunArchive(key=key, digest=digest, size=size)
+        self.session.flush()
+        return file
+
+    def purge(self):
+        """Delete the files of archives that were removed from the cache. This
+        method should only be called after the database transaction that
+        removed the archives has been committed.
+        """
+        while self.obsolete:
+            self.fs.delete_file(self.obsolete.pop())
+
+
+# -- Helper Functions ---------------------------------------------------------
+
+def archive_chunks(
+    files: List[Tuple[IOHandle, str, int]], chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Generate a gzip-compressed tar archive for the given list of files. The
+    archive is yielded in chunks as the files are read. File contents are read
+    in chunks of the given size so that the memory usage is independent of the
+    size of the archive.
+
+    Each entry in the file list is a tuple of file object, the name of the
+    archive member, and the file size.
+
+    Parameters
+    ----------
+    files: list of (flowserv.model.files.base.IOHandle, string, int)
+        Files that are added to the archive.
+    chunk_size: int, default=DEFAULT_CHUNK_SIZE
+        Number of bytes that are read from a file at a time.
+
+    Returns
+    -------
+    iterator of bytes
+    """
+    # Use the gzip container format (wbits=31) with the same compression
+    # level as tarfile.
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+    offset = 0
+    for file, name, size in files:
+        info = tarfile.TarInfo(name=name)
+        info.size = size
+        header = info.tobuf(tarfile.DEFAULT_FORMAT, tarfile.ENCODING, 'surrogateescape')
+        data = compressor.compress(header)
+        if data:
+            yield data
+        remaining = size
+        with file.open_stream() as f:
+            while remaining > 0:
+                buf = f.read(min(chunk_size, remaining))
+                if not buf:
+                    raise OSError("unexpected end of data for '{}'".format(name))
+                remaining -= len(buf)
+                data = compressor.compress(buf)
+                if data:
+                    yield data
+        # Pad the file content to a full block.
+        padding = -size % tarfile.BLOCKSIZE
+        offset += len(header) + size + padding
+        data = compressor.compress(tarfile.NUL * padding)
+        if data:
+            yield data
+    # The end of the archive is marked by two empty blocks. The archive is
+    # padded to a full record.
+    offset += 2 * tarfile.BLOCKSIZE
+    end = tarfile.NUL * (2 * tarfile.BLOCKSIZE + (-offset % tarfile.RECORDSIZE))
+    yield compressor.compress(end) + compressor.flush()
+
+
+def archive_digest(files: List[Tuple[IOHandle, str, int]]) -> str:
+    """Get digest for a list of archive members. The digest is computed from
+    the names and sizes of the archived files.
+
+    Parameters
+    ----------
+    files: list of (flowserv.model.files.base.IOHandle, string, int)
+        Files that are added to the archive.
+
+    Returns
+    -------
+    string
+    """
+    h = hashlib.sha1()
+    for _, name, size in sorted(files, key=lambda f: f[1]):
+        h.update('{}:{}\n'.format(name, size).encode('utf-8'))
+    return h.hexdigest()
@@ -10,8 +10,8 @@
 
 import json
 
-from sqlalchemy import Boolean, Integer, String, Text
-from sqlalchemy import Column, ForeignKey, UniqueConstraint, Table
+from sqlalchemy import BigInteger, Boolean, Float, Integer, String, Text
+from sqlalchemy import Column, ForeignKey, Index, UniqueConstraint, Table
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.types import TypeDecorator, Unicode
@@ -187,6 +187,8 @@ class User(Base):
     name = Column(String(256), nullable=False)
     active = Column(Boolean, nullable=False, default=False)
 
+    __table_args__ = (Index('idx_user_name', 'name'),)
+
     # -- Relationships --------------------------------------------------------
     api_key = relationship(
         'APIKey',
@@ -279,6 +281,37 @@ class WorkflowRankingRun(Base):
     )
 
 
+class WorkflowLeaderboardEntry(Base):
+    """Materialized entry in the leaderboard of a workflow. For each workflow
+    group the entry references the best successful run according to the
+    default sort order that is defined in the workflow result schema. Entries
+    are updated incrementally when runs succeed or are deleted.
+    """
+    # -- Schema ---------------------------------------------------------------
+    __tablename__ = 'workflow_leaderboard'
+
+    group_id = Column(
+        String(32),
+        ForeignKey('workflow_group.group_id'),
+        primary_key=True
+    )
+    workflow_id = Column(
+        String(32),
+        ForeignKey('workflow_template.workflow_id'),
+        nullable=False
+    )
+    run_id = Column(
+        String(32),
+        ForeignKey('workflow_run.run_id'),
+        nullable=False
+    )
+
+    __table_args__ = (Index('idx_leaderboard_workflow', 'workflow_id'),)
+
+    # -- Relationships --------------------------------------------------------
+    group = relationship('GroupObject', back_populates='leaderboard_entry')
+
+
 class WorkflowObject(Base):
     """Each workflow has a unique name, an optional short descriptor and long
     instruction text. The five main components of the template are (i) the
@@ -423,7 +456,15 @@ class GroupObject(Base):
 
     UniqueConstraint('workflow_id', 'name')
 
+    __table_args__ = (Index('idx_group_workflow', 'workflow_id'),)
+
     # -- Relationships --------------------------------------------------------
+    leaderboard_entry = relationship(
+        'WorkflowLeaderboardEntry',
+        uselist=False,
+        back_populates='group',
+        cascade='all, delete, delete-orphan'
+    )
     members = relationship(
         'User',
         secondary=group_member,
@@ -491,10 +532,51 @@ class RunObject(Base):
     arguments = Column(JsonObject)
     result = Column(JsonObject)
 
+    __table_args__ = (
+        Index('idx_run_group', 'group_id'),
+        Index('idx_run_workflow_state', 'workflow_id', 'state_type'),
+        Index('idx_run_created_at', 'created_at')
+    )
+
     # -- Relationships --------------------------------------------------------
+    archive = relationship(
+        'RunArchive',
+        uselist=False,
+        back_populates='run',
+        cascade='all, delete, delete-orphan'
+    )
+    executor = relationship(
+        'RunExecutor',
+        uselist=False,
+        back_populates='run',
+        cascade='all, delete, delete-orphan'
+    )
     files = relationship('RunFile', cascade='all, delete, delete-orphan')
     group = relationship('GroupObject', back_populates='runs')
     log = relationship('RunMessage', cascade='all, delete, delete-orphan')
+    queue_entry = relationship(
+        'RunQueueEntry',
+        uselist=False,
+        back_populates='run',
+        cascade='all, delete, delete-orphan'
+    )
+    remote_task = relationship(
+        'RunRemoteTask',
+        uselist=False,
+        back_populates='run',
+        cascade='all, delete, delete-orphan'
+    )
+    result_values = relationship(
+        'RunResultValue',
+        back_populates='run',
+        cascade='all, delete, delete-orphan'
+    )
+    steps = relationship(
+        'RunStep',
+        back_populates='run',
+        order_by='RunStep.pos',
+        cascade='all, delete, delete-orphan'
+    )
     workflow = relationship('WorkflowObject', back_populates='runs')
 
     def get_file(self, by_id=None, by_key=None):
@@ -655,6 +737,63 @@ class RunObject(Base):
             )
 
 
+class RunArchive(Base):
+    """Cached archive of the result files of a successful workflow run. The
+    archive is maintained in the file store. The digest identifies the list
+    of run files (and their sizes) that were used to generate the archive.
+    The timestamp of the last access is used to evict archives from the cache.
+    """
+    # -- Schema ---------------------------------------------------------------
+    __tablename__ = 'run_archive'
+
+    run_id = Column(
+        String(32),
+        ForeignKey('workflow_run.run_id'),
+        primary_key=True
+    )
+    key = Column(String(1024), nullable=False)
+    digest = Column(String(64), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    accessed_at = Column(String(32), default=util.utc_now, nullable=False)
+
+    __table_args__ = (Index('idx_run_archive_accessed', 'accessed_at'),)
+
+    # Relationships -----------------------------------------------------------
+    run = relationship('RunObject', back_populates='archive')
+
+
+class RunExecutor(Base):
+    """Process that executes an active workflow run. The executor is the
+    process that dispatched the run to the workflow engine. It is identified by
+    the host name, the process identifier, and a unique token for the process.
+    The token distinguishes processes with the same identifier (e.g., after a
+    restart of a container). The process start time (if available) is used to
+    detect reused process identifiers. The run directory is the local folder
+    that contains the run files while the run is active. The priority of the
+    queue entry of a dispatched run is kept to re-queue the run with the same
+    priority. Executor records are used to detect (and recover) runs whose
+    executor is no longer alive.
+    """
+    # -- Schema ---------------------------------------------------------------
+    __tablename__ = 'run_executor'
+
+    run_id = Column(
+        String(32),
+        ForeignKey('workflow_run.run_id'),
+        primary_key=True
+    )
+    host = Column(String(256), nullable=False)
+    pid = Column(Integer, nullable=False)
+    token = Column(String(32), nullable=False)
+    started = Column(BigInteger)
+    rundir = Column(String(1024))
+    priority = Column(Integer, default=0, nullable=False)
+    assigned_at = Column(String(32), default=util.utc_now, nullable=False)
+
+    # Relationships -----------------------------------------------------------
+    run = relationship('RunObject', back_populates='executor')
+
+
 class RunFile(FileObject):
     """File resources that are created by successful workflow runs."""
     # -- Schema ---------------------------------------------------------------
@@ -690,6 +829,115 @@ class RunMessage(Base):
     run = relationship('RunObject', back_populates='log')
 
 
+class RunQueueEntry(Base):
+    """Entry in the persistent queue of runs that wait to be dispatched to the
+    workflow engine. Entries are removed when the run is dispatched. Runs with
+    higher priority are dispatched first.
+    """
+    # -- Schema ---------------------------------------------------------------
+    __tablename__ = 'run_queue'
+
+    run_id = Column(
+        String(32),
+        ForeignKey('workflow_run.run_id'),
+        primary_key=True
+    )
+    priority = Column(Integer, default=0, nullable=False)
+    queued_at = Column(String(32), default=util.utc_now, nullable=False)
+
+    __table_args__ = (Index('idx_run_queue_order', 'priority', 'queued_at'),)
+
+    # Relationships -----------------------------------------------------------
+    run = relationship('RunObject', back_populates='queue_entry')
+
+
+class RunRemoteTask(Base):
+    """Monitoring information for an active run that is executed by a remote
+    workflow engine. Maintains the identifier of the workflow on the remote
+    engine, the run output files, and the poll schedule (current interval in
+    seconds and the time of the next state check in seconds since the epoch).
+    The last known state of the run is the state of the run object. Entries
+    allow a restarted controller to resume monitoring (and to cancel) remote
+    runs. They are removed when the run becomes inactive.
+    """
+    # -- Schema ---------------------------------------------------------------
+    __tablename__ = 'run_remote_task'
+
+    run_id = Column(
+        String(32),
+        ForeignKey('workflow_run.run_id'),
+        primary_key=True
+    )
+    workflow_id = Column(String(256), nullable=False)
+    output_files = Column(JsonObject)
+    interval = Column(Float, nullable=False)
+    next_poll = Column(Float, nullable=False)
+
+    # Relationships -----------------------------------------------------------
+    run = relationship('RunObject', back_populates='remote_task')
+
+
+class RunResultValue(Base):
+    """Typed value for a column in the result schema of a workflow run. The
+    value is stored in the column that matches the data type of the result
+    column. The remaining value columns are None. The typed values allow the
+    database to sort and filter run results for workflow rankings without
+    deserializing the JSON result object of each run. Values are looked up by
+    their primary key. The ranking order is not backed by an index on the
+    values since runs without a value are included via an outer join.
+    """
+    # -- Schema ---------------------------------------------------------------
+    __tablename__ = 'run_result_value'
+
+    run_id = Column(
+        String(32),
+        ForeignKey('workflow_run.run_id'),
+        primary_key=True
+    )
+    column_id = Column(String(256), primary_key=True)
+    workflow_id = Column(
+        String(32),
+        ForeignKey('workflow_template.workflow_id'),
+        nullable=False
+    )
+    int_value = Column(Integer)
+    float_value = Column(Float)
+    text_value = Column(Text)
+
+    # Relationships -----------------------------------------------------------
+    run = relationship('RunObject', back_populates='result_values')
+
+
+class RunStep(Base):
+    """Progress information for a command that is executed as part of a
+    workflow step. Commands are identified by their position in the list of
+    all workflow commands. The exit code and the finish time are None while
+    the command is running. The measured resource usage of a finished command
+    (CPU time and wall time in seconds and peak memory in bytes) is None if it
+    was not reported by the workflow engine.
+    """
+    # -- Schema ---------------------------------------------------------------
+    __tablename__ = 'run_step'
+
+    run_id = Column(
+        String(32),
+        ForeignKey('workflow_run.run_id'),
+        primary_key=True
+    )
+    pos = Column(Integer, primary_key=True)
+    step = Column(Integer, nullable=False)
+    command = Column(Text, nullable=False)
+    started_at = Column(String(32), nullable=False)
+    finished_at = Column(String(32))
+    exit_code = Column(Integer)
+    cpu_time = Column(Float)
+    max_memory = Column(BigInteger)
+    wall_time = Column(Float)
+
+    # Relationships -----------------------------------------------------------
+    run = relationship('RunObject', back_populates='steps')
+
+
 # -- Helper classes and functions ---------------------------------------------
 
 def by_pos(msg):
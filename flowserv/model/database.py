@@ -11,7 +11,7 @@ sessions as well as to create a fresh database.
 """
 
 from __future__ import annotations
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, scoped_session
 from typing import Optional
 
@@ -103,6 +103,44 @@ class DB(object):
         """
         return SessionScope(self._session())
 
+    def upgrade(self) -> DB:
+        """Upgrade an existing database to the current database model schema
+        without erasing any data. Creates all tables and indexes that are
+        missing in the database. The typed result values and the leaderboards
+        for all workflows are re-computed from the stored run results.
+
+        Nullable columns that were added to existing tables are added to the
+        database tables. Other changes to existing columns are not handled by
+        the upgrade.
+        """
+        # Add import for modules that contain ORM definitions.
+        import flowserv.model.base  # noqa: F401
+        # Create missing tables (including their indexes) first. Then create
+        # missing indexes for all existing tables.
+        Base.metadata.create_all(self._engine)
+        inspector = inspect(self._engine)
+        for table in Base.metadata.sorted_tables:
+            columns = {col['name'] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns and column.nullable:
+                    coltype = column.type.compile(dialect=self._engine.dialect)
+                    sql = 'ALTER TABLE {} ADD COLUMN {} {}'.format(table.name, column.name, coltype)
+                    with self._engine.begin() as conn:
+                        conn.execute(text(sql))
+            indexes = {ix['name'] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(self._engine)
+        # Re-compute derived ranking information for all workflows.
+        with self.session() as session:
+            from flowserv.model.base import WorkflowObject
+            from flowserv.model.ranking import RankingManager
+            rankings = RankingManager(session=session)
+            for workflow in session.query(WorkflowObject).all():
+                rankings.rebuild_result_values(workflow)
+                rankings.rebuild_leaderboard(workflow)
+        return self
+
 
 class SessionScope(object):
     """Context manager for providing transactional scope around a series of
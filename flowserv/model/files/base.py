@@ -23,14 +23,20 @@ The folder structure is currently as follows:
                     {file_id}: Folder for uploaded file
         runs/                : Folder for all workflow runs
             {run_id}         : Result files for individual runs
+            {run_id}.{digest}.tar.gz : Cached archive of run result files
         static/
 """
 
 from abc import ABCMeta, abstractmethod
-from io import BytesIO
-from typing import IO, List, Tuple
+from io import BufferedReader, BytesIO, RawIOBase
+from typing import Callable, IO, Iterable, Iterator, List, Optional, Tuple
 
 import os
+import shutil
+
+
+"""Default size (in bytes) for chunks of streamed file content."""
+DEFAULT_CHUNK_SIZE = 64 * 1024
 
 
 # -- File objects for file stores ---------------------------------------------
@@ -39,7 +45,51 @@ class IOHandle(metaclass=ABCMeta):
     """Wrapper around different file objects (i.e., files on disk or files in
     object stores). Provides functionality to load file content as a bytes
     buffer and to write file contents to disk.
+
+    In addition to loading the complete file content into memory, the handle
+    provides methods to read the content as a stream of chunks and to copy the
+    content to a file object. Implementations should override these methods
+    if the underlying storage allows for more efficient access.
     """
+    def copy_to(self, fileobj: IO):
+        """Copy the file content to the given writable file object. The content
+        is copied in chunks.
+
+        Parameters
+        ----------
+        fileobj: io.IOBase
+            Writable file object.
+
+        Raises
+        ------
+        flowserv.error.UnknownFileError
+        """
+        with self.open_stream() as f:
+            shutil.copyfileobj(f, fileobj, DEFAULT_CHUNK_SIZE)
+
+    def iter_chunks(self, chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Get an iterator over chunks of the file content.
+
+        Parameters
+        ----------
+        chunk_size: int, default=DEFAULT_CHUNK_SIZE
+            Maximum number of bytes in each chunk.
+
+        Returns
+        -------
+        iterator of bytes
+
+        Raises
+        ------
+        flowserv.error.UnknownFileError
+        """
+        with self.open_stream() as f:
+            while True:
+                data = f.read(chunk_size)
+                if not data:
+                    break
+                yield data
+
     @abstractmethod
     def open(self) -> IO:
         """Get file contents as a BytesIO buffer.
@@ -54,9 +104,30 @@ class IOHandle(metaclass=ABCMeta):
         """
         raise NotImplementedError()  # pragma: no cover
 
+    def open_stream(self) -> IO:
+        """Get a readable file object for the file contents. In contrast to
+        :meth:`open`, implementations may return a file object that reads the
+        content on demand instead of loading the whole file into memory. The
+        returned object is not guaranteed to be seekable. The caller is
+        responsible for closing the returned file object.
+
+        The default implementation returns the buffer from :meth:`open`.
+
+        Returns
+        -------
+        io.IOBase
+
+        Raises
+        ------
+        flowserv.error.UnknownFileError
+        """
+        return self.open()
+
     @abstractmethod
-    def size(self) -> int:
-        """Get size of the file in the number of bytes.
+    def size(self) -> Optional[int]:
+        """Get size of the file in the number of bytes. The result is None for
+        content that is generated on demand and whose size is unknown (see
+        IOStream). Callers should omit the content length in this case.
 
         Returns
         -------
@@ -76,6 +147,54 @@ class IOHandle(metaclass=ABCMeta):
         raise NotImplementedError()  # pragma: no cover
 
 
+class ChunkReader(RawIOBase):
+    """Read-only file object for content that is provided by an iterator of
+    bytes chunks. Chunks are consumed on demand as the content is read.
+    """
+    def __init__(self, chunks: Iterable[bytes]):
+        """Initialize the chunk iterator.
+
+        Parameters
+        ----------
+        chunks: iterable of bytes
+            Chunks of the file content.
+        """
+        self.chunks = iter(chunks)
+        self.buf = b''
+
+    def readable(self) -> bool:
+        """The file object is readable.
+
+        Returns
+        -------
+        bool
+        """
+        return True
+
+    def readinto(self, b) -> int:
+        """Read bytes into a pre-allocated buffer. Returns the number of bytes
+        that were read. The result is zero at the end of the content.
+
+        Parameters
+        ----------
+        b: bytearray or memoryview
+            Buffer for the read bytes.
+
+        Returns
+        -------
+        int
+        """
+        while not self.buf:
+            try:
+                self.buf = next(self.chunks)
+            except StopIteration:
+                return 0
+        n = min(len(b), len(self.buf))
+        b[:n] = self.buf[:n]
+        self.buf = self.buf[n:]
+        return n
+
+
 class IOBuffer(IOHandle):
     """Implementation of the file object interface for bytes IO buffers."""
     def __init__(self, buf: IO):
@@ -98,6 +217,16 @@ class IOBuffer(IOHandle):
         self.buf.seek(0)
         return self.buf
 
+    def open_stream(self) -> IO:
+        """Get a new buffer with the buffer contents. The associated buffer is
+        not affected when the returned buffer is closed.
+
+        Returns
+        -------
+        io.BytesIO
+        """
+        return type(self.buf)(self.buf.getvalue())
+
     def size(self) -> int:
         """Get size of the file in the number of bytes.
 
@@ -116,7 +245,96 @@ class IOBuffer(IOHandle):
             Name of the file to which the content is written.
         """
         with open(filename, 'wb') as f:
-            f.write(self.open().read())
+            self.copy_to(f)
+
+
+class IOStream(IOHandle):
+    """Implementation of the file object interface for content that is
+    generated on demand (e.g., a compressed archive of run result files). The
+    content is provided by a function that returns a new iterator of bytes
+    chunks each time the content is read. Memory usage for streaming and
+    storing the content is therefore bounded by the size of the chunks. The
+    size of the content is unknown.
+    """
+    def __init__(self, chunks: Callable[[], Iterator[bytes]]):
+        """Initialize the function that generates the content chunks.
+
+        Parameters
+        ----------
+        chunks: callable
+            Function that returns an iterator of bytes chunks for the content.
+        """
+        self.chunks = chunks
+
+    def copy_to(self, fileobj: IO):
+        """Write the content chunks to the given file object.
+
+        Parameters
+        ----------
+        fileobj: io.IOBase
+            Writable file object.
+        """
+        for chunk in self.iter_chunks():
+            fileobj.write(chunk)
+
+    def iter_chunks(self, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        """Get an iterator over chunks of the file content. The chunks are
+        returned as they are generated by the stream.
+
+        Parameters
+        ----------
+        chunk_size: int, default=None
+            Ignored. The size of the chunks is defined by the stream.
+
+        Returns
+        -------
+        iterator of bytes
+        """
+        return self.chunks()
+
+    def open(self) -> IO:
+        """Get the complete content as a BytesIO buffer.
+
+        Returns
+        -------
+        io.BytesIO
+        """
+        buf = BytesIO()
+        for chunk in self.iter_chunks():
+            buf.write(chunk)
+        buf.seek(0)
+        return buf
+
+    def open_stream(self) -> IO:
+        """Get a readable (non-seekable) file object that generates the content
+        on demand.
+
+        Returns
+        -------
+        io.BufferedReader
+        """
+        return BufferedReader(ChunkReader(self.iter_chunks()))
+
+    def size(self) -> Optional[int]:
+        """The size of generated content is unknown. The result is always
+        None. The content is not generated only to determine its size.
+
+        Returns
+        -------
+        int
+        """
+        return None
+
+    def store(self, filename: str):
+        """Write the content chunks to disk.
+
+        Parameters
+        ----------
+        filename: string
+            Name of the file to which the content is written.
+        """
+        with open(filename, 'wb') as f:
+            self.copy_to(f)
 
 
 # -- Wrapper for database files -----------------------------------------------
@@ -144,6 +362,40 @@ class FileHandle(IOHandle):
         self.mime_type = mime_type
         self.fileobj = fileobj
 
+    def copy_to(self, fileobj: IO):
+        """Copy the content of the associated file object to the given file
+        object.
+
+        Parameters
+        ----------
+        fileobj: io.IOBase
+            Writable file object.
+
+        Raises
+        ------
+        flowserv.error.UnknownFileError
+        """
+        self.fileobj.copy_to(fileobj)
+
+    def iter_chunks(self, chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Get an iterator over chunks of the content of the associated file
+        object.
+
+        Parameters
+        ----------
+        chunk_size: int, default=DEFAULT_CHUNK_SIZE
+            Maximum number of bytes in each chunk.
+
+        Returns
+        -------
+        iterator of bytes
+
+        Raises
+        ------
+        flowserv.error.UnknownFileError
+        """
+        return self.fileobj.iter_chunks(chunk_size)
+
     def open(self) -> IO:
         """Get an BytesIO buffer containing the file content. If the associated
         file object is a path to a file on disk the file is being read.
@@ -158,8 +410,23 @@ class FileHandle(IOHandle):
         """
         return self.fileobj.open()
 
-    def size(self) -> int:
-        """Get size of the file in the number of bytes.
+    def open_stream(self) -> IO:
+        """Get a readable file object for the content of the associated file
+        object.
+
+        Returns
+        -------
+        io.IOBase
+
+        Raises
+        ------
+        flowserv.error.UnknownFileError
+        """
+        return self.fileobj.open_stream()
+
+    def size(self) -> Optional[int]:
+        """Get size of the file in the number of bytes. The result is None if
+        the size of the file is unknown.
 
         Returns
         -------
@@ -194,6 +461,16 @@ class FlaskFile(IOHandle):
         """
         self.file = file
 
+    def copy_to(self, fileobj: IO):
+        """Write the uploaded file to the given file object.
+
+        Parameters
+        ----------
+        fileobj: io.IOBase
+            Writable file object.
+        """
+        self.file.save(fileobj)
+
     def open(self) -> IO:
         """Get file contents as a BytesIO buffer.
 
@@ -305,6 +582,26 @@ class FileStore(metaclass=ABCMeta):
         """
         raise NotImplementedError()  # pragma: no cover
 
+    def run_archivefile(self, workflow_id: str, run_id: str, digest: str) -> str:
+        """Get path to the cached archive of the result files for a workflow
+        run. The digest identifies the archived files.
+
+        Parameters
+        ----------
+        workflow_id: string
+            Unique workflow identifier
+        run_id: string
+            Unique run identifier
+        digest: string
+            Digest for the list of archived run files.
+
+        Returns
+        -------
+        string
+        """
+        workflowdir = self.workflow_basedir(workflow_id)
+        return os.path.join(workflowdir, 'runs', '{}.{}.tar.gz'.format(run_id, digest))
+
     def run_basedir(self, workflow_id: str, run_id: str) -> str:
         """Get path to the base directory for all files that are maintained for
         a workflow run.
@@ -6,20 +6,37 @@
 # flowServ is free software; you can redistribute it and/or modify it under the
 # terms of the MIT License; see LICENSE file for more details.
 
-"""Implementation of the file store that uses the local file system."""
+"""Implementation of the file store that uses the local file system.
+
+Files that are copied from the file store into run directories are staged
+according to the staging mode in the configuration. Instead of copying the
+content of each file, files can be cloned using copy-on-write reflinks (on
+file systems that support them) or they can be hard-linked. The cost of
+staging a folder then depends on the number of files rather than on their
+size.
+"""
 
 import os
 import shutil
+import stat
+import sys
 
 from typing import Dict, IO, List, Optional, Tuple
 
-from flowserv.config import FLOWSERV_BASEDIR
-from flowserv.model.files.base import FileStore, IOHandle
+from flowserv.config import (
+    FLOWSERV_BASEDIR, FLOWSERV_STAGING, DEFAULT_STAGING, STAGING_COPY,
+    STAGING_HARDLINK, STAGING_MODES, STAGING_REFLINK
+)
+from flowserv.model.files.base import DEFAULT_CHUNK_SIZE, FileStore, IOHandle
 
 import flowserv.error as err
 import flowserv.util as util
 
 
+"""Request code for the Linux ioctl that clones a file (FICLONE)."""
+FICLONE = 0x40049409
+
+
 class FSFile(IOHandle):
     """Implementation of the file object interface for files that are stored on
     the file system.
@@ -34,6 +51,25 @@ class FSFile(IOHandle):
         """
         self.filename = filename
 
+    def copy_to(self, fileobj: IO):
+        """Copy the file content to the given file object. Uses `os.sendfile`
+        to copy the content without reading it into user space if the target
+        is backed by a file descriptor. Falls back to copying the content in
+        chunks otherwise.
+
+        Parameters
+        ----------
+        fileobj: io.IOBase
+            Writable file object.
+
+        Raises
+        ------
+        flowserv.error.UnknownFileError
+        """
+        with self.open_stream() as f:
+            if not sendfile(src=f, dst=fileobj):
+                shutil.copyfileobj(f, fileobj, DEFAULT_CHUNK_SIZE)
+
     def open(self) -> IO:
         """Get file contents as a BytesIO buffer.
 
@@ -49,6 +85,21 @@ class FSFile(IOHandle):
             raise err.UnknownFileError(self.filename)
         return util.read_buffer(self.filename)
 
+    def open_stream(self) -> IO:
+        """Open the file on disk for reading.
+
+        Returns
+        -------
+        io.BufferedReader
+
+        Raises
+        ------
+        flowserv.error.UnknownFileError
+        """
+        if not os.path.isfile(self.filename):
+            raise err.UnknownFileError(self.filename)
+        return open(self.filename, 'rb')
+
     def size(self) -> int:
         """Get size of the file in the number of bytes.
 
@@ -87,6 +138,9 @@ class FileSystemStore(FileStore):
         self.basedir = env.get(FLOWSERV_BASEDIR)
         if self.basedir is None:
             raise err.MissingConfigurationError('API base directory')
+        self.staging = env.get(FLOWSERV_STAGING, DEFAULT_STAGING)
+        if self.staging not in STAGING_MODES:
+            raise err.InvalidArgumentError("invalid staging mode '{}'".format(self.staging))
 
     def __repr__(self):
         """Get object representation ."""
@@ -96,6 +150,9 @@ class FileSystemStore(FileStore):
         """Copy all files in the folder with the given key to a target folder.
         Creates the destination folder if it does not exist.
 
+        Files are staged in the target folder according to the staging mode
+        of the file store. Hard-linked files are read-only.
+
         Parameters
         ----------
         key: string
@@ -103,18 +160,7 @@ class FileSystemStore(FileStore):
         dst: string
             Path on the file system to the target folder.
         """
-        # Create target directory if it does not exist.
-        os.makedirs(dst, exist_ok=True)
-        # Copy all files and folders from the source folder to the target
-        # folder.
-        src = os.path.join(self.basedir, key)
-        for filename in os.listdir(src):
-            source = os.path.join(src, filename)
-            target = os.path.join(dst, filename)
-            if os.path.isdir(source):
-                shutil.copytree(src=source, dst=target)
-            else:
-                shutil.copy(src=source, dst=target)
+        stage_folder(src=os.path.join(self.basedir, key), dst=dst, mode=self.staging, readonly=True)
 
     def delete_file(self, key: str):
         """Delete the file with the given key.
@@ -163,6 +209,11 @@ class FileSystemStore(FileStore):
         for all files. The file list contains tuples of file object and target
         path. The target is relative to the base destination path.
 
+        Files on the local file system (e.g., the result files in a run
+        directory) are staged in the file store according to the staging mode
+        of the file store. In 'hardlink' mode the stored file and the source
+        file share their content.
+
         Paramaters
         ----------
         file: flowserv.model.files.base.IOHandle
@@ -173,10 +224,20 @@ class FileSystemStore(FileStore):
         # Ensure that the target directory exists.
         target = os.path.join(self.basedir, dst)
         os.makedirs(target, exist_ok=True)
-        # Use the file object's store method to store the file at the target
-        # destination.
         for file, filename in files:
-            file.store(os.path.join(target, filename))
+            filename = os.path.join(target, filename)
+            # Remove an existing file instead of overwriting it. The file may
+            # be read-only or linked into run directories.
+            if os.path.isfile(filename):
+                os.remove(filename)
+            if isinstance(file, FSFile) and self.staging != STAGING_COPY and os.path.isfile(file.filename):
+                # Link (or clone) local files instead of copying them.
+                os.makedirs(os.path.dirname(filename), exist_ok=True)
+                stage_file(src=file.filename, dst=filename, mode=self.staging)
+            else:
+                # Use the file object's store method to store the file at the
+                # target destination.
+                file.store(filename)
 
 
 # -- Helper Methods -----------------------------------------------------------
@@ -203,6 +264,155 @@ def copy(src: str, dst: str):
         shutil.copyfile(src=src, dst=dst)
 
 
+def reflink(src: str, dst: str) -> bool:
+    """Clone a file using a copy-on-write reflink. The cloned file shares its
+    data blocks with the source file until either of them is modified. Returns
+    False if the platform or the file system does not support reflinks. In
+    this case the target file may have been created but its content is
+    undefined.
+
+    Parameters
+    ----------
+    src: string
+        Path to the source file.
+    dst: string
+        Path to the target file.
+
+    Returns
+    -------
+    bool
+    """
+    if not sys.platform.startswith('linux'):
+        return False  # pragma: no cover
+    import fcntl
+    try:
+        with open(src, 'rb') as fin, open(dst, 'wb') as fout:
+            fcntl.ioctl(fout.fileno(), FICLONE, fin.fileno())
+    except OSError:
+        return False
+    shutil.copymode(src, dst)
+    return True
+
+
+def sendfile(src: IO, dst: IO) -> bool:
+    """Copy the content of a file on disk to a file object using `os.sendfile`.
+    Returns False if the target file object is not backed by a file descriptor
+    or if the system does not support `os.sendfile` for the target. In this
+    case nothing has been copied.
+
+    Parameters
+    ----------
+    src: io.BufferedReader
+        File on disk that was opened for reading.
+    dst: io.IOBase
+        Writable file object.
+
+    Returns
+    -------
+    bool
+    """
+    if not hasattr(os, 'sendfile'):
+        return False  # pragma: no cover
+    try:
+        out_fd = dst.fileno()
+    except (AttributeError, OSError):
+        return False
+    # Write buffered data before copying the file content.
+    dst.flush()
+    in_fd = src.fileno()
+    size = os.fstat(in_fd).st_size
+    offset = 0
+    while offset < size:
+        try:
+            sent = os.sendfile(out_fd, in_fd, offset, size - offset)
+        except OSError:
+            if offset == 0:
+                return False
+            raise
+        if sent == 0:
+            break
+        offset += sent
+    # Synchronize the position of buffered file objects with the position of
+    # the underlying file descriptor.
+    if dst.seekable():
+        dst.seek(os.lseek(out_fd, 0, os.SEEK_CUR))
+    return True
+
+
+def stage_file(
+    src: str, dst: str, mode: Optional[str] = STAGING_COPY,
+    readonly: Optional[bool] = False
+):
+    """Stage a file from the file store in a run directory. In 'hardlink' mode
+    the target is a hard link to the source file. In 'reflink' mode the target
+    is a copy-on-write clone of the source file. Falls back to cloning (in
+    'hardlink' mode) and to copying the file if links are not supported
+    (e.g., because source and target are on different devices).
+
+    A hard link shares the file content with the source file. If the readonly
+    flag is True, write permissions are removed from hard-linked files (and
+    therefore from the source file) to protect the source from modifications
+    by workflow steps. Note that this does not prevent modifications by
+    processes that run as root.
+
+    Parameters
+    ----------
+    src: string
+        Path to the source file.
+    dst: string
+        Path to the target file.
+    mode: string, default='copy'
+        Staging mode.
+    readonly: bool, default=False
+        Remove write permissions from hard-linked files.
+    """
+    if mode == STAGING_HARDLINK:
+        try:
+            os.link(src, dst)
+        except OSError:
+            pass
+        else:
+            if readonly and os.name == 'posix':
+                perms = stat.S_IMODE(os.stat(dst).st_mode)
+                os.chmod(dst, perms & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+            return
+    if mode in [STAGING_HARDLINK, STAGING_REFLINK] and reflink(src, dst):
+        return
+    shutil.copy2(src, dst)
+
+
+def stage_folder(
+    src: str, dst: str, mode: Optional[str] = STAGING_COPY,
+    readonly: Optional[bool] = False
+):
+    """Stage all files and folders in the source folder in the target folder.
+    Creates the target folder if it does not exist.
+
+    Parameters
+    ----------
+    src: string
+        Path to the source folder.
+    dst: string
+        Path to the target folder.
+    mode: string, default='copy'
+        Staging mode.
+    readonly: bool, default=False
+        Remove write permissions from hard-linked files.
+    """
+    os.makedirs(dst, exist_ok=True)
+    for root, dirs, files in os.walk(src, followlinks=True):
+        target = os.path.join(dst, os.path.relpath(root, src))
+        for dirname in dirs:
+            os.makedirs(os.path.join(target, dirname), exist_ok=True)
+        for filename in files:
+            stage_file(
+                src=os.path.join(root, filename),
+                dst=os.path.join(target, filename),
+                mode=mode,
+                readonly=readonly
+            )
+
+
 def walk(
     files: List[Tuple[str, str]], result: Optional[Tuple[FSFile, str]] = None
 ) -> List[Tuple[FSFile, str]]:
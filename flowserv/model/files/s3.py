@@ -10,14 +10,24 @@
 bucket-like) objects.
 """
 
+from __future__ import annotations
+
 import botocore
+import hashlib
 import os
+import tempfile
 
-from io import BytesIO
-from typing import Dict, IO, List, Set, Tuple, TypeVar
+from io import BufferedReader, BytesIO
+from typing import Callable, Dict, IO, Iterator, List, Optional, Set, Tuple, TypeVar
 
-from flowserv.config import FLOWSERV_BASEDIR, FLOWSERV_S3BUCKET
-from flowserv.model.files.base import FileStore, IOHandle
+from flowserv.config import (
+    FLOWSERV_BASEDIR, FLOWSERV_S3BUCKET, FLOWSERV_S3_CACHEDIR, FLOWSERV_S3_RETRIES,
+    FLOWSERV_S3_WORKERS, FLOWSERV_STAGING, DEFAULT_S3_RETRIES, DEFAULT_S3_WORKERS,
+    DEFAULT_STAGING
+)
+from flowserv.model.files.base import ChunkReader, DEFAULT_CHUNK_SIZE, FileStore, IOHandle
+from flowserv.model.files.fs import stage_file
+from flowserv.model.files.transfer import TransferManager
 
 import flowserv.error as err
 
@@ -25,6 +35,9 @@ import flowserv.error as err
 # Type variable for S3 bucket objects.
 B = TypeVar('B')
 
+# Maximum number of objects in a single delete_objects request.
+DELETE_BATCH_SIZE = 1000
+
 
 class BucketFile(IOHandle):
     """Implementation of the file object interface for files that are stored on
@@ -44,6 +57,67 @@ class BucketFile(IOHandle):
         self.bucket = bucket
         self.key = key
 
+    def copy_to(self, fileobj: IO):
+        """Download the object to the given file object.
+
+        Parameters
+        ----------
+        fileobj: io.IOBase
+            Writable file object.
+
+        Raises
+        ------
+        flowserv.error.UnknownFileError
+        """
+        try:
+            self.bucket.download_fileobj(self.key, fileobj)
+        except botocore.exceptions.ClientError:
+            raise err.UnknownFileError(self.key)
+
+    def exists(self) -> bool:
+        """Test if the object exists in the bucket. Requires only a metadata
+        request for the object.
+
+        Returns
+        -------
+        bool
+        """
+        try:
+            self.bucket.Object(self.key).content_length
+        except botocore.exceptions.ClientError:
+            return False
+        return True
+
+    def iter_chunks(self, chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Get an iterator over chunks of the object content. The content is
+        streamed from the response body of a single GET request.
+
+        Parameters
+        ----------
+        chunk_size: int, default=DEFAULT_CHUNK_SIZE
+            Maximum number of bytes in each chunk.
+
+        Returns
+        -------
+        iterator of bytes
+
+        Raises
+        ------
+        flowserv.error.UnknownFileError
+        """
+        try:
+            body = self.bucket.Object(self.key).get()['Body']
+        except botocore.exceptions.ClientError:
+            raise err.UnknownFileError(self.key)
+        try:
+            while True:
+                data = body.read(chunk_size)
+                if not data:
+                    break
+                yield data
+        finally:
+            body.close()
+
     def open(self) -> IO:
         """Get file contents as a BytesIO buffer.
 
@@ -62,28 +136,42 @@ class BucketFile(IOHandle):
         return data
 
     def size(self) -> int:
-        """Get size of the file in the number of bytes.
+        """Get size of the file in the number of bytes. The size is read from
+        the object metadata without downloading the object.
 
         Returns
         -------
         int
+
+        Raises
+        ------
+        flowserv.error.UnknownFileError
         """
-        return self.open().getbuffer().nbytes
+        try:
+            return self.bucket.Object(self.key).content_length
+        except botocore.exceptions.ClientError:
+            raise err.UnknownFileError(self.key)
+
+    def open_stream(self) -> IO:
+        """Get a readable file object that downloads the object content in
+        chunks as it is read.
+
+        Returns
+        -------
+        io.BufferedReader
+        """
+        return BufferedReader(ChunkReader(self.iter_chunks()))
 
-    def store(self, filename: str) -> int:
-        """Write file content to disk. Returns the size of the written file.
+    def store(self, filename: str):
+        """Write file content to disk.
 
         Parameters
         ----------
         filename: string
             Name of the file to which the content is written.
-
-        Returns
-        -------
-        int
         """
         with open(filename, 'wb') as f:
-            f.write(self.open().read())
+            self.copy_to(f)
 
 
 class BucketStore(FileStore):
@@ -91,8 +179,12 @@ class BucketStore(FileStore):
     all files are maintained on the local file system under a given base
     directory.
     """
-    def __init__(self, env: Dict, bucket: B = None):
-        """Initialize the storage bucket.
+    def __init__(
+        self, env: Dict, bucket: B = None,
+        transfers: Optional[TransferManager] = None
+    ):
+        """Initialize the storage bucket and the manager for parallel object
+        transfers.
 
         Parameters
         ----------
@@ -102,6 +194,9 @@ class BucketStore(FileStore):
         bucket: S3.Bucket
             Object that implements the delete, download, and upload methods of
             the S3.Bucket interface.
+        transfers: flowserv.model.files.transfer.TransferManager, default=None
+            Manager for parallel object transfers. If not given, the manager
+            is configured using the settings in the environment.
         """
         if bucket is None:
             bucket_id = env.get(FLOWSERV_S3BUCKET)
@@ -112,6 +207,16 @@ class BucketStore(FileStore):
                 import boto3
                 bucket = boto3.resource('s3').Bucket(bucket_id)
         self.bucket = bucket
+        if transfers is None:
+            transfers = TransferManager(
+                workers=env.get(FLOWSERV_S3_WORKERS, DEFAULT_S3_WORKERS),
+                retries=env.get(FLOWSERV_S3_RETRIES, DEFAULT_S3_RETRIES)
+            )
+        self.transfers = transfers
+        # Local cache for object content and staging mode for copying files
+        # from the cache to run directories.
+        self.cachedir = env.get(FLOWSERV_S3_CACHEDIR)
+        self.staging = env.get(FLOWSERV_STAGING, DEFAULT_STAGING)
 
     def __repr__(self):
         """Get object representation ."""
@@ -121,22 +226,44 @@ class BucketStore(FileStore):
         """Copy all files in the folder with the given key to a target folder
         on the local file system. Ensures that the target folder exists.
 
+        Files are downloaded in parallel. If the local content cache is
+        enabled, objects are downloaded to the cache (unless the cache contains
+        the current version of the object already) and then staged in the
+        target folder. Objects are identified in the cache by their key and
+        entity tag. Hard-linked files are read-only to protect the cache.
+
         Parameters
         ----------
         key: string
             Unique folder key.
         dst: string
             Path on the file system to the target folder.
+
+        Raises
+        ------
+        flowserv.error.FileTransferError
         """
         os.makedirs(dst, exist_ok=True)
         # Get list of all files in the folder.
-        for filekey, target in downloads(key=key, bucket=self.bucket):
+        tasks = list()
+        cached = list()
+        for filekey, target, version in downloads(key=key, bucket=self.bucket):
             outfile = os.path.join(dst, target)
             # Create parent folder for the target file exist.
             os.makedirs(os.path.dirname(outfile), exist_ok=True)
-            data = self.load_file(filekey)
-            with open(outfile, 'wb') as f:
-                f.write(data.open().read())
+            if self.cachedir is None or version is None:
+                tasks.append((filekey, download_task(self.bucket, filekey, outfile)))
+                continue
+            digest = hashlib.sha256('{}\0{}'.format(filekey, version).encode('utf-8')).hexdigest()
+            cachefile = os.path.join(self.cachedir, digest)
+            if not os.path.isfile(cachefile):
+                tasks.append((filekey, cache_task(self.bucket, filekey, cachefile)))
+            cached.append((cachefile, outfile))
+        if cached:
+            os.makedirs(self.cachedir, exist_ok=True)
+        self.transfers.run(tasks)
+        for cachefile, outfile in cached:
+            stage_file(src=cachefile, dst=outfile, mode=self.staging, readonly=True)
 
     def delete_file(self, key: str):
         """Delete the file with the given key.
@@ -152,18 +279,27 @@ class BucketStore(FileStore):
     def delete_folder(self, key: str):
         """Delete all files in the folder with the given key.
 
+        Objects are deleted in batches (of at most DELETE_BATCH_SIZE objects)
+        that are processed in parallel.
+
         Parameters
         ----------
         key: string
             Unique folder key.
+
+        Raises
+        ------
+        flowserv.error.FileTransferError
         """
         # Collect the keys for all objects in the folder.
-        keys = folder(key=key, bucket=self.bucket)
-        # Only class the delete_objects method if the list of matched objects
+        keys = sorted(folder(key=key, bucket=self.bucket))
+        # Only call the delete_objects method if the list of matched objects
         # is not empty.
-        if len(keys) > 0:
-            objects = [{'Key': k} for k in keys]
-            self.bucket.delete_objects(Delete={'Objects': objects})
+        tasks = list()
+        for i in range(0, len(keys), DELETE_BATCH_SIZE):
+            objects = [{'Key': k} for k in keys[i:i + DELETE_BATCH_SIZE]]
+            tasks.append((objects[0]['Key'], delete_task(self.bucket, objects)))
+        self.transfers.run(tasks)
 
     def load_file(self, key: str) -> BucketFile:
         """Get a file object for the given key. Returns a buffer with the file
@@ -190,6 +326,8 @@ class BucketStore(FileStore):
         path for all files. The file list contains tuples of file object and
         target path. The target is relative to the base destination path.
 
+        Files are uploaded in parallel.
+
         Paramaters
         ----------
         file: flowserv.model.files.base.IOHandle
@@ -197,23 +335,98 @@ class BucketStore(FileStore):
         dst: string
             Relative target path for the stored file.
 
-        Returns
-        -------
-        int
+        Raises
+        ------
+        flowserv.error.FileTransferError
         """
-        # Use the file object's store method to store the file at the target
+        # Upload the content of each file object as a stream to the target
         # destination.
+        tasks = list()
         for file, filename in files:
             key = os.path.join(dst, filename)
-            self.bucket.upload_fileobj(file.open(), key)
+            tasks.append((key, upload_task(self.bucket, file, key)))
+        self.transfers.run(tasks)
 
 
 # -- Helper Methods -----------------------------------------------------------
 
-def downloads(key: str, bucket: B) -> List[Tuple[str, str]]:
+def cache_task(bucket: B, key: str, filename: str) -> Callable:
+    """Get transfer task that downloads a bucket object to a file in the local
+    content cache. The object is downloaded to a temporary file that is renamed
+    after the download is complete. This ensures that incomplete downloads are
+    never visible in the cache.
+
+    Parameters
+    ----------
+    bucket: S3.bucket
+        S3 bucket object.
+    key: string
+        Key for the downloaded object.
+    filename: string
+        Path to the cache file.
+
+    Returns
+    -------
+    callable
+    """
+    def download():
+        fd, tmpfile = tempfile.mkstemp(dir=os.path.dirname(filename), prefix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                bucket.download_fileobj(key, f)
+            os.replace(tmpfile, filename)
+        except BaseException:
+            os.remove(tmpfile)
+            raise
+
+    return download
+
+
+def delete_task(bucket: B, objects: List[Dict]) -> Callable:
+    """Get transfer task that deletes a given list of objects from a bucket.
+
+    Parameters
+    ----------
+    bucket: S3.bucket
+        S3 bucket object.
+    objects: list of dict
+        List of object references for the delete_objects request.
+
+    Returns
+    -------
+    callable
+    """
+    return lambda: bucket.delete_objects(Delete={'Objects': objects})
+
+
+def download_task(bucket: B, key: str, filename: str) -> Callable:
+    """Get transfer task that downloads a bucket object to a local file.
+
+    Parameters
+    ----------
+    bucket: S3.bucket
+        S3 bucket object.
+    key: string
+        Key for the downloaded object.
+    filename: string
+        Path to the target file.
+
+    Returns
+    -------
+    callable
+    """
+    def download():
+        with open(filename, 'wb') as f:
+            bucket.download_fileobj(key, f)
+
+    return download
+
+
+def downloads(key: str, bucket: B) -> List[Tuple[str, str, Optional[str]]]:
     """Create a list of objects that need to be downloaded based on the given
-    source key. Returns a list of (key, path) where key is the key for the
-    downloaded folder and path is the relative target path.
+    source key. Returns a list of (key, path, version) where key is the key for
+    the downloaded folder, path is the relative target path, and version is
+    the entity tag of the object (if available).
 
     Parameters
     ----------
@@ -229,10 +442,10 @@ def downloads(key: str, bucket: B) -> List[Tuple[str, str]]:
     result = list()
     # Ensure that if the key ends with a '/'.
     key = key if key[-1] == '/' else '{}/'.format(key)
-    for filekey in folder(key=key, bucket=bucket):
+    for filekey, version in folder_objects(key=key, bucket=bucket).items():
         # Remove the src key prefix from the file key to generate a target
         # name (i.e., relative file path) for the downloaded file.
-        result.append((filekey, filekey[len(key):]))
+        result.append((filekey, filekey[len(key):], version))
     return result
 
 
@@ -251,9 +464,52 @@ def folder(key: str, bucket: B) -> Set[str]:
     -------
     set
     """
-    keyset = set()
+    return set(folder_objects(key=key, bucket=bucket))
+
+
+def folder_objects(key: str, bucket: B) -> Dict[str, Optional[str]]:
+    """Get the keys and entity tags for all objects in a bucket that belong to
+    a given folder. The entity tag is None if it is not provided by the object
+    summaries of the bucket.
+
+    Parameters
+    ----------
+    key: string
+        unique folder key.
+    bucket: S3.bucket
+        S3 bucket object.
+
+    Returns
+    -------
+    dict
+    """
+    result = dict()
     # Prefix for objects if the query references a directory.
     prefix = key if key[-1] == '/' else '{}/'.format(key)
     for obj in bucket.objects.filter(Prefix=prefix):
-        keyset.add(obj.key)
-    return keyset
+        result[obj.key] = getattr(obj, 'e_tag', None)
+    return result
+
+
+def upload_task(bucket: B, file: IOHandle, key: str) -> Callable:
+    """Get transfer task that uploads the content of a file object to the
+    bucket. The file content is read as a stream.
+
+    Parameters
+    ----------
+    bucket: S3.bucket
+        S3 bucket object.
+    file: flowserv.model.files.base.IOHandle
+        Handle for the uploaded file.
+    key: string
+        Target key for the uploaded object.
+
+    Returns
+    -------
+    callable
+    """
+    def upload():
+        with file.open_stream() as f:
+            bucket.upload_fileobj(f, key)
+
+    return upload
@@ -0,0 +1,110 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Parallel file transfers with a bounded number of workers and retries for
+failed transfers. Transfers are used by file stores (e.g., to upload and
+download bucket objects) and by remote workflow controllers (to download the
+result files of workflow runs).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import time
+
+from flowserv.config import DEFAULT_S3_RETRIES, DEFAULT_S3_WORKERS
+
+import flowserv.error as err
+
+
+class TransferManager(object):
+    """Manager for parallel file transfers. Runs transfer tasks in a pool of
+    threads with a bounded number of workers. Failed tasks are retried a given
+    number of times. Errors for tasks that fail on the last attempt are
+    collected and raised as a single error after all tasks have finished.
+
+    Errors that are raised by flowserv itself (e.g., for unknown files) are
+    not retried.
+    """
+    def __init__(
+        self, workers: Optional[int] = DEFAULT_S3_WORKERS,
+        retries: Optional[int] = DEFAULT_S3_RETRIES,
+        backoff: Optional[float] = 0.1
+    ):
+        """Initialize the maximum number of concurrent transfers and the retry
+        policy.
+
+        Parameters
+        ----------
+        workers: int, default=8
+            Maximum number of concurrent transfers.
+        retries: int, default=3
+            Number of times that a failed transfer is retried.
+        backoff: float, default=0.1
+            Initial wait time (in seconds) before retrying a failed transfer.
+            The wait time doubles with every attempt.
+        """
+        self.workers = max(1, workers)
+        self.retries = max(0, retries)
+        self.backoff = backoff
+
+    def run(self, tasks: List[Tuple[str, Callable]]):
+        """Run the given list of transfer tasks. Each task is a tuple of the
+        key for the transferred object and a function without arguments that
+        executes the transfer.
+
+        Parameters
+        ----------
+        tasks: list of (string, callable)
+            List of object keys and transfer functions.
+
+        Raises
+        ------
+        flowserv.error.FileTransferError
+        """
+        if not tasks:
+            return
+        if len(tasks) == 1 or self.workers == 1:
+            # Avoid the overhead of the thread pool for sequential transfers.
+            results = [self._execute(key, func) for key, func in tasks]
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(lambda t: self._execute(*t), tasks))
+        errors = [r for r in results if r is not None]
+        if errors:
+            raise err.FileTransferError(errors)
+
+    def _execute(self, key: str, func: Callable) -> Optional[Tuple[str, Exception]]:
+        """Execute a single transfer task. Returns None if the transfer was
+        successful or a tuple of object key and the error that was raised by
+        the last transfer attempt.
+
+        Parameters
+        ----------
+        key: string
+            Key for the transferred object.
+        func: callable
+            Function that executes the transfer.
+
+        Returns
+        -------
+        tuple of (string, Exception)
+        """
+        attempt = 0
+        while True:
+            try:
+                func()
+                return None
+            except err.FlowservError as ex:
+                return key, ex
+            except Exception as ex:
+                if attempt >= self.retries:
+                    return key, ex
+            if self.backoff:
+                time.sleep(self.backoff * 2 ** attempt)
+            attempt += 1
@@ -0,0 +1,392 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Persistent queue for workflow runs that wait to be dispatched to the
+workflow engine. The queue is maintained in the database so that pending runs
+survive restarts of the service.
+
+Runs are selected for dispatch in order of their priority. Runs with the same
+priority are selected using a fair-share policy between workflow groups: the
+next run is taken from the group that has the fewest active (i.e., dispatched
+and not yet finished) runs. Within a group, runs are dispatched in the order in
+which they were queued.
+
+When a run is dispatched it is assigned to the executor, i.e., the process that
+dispatched the run to the workflow engine. Active runs whose executor is no
+longer alive (e.g., because the process hosting the workflow engine died) are
+orphaned. Orphaned runs can be re-queued or set to error state by the service.
+Executors are identified by the host name, the process identifier, and a unique
+token that is generated for each process.
+"""
+
+from collections import deque
+from sqlalchemy.sql.expression import func
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+import os
+import socket
+
+from flowserv.model.base import RunExecutor, RunObject, RunQueueEntry
+
+import flowserv.model.workflow.state as st
+import flowserv.util as util
+
+
+"""Unique token and start time for the current process (keyed by the process
+identifier). The values are created on first use in each process, including
+forked child processes.
+"""
+_PROCESS = dict()
+_PROCESS_LOCK = Lock()
+
+
+class RunQueue(object):
+    """Manager for the persistent queue of workflow runs. Only runs that
+    belong to a workflow group are queued. Post-processing runs are dispatched
+    directly by the service.
+    """
+    def __init__(self, session):
+        """Initialize the database session.
+
+        Parameters
+        ----------
+        session: sqlalchemy.orm.session.Session
+            Database session.
+        """
+        self.session = session
+
+    def active_runs(self) -> Dict[str, int]:
+        """Get the number of active runs for each workflow group. Active runs
+        are runs in pending or running state that are not queued, i.e., runs
+        that have been dispatched to the workflow engine.
+
+        Returns
+        -------
+        dict
+        """
+        rows = self.session.query(RunObject.group_id, func.count(RunObject.run_id))\
+            .outerjoin(RunQueueEntry, RunObject.run_id == RunQueueEntry.run_id)\
+            .filter(RunQueueEntry.run_id.is_(None))\
+            .filter(RunObject.group_id.isnot(None))\
+            .filter(RunObject.state_type.in_(st.ACTIVE_STATES))\
+            .group_by(RunObject.group_id)\
+            .all()
+        return {group_id: count for group_id, count in rows}
+
+    def assign(self, run_id: str, rundir: Optional[str] = None):
+        """Assign the given run to the current process as its executor. Updates
+        the run directory if the run is already assigned to the process. Has no
+        effect if the run is no longer active.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+        rundir: string, default=None
+            Path to the local folder that contains the run files.
+        """
+        run = self.session.query(RunObject).get(run_id)
+        if run is None or not run.is_active():
+            return
+        if run.executor is None:
+            run.executor = set_executor(RunExecutor(rundir=rundir))
+        else:
+            set_executor(run.executor)
+            if rundir is not None:
+                run.executor.rundir = rundir
+        self.session.commit()
+
+    def claim(self, run_id: str) -> bool:
+        """Remove the queue entry for the given run in preparation of
+        dispatching the run to the workflow engine. The run is assigned to the
+        current process as its executor. Returns False if the run is no longer
+        queued (e.g., because it was claimed by another process).
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+
+        Returns
+        -------
+        bool
+        """
+        # Keep the priority of the queue entry for the run executor.
+        priority = self.session.query(RunQueueEntry.priority)\
+            .filter(RunQueueEntry.run_id == run_id)\
+            .scalar()
+        count = self.session.query(RunQueueEntry)\
+            .filter(RunQueueEntry.run_id == run_id)\
+            .delete(synchronize_session=False)
+        if count == 1:
+            self.session.merge(set_executor(RunExecutor(run_id=run_id, priority=priority if priority else 0)))
+        self.session.commit()
+        return count == 1
+
+    def enqueue(self, run: RunObject, priority: Optional[int] = 0):
+        """Add the given run to the queue.
+
+        Parameters
+        ----------
+        run: flowserv.model.base.RunObject
+            Handle for a pending workflow run.
+        priority: int, default=0
+            Runs with higher priority are dispatched first.
+        """
+        self.session.add(RunQueueEntry(run_id=run.run_id, priority=priority if priority else 0))
+        self.session.commit()
+
+    def next_runs(self, limit: Optional[int] = None) -> List[RunObject]:
+        """Get the list of queued runs that are dispatched next, in order of
+        dispatch. The limit defines the maximum number of active runs. If no
+        limit is given all queued runs are returned.
+
+        Parameters
+        ----------
+        limit: int, default=None
+            Maximum number of active runs.
+
+        Returns
+        -------
+        list of flowserv.model.base.RunObject
+        """
+        active = self.active_runs()
+        slots = None
+        if limit is not None:
+            slots = limit - sum(active.values())
+            if slots <= 0:
+                return list()
+        entries = self.session.query(RunQueueEntry)\
+            .order_by(RunQueueEntry.priority.desc(), RunQueueEntry.queued_at, RunQueueEntry.run_id)\
+            .all()
+        # Queues of runs for each group in priority and queue order.
+        groups = dict()
+        for entry in entries:
+            groups.setdefault(entry.run.group_id, deque()).append(entry)
+        result = list()
+        while groups and (slots is None or len(result) < slots):
+            # Select the group with the highest priority run at the head of
+            # its queue. Ties are broken by the number of active runs for the
+            # group and the time when the run was queued.
+            group_id = min(
+                groups,
+                key=lambda g: (
+                    -groups[g][0].priority,
+                    active.get(g, 0),
+                    groups[g][0].queued_at,
+                    groups[g][0].run_id
+                )
+            )
+            entry = groups[group_id].popleft()
+            if not groups[group_id]:
+                del groups[group_id]
+            active[group_id] = active.get(group_id, 0) + 1
+            result.append(entry.run)
+        return result
+
+    def orphaned_runs(self) -> List[RunObject]:
+        """Get the list of active runs that have been dispatched but whose
+        executor is no longer alive. This includes active runs that are not
+        queued and that have not been assigned to an executor.
+
+        Executors on other hosts are always considered alive since the state
+        of their processes cannot be determined.
+
+        Returns
+        -------
+        list of flowserv.model.base.RunObject
+        """
+        runs = self.session.query(RunObject)\
+            .outerjoin(RunQueueEntry, RunObject.run_id == RunQueueEntry.run_id)\
+            .filter(RunQueueEntry.run_id.is_(None))\
+            .filter(RunObject.state_type.in_(st.ACTIVE_STATES))\
+            .order_by(RunObject.created_at)\
+            .all()
+        return [run for run in runs if run.executor is None or not is_alive(run.executor)]
+
+    def remove(self, run_id: str) -> bool:
+        """Remove the given run from the queue. Has no effect if the run is
+        not queued. Returns False if the run was not queued.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+
+        Returns
+        -------
+        bool
+        """
+        count = self.session.query(RunQueueEntry)\
+            .filter(RunQueueEntry.run_id == run_id)\
+            .delete(synchronize_session=False)
+        self.session.commit()
+        return count == 1
+
+    def requeue(self, run: RunObject):
+        """Reset the given active run to pending state and add it to the queue.
+        The run keeps its original position in the queue based on its creation
+        time and the priority with which it was dispatched. The assignment to
+        the run executor is removed.
+
+        Parameters
+        ----------
+        run: flowserv.model.base.RunObject
+            Handle for an active workflow run.
+        """
+        priority = run.executor.priority if run.executor is not None else 0
+        run.state_type = st.STATE_PENDING
+        run.started_at = None
+        run.executor = None
+        run.queue_entry = RunQueueEntry(priority=priority, queued_at=run.created_at)
+        self.session.commit()
+
+    def size(self) -> int:
+        """Get the number of queued runs.
+
+        Returns
+        -------
+        int
+        """
+        return self.session.query(RunQueueEntry).count()
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def executor_id() -> Tuple[str, int, str]:
+    """Get the host name, process identifier, and the unique process token
+    that identify the current process as a run executor.
+
+    Returns
+    -------
+    string, int, string
+    """
+    pid = os.getpid()
+    token, _ = process_info(pid)
+    return socket.gethostname(), pid, token
+
+
+def is_alive(executor: RunExecutor) -> bool:
+    """Test if the process for a run executor is alive. Processes on other
+    hosts are always considered alive. A process with the identifier of the
+    current process is alive only if it is the current process. For other
+    processes on the same host the process start time is compared (if known)
+    to detect reused process identifiers. On Windows, where the existence of a
+    process cannot be tested without affecting it, all other processes are
+    considered alive.
+
+    Parameters
+    ----------
+    executor: flowserv.model.base.RunExecutor
+        Executor for an active workflow run.
+
+    Returns
+    -------
+    bool
+    """
+    host, pid, token = executor_id()
+    if executor.host != host:
+        return True
+    if executor.pid == pid:
+        return executor.token == token
+    if os.name == 'nt':
+        return True
+    if executor.started is not None:
+        started = process_start(executor.pid)
+        if started is not None:
+            return started == executor.started
+    try:
+        os.kill(executor.pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # pragma: no cover
+        # The process exists but is owned by a different user.
+        pass
+    return True
+
+
+def is_current(executor: RunExecutor) -> bool:
+    """Test if the given run executor is the current process.
+
+    Parameters
+    ----------
+    executor: flowserv.model.base.RunExecutor
+        Executor for an active workflow run.
+
+    Returns
+    -------
+    bool
+    """
+    return (executor.host, executor.pid, executor.token) == executor_id()
+
+
+def process_info(pid: int) -> Tuple[str, Optional[int]]:
+    """Get the unique token and the start time for the current process with
+    the given identifier. A new token is generated if the process identifier
+    changed (e.g., in a forked child process).
+
+    Parameters
+    ----------
+    pid: int
+        Identifier of the current process.
+
+    Returns
+    -------
+    string, int
+    """
+    with _PROCESS_LOCK:
+        info = _PROCESS.get(pid)
+        if info is None:
+            _PROCESS.clear()
+            info = (util.get_unique_identifier(), process_start(pid))
+            _PROCESS[pid] = info
+        return info
+
+
+def process_start(pid: int) -> Optional[int]:
+    """Get the start time of the process with the given identifier in clock
+    ticks since system boot. The start time is read from the proc file system.
+    Returns None if the start time is not available (e.g., if the process does
+    not exist or on systems without a proc file system).
+
+    Parameters
+    ----------
+    pid: int
+        Process identifier.
+
+    Returns
+    -------
+    int
+    """
+    try:
+        with open('/proc/{}/stat'.format(pid)) as f:
+            stat = f.read()
+        # The command name may contain spaces. The start time is the 20th
+        # field after the command name.
+        return int(stat[stat.rindex(')') + 2:].split()[19])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def set_executor(executor: RunExecutor) -> RunExecutor:
+    """Assign the identifier of the current process to the given run
+    executor. Returns the modified executor.
+
+    Parameters
+    ----------
+    executor: flowserv.model.base.RunExecutor
+        Executor for an active workflow run.
+
+    Returns
+    -------
+    flowserv.model.base.RunExecutor
+    """
+    executor.host, executor.pid, executor.token = executor_id()
+    _, executor.started = process_info(executor.pid)
+    return executor
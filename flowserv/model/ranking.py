@@ -10,13 +10,38 @@
 and querying analytics results for individual workflows.
 """
 
+from __future__ import annotations
 from dateutil.parser import isoparse
+from sqlalchemy.orm import Query, aliased
+from sqlalchemy.sql.expression import and_, func, or_
+from typing import Any, List, Optional
 
-from flowserv.model.base import GroupObject, RunObject
+import base64
+import binascii
+import json
 
+from flowserv.model.base import (
+    GroupObject, RunObject, RunResultValue, WorkflowLeaderboardEntry,
+    WorkflowObject
+)
+from flowserv.model.parameter.numeric import PARA_FLOAT, PARA_INT
+from flowserv.model.parameter.string import PARA_STRING
+from flowserv.model.template.schema import ResultSchema, SortColumn
+
+import flowserv.error as err
 import flowserv.model.workflow.state as st
 
 
+"""Names of the columns in the result value table that store the values for
+the different result column data types.
+"""
+VALUE_COLUMNS = {
+    PARA_FLOAT: 'float_value',
+    PARA_INT: 'int_value',
+    PARA_STRING: 'text_value'
+}
+
+
 class RunResult(object):
     """Handle for analytics results of a successful workflow run. Maintains the
     run identifier, run timestamps, group information, and a dictionary
@@ -84,6 +109,14 @@ class RankingManager(object):
     Analytics results for each workflow are maintaind in separate tables. The
     schema of thoses tables is defined by the result schema of the respective
     workflow template.
+
+    For each workflow the manager maintains a materialized leaderboard that
+    references the best run of each workflow group based on the default sort
+    order of the result schema. The leaderboard is updated incrementally when
+    individual runs succeed or are deleted.
+
+    Ranking queries sort and filter runs based on the typed result values that
+    are maintained for each run in addition to the JSON result object.
     """
     def __init__(self, session):
         """Initialize the connection to the underlying database.
@@ -95,10 +128,106 @@ class RankingManager(object):
         """
         self.session = session
 
-    def get_ranking(self, workflow, order_by=None, include_all=False):
+    def add_run(self, run: RunObject):
+        """Update the materialized leaderboard for a run that is in SUCCESS
+        state. The run replaces the current leaderboard entry for its group if
+        it ranks higher than the current best run of the group (based on the
+        default sort order of the workflow result schema).
+
+        Runs for workflows without result schema, post-processing runs, and
+        runs that did not produce a result are ignored.
+
+        Parameters
+        ----------
+        run: flowserv.model.base.RunObject
+            Handle for a successful workflow run.
+        """
+        result_schema = run.workflow.result_schema
+        if run.group_id is None or run.result is None or result_schema is None:
+            return
+        entry = self.session\
+            .query(WorkflowLeaderboardEntry)\
+            .filter(WorkflowLeaderboardEntry.group_id == run.group_id)\
+            .one_or_none()
+        if entry is None:
+            entry = WorkflowLeaderboardEntry(
+                group_id=run.group_id,
+                workflow_id=run.workflow_id,
+                run_id=run.run_id
+            )
+            self.session.add(entry)
+        elif entry.run_id != run.run_id:
+            # Use the database to compare the new run with the current best
+            # run to ensure that the same sort order is used as for ranking
+            # queries. Make sure that the run result is visible to the query.
+            self.session.flush()
+            sort_key = SortKey(
+                schema=result_schema,
+                order_by=result_schema.get_default_order()
+            )
+            entry.run_id = sort_key.join(self.session.query(RunObject.run_id))\
+                .filter(RunObject.run_id.in_([entry.run_id, run.run_id]))\
+                .order_by(*sort_key.clause())\
+                .limit(1)\
+                .scalar()
+
+    def best_runs(self, workflow: WorkflowObject, sort_key: SortKey):
+        """Get query that numbers the successful runs of a workflow within
+        their group based on the given sort key. The best run of each group
+        has the value 1 in the column 'group_rank'.
+
+        Parameters
+        ----------
+        workflow: flowserv.model.base.WorkflowObject
+            Handle for workflow.
+        sort_key: flowserv.model.ranking.SortKey
+            Sort key for runs within their group.
+
+        Returns
+        -------
+        sqlalchemy.orm.query.Query
+        """
+        group_rank = func.row_number().over(
+            partition_by=RunObject.group_id,
+            order_by=sort_key.clause()
+        ).label('group_rank')
+        return sort_key.join(self.session.query(RunObject.run_id, group_rank))\
+            .filter(RunObject.workflow_id == workflow.workflow_id)\
+            .filter(RunObject.group_id != None)\
+            .filter(RunObject.state_type == st.STATE_SUCCESS)\
+            .filter(RunObject.result != None)  # noqa: E711
+
+    def get_leaderboard_runs(self, workflow: WorkflowObject) -> List[str]:
+        """Get sorted list of identifier for the runs in the materialized
+        leaderboard of the given workflow.
+
+        Parameters
+        ----------
+        workflow: flowserv.model.base.WorkflowObject
+            Handle for workflow.
+
+        Returns
+        -------
+        list(string)
+        """
+        rs = self.session\
+            .query(WorkflowLeaderboardEntry.run_id)\
+            .filter(WorkflowLeaderboardEntry.workflow_id == workflow.workflow_id)\
+            .order_by(WorkflowLeaderboardEntry.run_id)
+        return [run_id for run_id, in rs]
+
+    def get_ranking(
+        self, workflow: WorkflowObject, order_by: Optional[List[SortColumn]] = None,
+        include_all: Optional[bool] = False, limit: Optional[int] = None,
+        offset: Optional[int] = None, after: Optional[List[Any]] = None
+    ) -> List[RunResult]:
         """Query the underlying database to retrieve a result ranking for a
         given workflow.
 
+        Sorting, the selection of the best run for each group, and pagination
+        are all done by the database. Only the run results for the entries in
+        the returned (partial) ranking are loaded.
+
         Parameters
         ----------
         workflow: flowserv.model.base.WorkflowObject
@@ -108,51 +237,407 @@ class RankingManager(object):
             schema default sort order is used
         include_all: bool, optional
             Include at most one entry per group in the result if False
+        limit: int, default=None
+            Maximum number of entries in the returned ranking.
+        offset: int, default=None
+            Number of entries to skip at the beginning of the ranking.
+        after: list, default=None
+            Sort key of the ranking entry after which the returned ranking
+            starts (see :func:`flowserv.model.ranking.decode_cursor`).
 
         Returns
         -------
         list(flowserv.model.ranking.RunResult)
+
+        Raises
+        ------
+        flowserv.error.InvalidArgumentError
+        flowserv.error.InvalidSortColumnError
         """
-        # Get results for all successful runs of the workflow.
-        rs = self.session.query(GroupObject, RunObject)\
+        # Get the ORDER BY clause for the ranking. If no order by clause is
+        # given use the schema default sort order.
+        result_schema = workflow.result_schema
+        default_order = result_schema.get_default_order()
+        if order_by is None:
+            order_by = default_order
+        sort_key = SortKey(schema=result_schema, order_by=order_by)
+        # Query results for all successful runs of the workflow.
+        query = self.session\
+            .query(
+                RunObject.run_id,
+                RunObject.group_id,
+                GroupObject.name,
+                RunObject.created_at,
+                RunObject.started_at,
+                RunObject.ended_at,
+                RunObject.result
+            )
+        query = sort_key.join(query)\
             .filter(GroupObject.group_id == RunObject.group_id)\
-            .filter(GroupObject.workflow_id == workflow.workflow_id)\
+            .filter(RunObject.workflow_id == workflow.workflow_id)\
             .filter(RunObject.state_type == st.STATE_SUCCESS)\
-            .filter(RunObject.result != None)\
-            .all()  # noqa: E711
+            .filter(RunObject.result != None)  # noqa: E711
+        # Remove multiple entries for the same group if requested by the user.
+        # For the default sort order the best run for each group is maintained
+        # in the materialized leaderboard. For other sort orders, runs are
+        # numbered within their group and only the best run (with number 1)
+        # for each group is kept.
+        if not include_all and is_same_order(order_by, default_order):
+            query = query.filter(
+                RunObject.run_id == WorkflowLeaderboardEntry.run_id
+            )
+        elif not include_all:
+            best_runs = self.best_runs(
+                workflow=workflow,
+                sort_key=SortKey(schema=result_schema, order_by=order_by)
+            ).subquery()
+            query = query\
+                .filter(RunObject.run_id == best_runs.c.run_id)\
+                .filter(best_runs.c.group_rank == 1)
+        # Skip all entries up to (and including) the entry with the given sort
+        # key.
+        if after is not None:
+            query = query.filter(sort_key.after(after))
+        query = query.order_by(*sort_key.clause())
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
         entries = list()
-        for group, run in rs:
-            # Add entry to leaderboard
+        for row in query.all():
+            run_id, group_id, group_name, created_at, started_at, ended_at, values = row
             entries.append(
                 RunResult(
-                    run_id=run.run_id,
-                    group_id=group.group_id,
-                    group_name=group.name,
-                    created_at=run.created_at,
-                    started_at=run.started_at,
-                    finished_at=run.ended_at,
-                    values=run.result
+                    run_id=run_id,
+                    group_id=group_id,
+                    group_name=group_name,
+                    created_at=created_at,
+                    started_at=started_at,
+                    finished_at=ended_at,
+                    values=values
                 )
             )
-        # Sort the ranking based on the order by clause. If no order by clause
-        # is given use the schema default sort order..
+        return entries
+
+    def rebuild_leaderboard(self, workflow: WorkflowObject):
+        """Re-compute the materialized leaderboard for the given workflow from
+        the results of all successful workflow runs. This is primarily needed
+        for workflows in databases that were created before the leaderboard
+        was introduced.
+
+        Parameters
+        ----------
+        workflow: flowserv.model.base.WorkflowObject
+            Handle for workflow.
+        """
+        self.session\
+            .query(WorkflowLeaderboardEntry)\
+            .filter(WorkflowLeaderboardEntry.workflow_id == workflow.workflow_id)\
+            .delete(synchronize_session=False)
         result_schema = workflow.result_schema
-        if order_by is None:
-            order_by = result_schema.get_default_order()
-        for sort_col in order_by[::-1]:
-            sort_key = sort_col.column_id
-            entries = sorted(
-                entries,
-                key=lambda e: e.get(sort_key),
-                reverse=sort_col.sort_desc
+        if result_schema is None:
+            return
+        sort_key = SortKey(
+            schema=result_schema,
+            order_by=result_schema.get_default_order()
+        )
+        best_runs = self.best_runs(workflow, sort_key).subquery()
+        rs = self.session\
+            .query(RunObject.run_id, RunObject.group_id)\
+            .filter(RunObject.run_id == best_runs.c.run_id)\
+            .filter(best_runs.c.group_rank == 1)
+        for run_id, group_id in rs.all():
+            self.session.add(
+                WorkflowLeaderboardEntry(
+                    group_id=group_id,
+                    workflow_id=workflow.workflow_id,
+                    run_id=run_id
+                )
             )
-        # Remove multiple entries for the same group if requested by the user.
-        if not include_all:
-            pruned_entries = list()
-            groups = set()
-            for item in entries:
-                if item.group_id not in groups:
-                    groups.add(item.group_id)
-                    pruned_entries.append(item)
-            entries = pruned_entries
-        return entries
+        self.session.flush()
+
+    def rebuild_result_values(self, workflow: WorkflowObject):
+        """Re-create the typed result values for all runs of the given workflow
+        from their JSON result objects. This is primarily needed for workflows
+        in databases that were created before typed result values were
+        introduced. The leaderboard should be re-computed afterwards.
+
+        Parameters
+        ----------
+        workflow: flowserv.model.base.WorkflowObject
+            Handle for workflow.
+        """
+        result_schema = workflow.result_schema
+        for run in workflow.runs:
+            if result_schema is None:
+                run.result_values = []
+            else:
+                run.result_values = get_result_values(run, result_schema)
+        self.session.flush()
+
+    def remove_run(self, run: RunObject):
+        """Update the materialized leaderboard before the given run is deleted.
+        If the run is the current best run of its group it is replaced by the
+        next best successful run of the group (if any).
+
+        Parameters
+        ----------
+        run: flowserv.model.base.RunObject
+            Handle for a workflow run that is being deleted.
+        """
+        entry = self.session\
+            .query(WorkflowLeaderboardEntry)\
+            .filter(WorkflowLeaderboardEntry.run_id == run.run_id)\
+            .one_or_none()
+        if entry is None:
+            return
+        result_schema = run.workflow.result_schema
+        sort_key = SortKey(
+            schema=result_schema,
+            order_by=result_schema.get_default_order()
+        )
+        run_id = sort_key.join(self.session.query(RunObject.run_id))\
+            .filter(RunObject.group_id == run.group_id)\
+            .filter(RunObject.state_type == st.STATE_SUCCESS)\
+            .filter(RunObject.result != None)\
+            .filter(RunObject.run_id != run.run_id)\
+            .order_by(*sort_key.clause())\
+            .limit(1)\
+            .scalar()  # noqa: E711
+        if run_id is None:
+            self.session.delete(entry)
+        else:
+            entry.run_id = run_id
+
+
+# -- Helper classes and functions ---------------------------------------------
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Get the sort key of a ranking entry from the cursor that was created by
+    :func:`flowserv.model.ranking.encode_cursor`.
+
+    Parameters
+    ----------
+    cursor: string
+        Opaque cursor for a ranking entry.
+
+    Returns
+    -------
+    list
+
+    Raises
+    ------
+    flowserv.error.InvalidArgumentError
+    """
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise err.InvalidArgumentError('invalid ranking cursor')
+    if not isinstance(key, list):
+        raise err.InvalidArgumentError('invalid ranking cursor')
+    return key
+
+
+def encode_cursor(entry: RunResult, order_by: List[SortColumn]) -> str:
+    """Get an opaque cursor for the given ranking entry. The cursor encodes the
+    values of the entry for all components of the sort key (i.e., the sort
+    columns, the run creation time, and the run identifier). It can be used to
+    get the ranking entries that follow the entry in the ranking with the same
+    sort order.
+
+    Parameters
+    ----------
+    entry: flowserv.model.ranking.RunResult
+        Entry in a workflow ranking.
+    order_by: list(flowserv.model.template.schema.SortColumn)
+        List of sort columns for the ranking.
+
+    Returns
+    -------
+    string
+    """
+    key = [entry.get(col.column_id) for col in order_by]
+    key.extend([entry.created_at, entry.run_id])
+    cursor = base64.urlsafe_b64encode(json.dumps(key).encode('utf-8'))
+    return cursor.decode('utf-8').rstrip('=')
+
+
+def get_result_values(run: RunObject, schema: ResultSchema) -> List[RunResultValue]:
+    """Get list of typed result values for the result object of the given run.
+    The list contains one entry for each column in the result schema that has
+    a value in the run result.
+
+    Parameters
+    ----------
+    run: flowserv.model.base.RunObject
+        Handle for a workflow run.
+    schema: flowserv.model.template.schema.ResultSchema
+        Workflow result schema.
+
+    Returns
+    -------
+    list(flowserv.model.base.RunResultValue)
+    """
+    result = run.result if run.result is not None else dict()
+    values = list()
+    for col in schema.columns:
+        val = result.get(col.column_id)
+        if val is None:
+            continue
+        rv = RunResultValue(
+            run_id=run.run_id,
+            workflow_id=run.workflow_id,
+            column_id=col.column_id
+        )
+        setattr(rv, VALUE_COLUMNS[col.dtype], val)
+        values.append(rv)
+    return values
+
+
+def is_same_order(order_by: List[SortColumn], other: List[SortColumn]) -> bool:
+    """Test if two lists of sort columns define the same sort order.
+
+    Parameters
+    ----------
+    order_by: list(flowserv.model.template.schema.SortColumn)
+        List of sort columns.
+    other: list(flowserv.model.template.schema.SortColumn)
+        List of sort columns.
+
+    Returns
+    -------
+    bool
+    """
+    if len(order_by) != len(other):
+        return False
+    for c1, c2 in zip(order_by, other):
+        if c1.column_id != c2.column_id or c1.sort_desc != c2.sort_desc:
+            return False
+    return True
+
+
+class SortKey(object):
+    """SQL expressions for sorting and filtering the entries in a workflow
+    ranking. Result values are read from the typed result value table. The
+    table is joined (as a separate alias) once for each result column that is
+    referenced in the sort order.
+
+    Runs that do not have a value for a sort column are ranked after all runs
+    that have a value (NULLS LAST). Ties are broken by the run creation time
+    and the run identifier to get a deterministic ranking. The aliases are
+    joined on the workflow, column, and run identifier. The ranking order is
+    not backed by an index since the query is driven by the (outer joined)
+    workflow runs.
+    """
+    def __init__(self, schema: ResultSchema, order_by: List[SortColumn]):
+        """Initialize the table aliases and value expressions for the columns
+        in the sort order.
+
+        Parameters
+        ----------
+        schema: flowserv.model.template.schema.ResultSchema
+            Workflow result schema.
+        order_by: list(flowserv.model.template.schema.SortColumn)
+            List of sort columns.
+
+        Raises
+        ------
+        flowserv.error.InvalidSortColumnError
+        """
+        columns = {c.column_id: c for c in schema.columns}
+        self.order_by = order_by
+        self.aliases = dict()
+        self.values = list()
+        for sort_col in order_by:
+            col = columns.get(sort_col.column_id)
+            if col is None:
+                raise err.InvalidSortColumnError(sort_col.column_id)
+            alias = self.aliases.get(col.column_id)
+            if alias is None:
+                alias = aliased(RunResultValue)
+                self.aliases[col.column_id] = alias
+            self.values.append(getattr(alias, VALUE_COLUMNS[col.dtype]))
+
+    def after(self, key: List[Any]):
+        """Get SQL filter for ranking entries that follow the entry with the
+        given sort key. The sort key contains the values for all sort columns,
+        followed by the run creation time and the run identifier.
+
+        Parameters
+        ----------
+        key: list
+            Sort key of a ranking entry.
+
+        Returns
+        -------
+        sqlalchemy.sql.expression.ColumnElement
+
+        Raises
+        ------
+        flowserv.error.InvalidArgumentError
+        """
+        if len(key) != len(self.order_by) + 2:
+            raise err.InvalidArgumentError('invalid ranking cursor')
+        # Create pairs of conditions for entries that have the same value as
+        # the key and for entries that come after the key for each component
+        # of the sort key. Missing values are ranked last.
+        conditions = list()
+        for sort_col, value, val in zip(self.order_by, self.values, key):
+            if val is None:
+                conditions.append((value.is_(None), None))
+            else:
+                follows = value < val if sort_col.sort_desc else value > val
+                conditions.append((value == val, or_(value.is_(None), follows)))
+        created_at, run_id = key[-2:]
+        conditions.append((RunObject.created_at == created_at, RunObject.created_at > created_at))
+        conditions.append((RunObject.run_id == run_id, RunObject.run_id > run_id))
+        # An entry follows the key if it is equal to the key for a prefix of
+        # the sort key and follows the key for the next component.
+        clauses = list()
+        prefix = list()
+        for same, follows in conditions:
+            if follows is not None:
+                clauses.append(and_(*(prefix + [follows])))
+            prefix.append(same)
+        return or_(*clauses)
+
+    def clause(self) -> List:
+        """Get list of SQL expressions for the ORDER BY clause of a ranking
+        query.
+
+        Returns
+        -------
+        list
+        """
+        sort_key = list()
+        for sort_col, value in zip(self.order_by, self.values):
+            order = value.desc() if sort_col.sort_desc else value.asc()
+            sort_key.append(order.nullslast())
+        sort_key.append(RunObject.created_at.asc())
+        sort_key.append(RunObject.run_id.asc())
+        return sort_key
+
+    def join(self, query: Query) -> Query:
+        """Add outer joins with the result value table for all sort columns to
+        the given query over workflow runs.
+
+        Parameters
+        ----------
+        query: sqlalchemy.orm.query.Query
+            Query over workflow runs.
+
+        Returns
+        -------
+        sqlalchemy.orm.query.Query
+        """
+        for column_id, alias in self.aliases.items():
+            query = query.outerjoin(
+                alias,
+                and_(
+                    alias.workflow_id == RunObject.workflow_id,
+                    alias.column_id == column_id,
+                    alias.run_id == RunObject.run_id
+                )
+            )
+        return query
@@ -10,18 +10,19 @@
 about workflow runs in an underlying database.
 """
 
-from typing import List, Optional, Tuple
+from typing import List, Optional, Set, Tuple
 
-import io
 import mimetypes
 import os
 import shutil
-import tarfile
 
-from flowserv.model.base import RunFile, RunObject, RunMessage, WorkflowRankingRun
-from flowserv.model.files.base import FileHandle, IOBuffer
+from flowserv.model.archive import ArchiveCache
+from flowserv.model.base import RunFile, RunObject, RunMessage, RunRemoteTask, RunStep, WorkflowRankingRun
+from flowserv.model.files.base import FileHandle
 from flowserv.model.files.fs import walk
+from flowserv.model.ranking import RankingManager, get_result_values
 from flowserv.model.template.schema import ResultSchema
+from flowserv.model.workflow.serial import LOGS_DIR
 from flowserv.model.workflow.state import WorkflowState
 
 import flowserv.error as err
@@ -34,7 +35,7 @@ class RunManager(object):
     delete, and retrieve runs. the manager also provides the functionality to
     update the state of workflow runs.
     """
-    def __init__(self, session, fs):
+    def __init__(self, session, fs, archive_cache: Optional[int] = 0):
         """Initialize the connection to the underlying database and the file
         system helper to get path names for run folders.
 
@@ -44,9 +45,34 @@ class RunManager(object):
             Database session.
         fs: flowserv.model.files.FileStore
             File store for run input and output files.
+        archive_cache: int, default=0
+            Maximum total size (in bytes) of cached run result archives.
+            Archives are not cached if the value is zero.
         """
         self.session = session
         self.fs = fs
+        self.archives = ArchiveCache(session=session, fs=fs, size=archive_cache)
+
+    def active_runs(self, run_ids: List[str]) -> Set[str]:
+        """Get the identifier of all runs in the given list that are in an
+        active state.
+
+        Parameters
+        ----------
+        run_ids: list of string
+            List of run identifier.
+
+        Returns
+        -------
+        set of string
+        """
+        if not run_ids:
+            return set()
+        rows = self.session.query(RunObject.run_id)\
+            .filter(RunObject.run_id.in_(run_ids))\
+            .filter(RunObject.state_type.in_(st.ACTIVE_STATES))\
+            .all()
+        return set([run_id for run_id, in rows])
 
     def create_run(self, workflow=None, group=None, arguments=None, runs=None):
         """Create a new entry for a run that is in pending state. Returns a
@@ -130,11 +156,17 @@ class RunManager(object):
         # Get base directory for run files
         workflow_id = run.workflow_id
         rundir = self.fs.run_basedir(workflow_id, run_id)
+        # Remove the run from the workflow leaderboard (if present).
+        RankingManager(session=self.session).remove_run(run)
+        # Remove the cached result archive for the run (if present).
+        archive = self.archives.delete_archive(run)
         # Delete run and the base directory containing run files. Commit
-        # changes before deleting the directory.
+        # changes before deleting the directory and the archive.
         self.session.delete(run)
         self.session.commit()
         self.fs.delete_folder(key=rundir)
+        if archive is not None:
+            self.fs.delete_file(key=archive)
 
     def delete_obsolete_runs(
         self, date: str, state: Optional[str] = None
@@ -194,6 +226,14 @@ class RunManager(object):
         """Get tar archive containing all result files for a given workflow
         run. Raises UnknownRunError if the run is not in SUCCESS state.
 
+        The archive is generated on demand when the content of the returned
+        file handle is read. The handle supports streaming the archive (e.g.,
+        via `open_stream()` or `store()`) with memory usage that is bounded
+        by the chunk size and not by the size of the archive. If the archive
+        cache is enabled, the archive is generated once and stored in the file
+        store for subsequent requests. The size of archives that are not
+        cached is unknown (i.e., the size of the returned handle is None).
+
         Parameters
         ----------
         run_id: string
@@ -211,26 +251,27 @@ class RunManager(object):
         run = self.get_run(run_id)
         if not run.is_success():
             raise err.UnknownRunError(run_id)
-        # Create a memory buffer for the tar file.
-        io_buffer = io.BytesIO()
-        tar_handle = tarfile.open(fileobj=io_buffer, mode='w:gz')
-        # Get file objects for all run result files.
+        # Get file objects for all run result files. The file size is taken
+        # from the database to avoid accessing the files before the archive is
+        # generated.
         workflow_id = run.workflow.workflow_id
         rundir = self.fs.run_basedir(workflow_id=workflow_id, run_id=run_id)
+        files = list()
         for f in run.files:
-            file = self.fs.load_file(os.path.join(rundir, f.key)).open()
-            info = tarfile.TarInfo(name=f.key)
-            info.size = file.getbuffer().nbytes
-            tar_handle.addfile(tarinfo=info, fileobj=file)
-        tar_handle.close()
-        io_buffer.seek(0)
+            file = self.fs.load_file(os.path.join(rundir, f.key))
+            files.append((file, f.key, f.size))
         # Create file handle for the archive. The file name includes the run
         # identifier. The mime type is 'application/gzip' based on
         # https://superuser.com/questions/901962.
+        fileobj = self.archives.get_archive(run=run, files=files)
+        # Delete the files of archives that were removed from the cache after
+        # the transaction has been committed.
+        self.session.commit()
+        self.archives.purge()
         return FileHandle(
             name='run.{}.tar.gz'.format(run_id),
             mime_type='application/gzip',
-            fileobj=IOBuffer(io_buffer)
+            fileobj=fileobj
         )
 
     def get_runfile(
@@ -337,6 +378,64 @@ class RunManager(object):
             query = query.filter(RunObject.state_type == state)
         return query.all()
 
+    def remote_tasks(self) -> List[RunRemoteTask]:
+        """Get the monitoring information for all active runs that are
+        executed by a remote workflow engine.
+
+        Returns
+        -------
+        list of flowserv.model.base.RunRemoteTask
+        """
+        return self.session.query(RunRemoteTask)\
+            .join(RunObject, RunObject.run_id == RunRemoteTask.run_id)\
+            .filter(RunObject.state_type.in_(st.ACTIVE_STATES))\
+            .order_by(RunRemoteTask.next_poll)\
+            .all()
+
+    def update_remote_task(
+        self, run_id: str, workflow_id: str, output_files: List[str],
+        interval: float, next_poll: float
+    ) -> bool:
+        """Update the monitoring information for a run that is executed by a
+        remote workflow engine. Creates a new entry if the run has not been
+        registered before. Returns False if the run is no longer active. In
+        this case the information is ignored.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+        workflow_id: string
+            Unique identifier for the workflow on the remote engine.
+        output_files: list(string)
+            Relative path of output files that are generated by the workflow
+            run.
+        interval: float
+            Current poll interval (in sec.) for the run.
+        next_poll: float
+            Time of the next state check (in seconds since the epoch).
+
+        Returns
+        -------
+        bool
+
+        Raises
+        ------
+        flowserv.error.UnknownRunError
+        """
+        run = self.get_run(run_id)
+        if not run.is_active():
+            return False
+        self.session.merge(RunRemoteTask(
+            run_id=run_id,
+            workflow_id=workflow_id,
+            output_files=output_files,
+            interval=interval,
+            next_poll=next_poll
+        ))
+        self.session.commit()
+        return True
+
     def update_run(self, run_id: str, state: WorkflowState, rundir: Optional[str] = None):
         """Update the state of the given run. This method does check if the
         state transition is valid. Transitions are valid for active workflows,
@@ -418,10 +517,73 @@ class RunManager(object):
         else:
             validate_state_transition(current_state, state.type_id, [st.STATE_PENDING])
         run.state_type = state.type_id
+        # Inactive runs are no longer assigned to an executor or monitored by
+        # a remote workflow controller.
+        if not state.is_active():
+            run.executor = None
+            run.remote_task = None
+        # Update the workflow leaderboard for successful runs.
+        if state.is_success():
+            RankingManager(session=self.session).add_run(run)
         # Commit changes to database. Then remove the local run directory.
         self.session.commit()
         return run
 
+    def update_step(
+        self, run_id: str, pos: int, step: int, command: str, started_at: str,
+        finished_at: Optional[str] = None, exit_code: Optional[int] = None,
+        cpu_time: Optional[float] = None, max_memory: Optional[int] = None,
+        wall_time: Optional[float] = None
+    ):
+        """Update progress information for a command of a workflow run. Creates
+        a new entry if the command has not been reported before. Progress
+        information for inactive runs is ignored (e.g., if a late report for a
+        canceled run is received).
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+        pos: int
+            Position of the command in the list of all workflow commands.
+        step: int
+            Position of the workflow step that contains the command.
+        command: string
+            Command line statement.
+        started_at: string
+            Timestamp when the command was started.
+        finished_at: string, default=None
+            Timestamp when the command finished.
+        exit_code: int, default=None
+            Exit code of the finished command.
+        cpu_time: float, default=None
+            CPU time (in seconds) that was used by the finished command.
+        max_memory: int, default=None
+            Peak memory usage (in bytes) of the finished command.
+        wall_time: float, default=None
+            Wall time (in seconds) of the finished command.
+
+        Raises
+        ------
+        flowserv.error.UnknownRunError
+        """
+        run = self.get_run(run_id)
+        if not run.is_active():
+            return
+        self.session.merge(RunStep(
+            run_id=run_id,
+            pos=pos,
+            step=step,
+            command=command,
+            started_at=started_at,
+            finished_at=finished_at,
+            exit_code=exit_code,
+            cpu_time=cpu_time,
+            max_memory=max_memory,
+            wall_time=wall_time
+        ))
+        self.session.commit()
+
 
 # -- Helper Functions ---------------------------------------------------------
 
@@ -469,6 +631,11 @@ def get_run_files(run: RunObject, state: WorkflowState, rundir: str) -> Tuple[Li
         # always a dictionary and (ii) that the keys in the returned
         # dictionary are not necessary equal to the file sources.
         filekeys = [f.source for f in run.outputs().values()]
+        # Include log files for workflow steps that are listed in the run
+        # state.
+        for key in state.files:
+            if key.startswith(LOGS_DIR + '/') and key not in filekeys:
+                filekeys.append(key)
     else:
         # List all files that were generated by the workflow run as
         # output.
@@ -525,6 +692,7 @@ def read_run_results(run: RunObject, schema: ResultSchema, rundir: str):
             elif val is not None:
                 values[col_id] = col.cast(val)
         run.result = values
+        run.result_values = get_result_values(run, schema)
 
 
 def validate_state_transition(current_state: str, target_state: str, valid_states: List[str]):
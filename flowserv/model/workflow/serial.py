@@ -8,20 +8,44 @@
 
 """Helper class to execute workflow templates that follow the syntax of the
 REANA serial workflow specifications.
+
+By default, the steps of a serial workflow are executed one after another.
+The specification can declare steps that are independent of each other. A
+step with a 'parallel' element defines a group of steps that only depend on
+the preceding step (or group) and that may be executed concurrently. A step
+can also declare the names of the (preceding) steps that it depends on in its
+'after' element. Steps without an 'after' element depend on the preceding step
+(or all steps in the preceding group).
 """
 
 from string import Template
+from typing import Dict
 
 from flowserv.model.template.base import WorkflowTemplate
 
+import flowserv.error as err
 import flowserv.model.template.parameter as tp
 
 
+"""Folder in the run directory that contains the output logs of executed
+workflow steps.
+"""
+LOGS_DIR = '.logs'
+
+"""Keys for resource limits of workflow steps. Limits are given for CPU time
+and wall time in seconds and for memory in bytes.
+"""
+LIMIT_CPUTIME = 'cputime'
+LIMIT_MEMORY = 'memory'
+LIMIT_WALLTIME = 'walltime'
+LIMITS = [LIMIT_CPUTIME, LIMIT_MEMORY, LIMIT_WALLTIME]
+
+
 class Step(object):
     """List of command line statements that are executed in a given
     environment. The environment can, for example, specify a Docker image.
     """
-    def __init__(self, env, commands=None):
+    def __init__(self, env, commands=None, inputs=None, limits=None, name=None, depends=None):
         """Initialize the object properties.
 
         Parameters
@@ -30,9 +54,26 @@ class Step(object):
             Execution environment name
         commands: list(string), optional
             List of command line statements
+        inputs: list(string), optional
+            Optional list of files and folders (relative to the run directory)
+            that are read by the step commands. If not given, all files in the
+            run directory are considered as inputs.
+        limits: dict, optional
+            Optional resource limits for the execution of each step command.
+            Maps the keys in LIMITS to the respective limit.
+        name: string, optional
+            Optional unique step name.
+        depends: list(int), optional
+            Positions of the steps in the workflow that have to finish before
+            the step can be executed. If not given, the step depends on the
+            preceding step in the workflow.
         """
         self.env = env
         self.commands = commands if commands is not None else list()
+        self.inputs = inputs
+        self.limits = limits if limits is not None else dict()
+        self.name = name
+        self.depends = depends
 
     def add(self, cmd):
         """Append a given command line statement to the list of commands in the
@@ -112,22 +153,33 @@ class SerialWorkflow(object):
         # Add all command stings in workflow steps to result after replacing
         # references to parameters
         result = list()
+        # Resource limits for all workflow steps.
+        limits = self.resource_limits(workflow_spec.get('resources', {}), workflow_parameters)
+        # Index of step names and positions of the steps that the next step
+        # depends on by default.
+        names = dict()
+        previous = list()
         spec = workflow_spec.get('workflow', {}).get('specification', {})
         for step in spec.get('steps', []):
-            env = tp.expand_value(
-                value=step.get('environment'),
-                arguments=workflow_parameters,
-                parameters=self.template.parameters
-            )
-            script = Step(env=env)
-            for cmd in step.get('commands', []):
-                cmd = tp.expand_value(
-                    value=cmd,
-                    arguments=workflow_parameters,
-                    parameters=self.template.parameters
-                )
-                script.add(Template(cmd).substitute(workflow_parameters))
-            result.append(script)
+            group = step['parallel'] if 'parallel' in step else [step]
+            stage = list()
+            for member in group:
+                script = self.step(member, workflow_parameters, limits)
+                if 'after' in member:
+                    script.depends = list()
+                    for name in member['after']:
+                        if name not in names:
+                            raise err.InvalidTemplateError("unknown step '{}'".format(name))
+                        script.depends.append(names[name])
+                else:
+                    script.depends = list(previous)
+                if script.name is not None:
+                    if script.name in names:
+                        raise err.InvalidTemplateError("duplicate step '{}'".format(script.name))
+                    names[script.name] = len(result)
+                stage.append(len(result))
+                result.append(script)
+            previous = stage
         return result
 
     def output_files(self):
@@ -149,3 +201,117 @@ class SerialWorkflow(object):
             arguments=self.arguments,
             parameters=self.template.parameters
         )
+
+    def resource_limits(self, spec: Dict, arguments: Dict) -> Dict:
+        """Get resource limits from the given specification. Replaces
+        references to template parameters in the limit values. Memory limits
+        can be given as strings with a unit suffix (e.g., '512m').
+
+        Parameters
+        ----------
+        spec: dict
+            Resource limit specification.
+        arguments: dict
+            Workflow parameters for reference replacement.
+
+        Returns
+        -------
+        dict
+
+        Raises
+        ------
+        flowserv.error.InvalidTemplateError
+        """
+        result = dict()
+        for key, value in spec.items():
+            if key not in LIMITS:
+                raise err.InvalidTemplateError("invalid resource '{}'".format(key))
+            if isinstance(value, str):
+                value = tp.expand_value(
+                    value=value,
+                    arguments=arguments,
+                    parameters=self.template.parameters
+                )
+                value = Template(value).substitute(arguments)
+            try:
+                result[key] = to_bytes(value) if key == LIMIT_MEMORY else float(value)
+            except ValueError:
+                raise err.InvalidTemplateError("invalid {} limit '{}'".format(key, value))
+        return result
+
+    def step(self, spec: Dict, arguments: Dict, limits: Dict) -> Step:
+        """Get the expanded workflow step for the given step specification.
+        Dependencies between steps are not set.
+
+        Parameters
+        ----------
+        spec: dict
+            Workflow step specification.
+        arguments: dict
+            Workflow parameters for reference replacement.
+        limits: dict
+            Resource limits for all workflow steps.
+
+        Returns
+        -------
+        flowserv.model.workflow.serial.Step
+
+        Raises
+        ------
+        flowserv.error.InvalidTemplateError
+        flowserv.error.MissingArgumentError
+        """
+        env = tp.expand_value(
+            value=spec.get('environment'),
+            arguments=arguments,
+            parameters=self.template.parameters
+        )
+        script = Step(env=env, name=spec.get('name'))
+        for cmd in spec.get('commands', []):
+            cmd = tp.expand_value(
+                value=cmd,
+                arguments=arguments,
+                parameters=self.template.parameters
+            )
+            script.add(Template(cmd).substitute(arguments))
+        # Optional list of input files for the step.
+        if 'inputs' in spec:
+            script.inputs = list()
+            for filename in spec['inputs']:
+                filename = tp.expand_value(
+                    value=filename,
+                    arguments=arguments,
+                    parameters=self.template.parameters
+                )
+                script.inputs.append(Template(filename).substitute(arguments))
+        # Step resource limits override the workflow limits.
+        script.limits = dict(limits)
+        script.limits.update(self.resource_limits(spec.get('resources', {}), arguments))
+        return script
+
+
+# -- Helper Functions ---------------------------------------------------------
+
+def to_bytes(value) -> int:
+    """Convert a memory size to the number of bytes. The value is either a
+    number or a string with an optional unit suffix (k, m, g).
+
+    Parameters
+    ----------
+    value: int, float, or string
+        Memory size.
+
+    Returns
+    -------
+    int
+
+    Raises
+    ------
+    ValueError
+    """
+    if isinstance(value, str):
+        value = value.strip().lower().rstrip('b')
+        units = {'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+        if value and value[-1] in units:
+            return int(float(value[:-1]) * units[value[-1]])
+    return int(float(value))
@@ -37,6 +37,7 @@ RUNS_DELETE = 'runs:delete'
 RUNS_DOWNLOAD_ARCHIVE = 'runs:download:archive'
 RUNS_DOWNLOAD_FILE = 'runs:download:file'
 RUNS_GET = 'runs:get'
+RUNS_NOTIFY = 'runs:notify'
 RUNS_START = 'runs:start'
 
 SERVICE_DESCRIPTOR = 'service'
@@ -69,12 +70,13 @@ ROUTES = {
     GROUPS_LIST: 'groups',
     GROUPS_RUNS: 'groups/{userGroupId}/runs?state={state}',
     GROUPS_UPDATE: 'groups/{userGroupId}',
-    LEADERBOARD_GET: 'workflows/{workflowId}/leaderboard?orderBy={orderBy}&includeAll={includeAll}',
+    LEADERBOARD_GET: 'workflows/{workflowId}/leaderboard?orderBy={orderBy}&includeAll={includeAll}&limit={limit}&offset={offset}&cursor={cursor}',  # noqa: E501
     RUNS_CANCEL: 'runs/{runId}',
     RUNS_DELETE: 'runs/{runId}',
     RUNS_DOWNLOAD_ARCHIVE: 'runs/{runId}/downloads/archive',
     RUNS_DOWNLOAD_FILE: 'runs/{runId}/downloads/files/{fileId}',
     RUNS_GET: 'runs/{runId}',
+    RUNS_NOTIFY: 'runs/{runId}/notify',
     RUNS_START: 'groups/{userGroupId}/runs',
     SERVICE_DESCRIPTOR: '',
     USERS_ACTIVATE: 'users/activate',
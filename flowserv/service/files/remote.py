@@ -125,6 +125,6 @@ class RemoteUploadFileService(UploadFileService):
         flowserv.error.UnauthorizedAccessError
         flowserv.error.UnknownWorkflowGroupError
         """
-        files = {'files': (name, file.open())}
         url = self.urls(route.FILES_UPLOAD, userGroupId=group_id)
-        return post(url=url, files=files)
+        with file.open_stream() as f:
+            return post(url=url, files={'files': (name, f)})
@@ -16,7 +16,7 @@ object is under the control of of a context manager to ensure that the
 connection is closed properly after every API request has been handled.
 """
 
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import logging
 import os
@@ -100,6 +100,14 @@ class LocalAPIFactory(APIFactory):
         # Authenticated default user. The initial value depends on the given
         # value for the user_id or authentication policy.
         self._user_id = config.DEFAULT_USER if not user_id and self[AUTH] == config.AUTH_OPEN else user_id
+        # Recover orphaned runs of a previous service instance if requested.
+        # Stale run directories in the base directory for run files of the
+        # workflow engine are deleted as well. Runs that the workflow engine
+        # can resume (e.g., runs on a remote engine) are not orphaned.
+        if self.get(config.FLOWSERV_RECOVER_RUNS):
+            self.resume_runs()
+            with self() as api:
+                api.runs().recover_runs(runsdir=config.RUNSDIR(self), dispatch=True)
 
     def __call__(self, user_id: Optional[str] = None, access_token: Optional[str] = None):
         """Get an instance of the context manager that creates the local service
@@ -180,6 +188,47 @@ class LocalAPIFactory(APIFactory):
             arguments=arguments
         )
 
+    def notify_run(self, run_id: str, doc: Dict) -> bool:
+        """Process a notification about a state change of the given run that
+        was pushed by an external workflow engine.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+        doc: dict
+            Notification content.
+
+        Returns
+        -------
+        bool
+        """
+        return self._engine.notify_run(run_id=run_id, doc=doc)
+
+    def pop_progress(self, run_id: str) -> List[Dict]:
+        """Get (and remove) the progress reports for the commands of a
+        synchronously executed run.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+
+        Returns
+        -------
+        list of dict
+        """
+        return self._engine.pop_progress(run_id=run_id)
+
+    def resume_runs(self) -> List[str]:
+        """Resume active runs of a previous instance of the workflow engine.
+
+        Returns
+        -------
+        list of string
+        """
+        return self._engine.resume_runs()
+
 
 class SessionManager(object):
     """Context manager that creates a local API and controls the database
@@ -255,7 +304,11 @@ class SessionManager(object):
         # Create the individual components of the API.
         ttl = env.get(config.FLOWSERV_AUTH_LOGINTTL, config.DEFAULT_LOGINTTL)
         user_manager = UserManager(session=session, token_timeout=ttl)
-        run_manager = RunManager(session=session, fs=fs)
+        run_manager = RunManager(
+            session=session,
+            fs=fs,
+            archive_cache=env.get(config.FLOWSERV_ARCHIVE_CACHE, config.DEFAULT_ARCHIVE_CACHE)
+        )
         group_manager = WorkflowGroupManager(
             session=session,
             fs=fs,
@@ -291,7 +344,8 @@ class SessionManager(object):
                 ranking_manager=ranking_manager,
                 backend=engine,
                 auth=auth,
-                user_id=user_id
+                user_id=user_id,
+                max_active_runs=env.get(config.FLOWSERV_MAX_ACTIVE_RUNS)
             ),
             user_service=LocalUserService(
                 manager=user_manager,
@@ -134,7 +134,7 @@ class RunService(metaclass=ABCMeta):  # pragma: no cover
         raise NotImplementedError()
 
     @abstractmethod
-    def start_run(self, group_id: str, arguments: List[Dict]) -> Dict:
+    def start_run(self, group_id: str, arguments: List[Dict], priority: Optional[int] = 0) -> Dict:
         """Start a new workflow run for the given group. The user provided
         arguments are expected to be a list of (key,value)-pairs. The key value
         identifies the template parameter. The data type of the value depends
@@ -151,6 +151,8 @@ class RunService(metaclass=ABCMeta):  # pragma: no cover
             Unique workflow group identifier
         arguments: list(dict)
             List of user provided arguments for template parameters.
+        priority: int, default=0
+            Runs with higher priority are dispatched first.
 
         Returns
         -------
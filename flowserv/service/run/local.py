@@ -11,20 +11,22 @@ manipulate workflow runs and their results. The local run service accesses all
 resources directly via a the database model.
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import logging
+import os
 import shutil
 
 from flowserv.controller.base import WorkflowController
 from flowserv.model.auth import Auth
-from flowserv.model.base import WorkflowObject
+from flowserv.model.base import GroupObject, RunObject, WorkflowObject
 from flowserv.model.files.base import FileHandle
 from flowserv.model.files.fs import FSFile
 from flowserv.model.group import WorkflowGroupManager
 from flowserv.model.parameter.files import InputFile
+from flowserv.model.queue import RunQueue, is_alive, is_current
 from flowserv.model.ranking import RankingManager
-from flowserv.model.run import RunManager
+from flowserv.model.run import RunManager, delete_run_dir
 from flowserv.model.template.base import WorkflowTemplate
 from flowserv.model.workflow.state import WorkflowState
 from flowserv.service.run.argument import serialize_arg, serialize_fh
@@ -46,10 +48,11 @@ class LocalRunService(RunService):
     def __init__(
         self, run_manager: RunManager, group_manager: WorkflowGroupManager,
         ranking_manager: RankingManager, backend: WorkflowController, auth: Auth,
-        user_id: Optional[str] = None, serializer: Optional[RunSerializer] = None
+        user_id: Optional[str] = None, serializer: Optional[RunSerializer] = None,
+        run_queue: Optional[RunQueue] = None, max_active_runs: Optional[int] = None
     ):
         """Initialize the internal reference to the workflow controller, the
-        runa and group managers, and to the serializer.
+        runa and group managers, the run queue, and to the serializer.
 
         Parameters
         ----------
@@ -67,6 +70,11 @@ class LocalRunService(RunService):
             Identifier of an authenticated user.
         serializer: flowserv.view.run.RunSerializer
             Override the default serializer
+        run_queue: flowserv.model.queue.RunQueue, default=None
+            Queue for runs that wait to be dispatched to the workflow engine.
+        max_active_runs: int, default=None
+            Maximum number of group runs that are dispatched to the workflow
+            engine at the same time. There is no limit if the value is None.
         """
         self.run_manager = run_manager
         self.group_manager = group_manager
@@ -75,6 +83,9 @@ class LocalRunService(RunService):
         self.auth = auth
         self.user_id = user_id
         self.serialize = serializer if serializer is not None else RunSerializer()
+        self.run_queue = run_queue if run_queue is not None else RunQueue(run_manager.session)
+        self.max_active_runs = max_active_runs
+        self._dispatching = False
 
     def cancel_run(self, run_id: str, reason: Optional[str] = None) -> Dict:
         """Cancel the run with the given identifier. Returns a serialization of
@@ -109,14 +120,18 @@ class LocalRunService(RunService):
         run = self.run_manager.get_run(run_id)
         if not run.is_active():
             raise err.InvalidRunStateError(run.state)
-        # Cancel execution at the backend
-        self.backend.cancel_run(run_id)
+        # Remove the run from the queue or cancel execution at the backend if
+        # the run has been dispatched.
+        if not self.run_queue.remove(run_id):
+            self.backend.cancel_run(run_id)
         # Update the run state and return the run handle
         messages = None
         if reason is not None:
             messages = list([reason])
         state = run.state().cancel(messages=messages)
         run = self.run_manager.update_run(run_id=run_id, state=state)
+        # Dispatch queued runs if a slot at the workflow engine was freed.
+        self.dispatch_runs()
         return self.serialize.run_handle(run=run, group=run.group)
 
     def delete_run(self, run_id: str) -> Dict:
@@ -149,6 +164,68 @@ class LocalRunService(RunService):
         # and to delete all run files
         self.run_manager.delete_run(run_id)
 
+    def dispatch_runs(self):
+        """Dispatch queued runs to the workflow engine. The number of runs
+        that are dispatched depends on the maximum number of active runs. Runs
+        are selected by the run queue based on their priority and on the
+        number of active runs for each workflow group.
+
+        Runs for which the workflow arguments can no longer be instantiated
+        (e.g., because an uploaded file was deleted) are set to error state.
+        """
+        # Avoid recursive dispatch when the workflow engine executes runs
+        # synchronously (and the state update dispatches the next runs).
+        if self._dispatching:
+            return
+        self._dispatching = True
+        try:
+            while True:
+                runs = self.run_queue.next_runs(limit=self.max_active_runs)
+                # Only dispatch runs that have not been claimed by a different
+                # process.
+                runs = [run for run in runs if self.run_queue.claim(run.run_id)]
+                if not runs:
+                    break
+                for run in runs:
+                    self.exec_run(run)
+        finally:
+            self._dispatching = False
+
+    def exec_run(self, run: RunObject):
+        """Execute the given run using the workflow engine. The template and
+        arguments for the run are instantiated from the stored run arguments.
+
+        Parameters
+        ----------
+        run: flowserv.model.base.RunObject
+            Handle for a pending workflow run.
+        """
+        run_id = run.run_id
+        try:
+            template, run_args = self.get_run_arguments(group=run.group, arguments=run.arguments)
+        except err.FlowservError as ex:
+            logging.error(ex)
+            self.update_run(run_id=run_id, state=run.state().error(messages=[str(ex)]))
+            return
+        state, rundir = self.backend.exec_workflow(
+            run=run,
+            template=template,
+            arguments=run_args
+        )
+        # Write progress reports of a synchronously executed run.
+        store_progress(self.run_manager, self.backend.pop_progress(run_id))
+        # Update the run state if it is no longer pending for execution. Make
+        # sure to call the update run method for the server to ensure that
+        # results are inserted and post-processing workflows started.
+        if state.is_active():
+            self.run_queue.assign(run_id, rundir=rundir)
+        if not state.is_pending():
+            self.update_run(
+                run_id=run_id,
+                state=state,
+                rundir=rundir
+            )
+
     def get_result_archive(self, run_id: str) -> FileHandle:
         """Get compressed tar-archive containing all result files that were
         generated by a given workflow run. If the run is not in sucess state
@@ -254,6 +331,71 @@ class LocalRunService(RunService):
         run = self.run_manager.get_run(run_id)
         return self.serialize.run_handle(run=run, group=run.group)
 
+    def get_run_arguments(self, group: GroupObject, arguments: List[Dict]) -> Tuple[WorkflowTemplate, Dict]:
+        """Get the workflow template for a group and the template arguments
+        from a list of user provided arguments. Returns the template and a
+        dictionary that maps parameter identifier to the argument values.
+
+        Parameters
+        ----------
+        group: flowserv.model.base.GroupObject
+            Workflow group handle.
+        arguments: list(dict)
+            List of user provided arguments for template parameters.
+
+        Returns
+        -------
+        flowserv.model.template.base.WorkflowTemplate, dict
+
+        Raises
+        ------
+        flowserv.error.InvalidArgumentError
+        flowserv.error.MissingArgumentError
+        flowserv.error.UnknownFileError
+        flowserv.error.UnknownParameterError
+        """
+        group_id = group.group_id
+        # Get the template from the workflow that the workflow group belongs
+        # to. Get a modified copy of the template based on  the (potentially)
+        # modified workflow specification and parameters of the workflow group.
+        template = group.workflow.get_template(
+            workflow_spec=group.workflow_spec,
+            parameters=group.parameters
+        )
+        # Create instances of the template arguments from the given list of
+        # values. At this point we only distinguish between scalar values and
+        # input files. Also create a mapping from he argument list that is used
+        # stored in the database.
+        run_args = dict()
+        for arg in arguments:
+            arg_id, arg_val = deserialize_arg(arg)
+            # Raise an error if multiple values are given for the same argument
+            if arg_id in run_args:
+                raise err.DuplicateArgumentError(arg_id)
+            para = template.parameters.get(arg_id)
+            if para is None:
+                raise err.UnknownParameterError(arg_id)
+            if is_fh(arg_val):
+                file_id, target = deserialize_fh(arg_val)
+                # The argument value is expected to be the identifier of an
+                # previously uploaded file. This will raise an exception if the
+                # file identifier is unknown.
+                fileobj = self.group_manager.get_uploaded_file(
+                    group_id=group_id,
+                    file_id=file_id
+                ).fileobj
+                run_args[arg_id] = para.cast(
+                    value=fileobj,
+                    target=target
+                )
+            else:
+                run_args[arg_id] = para.cast(arg_val)
+        # Before we start creating directories and copying files make sure that
+        # there are values for all template parameters (either in the arguments
+        # dictionary or set as default values)
+        template.validate_arguments(run_args)
+        return template, run_args
+
     def list_runs(self, group_id: str, state: Optional[str] = None):
         """Get a listing of all run handles for the given workflow group.
 
@@ -282,12 +424,141 @@ class LocalRunService(RunService):
             runs=self.run_manager.list_runs(group_id=group_id, state=state)
         )
 
-    def start_run(self, group_id: str, arguments: List[Dict]) -> Dict:
+    def notify_run(self, run_id: str, doc: Dict) -> bool:
+        """Forward a notification about a state change of the given run that
+        was pushed by an external workflow engine to the workflow controller.
+        The notification content is interpreted by the controller. Returns
+        False if the run is not monitored by the controller of the current
+        process.
+
+        Raises an unauthorized access error if the user does not have the
+        necessary access rights to update the run. The remote engine has to
+        authenticate as a member of the group that submitted the run (or the
+        service has to run in open access mode).
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+        doc: dict
+            Notification content.
+
+        Returns
+        -------
+        bool
+
+        Raises
+        ------
+        flowserv.error.UnauthorizedAccessError
+        flowserv.error.UnknownRunError
+        """
+        # Raise an error if the user does not have rights to update the run or
+        # if the run does not exist.
+        if not self.auth.is_group_member(run_id=run_id, user_id=self.user_id):
+            raise err.UnauthorizedAccessError()
+        return self.backend.notify_run(run_id=run_id, doc=doc)
+
+    def recover_runs(
+        self, requeue: Optional[bool] = False, runsdir: Optional[str] = None,
+        dispatch: Optional[bool] = False
+    ) -> List[str]:
+        """Recover active runs whose executor is no longer alive (e.g., after
+        the process that hosted the workflow engine died). Returns the
+        identifier of the recovered runs.
+
+        Pending runs are re-queued. Running runs are set to error state unless
+        the requeue flag is True. In the latter case, running group runs are
+        reset to pending and re-queued. Post-processing runs are always set to
+        error state. The run directories of all recovered runs are deleted.
+
+        If the base directory for run files is given, all run directories in
+        that folder that do not belong to an active run are deleted as well.
+
+        Queued runs are only dispatched if the dispatch flag is True. Runs
+        should only be dispatched by the process that hosts the workflow
+        engine of the service (and not, e.g., by a command line tool that
+        recovers the runs of a running service).
+
+        Parameters
+        ----------
+        requeue: bool, default=False
+            Re-queue orphaned runs that are in running state.
+        runsdir: string, default=None
+            Base directory for temporary run files of the workflow engine.
+        dispatch: bool, default=False
+            Dispatch queued runs after the orphaned runs were recovered.
+
+        Returns
+        -------
+        list of string
+        """
+        runs = list()
+        for run in self.run_queue.orphaned_runs():
+            run_id = run.run_id
+            rundir = run.executor.rundir if run.executor is not None else None
+            if rundir is not None and os.path.isdir(rundir):
+                delete_run_dir(rundir)
+            if run.group_id is not None and (run.is_pending() or requeue):
+                logging.info('re-queue orphaned run {}'.format(run_id))
+                self.run_queue.requeue(run)
+            else:
+                logging.info('orphaned run {} failed'.format(run_id))
+                state = run.state().error(messages=['run executor terminated unexpectedly'])
+                self.run_manager.update_run(run_id=run_id, state=state)
+            runs.append(run_id)
+        # Delete stale run directories before new runs are dispatched.
+        if runsdir is not None and os.path.isdir(runsdir):
+            folders = [f for f in os.listdir(runsdir) if os.path.isdir(os.path.join(runsdir, f))]
+            active = self.run_manager.active_runs(folders)
+            for run_id in folders:
+                if run_id not in active:
+                    delete_run_dir(os.path.join(runsdir, run_id))
+        if dispatch:
+            self.dispatch_runs()
+        return runs
+
+    def remote_tasks(self) -> List[Dict]:
+        """Get the monitoring information for active runs that are executed by
+        a remote workflow engine and that can be resumed by the current
+        process. These are runs that are assigned to the current process or
+        whose executor is no longer alive (e.g., after a restart of the
+        service). This method is called by remote workflow controllers on
+        startup.
+
+        Each entry is a dictionary with the run identifier (run_id), the
+        identifier of the remote workflow (workflow_id), the last known state
+        of the run (state), the output files (output_files), and the poll
+        schedule (interval and next_poll).
+
+        Returns
+        -------
+        list of dict
+        """
+        result = list()
+        for task in self.run_manager.remote_tasks():
+            executor = task.run.executor
+            if executor is not None and not is_current(executor) and is_alive(executor):
+                continue
+            result.append({
+                'run_id': task.run_id,
+                'workflow_id': task.workflow_id,
+                'state': task.run.state(),
+                'output_files': task.output_files if task.output_files else list(),
+                'interval': task.interval,
+                'next_poll': task.next_poll
+            })
+        return result
+
+    def start_run(self, group_id: str, arguments: List[Dict], priority: Optional[int] = 0) -> Dict:
         """Start a new workflow run for the given group. The user provided
         arguments are expected to be a list of (key,value)-pairs. The key value
         identifies the template parameter. The data type of the value depends
         on the type of the parameter.
 
+        The new run is added to the run queue. Queued runs are dispatched to
+        the workflow engine according to their priority and the number of
+        active runs for each group.
+
         Returns a serialization of the handle for the started run.
 
         Raises an unauthorized access error if the user does not have the
@@ -299,6 +570,8 @@ class LocalRunService(RunService):
             Unique workflow group identifier
         arguments: list(dict)
             List of user provided arguments for template parameters.
+        priority: int, default=0
+            Runs with higher priority are dispatched first.
 
         Returns
         -------
@@ -320,68 +593,61 @@ class LocalRunService(RunService):
         # Get handle for the given user group to enable access to uploaded
         # files and the identifier of the associated workflow.
         group = self.group_manager.get_group(group_id)
-        # Get the template from the workflow that the workflow group belongs
-        # to. Get a modified copy of the template based on  the (potentially)
-        # modified workflow specification and parameters of the workflow group.
-        template = group.workflow.get_template(
-            workflow_spec=group.workflow_spec,
-            parameters=group.parameters
-        )
-        # Create instances of the template arguments from the given list of
-        # values. At this point we only distinguish between scalar values and
-        # input files. Also create a mapping from he argument list that is used
-        # stored in the database.
-        run_args = dict()
-        for arg in arguments:
-            arg_id, arg_val = deserialize_arg(arg)
-            # Raise an error if multiple values are given for the same argument
-            if arg_id in run_args:
-                raise err.DuplicateArgumentError(arg_id)
-            para = template.parameters.get(arg_id)
-            if para is None:
-                raise err.UnknownParameterError(arg_id)
-            if is_fh(arg_val):
-                file_id, target = deserialize_fh(arg_val)
-                # The argument value is expected to be the identifier of an
-                # previously uploaded file. This will raise an exception if the
-                # file identifier is unknown.
-                fileobj = self.group_manager.get_uploaded_file(
-                    group_id=group_id,
-                    file_id=file_id
-                ).fileobj
-                run_args[arg_id] = para.cast(
-                    value=fileobj,
-                    target=target
-                )
-            else:
-                run_args[arg_id] = para.cast(arg_val)
-        # Before we start creating directories and copying files make sure that
-        # there are values for all template parameters (either in the arguments
-        # dictionary or set as default values)
-        template.validate_arguments(run_args)
-        # Start the run.
+        # Validate the arguments before the run is created. Raises an error
+        # if the arguments are invalid.
+        self.get_run_arguments(group=group, arguments=arguments)
+        # Create the run and add it to the queue. Dispatch queued runs to
+        # the workflow engine.
         run = self.run_manager.create_run(
             group=group,
             arguments=arguments
         )
         run_id = run.run_id
-        state, rundir = self.backend.exec_workflow(
-            run=run,
-            template=template,
-            arguments=run_args
-        )
-        # Update the run state if it is no longer pending for execution. Make
-        # sure to call the update run method for the server to ensure that
-        # results are inserted and post-processing workflows started.
-        if not state.is_pending():
-            self.update_run(
-                run_id=run_id,
-                state=state,
-                rundir=rundir
-            )
+        self.run_queue.enqueue(run, priority=priority)
+        self.dispatch_runs()
+        run = self.run_manager.get_run(run_id)
+        if not run.is_pending():
             return self.get_run(run_id)
         return self.serialize.run_handle(run, group)
 
+    def update_remote_task(
+        self, run_id: str, workflow_id: str, output_files: List[str],
+        interval: float, next_poll: float
+    ):
+        """Update the monitoring information for a run that is executed by a
+        remote workflow engine. The run is assigned to the current process as
+        its executor. This method is called by remote workflow controllers
+        when a run is submitted or resumed and when the poll schedule for the
+        run changes. Information for inactive runs is ignored.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+        workflow_id: string
+            Unique identifier for the workflow on the remote engine.
+        output_files: list(string)
+            Relative path of output files that are generated by the workflow
+            run.
+        interval: float
+            Current poll interval (in sec.) for the run.
+        next_poll: float
+            Time of the next state check (in seconds since the epoch).
+
+        Raises
+        ------
+        flowserv.error.UnknownRunError
+        """
+        updated = self.run_manager.update_remote_task(
+            run_id=run_id,
+            workflow_id=workflow_id,
+            output_files=output_files,
+            interval=interval,
+            next_poll=next_poll
+        )
+        if updated:
+            self.run_queue.assign(run_id)
+
     def update_run(self, run_id: str, state: WorkflowState, rundir: Optional[str] = None):
         """Update the state of the given run. For runs that are in a SUCCESS
         state the workflow evaluation ranking is updated (if a result schema
@@ -419,17 +685,17 @@ class LocalRunService(RunService):
             logging.info('run {} is a success'.format(run_id))
             workflow = run.workflow
             if workflow.run_postproc:
-                # Get the latest ranking for the workflow and create a
-                # sorted list of run identifier to compare agains the
-                # current post-processing key for the workflow.
-                ranking = self.ranking_manager.get_ranking(workflow=workflow)
-                runs = sorted([r.run_id for r in ranking])
+                # Get the sorted list of run identifier in the materialized
+                # leaderboard for the workflow to compare agains the current
+                # post-processing key for the workflow.
+                runs = self.ranking_manager.get_leaderboard_runs(workflow)
                 # Run post-processing task synchronously if the current
                 # post-processing resources where generated for a different
                 # set of runs than those in the ranking.
                 if runs != workflow.ranking():
                     msg = 'Run post-processing workflow for {}'
                     logging.info(msg.format(workflow.workflow_id))
+                    ranking = self.ranking_manager.get_ranking(workflow=workflow)
                     run_postproc_workflow(
                         postproc_spec=workflow.postproc_spec,
                         workflow=workflow,
@@ -438,6 +704,59 @@ class LocalRunService(RunService):
                         run_manager=self.run_manager,
                         backend=self.backend
                     )
+        # Dispatch queued runs if a slot at the workflow engine was freed.
+        if run is not None and not state.is_active():
+            self.dispatch_runs()
+
+    def update_step(
+        self, run_id: str, pos: int, step: int, command: str, started_at: str,
+        finished_at: Optional[str] = None, exit_code: Optional[int] = None,
+        cpu_time: Optional[float] = None, max_memory: Optional[int] = None,
+        wall_time: Optional[float] = None
+    ):
+        """Update progress information for a command of a workflow run. This
+        method is called by the workflow engine when a command is started and
+        when it finishes.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier.
+        pos: int
+            Position of the command in the list of all workflow commands.
+        step: int
+            Position of the workflow step that contains the command.
+        command: string
+            Command line statement.
+        started_at: string
+            Timestamp when the command was started.
+        finished_at: string, default=None
+            Timestamp when the command finished.
+        exit_code: int, default=None
+            Exit code of the finished command.
+        cpu_time: float, default=None
+            CPU time (in seconds) that was used by the finished command.
+        max_memory: int, default=None
+            Peak memory usage (in bytes) of the finished command.
+        wall_time: float, default=None
+            Wall time (in seconds) of the finished command.
+
+        Raises
+        ------
+        flowserv.error.UnknownRunError
+        """
+        self.run_manager.update_step(
+            run_id=run_id,
+            pos=pos,
+            step=step,
+            command=command,
+            started_at=started_at,
+            finished_at=finished_at,
+            exit_code=exit_code,
+            cpu_time=cpu_time,
+            max_memory=max_memory,
+            wall_time=wall_time
+        )
 
 
 # -- Helper functions ---------------------------------------------------------
@@ -489,7 +808,10 @@ def run_postproc_workflow(
         )
     else:
         # Execute the post-processing workflow asynchronously if
-        # there were no data preparation errors.
+        # there were no data preparation errors. The run is assigned to the
+        # current process as its executor.
+        queue = RunQueue(run_manager.session)
+        queue.assign(run.run_id)
         postproc_state, rundir = backend.exec_workflow(
             run=run,
             template=WorkflowTemplate(
@@ -498,8 +820,11 @@ def run_postproc_workflow(
             ),
             arguments=run_args
         )
+        store_progress(run_manager, backend.pop_progress(run.run_id))
         # Update the post-processing workflow run state if it is
         # no longer pending for execution.
+        if postproc_state.is_active():
+            queue.assign(run.run_id, rundir=rundir)
         if not postproc_state.is_pending():
             run_manager.update_run(
                 run_id=run.run_id,
@@ -508,3 +833,21 @@ def run_postproc_workflow(
             )
         # Remove the temporary input folder
         shutil.rmtree(datadir)
+
+
+def store_progress(run_manager: RunManager, reports: List[Dict]):
+    """Write the progress reports for the commands of a workflow run to the
+    database. Errors are logged but not raised.
+
+    Parameters
+    ----------
+    run_manager: flowserv.model.run.RunManager
+        Manager for workflow runs.
+    reports: list of dict
+        Progress information for workflow commands.
+    """
+    for progress in reports:
+        try:
+            run_manager.update_step(**progress)
+        except Exception as ex:
+            logging.error(ex)
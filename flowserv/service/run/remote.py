@@ -39,7 +39,8 @@ class RemoteRunService(RunService):
         # Default labels for elements in request bodies.
         self.labels = {
             'CANCEL_REASON': default_labels.CANCEL_REASON,
-            'RUN_ARGUMENTS': default_labels.RUN_ARGUMENTS
+            'RUN_ARGUMENTS': default_labels.RUN_ARGUMENTS,
+            'RUN_PRIORITY': default_labels.RUN_PRIORITY
         }
         if labels is not None:
             self.labels.update(labels)
@@ -162,7 +163,7 @@ class RemoteRunService(RunService):
         url = self.urls(route.GROUPS_RUNS, userGroupId=group_id, state=state)
         return get(url=url)
 
-    def start_run(self, group_id: str, arguments: List[Dict]) -> Dict:
+    def start_run(self, group_id: str, arguments: List[Dict], priority: Optional[int] = 0) -> Dict:
         """Start a new workflow run for the given group. The user provided
         arguments are expected to be a list of (key,value)-pairs. The key value
         identifies the template parameter. The data type of the value depends
@@ -179,11 +180,15 @@ class RemoteRunService(RunService):
             Unique workflow group identifier
         arguments: list(dict)
             List of user provided arguments for template parameters.
+        priority: int, default=0
+            Runs with higher priority are dispatched first.
 
         Returns
         -------
         dict
         """
         data = {self.labels['RUN_ARGUMENTS']: arguments}
+        if priority:
+            data[self.labels['RUN_PRIORITY']] = priority
         url = self.urls(route.RUNS_START, userGroupId=group_id)
         return post(url=url, data=data)
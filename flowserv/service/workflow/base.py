@@ -23,10 +23,15 @@ class WorkflowService(metaclass=ABCMeta):  # pragma: no cover
     @abstractmethod
     def get_ranking(
         self, workflow_id: str, order_by: Optional[List[SortColumn]] = None,
-        include_all: Optional[bool] = False
+        include_all: Optional[bool] = False, limit: Optional[int] = None,
+        offset: Optional[int] = None, cursor: Optional[str] = None
     ) -> Dict:
         """Get serialization of the evaluation ranking for the given workflow.
 
+        The ranking can be paginated using either limit and offset or the
+        cursor that is included in the serialization of a ranking if further
+        entries exist after the returned ones.
+
         Parameters
         ----------
         workflow_id: string
@@ -37,6 +42,13 @@ class WorkflowService(metaclass=ABCMeta):  # pragma: no cover
         include_all: bool, default=False
             Include all entries (True) or at most one entry (False) per user
             group in the returned ranking
+        limit: int, default=None
+            Maximum number of entries in the returned ranking.
+        offset: int, default=None
+            Number of entries to skip at the beginning of the ranking.
+        cursor: string, default=None
+            Cursor for the ranking entry after which the returned ranking
+            starts.
 
         Returns
         -------
@@ -15,7 +15,7 @@ from typing import Dict, List, Optional
 
 from flowserv.model.files.base import FileHandle
 from flowserv.model.group import WorkflowGroupManager
-from flowserv.model.ranking import RankingManager
+from flowserv.model.ranking import RankingManager, decode_cursor, encode_cursor
 from flowserv.model.run import RunManager
 from flowserv.model.template.schema import SortColumn
 from flowserv.model.workflow.manager import WorkflowManager
@@ -135,11 +135,16 @@ class LocalWorkflowService(WorkflowService):
 
     def get_ranking(
         self, workflow_id: str, order_by: Optional[List[SortColumn]] = None,
-        include_all: Optional[bool] = False
+        include_all: Optional[bool] = False, limit: Optional[int] = None,
+        offset: Optional[int] = None, cursor: Optional[str] = None
     ) -> Dict:
         """Get serialization of the evaluation ranking for the given workflow.
         Returns None if the workflow does not have a result schema.
 
+        The ranking can be paginated using either limit and offset or the
+        cursor that is included in the serialization of a ranking if further
+        entries exist after the returned ones.
+
         Parameters
         ----------
         workflow_id: string
@@ -150,6 +155,13 @@ class LocalWorkflowService(WorkflowService):
         include_all: bool, default=False
             Include all entries (True) or at most one entry (False) per user
             group in the returned ranking.
+        limit: int, default=None
+            Maximum number of entries in the returned ranking.
+        offset: int, default=None
+            Number of entries to skip at the beginning of the ranking.
+        cursor: string, default=None
+            Cursor for the ranking entry after which the returned ranking
+            starts.
 
         Returns
         -------
@@ -157,6 +169,8 @@ class LocalWorkflowService(WorkflowService):
 
         Raises
         ------
+        flowserv.error.InvalidArgumentError
+        flowserv.error.InvalidSortColumnError
         flowserv.error.UnknownWorkflowError
         """
         # Get the workflow handle to ensure that the workflow exists
@@ -164,20 +178,32 @@ class LocalWorkflowService(WorkflowService):
         # Return None if the workflow has no result schema defined.
         if workflow.result_schema is None:
             return None
+        if order_by is None:
+            order_by = workflow.result_schema.get_default_order()
         # Only if the workflow has a defined result schema we get theranking of
-        # run results. Otherwise, the ranking is empty.
+        # run results. Otherwise, the ranking is empty. If a limit is given we
+        # query one additional entry to see whether the ranking continues after
+        # the returned entries.
         ranking = self.ranking_manager.get_ranking(
             workflow=workflow,
             order_by=order_by,
-            include_all=include_all
+            include_all=include_all,
+            limit=limit + 1 if limit is not None else None,
+            offset=offset,
+            after=decode_cursor(cursor) if cursor else None
         )
+        next_cursor = None
+        if limit is not None and len(ranking) > limit:
+            ranking = ranking[:limit]
+            next_cursor = encode_cursor(ranking[-1], order_by) if ranking else None
         postproc = None
         if workflow.postproc_run_id is not None:
             postproc = self.run_manager.get_run(workflow.postproc_run_id)
         return self.serialize.workflow_leaderboard(
             workflow=workflow,
             ranking=ranking,
-            postproc=postproc
+            postproc=postproc,
+            cursor=next_cursor
         )
 
     def get_result_archive(self, workflow_id: str) -> FileHandle:
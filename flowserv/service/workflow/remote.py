@@ -38,7 +38,8 @@ class RemoteWorkflowService(WorkflowService):
 
     def get_ranking(
         self, workflow_id: str, order_by: Optional[List[SortColumn]] = None,
-        include_all: Optional[bool] = False
+        include_all: Optional[bool] = False, limit: Optional[int] = None,
+        offset: Optional[int] = None, cursor: Optional[str] = None
     ) -> Dict:
         """Get serialization of the evaluation ranking for the given workflow.
 
@@ -52,6 +53,13 @@ class RemoteWorkflowService(WorkflowService):
         include_all: bool, default=False
             Include all entries (True) or at most one entry (False) per user
             group in the returned ranking
+        limit: int, default=None
+            Maximum number of entries in the returned ranking.
+        offset: int, default=None
+            Number of entries to skip at the beginning of the ranking.
+        cursor: string, default=None
+            Cursor for the ranking entry after which the returned ranking
+            starts.
 
         Returns
         -------
@@ -67,7 +75,10 @@ class RemoteWorkflowService(WorkflowService):
             route.LEADERBOARD_GET,
             workflowId=workflow_id,
             orderBy=','.join(q_order_by),
-            includeAll=include_all
+            includeAll=include_all,
+            limit=limit if limit is not None else '',
+            offset=offset if offset is not None else '',
+            cursor=cursor if cursor is not None else ''
         )
         return get(url=url)
 
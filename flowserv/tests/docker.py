@@ -0,0 +1,405 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Fake Docker client for unit tests of the Docker workflow engine. Commands
+are executed as shell commands on the local machine. The bound volumes of a
+container are simulated by a container root folder that contains symbolic
+links to the bound folders. Commands are executed with the container root
+folder as the working directory. Command paths therefore have to be relative
+(e.g., 'data/names.txt' instead of '/data/names.txt'). Commands that are
+given as a list of arguments (e.g., commands with an image entrypoint) are
+executed without a shell.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import uuid
+
+
+class FakeAPIClient(object):
+    """Fake low-level API client of the Docker client. Executes commands in
+    the containers of the client.
+    """
+    def __init__(self, containers: 'FakeContainers'):
+        """Initialize the container collection and the index of created
+        command executions.
+
+        Parameters
+        ----------
+        containers: flowserv.tests.docker.FakeContainers
+            Container collection of the Docker client.
+        """
+        self.containers = containers
+        self.execs = dict()
+
+    def exec_create(self, container: str, cmd: Union[str, List[str]]) -> Dict:
+        """Create a command execution for the given container.
+
+        Parameters
+        ----------
+        container: string
+            Unique container identifier.
+        cmd: string or list of string
+            Command line statement or list of command arguments.
+
+        Returns
+        -------
+        dict
+        """
+        exec_id = uuid.uuid4().hex
+        self.execs[exec_id] = {'container': self.containers.get(container), 'cmd': cmd, 'ExitCode': None}
+        return {'Id': exec_id}
+
+    def exec_inspect(self, exec_id: str) -> Dict:
+        """Get the exit code of a command execution.
+
+        Parameters
+        ----------
+        exec_id: string
+            Unique execution identifier.
+
+        Returns
+        -------
+        dict
+        """
+        return {'ExitCode': self.execs[exec_id]['ExitCode']}
+
+    def exec_start(
+        self, exec_id: str, stream: Optional[bool] = False, demux: Optional[bool] = False
+    ) -> Iterable[Tuple[bytes, bytes]]:
+        """Run a command execution. Returns the standard output and error
+        output of the command as a single chunk.
+
+        Parameters
+        ----------
+        exec_id: string
+            Unique execution identifier.
+        stream: bool, default=False
+            Ignored.
+        demux: bool, default=False
+            Ignored. The output is always returned as a tuple.
+
+        Returns
+        -------
+        iterable of (bytes, bytes)
+        """
+        execution = self.execs[exec_id]
+        exit_code, output = execution['container'].exec_run(execution['cmd'])
+        execution['ExitCode'] = exit_code
+        return iter([output])
+
+
+class FakeContainer(object):
+    """Fake container that executes commands in a local container root
+    folder.
+    """
+    def __init__(
+        self, image: str, command: Optional[str] = None, volumes: Optional[Dict] = None,
+        limits: Optional[Dict] = None, labels: Optional[Dict] = None
+    ):
+        """Initialize the image name and create the container root folder.
+
+        Parameters
+        ----------
+        image: string
+            Name of the container image.
+        command: string, default=None
+            Command that is executed when waiting for a detached container.
+        volumes: dict, default=None
+            Mapping of host folders to bind definitions.
+        limits: dict, default=None
+            Resource limits of the container. The limits are not enforced.
+        labels: dict, default=None
+            Container labels.
+        """
+        self.id = uuid.uuid4().hex
+        self.image = image
+        self.labels = labels if labels is not None else dict()
+        self.command = command
+        self.limits = limits if limits is not None else dict()
+        self.root = tempfile.mkdtemp()
+        for src, bind in (volumes if volumes is not None else dict()).items():
+            os.symlink(src, os.path.join(self.root, bind['bind'].lstrip('/')))
+        self.commands = list()
+        self.removed = False
+        self.stderr = None
+        # Currently running command.
+        self._proc = None
+
+    def exec_run(self, cmd: Union[str, List[str]], demux: Optional[bool] = False) -> Tuple[int, Tuple[bytes, bytes]]:
+        """Execute a command in the container root folder. Returns the exit
+        code and a tuple with the standard output and error output.
+
+        Parameters
+        ----------
+        cmd: string or list of string
+            Command line statement or list of command arguments.
+        demux: bool, default=False
+            Ignored. The output is always returned as a tuple.
+
+        Returns
+        -------
+        int, (bytes, bytes)
+        """
+        if self.removed:
+            from docker.errors import APIError
+            raise APIError('container removed')
+        self.commands.append(cmd)
+        self._proc = subprocess.Popen(
+            cmd,
+            shell=isinstance(cmd, str),
+            cwd=self.root,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True
+        )
+        stdout, stderr = self._proc.communicate()
+        return self._proc.returncode, (stdout or None, stderr or None)
+
+    def kill(self):
+        """Kill the currently running command."""
+        if self._proc is not None and self._proc.poll() is None:
+            os.killpg(self._proc.pid, signal.SIGKILL)
+
+    def logs(self, stdout: Optional[bool] = True, stderr: Optional[bool] = True) -> bytes:
+        """Get the error output of the command that was executed by a detached
+        container.
+
+        Parameters
+        ----------
+        stdout: bool, default=True
+            Ignored.
+        stderr: bool, default=True
+            Ignored.
+
+        Returns
+        -------
+        bytes
+        """
+        return self.stderr if self.stderr is not None else b''
+
+    def remove(self, force: Optional[bool] = False):
+        """Remove the container root folder.
+
+        Parameters
+        ----------
+        force: bool, default=False
+            Ignored.
+        """
+        self.removed = True
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def wait(self, timeout: Optional[float] = None) -> Dict:
+        """Execute the command of a detached container. Raises a read timeout
+        error if the command does not finish within the given time.
+
+        Parameters
+        ----------
+        timeout: float, default=None
+            Timeout in seconds.
+
+        Returns
+        -------
+        dict
+        """
+        from requests.exceptions import ReadTimeout
+        timer = None
+        if timeout is not None:
+            timer = threading.Timer(timeout, self.kill)
+            timer.start()
+        exit_code, (_, self.stderr) = self.exec_run(self.command)
+        if timer is not None:
+            timer.cancel()
+            if exit_code == -signal.SIGKILL:
+                raise ReadTimeout('timeout')
+        return {'StatusCode': exit_code}
+
+
+class FakeContainers(object):
+    """Fake container collection of the Docker client."""
+    def __init__(self):
+        """Initialize the list of created containers."""
+        self.created = list()
+
+    def get(self, container_id: str) -> FakeContainer:
+        """Get the container with the given identifier.
+
+        Parameters
+        ----------
+        container_id: string
+            Unique container identifier.
+
+        Returns
+        -------
+        flowserv.tests.docker.FakeContainer
+        """
+        for container in self.created:
+            if container.id == container_id:
+                return container
+        from docker.errors import NotFound
+        raise NotFound(container_id)
+
+    def list(self, all: Optional[bool] = False, filters: Optional[Dict] = None) -> List[FakeContainer]:
+        """Get the containers that have not been removed. The label filter
+        ('key' or 'key=value') is the only supported filter.
+
+        Parameters
+        ----------
+        all: bool, default=False
+            Ignored.
+        filters: dict, default=None
+            Filters for the returned containers.
+
+        Returns
+        -------
+        list of flowserv.tests.docker.FakeContainer
+        """
+        label = (filters if filters is not None else dict()).get('label')
+        result = list()
+        for container in self.created:
+            if container.removed:
+                continue
+            if label is not None:
+                key, _, value = label.partition('=')
+                if key not in container.labels or (value and container.labels[key] != value):
+                    continue
+            result.append(container)
+        return result
+
+    def run(
+        self, image: str, command: Optional[str] = None, volumes: Optional[Dict] = None,
+        detach: Optional[bool] = False, **kwargs
+    ):
+        """Create a container. If the detach flag is False, the given command
+        is executed and the container is removed. An error is raised if the
+        command fails.
+
+        Parameters
+        ----------
+        image: string
+            Name of the container image.
+        command: string, default=None
+            Command that is executed by a container that is not detached.
+        volumes: dict, default=None
+            Mapping of host folders to bind definitions.
+        detach: bool, default=False
+            Return the created container if True.
+        kwargs: dict
+            Resource limits and labels are kept with the container. Other
+            arguments are ignored.
+
+        Returns
+        -------
+        flowserv.tests.docker.FakeContainer
+        """
+        limits = {k: kwargs[k] for k in ['mem_limit', 'ulimits'] if k in kwargs}
+        container = FakeContainer(
+            image=image,
+            command=command,
+            volumes=volumes,
+            limits=limits,
+            labels=kwargs.get('labels')
+        )
+        self.created.append(container)
+        if detach:
+            return container
+        exit_code, (stdout, stderr) = container.exec_run(command)
+        container.remove()
+        if exit_code != 0:
+            from docker.errors import ContainerError
+            raise ContainerError(container, exit_code, command, image, stderr)
+        return stdout
+
+
+class FakeImage(object):
+    """Fake image with the image configuration attributes."""
+    def __init__(self, name: str, entrypoint: Optional[List[str]] = None):
+        """Initialize the image name and the image entrypoint.
+
+        Parameters
+        ----------
+        name: string
+            Image name.
+        entrypoint: list of string, default=None
+            Entrypoint of the image.
+        """
+        self.name = name
+        self.attrs = {'Config': {'Entrypoint': entrypoint}}
+
+
+class FakeImages(object):
+    """Fake image collection of the Docker client."""
+    def __init__(self, images: Iterable[str], entrypoints: Optional[Dict] = None):
+        """Initialize the list of locally available images.
+
+        Parameters
+        ----------
+        images: iterable of string
+            Names of locally available images.
+        entrypoints: dict, default=None
+            Mapping of image names to image entrypoints.
+        """
+        self.images = set(images)
+        self.entrypoints = entrypoints if entrypoints is not None else dict()
+        self.pulled = list()
+
+    def get(self, name: str) -> FakeImage:
+        """Get the locally available image with the given name.
+
+        Parameters
+        ----------
+        name: string
+            Image name.
+
+        Returns
+        -------
+        flowserv.tests.docker.FakeImage
+        """
+        if name not in self.images:
+            from docker.errors import ImageNotFound
+            raise ImageNotFound(name)
+        return FakeImage(name=name, entrypoint=self.entrypoints.get(name))
+
+    def pull(self, name: str) -> str:
+        """Pull the image with the given name.
+
+        Parameters
+        ----------
+        name: string
+            Image name.
+
+        Returns
+        -------
+        string
+        """
+        self.pulled.append(name)
+        self.images.add(name)
+        return name
+
+
+class FakeDockerClient(object):
+    """Fake Docker client that executes container commands locally."""
+    def __init__(self, images: Optional[List[str]] = None, entrypoints: Optional[Dict] = None):
+        """Initialize the container and image collections.
+
+        Parameters
+        ----------
+        images: list of string, default=None
+            Names of locally available images.
+        entrypoints: dict, default=None
+            Mapping of image names to image entrypoints.
+        """
+        self.containers = FakeContainers()
+        self.images = FakeImages(images if images is not None else list(), entrypoints=entrypoints)
+        self.api = FakeAPIClient(self.containers)
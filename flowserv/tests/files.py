@@ -11,6 +11,8 @@
 import botocore.exceptions
 import json
 import os
+import shutil
+import threading
 
 from io import BytesIO
 from typing import Dict, IO, List, Optional, Union
@@ -40,9 +42,12 @@ class FileStorage(object):
         """Get the size of the wrapped file."""
         return self.file.size()
 
-    def save(self, filename: str):
+    def save(self, dst: Union[str, IO]):
         """Write file to disk or to a given IO buffer."""
-        self.file.store(filename)
+        if isinstance(dst, str):
+            self.file.store(dst)
+        else:
+            self.file.copy_to(dst)
 
 
 # -- S3 Buckets ---------------------------------------------------------------
@@ -51,10 +56,19 @@ class DiskBucket(object):
     """Implementation of relevant methods for S3 buckets that are used by the
     BucketStore for test purposes. Persists all objects on disk. Uses the
     API_BASDIR if not storage directory is given.
+
+    For testing the handling of transfer errors, the bucket can be configured
+    to fail the first n download or upload requests for individual objects.
     """
-    def __init__(self, basedir: str):
-        """Initialize the internal object dictionary."""
+    def __init__(self, basedir: str, failures: Optional[Dict[str, int]] = None):
+        """Initialize the storage directory and the optional number of failed
+        transfer requests for individual object keys.
+        """
         self.basedir = basedir
+        self.failures = failures if failures is not None else dict()
+        # Number of GET requests for objects in the bucket.
+        self.get_requests = 0
+        self._lock = threading.Lock()
 
     def __repr__(self):
         """Get object representation ."""
@@ -75,38 +89,120 @@ class DiskBucket(object):
             os.remove(filename)
 
     def download_fileobj(self, key: str, data: IO):
-        """Copy the buffer for the identified object into the given data
+        """Copy the content of the identified object into the given data
         buffer.
         """
+        self._fail(key, 'download_fileobj')
         filename = os.path.join(self.basedir, key)
         if os.path.isfile(filename):
             with open(filename, 'rb') as f:
-                data.write(f.read())
+                shutil.copyfileobj(f, data)
         else:
             raise botocore.exceptions.ClientError(
                 operation_name='download_fileobj',
                 error_response={'Error': {'Code': 404, 'Message': filename}}
             )
-        data.seek(0)
 
     def filter(self, Prefix: str) -> List:
         """Return all objects in the bucket that have a key which matches the
-        given prefix.
+        given prefix. The entity tag of each object is derived from the file
+        size and modification time to avoid reading the file content.
         """
         result = list()
         for key in parse_dir(self.basedir, ''):
             if key.startswith(Prefix):
-                result.append(ObjectSummary(key))
+                stat = os.stat(os.path.join(self.basedir, key))
+                e_tag = '"{:x}-{:x}"'.format(stat.st_size, stat.st_mtime_ns)
+                result.append(ObjectSummary(key, e_tag=e_tag))
         return result
 
+    def Object(self, key: str):
+        """Get handle for the object with the given key.
+
+        Returns
+        -------
+        flowserv.tests.files.DiskObject
+        """
+        return DiskObject(filename=os.path.join(self.basedir, key), bucket=self)
+
     def upload_fileobj(self, file: IO, dst: str):
         """Add given buffer to the object index. Uses the destination as the
         object key.
         """
+        self._fail(dst, 'upload_fileobj')
         filename = os.path.join(self.basedir, dst)
         os.makedirs(os.path.dirname(filename), exist_ok=True)
         with open(filename, 'wb') as f:
-            f.write(file.read())
+            shutil.copyfileobj(file, f)
+
+    def _fail(self, key: str, operation: str):
+        """Raise a client error if a failure is pending for the given key."""
+        with self._lock:
+            count = self.failures.get(key, 0)
+            if count <= 0:
+                return
+            self.failures[key] = count - 1
+        raise botocore.exceptions.ClientError(
+            operation_name=operation,
+            error_response={'Error': {'Code': 503, 'Message': key}}
+        )
+
+
+class DiskObject(object):
+    """Simulate S3 object handles for objects in a disk bucket. Implements
+    (ranged) get requests and access to the object size.
+    """
+    def __init__(self, filename: str, bucket: Optional[DiskBucket] = None):
+        """Initialize the path to the object file on disk and the bucket that
+        counts the GET requests.
+        """
+        self.filename = filename
+        self.bucket = bucket
+
+    @property
+    def content_length(self) -> int:
+        """Get the object size from the file system metadata. Raises a client
+        error if the object does not exist (similar to a failed HEAD request
+        for S3 objects).
+        """
+        try:
+            return os.stat(self.filename).st_size
+        except FileNotFoundError:
+            raise botocore.exceptions.ClientError(
+                operation_name='head_object',
+                error_response={'Error': {'Code': '404', 'Message': self.filename}}
+            )
+
+    def get(self, Range: Optional[str] = None) -> Dict:
+        """Get the object content. The optional range has the format
+        'bytes={start}-{end}'. Returns a dictionary with the content in the
+        'Body' element. The content of the whole object is streamed from the
+        file.
+        """
+        if self.bucket is not None:
+            with self.bucket._lock:
+                self.bucket.get_requests += 1
+        if not os.path.isfile(self.filename):
+            raise botocore.exceptions.ClientError(
+                operation_name='get_object',
+                error_response={'Error': {'Code': 'NoSuchKey', 'Message': self.filename}}
+            )
+        size = os.stat(self.filename).st_size
+        start, end = 0, size - 1
+        if Range is not None:
+            start, end = [int(pos) for pos in Range[len('bytes='):].split('-')]
+            if start >= size:
+                raise botocore.exceptions.ClientError(
+                    operation_name='get_object',
+                    error_response={'Error': {'Code': 'InvalidRange', 'Message': Range}}
+                )
+            end = min(end, size - 1)
+        else:
+            return {'Body': open(self.filename, 'rb'), 'ContentLength': size}
+        with open(self.filename, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start + 1)
+        return {'Body': BytesIO(data), 'ContentLength': len(data)}
 
 
 def DiskStore(env: Dict):
@@ -120,11 +216,12 @@ def DiskStore(env: Dict):
 
 class ObjectSummary(object):
     """Simple class to simulate object summaries. Only implements the .key
-    property.
+    and .e_tag properties.
     """
-    def __init__(self, key):
-        """Initialize the object key."""
+    def __init__(self, key, e_tag=None):
+        """Initialize the object key and entity tag."""
         self.key = key
+        self.e_tag = e_tag
 
 
 def parse_dir(dirname, prefix, result=None):
@@ -8,9 +8,10 @@
 
 """Implementation of the remote client for test purposes."""
 
+import asyncio
 import os
 
-from flowserv.controller.remote.client import RemoteClient
+from flowserv.controller.remote.client import AsyncRemoteClient, RemoteClient
 from flowserv.controller.remote.engine import RemoteWorkflowController
 from flowserv.model.workflow.remote import RemoteWorkflowObject
 from flowserv.model.workflow.serial import SerialWorkflow
@@ -19,6 +20,91 @@ from flowserv.model.workflow.state import StatePending
 import flowserv.util as util
 
 
+class AsyncRemoteTestClient(AsyncRemoteClient):
+    """Asynchronous version of the remote test client. Simulates the execution
+    of a workflow in the same way as the RemoteTestClient. Each method yields
+    control to the event loop before the request is processed.
+    """
+    def __init__(self, runcount=5, error=None, data=['no data']):
+        """Initialize the simulated workflow engine.
+
+        Parameters
+        ----------
+        runcount: int, default=5
+            Number of poll counts before the workflow state changes.
+        error: string
+            Error message. If given the resulting workflow run will be in
+            error state and this string will be the only error message.
+        data: list or dict, default=['no data']
+            Result file content for successful workflow runs.
+        """
+        self.client = RemoteTestClient(runcount=runcount, error=error, data=data)
+
+    async def create_workflow(self, run, template, arguments):
+        """Create a new instance of a workflow from the given workflow
+        template and user-provided arguments.
+
+        Parameters
+        ----------
+        run: flowserv.model.base.RunObject
+            Handle for the run that is being executed.
+        template: flowserv.model.template.base.WorkflowTemplate
+            Workflow template containing the parameterized specification and
+            the parameter declarations.
+        arguments: dict
+            Dictionary of argument values for parameters in the template.
+
+        Returns
+        -------
+        flowserv.model.workflow.remote.RemoteWorkflowObject
+        """
+        await asyncio.sleep(0)
+        return self.client.create_workflow(run=run, template=template, arguments=arguments)
+
+    async def download_file(self, workflow_id, source, target):
+        """Write the result data to the given target path.
+
+        Parameters
+        ----------
+        workflow_id: string
+            Unique workflow identifier.
+        source: string
+            Relative path to source file in workflow workspace.
+        target: string
+            Path to target file on local disk.
+        """
+        await asyncio.sleep(0)
+        self.client.download_file(workflow_id=workflow_id, source=source, target=target)
+
+    async def get_workflow_state(self, workflow_id, current_state):
+        """Get information about the current state of a given workflow.
+
+        Parameters
+        ----------
+        workflow_id: string
+            Unique workflow identifier
+        current_state: flowserv.model.workflw.state.WorkflowState
+            Last known state of the workflow by the workflow controller
+
+        Returns
+        -------
+        flowserv.model.workflw.state.WorkflowState
+        """
+        await asyncio.sleep(0)
+        return self.client.get_workflow_state(workflow_id=workflow_id, current_state=current_state)
+
+    async def stop_workflow(self, workflow_id):
+        """Stop the execution of the workflow with the given identifier.
+
+        Parameters
+        ----------
+        workflow_id: string
+            Unique workflow identifier
+        """
+        await asyncio.sleep(0)
+        self.client.stop_workflow(workflow_id)
+
+
 class RemoteTestClient(RemoteClient):
     """Implementation of the remote workflow engine client. Simulates the
     execution of a workflow. The remote workflow initially is in pending state.
@@ -147,7 +233,7 @@ class RemoteTestController(RemoteWorkflowController):
     """Extend remote workflow controller with dummy template modification
     method.
     """
-    def __init__(self, client, poll_interval, is_async):
+    def __init__(self, client, poll_interval, is_async, fallback_interval=None):
         """Initialize the test client.
 
         Parameters
@@ -158,5 +244,6 @@ class RemoteTestController(RemoteWorkflowController):
         super(RemoteTestController, self).__init__(
             client=client,
             poll_interval=poll_interval,
-            is_async=is_async
+            is_async=is_async,
+            fallback_interval=fallback_interval
         )
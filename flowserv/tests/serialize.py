@@ -109,7 +109,7 @@ def validate_ranking(doc):
     util.validate_doc(
         doc=doc,
         mandatory=['schema', 'ranking'],
-        optional=['postproc', 'outputs']
+        optional=['postproc', 'outputs', 'nextCursor']
     )
     # Schema columns
     for col in doc['schema']:
@@ -157,7 +157,7 @@ def validate_run_handle(doc, state):
     ------
     ValueError
     """
-    labels = ['id', 'workflowId', 'state', 'createdAt', 'arguments']
+    labels = ['id', 'workflowId', 'state', 'createdAt', 'arguments', 'steps']
     if state == st.STATE_RUNNING:
         labels.append('startedAt')
     elif state in [st.STATE_ERROR, st.STATE_CANCELED]:
@@ -177,6 +177,12 @@ def validate_run_handle(doc, state):
         for p in doc['parameters']:
             validate_parameter(p)
     assert doc['state'] == state
+    for s in doc['steps']:
+        util.validate_doc(
+            doc=s,
+            mandatory=['pos', 'step', 'command', 'startedAt'],
+            optional=['finishedAt', 'exitCode', 'cpuTime', 'maxMemory', 'wallTime']
+        )
     if state == st.STATE_SUCCESS:
         for r in doc['files']:
             util.validate_doc(
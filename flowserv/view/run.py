@@ -10,7 +10,7 @@
 
 from typing import Dict, List, Optional
 
-from flowserv.model.base import GroupObject, RunObject
+from flowserv.model.base import GroupObject, RunObject, RunStep
 
 
 """Serialization labels."""
@@ -35,11 +35,23 @@ RUN_GROUP = 'groupId'
 RUN_ID = 'id'
 RUN_LIST = 'runs'
 RUN_PARAMETERS = 'parameters'
+RUN_PRIORITY = 'priority'
 RUN_FILES = 'files'
 RUN_STARTED = 'startedAt'
 RUN_STATE = 'state'
+RUN_STEPS = 'steps'
 RUN_WORKFLOW = 'workflowId'
 
+STEP_COMMAND = 'command'
+STEP_CPUTIME = 'cpuTime'
+STEP_EXITCODE = 'exitCode'
+STEP_FINISHED = 'finishedAt'
+STEP_INDEX = 'step'
+STEP_MEMORY = 'maxMemory'
+STEP_POS = 'pos'
+STEP_STARTED = 'startedAt'
+STEP_WALLTIME = 'wallTime'
+
 
 class RunSerializer(object):
     """Serializer for workflow runs."""
@@ -92,6 +104,8 @@ class RunSerializer(object):
         if group is not None:
             parameters = group.parameters.values()
             doc[RUN_PARAMETERS] = [p.to_dict() for p in parameters]
+        # Add progress information for executed workflow commands.
+        doc[RUN_STEPS] = [self.run_step(s) for s in run.steps]
         # Add additional information from the run state
         if not run.is_pending():
             doc[RUN_STARTED] = run.state().started_at
@@ -136,3 +150,36 @@ class RunSerializer(object):
         dict
         """
         return {RUN_LIST: [self.run_descriptor(r) for r in runs]}
+
+    def run_step(self, step: RunStep) -> Dict:
+        """Get serialization for the progress information of an executed
+        workflow command. The finish time and exit code are only included for
+        commands that have finished. Resource usage values are only included if
+        they were reported by the workflow engine.
+
+        Parameters
+        ----------
+        step: flowserv.model.base.RunStep
+            Progress information for a workflow command.
+
+        Returns
+        -------
+        dict
+        """
+        doc = {
+            STEP_POS: step.pos,
+            STEP_INDEX: step.step,
+            STEP_COMMAND: step.command,
+            STEP_STARTED: step.started_at
+        }
+        if step.finished_at is not None:
+            doc[STEP_FINISHED] = step.finished_at
+            doc[STEP_EXITCODE] = step.exit_code
+        for key, value in [
+            (STEP_CPUTIME, step.cpu_time),
+            (STEP_MEMORY, step.max_memory),
+            (STEP_WALLTIME, step.wall_time)
+        ]:
+            if value is not None:
+                doc[key] = value
+        return doc
@@ -28,6 +28,7 @@ PARAGROUP_NAME = 'name'
 PARAGROUP_TITLE = 'title'
 POSTPROC_RUN = 'postproc'
 RANKING = 'ranking'
+RANKING_CURSOR = 'nextCursor'
 RUN_CREATED = 'createdAt'
 RUN_FINISHED = 'finishedAt'
 RUN_ID = 'id'
@@ -134,7 +135,7 @@ class WorkflowSerializer(object):
 
     def workflow_leaderboard(
         self, workflow: WorkflowObject, ranking: List[RunResult],
-        postproc: Optional[RunObject] = None
+        postproc: Optional[RunObject] = None, cursor: Optional[str] = None
     ) -> Dict:
         """Get dictionary serialization for a workflow evaluation leaderboard.
 
@@ -146,6 +147,9 @@ class WorkflowSerializer(object):
             List of entries in the workflow evaluation leaderboard
         postproc: flowserv.model.base.RunObject
             Handle for workflow post-porcessing run.
+        cursor: string, default=None
+            Cursor for the next page of leaderboard entries (if the ranking
+            continues after the given entries).
 
         Returns
         -------
@@ -185,6 +189,8 @@ class WorkflowSerializer(object):
             WORKFLOW_SCHEMA: schema,
             RANKING: entries
         }
+        if cursor is not None:
+            obj[RANKING_CURSOR] = cursor
         # Add serialization for optional workflow post-processing run handle
         if postproc is not None:
             obj[POSTPROC_RUN] = self.runs.run_handle(
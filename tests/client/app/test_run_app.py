@@ -54,7 +54,8 @@ def test_run_helloworld_in_env(source, specfile, filekey, tmpdir):
     assert run.is_success()
     assert not run.is_active()
     assert str(run) == st.STATE_SUCCESS
-    assert len(run.files()) == 2
+    # Two result files and the output logs of the workflow step.
+    assert len(run.files()) == 4
     text = run.get_file(filekey).text()
     assert 'Hey Alice' in text
     assert 'Hey Bob' in text
@@ -66,7 +67,7 @@ def test_run_helloworld_in_env(source, specfile, filekey, tmpdir):
     assert run.is_success()
     assert not run.is_active()
     assert str(run) == st.STATE_SUCCESS
-    assert len(run.files()) == 2
+    assert len(run.files()) == 4
     file_handles = dict()
     for f in run.files():
         file_handles[f.name] = f
@@ -75,6 +76,7 @@ def test_run_helloworld_in_env(source, specfile, filekey, tmpdir):
     assert file_handles['results/analytics.json'].name == 'results/analytics.json'
     assert file_handles['results/analytics.json'].caption is None
     assert file_handles['results/analytics.json'].format == {'type': 'json'}
+    assert '.logs/step0.out.log' in file_handles
     # -- Cancelling a finished run raises an error ----------------------------
     with pytest.raises(err.InvalidRunStateError):
         wf.cancel_run(run.run_id)
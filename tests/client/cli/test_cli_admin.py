@@ -32,6 +32,14 @@ def test_init_db(flowserv_cli):
     assert result.exit_code == 0
 
 
+def test_upgrade_db(flowserv_cli):
+    """Test upgrading an existing database."""
+    result = flowserv_cli.invoke(cli, ['init', '-f'])
+    assert result.exit_code == 0
+    result = flowserv_cli.invoke(cli, ['upgrade'])
+    assert result.exit_code == 0
+
+
 def test_init_without_force(flowserv_cli):
     """Test init without force option. Will terminate after printing confirm
     message.
@@ -25,3 +25,11 @@ def test_list_obsolete_runs(flowserv_cli):
     cmd = ['cleanup', 'list', '--before', '2020']
     result = flowserv_cli.invoke(cli, cmd)
     assert result.exit_code == 0
+
+
+def test_recover_runs(flowserv_cli):
+    """Test recovering orphaned runs via the command-line interface."""
+    for cmd in [['recover'], ['recover', '--requeue']]:
+        result = flowserv_cli.invoke(cli, cmd)
+        assert result.exit_code == 0
+        assert '0 runs recovered.' in result.output
@@ -128,6 +128,9 @@ def test_workflow_result_files(flowserv_cli, tmpdir):
     cmd = ['workflows', 'ranking', '-a', '-w', workflow_id]
     result = flowserv_cli.invoke(cli, cmd)
     assert result.exit_code == 0
+    cmd = ['workflows', 'ranking', '-n', '1', '-w', workflow_id]
+    result = flowserv_cli.invoke(cli, cmd)
+    assert result.exit_code == 0
     # -- Result files ---------------------------------------------------------
     filename = os.path.join(tmpdir, 'compare.json')
     assert not os.path.isfile(filename)
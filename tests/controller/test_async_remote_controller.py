@@ -0,0 +1,197 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the asynchronous (asyncio-based) remote workflow
+controller.
+"""
+
+import asyncio
+import os
+import pytest
+import time
+
+from flowserv.config import Config
+from flowserv.controller.remote.aio import AsyncRemoteWorkflowController, fetch_results
+from flowserv.model.workflow.state import StatePending
+from flowserv.tests.remote import AsyncRemoteTestClient
+from flowserv.tests.service import (
+    create_group, create_user, create_workflow, start_run
+)
+from flowserv.service.local import LocalAPIFactory
+
+import flowserv.error as err
+import flowserv.model.workflow.state as st
+import flowserv.tests.serialize as serialize
+
+
+# Template directory
+DIR = os.path.dirname(os.path.realpath(__file__))
+TEMPLATE_DIR = os.path.join(DIR, '../.files/benchmark/remote')
+
+
+class FlakyClient(AsyncRemoteTestClient):
+    """Asynchronous test client that fails on the first attempts to download
+    each file. Keeps track of the maximum number of concurrent downloads.
+    """
+    def __init__(self, failures):
+        super(FlakyClient, self).__init__(data=['success'])
+        self.failures = failures
+        self.attempts = dict()
+        self.active = 0
+        self.max_active = 0
+
+    async def download_file(self, workflow_id, source, target):
+        self.active += 1
+        self.max_active = max(self.active, self.max_active)
+        count = self.attempts.get(source, 0)
+        self.attempts[source] = count + 1
+        try:
+            await asyncio.sleep(0.01)
+            if count < self.failures:
+                raise IOError('connection reset')
+            await super(FlakyClient, self).download_file(workflow_id, source, target)
+        finally:
+            self.active -= 1
+
+
+def run_workflow(tmpdir, client, is_async, fallback_interval=None):
+    """Start a run for the remote test workflow. Returns the service, the
+    engine, the user identifier and the run identifier.
+    """
+    env = Config().basedir(tmpdir)
+    engine = AsyncRemoteWorkflowController(
+        client=client,
+        poll_interval=0.1,
+        is_async=is_async,
+        max_poll_interval=0.2,
+        fallback_interval=fallback_interval
+    )
+    service = LocalAPIFactory(env=env, engine=engine)
+    engine.service = service
+    with service() as api:
+        workflow_id = create_workflow(api, source=TEMPLATE_DIR)
+        user_id = create_user(api)
+    with service(user_id=user_id) as api:
+        group_id = create_group(api, workflow_id)
+        run_id = start_run(api, group_id)
+    return service, engine, user_id, run_id
+
+
+def wait_for(service, user_id, run_id, states):
+    """Poll the run state until it is not in one of the given states."""
+    with service(user_id=user_id) as api:
+        run = api.runs().get_run(run_id=run_id)
+    count = 0
+    while run['state'] in states and count < 100:
+        time.sleep(0.1)
+        count += 1
+        with service(user_id=user_id) as api:
+            run = api.runs().get_run(run_id=run_id)
+    return run
+
+
+def test_cancel_async_remote_workflow(tmpdir):
+    """Cancel the execution of a remote workflow that is monitored on the
+    event loop.
+    """
+    client = AsyncRemoteTestClient(runcount=100)
+    service, engine, user_id, run_id = run_workflow(tmpdir, client, is_async=True)
+    run = wait_for(service, user_id, run_id, [st.STATE_PENDING])
+    serialize.validate_run_handle(run, state=st.STATE_RUNNING)
+    with service(user_id=user_id) as api:
+        api.runs().cancel_run(run_id=run_id, reason='test')
+    assert client.client.state is None
+    assert not engine.tasks
+    time.sleep(0.5)
+    with service(user_id=user_id) as api:
+        run = api.runs().get_run(run_id=run_id)
+    serialize.validate_run_handle(run, state=st.STATE_CANCELED)
+    assert not engine.monitor.runs
+    engine.close()
+
+
+@pytest.mark.parametrize('failures,retries,success', [(1, 1, True), (2, 1, False)])
+def test_fetch_results_async(failures, retries, success, tmpdir):
+    """Test bounded concurrent download of result files with retries."""
+    files = ['results/{}.txt'.format(i) for i in range(8)]
+    client = FlakyClient(failures=failures)
+    coro = fetch_results(
+        workflow_id='W1',
+        state=StatePending().start().success(),
+        output_files=files,
+        client=client,
+        workers=3,
+        retries=retries,
+        basedir=str(tmpdir),
+        backoff=0
+    )
+    loop = asyncio.new_event_loop()
+    try:
+        if success:
+            state, rundir = loop.run_until_complete(coro)
+            assert state.files == files
+            for key in files:
+                assert os.path.isfile(os.path.join(rundir, key))
+        else:
+            with pytest.raises(err.FileTransferError):
+                loop.run_until_complete(coro)
+            assert not os.listdir(str(tmpdir))
+    finally:
+        loop.close()
+    assert 1 < client.max_active <= 3
+
+
+def test_notify_async_remote_workflow(tmpdir):
+    """Test processing state changes that are pushed by the remote engine for
+    runs that are monitored on the event loop.
+    """
+    client = AsyncRemoteTestClient(runcount=0, data=['success'])
+    service, engine, user_id, run_id = run_workflow(tmpdir, client, is_async=True, fallback_interval=60)
+    # The first state check is not due before the fallback interval. Each
+    # notification triggers an immediate state check.
+    with service(user_id=user_id) as api:
+        assert api.runs().notify_run(run_id=run_id, doc={})
+    run = wait_for(service, user_id, run_id, [st.STATE_PENDING])
+    serialize.validate_run_handle(run, state=st.STATE_RUNNING)
+    with service(user_id=user_id) as api:
+        assert api.runs().notify_run(run_id=run_id, doc={})
+    run = wait_for(service, user_id, run_id, [st.STATE_RUNNING])
+    serialize.validate_run_handle(run, state=st.STATE_SUCCESS)
+    assert not engine.notify_run(run_id=run_id, doc={})
+    engine.close()
+
+
+@pytest.mark.parametrize('is_async', [False, True])
+def test_run_async_remote_workflow(tmpdir, is_async):
+    """Execute the remote workflow example synchronized and in asynchronous
+    mode using the asynchronous client.
+    """
+    client = AsyncRemoteTestClient(runcount=3, data=['success'])
+    service, engine, user_id, run_id = run_workflow(tmpdir, client, is_async=is_async)
+    run = wait_for(service, user_id, run_id, st.ACTIVE_STATES)
+    serialize.validate_run_handle(run, state=st.STATE_SUCCESS)
+    files = dict()
+    for obj in run['files']:
+        files[obj['name']] = obj['id']
+    with service(user_id=user_id) as api:
+        fh = api.runs().get_result_file(run_id=run_id, file_id=files['results/data.txt'])
+    assert 'success' in fh.open().read().decode('utf-8')
+    assert not engine.tasks
+    engine.close()
+
+
+def test_run_async_remote_workflow_with_error(tmpdir):
+    """Execute the remote workflow example that will end in an error state
+    using the asynchronous client.
+    """
+    client = AsyncRemoteTestClient(runcount=3, error='some error')
+    service, engine, user_id, run_id = run_workflow(tmpdir, client, is_async=True)
+    run = wait_for(service, user_id, run_id, st.ACTIVE_STATES)
+    serialize.validate_run_handle(run, state=st.STATE_ERROR)
+    assert run['messages'][0] == 'some error'
+    engine.close()
@@ -0,0 +1,163 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for executing workflow steps in reusable Docker containers."""
+
+from types import SimpleNamespace
+
+import os
+import pytest
+
+from flowserv.config import Config
+from flowserv.controller.serial.docker import (
+    DockerWorkflowEngine, SESSION_LABEL, close_sessions, docker_run, docker_session_run, get_sessions
+)
+from flowserv.model.workflow.serial import Step
+from flowserv.model.workflow.state import StatePending
+from flowserv.tests.docker import FakeDockerClient
+
+import flowserv.model.workflow.state as serialize
+
+
+@pytest.fixture
+def rundir(tmpdir):
+    """Create a run directory with a code and a data folder."""
+    rundir = os.path.join(tmpdir, 'runs', '0000')
+    os.makedirs(os.path.join(rundir, 'code'))
+    os.makedirs(os.path.join(rundir, 'data'))
+    with open(os.path.join(rundir, 'data', 'names.txt'), 'w') as f:
+        f.write('Alice\n')
+    yield rundir
+    close_sessions()
+
+
+def read_file(filename):
+    """Read the content of a text file."""
+    with open(filename, 'r') as f:
+        return f.read()
+
+
+def test_docker_run_with_fake_client(rundir):
+    """Test executing workflow commands in separate containers."""
+    client = FakeDockerClient()
+    steps = [Step(env='alpine', commands=['cp data/names.txt data/a.txt', 'cp data/a.txt data/b.txt'])]
+    _, _, doc = docker_run('0000', rundir, StatePending(), ['data/b.txt'], steps, progress=list().append, client=client)
+    state = serialize.deserialize_state(doc)
+    assert state.is_success()
+    assert state.files == ['data/b.txt']
+    assert len(client.containers.created) == 2
+
+
+def test_session_reuse_across_runs(rundir, tmpdir):
+    """Test reusing session containers for the steps of multiple runs."""
+    client = FakeDockerClient(images=['alpine'])
+    steps = [
+        Step(env='alpine', commands=['cp data/names.txt data/a.txt', 'cp data/a.txt code/b.txt']),
+        Step(env='python', commands=['cat code/b.txt > data/c.txt']),
+        Step(env='alpine', commands=['cat data/c.txt'])
+    ]
+    _, _, doc = docker_session_run(
+        '0000', rundir, StatePending(), ['data/c.txt'], steps, progress=list().append,
+        client=client, workflow_id='W1', group_id='G1'
+    )
+    state = serialize.deserialize_state(doc)
+    assert state.is_success()
+    assert read_file(os.path.join(rundir, 'data', 'c.txt')) == 'Alice\n'
+    # The output of the commands is written to the step log files.
+    assert '.logs/step2.out.log' in state.files
+    assert read_file(os.path.join(rundir, '.logs', 'step2.out.log')) == 'Alice\n'
+    # One container per image. Missing images are pulled.
+    assert [c.image for c in client.containers.created] == ['alpine', 'python']
+    assert client.images.pulled == ['python']
+    assert client.containers.created[0].commands == [
+        'cp data/names.txt data/a.txt',
+        'cp data/a.txt code/b.txt',
+        'cat data/c.txt'
+    ]
+    # The containers are reused by a run with the same folders.
+    rundir2 = os.path.join(tmpdir, 'runs', '0001')
+    os.makedirs(os.path.join(rundir2, 'code'))
+    os.makedirs(os.path.join(rundir2, 'data'))
+    with open(os.path.join(rundir2, 'data', 'names.txt'), 'w') as f:
+        f.write('Bob\n')
+    _, _, doc = docker_session_run(
+        '0001', rundir2, StatePending(), ['data/c.txt'], steps, progress=list().append,
+        client=client, workflow_id='W1', group_id='G1'
+    )
+    assert serialize.deserialize_state(doc).is_success()
+    assert read_file(os.path.join(rundir2, 'data', 'c.txt')) == 'Bob\n'
+    assert read_file(os.path.join(rundir, 'data', 'c.txt')) == 'Alice\n'
+    assert len(client.containers.created) == 2
+    assert client.images.pulled == ['python']
+    # Runs of a different workflow or of a different group of the same
+    # workflow do not reuse the containers.
+    _, _, doc = docker_session_run(
+        '0001', rundir2, StatePending(), ['data/c.txt'], steps, progress=list().append,
+        client=client, workflow_id='W2'
+    )
+    assert serialize.deserialize_state(doc).is_success()
+    assert len(client.containers.created) == 4
+    _, _, doc = docker_session_run(
+        '0001', rundir2, StatePending(), ['data/c.txt'], steps, progress=list().append,
+        client=client, workflow_id='W1', group_id='G2'
+    )
+    assert serialize.deserialize_state(doc).is_success()
+    assert len(client.containers.created) == 6
+    # Idle containers are removed when the sessions are closed.
+    close_sessions()
+    assert all([c.removed for c in client.containers.created])
+    assert os.listdir(os.path.join(tmpdir, 'runs', '.sessions')) == []
+
+
+def test_session_step_error(rundir):
+    """Test error state for failed commands in a session container."""
+    client = FakeDockerClient(images=['alpine'])
+    steps = [Step(env='alpine', commands=['echo "error" 1>&2 && exit 1', 'echo "not executed"'])]
+    events = list()
+    _, _, doc = docker_session_run('0000', rundir, StatePending(), [], steps, progress=events.append, client=client)
+    state = serialize.deserialize_state(doc)
+    assert state.is_error()
+    assert state.messages == ['error\n']
+    assert [e.get('exit_code') for e in events] == [None, 1]
+    # Run files are moved back to the run directory.
+    assert read_file(os.path.join(rundir, 'data', 'names.txt')) == 'Alice\n'
+
+
+def test_session_entrypoint(rundir):
+    """Test passing commands to the entrypoint of the session image."""
+    client = FakeDockerClient(images=['alpine'], entrypoints={'alpine': ['echo', 'entry']})
+    steps = [Step(env='alpine', commands=['hello "Alice and Bob"'])]
+    _, _, doc = docker_session_run('0000', rundir, StatePending(), [], steps, progress=list().append, client=client)
+    assert serialize.deserialize_state(doc).is_success()
+    assert client.containers.created[0].commands == [['echo', 'entry', 'hello', 'Alice and Bob']]
+    assert read_file(os.path.join(rundir, '.logs', 'step0.out.log')) == 'entry hello Alice and Bob\n'
+
+
+def test_session_removal(rundir, tmpdir):
+    """Test removing leased session containers when the sessions are closed
+    and removing stale session containers on recovery.
+    """
+    client = FakeDockerClient(images=['alpine'])
+    sessions = get_sessions(client=client)
+    session = sessions.lease(image='alpine', rundir=rundir)
+    close_sessions()
+    assert session.container.removed
+    # Stale containers for the session directories in the runs folder of the
+    # engine are removed. Containers of other folders are not affected.
+    engine = DockerWorkflowEngine(service=Config().basedir(tmpdir).docker_sessions(), client=client)
+    # Session runs are scoped to the workflow group of the run.
+    func = engine.exec_function(SimpleNamespace(workflow_id='W1', group_id='G1'))
+    assert func.keywords['workflow_id'] == 'W1'
+    assert func.keywords['group_id'] == 'G1'
+    sessionsdir = os.path.join(engine.runsdir, '.sessions')
+    stale = client.containers.run(image='alpine', detach=True, labels={SESSION_LABEL: sessionsdir})
+    other = client.containers.run(image='alpine', detach=True, labels={SESSION_LABEL: '/tmp/.sessions'})
+    assert engine.resume_runs() == []
+    assert stale.removed
+    assert not other.removed
+    other.remove()
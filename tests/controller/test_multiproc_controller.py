@@ -13,7 +13,8 @@ import os
 import pytest
 import time
 
-from flowserv.config import FLOWSERV_FILESTORE_CLASS, FLOWSERV_FILESTORE_MODULE
+from flowserv.config import Config, FLOWSERV_FILESTORE_CLASS, FLOWSERV_FILESTORE_MODULE
+from flowserv.service.local import LocalAPIFactory
 from flowserv.service.run.argument import serialize_arg, serialize_fh
 from flowserv.tests.files import io_file
 from flowserv.tests.service import (
@@ -111,6 +112,8 @@ def test_run_helloworld_async(async_service, fsconfig, target):
         with async_service(user_id=user_id) as api:
             run = api.runs().get_run(run_id=run_id)
     assert run['state'] == st.STATE_SUCCESS
+    # Progress information is reported by the worker process.
+    assert [s['exitCode'] for s in run['steps']] == [0, 0]
     files = dict()
     for f in run['files']:
         files[f['name']] = f['id']
@@ -127,3 +130,39 @@ def test_run_helloworld_async(async_service, fsconfig, target):
         file_id=files['results/analytics.json']
     )
     assert json.load(fh.open()) is not None
+
+
+def test_run_helloworld_queued(database, tmpdir):
+    """Test queueing runs when all workers of the engine are busy."""
+    # -- Setup ----------------------------------------------------------------
+    #
+    # Use an engine with a single worker.
+    env = Config().basedir(tmpdir).run_async().auth().workers(1)
+    service = LocalAPIFactory(env=env)
+    with service() as api:
+        workflow_id = create_workflow(api, source=TEMPLATE_DIR)
+        user_id = create_user(api)
+    with service(user_id=user_id) as api:
+        group_id = create_group(api, workflow_id)
+        names = io_file(data=['Alice', 'Bob', 'Zoe'], format='plain/text')
+        file_id = upload_file(api, group_id, names)
+        args = [
+            serialize_arg('names', serialize_fh(file_id)),
+            serialize_arg('sleeptime', 1),
+            serialize_arg('greeting', 'Hi')
+        ]
+        run_1 = start_run(api, group_id, arguments=args)
+        run_2 = start_run(api, group_id, arguments=args)
+    # -- The second run is pending while the first run is running -------------
+    with service(user_id=user_id) as api:
+        assert api.runs().get_run(run_id=run_1)['state'] in st.ACTIVE_STATES
+        assert api.runs().get_run(run_id=run_2)['state'] == st.STATE_PENDING
+    # -- Both runs finish successfully ----------------------------------------
+    for run_id in [run_1, run_2]:
+        with service(user_id=user_id) as api:
+            run = api.runs().get_run(run_id=run_id)
+        while run['state'] in st.ACTIVE_STATES:
+            time.sleep(1)
+            with service(user_id=user_id) as api:
+                run = api.runs().get_run(run_id=run_id)
+        assert run['state'] == st.STATE_SUCCESS
@@ -0,0 +1,165 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the concurrent execution of independent serial workflow
+steps.
+"""
+
+import os
+import pytest
+import threading
+import time
+
+from flowserv.controller.serial.docker import docker_run
+from flowserv.controller.serial.engine import run_workflow
+from flowserv.controller.serial.scheduler import command_offsets, dependencies, isolated, run_steps
+from flowserv.model.template.base import WorkflowTemplate
+from flowserv.model.template.parameter import ParameterIndex
+from flowserv.model.workflow.serial import SerialWorkflow, Step
+from flowserv.model.workflow.state import StatePending
+from flowserv.tests.docker import FakeDockerClient
+
+import flowserv.error as err
+import flowserv.model.workflow.state as serialize
+
+
+def workflow(steps):
+    """Create a serial workflow with the given steps."""
+    spec = {'workflow': {'type': 'serial', 'specification': {'steps': steps}}}
+    template = WorkflowTemplate(workflow_spec=spec, parameters=ParameterIndex())
+    return SerialWorkflow(template=template, arguments={}, sourcedir='')
+
+
+def test_docker_parallel_steps(tmpdir):
+    """Test concurrent execution of independent steps with the Docker
+    workflow engine.
+    """
+    os.makedirs(os.path.join(tmpdir, 'data'))
+    steps = [
+        Step(env='alpine', commands=['echo "A" > data/a.txt'], depends=[]),
+        Step(env='alpine', commands=['echo "B" > data/b.txt'], depends=[]),
+        Step(env='alpine', commands=['cat data/a.txt data/b.txt > data/c.txt'], depends=[0, 1])
+    ]
+    reports = list()
+    _, _, doc = docker_run(
+        '0000', str(tmpdir), StatePending(), [], steps, progress=reports.append,
+        client=FakeDockerClient(), workers=2
+    )
+    assert serialize.deserialize_state(doc).is_success()
+    with open(os.path.join(tmpdir, 'data', 'c.txt')) as f:
+        assert f.read().split() == ['A', 'B']
+    assert sorted([r['pos'] for r in reports if 'exit_code' in r]) == [0, 1, 2]
+
+
+def test_parallel_step_failure(tmpdir):
+    """Test that no further steps are started after a step failed."""
+    steps = [
+        Step(env=None, commands=['sleep 0.5', 'touch A.txt'], depends=[]),
+        Step(env=None, commands=['echo "failed" 1>&2; exit 1'], depends=[]),
+        Step(env=None, commands=['touch B.txt'], depends=[1]),
+        Step(env=None, commands=['touch C.txt'], depends=[0, 1])
+    ]
+    reports = list()
+    _, _, doc = run_workflow('0000', str(tmpdir), StatePending(), [], steps, progress=reports.append, workers=4)
+    state = serialize.deserialize_state(doc)
+    assert state.is_error()
+    assert state.messages == ['failed\n']
+    # The running step finishes. Dependent steps are not started.
+    assert os.path.isfile(os.path.join(tmpdir, 'A.txt'))
+    assert not os.path.isfile(os.path.join(tmpdir, 'B.txt'))
+    assert not os.path.isfile(os.path.join(tmpdir, 'C.txt'))
+    assert sorted(set([r['pos'] for r in reports])) == [0, 1, 2]
+
+
+def test_parallel_step_execution(tmpdir):
+    """Test concurrent execution of independent workflow steps."""
+    steps = [
+        Step(env=None, commands=['mkdir data']),
+        Step(env=None, commands=['sleep 0.5', 'echo "A" > data/a.txt'], depends=[0]),
+        Step(env=None, commands=['sleep 0.5', 'echo "B" > data/b.txt'], depends=[0]),
+        Step(env=None, commands=['cat data/a.txt data/b.txt > data/c.txt'], depends=[1, 2])
+    ]
+    start = time.monotonic()
+    reports = list()
+    _, _, doc = run_workflow(
+        '0000', str(tmpdir), StatePending(), ['data/c.txt'], steps,
+        progress=reports.append, workers=2
+    )
+    state = serialize.deserialize_state(doc)
+    assert state.is_success()
+    assert time.monotonic() - start < 1
+    with open(os.path.join(tmpdir, 'data', 'c.txt')) as f:
+        assert f.read().split() == ['A', 'B']
+    assert 'data/c.txt' in state.files
+    assert '.logs/step2.err.log' in state.files
+    # Command positions and step positions are independent of the execution
+    # order.
+    finished = sorted([(r['pos'], r['step']) for r in reports if 'exit_code' in r])
+    assert finished == [(0, 0), (1, 1), (2, 1), (3, 2), (4, 2), (5, 3)]
+    # Steps are executed sequentially with a single worker.
+    start = time.monotonic()
+    steps = [Step(env=None, commands=['sleep 0.5'], depends=[]), Step(env=None, commands=['sleep 0.5'], depends=[])]
+    _, _, doc = run_workflow('0000', str(tmpdir), StatePending(), [], steps, progress=list().append, workers=1)
+    assert serialize.deserialize_state(doc).is_success()
+    assert time.monotonic() - start >= 1
+
+
+def test_run_steps():
+    """Test the step scheduler for different step dependencies."""
+    steps = [Step(env=None), Step(env=None, depends=[]), Step(env=None, depends=[0, 1]), Step(env=None)]
+    assert dependencies(steps) == [[], [], [0, 1], [2]]
+    assert isolated(steps) == [False, False, True, True]
+    assert command_offsets([Step(env=None, commands=['a', 'b']), Step(env=None), Step(env=None, commands=['c'])]) == [0, 2, 2]
+    executed = list()
+    lock = threading.Lock()
+
+    def func(pos):
+        with lock:
+            executed.append(pos)
+        return True
+
+    assert run_steps(steps, func, workers=2)
+    assert sorted(executed[:2]) == [0, 1]
+    assert executed[2:] == [2, 3]
+    # Errors are raised after running steps have finished.
+
+    def fail(pos):
+        if pos == 1:
+            raise ValueError('step failed')
+        return True
+
+    with pytest.raises(ValueError):
+        run_steps(steps, fail, workers=2)
+    # Invalid dependencies.
+    with pytest.raises(ValueError):
+        run_steps([Step(env=None, depends=[1]), Step(env=None, depends=[0])], func, workers=2)
+
+
+def test_template_parallel_steps():
+    """Test parsing workflow templates with parallel step groups and explicit
+    step dependencies.
+    """
+    steps = workflow([
+        {'name': 'prepare', 'environment': 'python', 'commands': ['ls']},
+        {'parallel': [
+            {'name': 'A', 'environment': 'python', 'commands': ['ls']},
+            {'name': 'B', 'environment': 'python', 'commands': ['ls']}
+        ]},
+        {'name': 'merge', 'environment': 'python', 'commands': ['ls']},
+        {'name': 'report', 'environment': 'python', 'commands': ['ls'], 'after': ['prepare']}
+    ]).commands()
+    assert [s.name for s in steps] == ['prepare', 'A', 'B', 'merge', 'report']
+    assert [s.depends for s in steps] == [[], [0], [0], [1, 2], [0]]
+    # Default serial workflows.
+    steps = workflow([{'environment': 'python', 'commands': ['ls']}] * 2).commands()
+    assert [s.depends for s in steps] == [[], [0]]
+    assert all(isolated(steps))
+    with pytest.raises(err.InvalidTemplateError):
+        workflow([{'environment': 'python', 'commands': ['ls'], 'after': ['A']}]).commands()
+    with pytest.raises(err.InvalidTemplateError):
+        workflow([{'name': 'A', 'environment': 'python', 'commands': ['ls']}] * 2).commands()
@@ -18,6 +18,7 @@ from flowserv.tests.service import (
     create_group, create_user, create_workflow, start_run
 )
 from flowserv.service.local import LocalAPIFactory
+import flowserv.error as err
 import flowserv.model.workflow.state as st
 import flowserv.tests.serialize as serialize
 
@@ -66,6 +67,109 @@ def test_cancel_remote_workflow(tmpdir):
     assert run['messages'][0] == 'test'
 
 
+def test_notify_remote_workflow(tmpdir):
+    """Test processing state changes that are pushed by the remote engine
+    for runs that are otherwise only polled at a slow fallback interval.
+    """
+    # -- Setup ----------------------------------------------------------------
+    #
+    env = Config().basedir(tmpdir).auth()
+    client = RemoteTestClient(runcount=0, data=['success'])
+    engine = RemoteTestController(client=client, poll_interval=0.1, is_async=True, fallback_interval=60)
+    service = LocalAPIFactory(env=env, engine=engine)
+    engine.service = service
+    with service() as api:
+        workflow_id = create_workflow(api, source=TEMPLATE_DIR)
+        user_id = create_user(api)
+        other_user_id = create_user(api)
+    with service(user_id=user_id) as api:
+        group_id = create_group(api, workflow_id)
+        run_id = start_run(api, group_id)
+    # -- Push notifications trigger immediate state checks. The first poll is
+    # not due before the fallback interval.
+    assert engine.monitor.runs[run_id].interval == 60
+    with service(user_id=other_user_id) as api:
+        with pytest.raises(err.UnauthorizedAccessError):
+            api.runs().notify_run(run_id=run_id, doc={'status': 'running'})
+    with service(user_id=user_id) as api:
+        assert api.runs().notify_run(run_id=run_id, doc={'status': 'running'})
+    with service(user_id=user_id) as api:
+        run = api.runs().get_run(run_id=run_id)
+    count = 0
+    while run['state'] == st.STATE_PENDING and count < 50:
+        time.sleep(0.1)
+        count += 1
+        with service(user_id=user_id) as api:
+            run = api.runs().get_run(run_id=run_id)
+    serialize.validate_run_handle(run, state=st.STATE_RUNNING)
+    with service(user_id=user_id) as api:
+        assert api.runs().notify_run(run_id=run_id, doc={'status': 'finished'})
+        with pytest.raises(err.UnknownRunError):
+            api.runs().notify_run(run_id='UNKNOWN', doc={})
+    count = 0
+    while run['state'] == st.STATE_RUNNING and count < 50:
+        time.sleep(0.1)
+        count += 1
+        with service(user_id=user_id) as api:
+            run = api.runs().get_run(run_id=run_id)
+    serialize.validate_run_handle(run, state=st.STATE_SUCCESS)
+    # Notifications for runs that are no longer monitored are ignored.
+    with service(user_id=user_id) as api:
+        assert not api.runs().notify_run(run_id=run_id, doc={})
+
+
+def test_resume_remote_workflow(tmpdir):
+    """Resume monitoring a remote workflow with a new controller instance
+    (e.g., after a restart of the service).
+    """
+    # -- Setup ----------------------------------------------------------------
+    #
+    env = Config().basedir(tmpdir)
+    client = RemoteTestClient(runcount=100, data=['success'])
+    engine = RemoteTestController(client=client, poll_interval=0.1, is_async=True)
+    service = LocalAPIFactory(env=env, engine=engine)
+    engine.service = service
+    with service() as api:
+        workflow_id = create_workflow(api, source=TEMPLATE_DIR)
+        user_id = create_user(api)
+    with service(user_id=user_id) as api:
+        group_id = create_group(api, workflow_id)
+        run_id = start_run(api, group_id)
+    # -- Wait until the run is running. The monitoring information is stored.
+    with service(user_id=user_id) as api:
+        run = api.runs().get_run(run_id=run_id)
+    while run['state'] == st.STATE_PENDING:
+        time.sleep(0.1)
+        with service(user_id=user_id) as api:
+            run = api.runs().get_run(run_id=run_id)
+    with service() as api:
+        tasks = api.runs().remote_tasks()
+    assert [t['run_id'] for t in tasks] == [run_id]
+    assert tasks[0]['state'].is_running()
+    # -- Stop monitoring the run and resume with a new controller -------------
+    engine.monitor.remove(run_id)
+    engine = RemoteTestController(client=client, poll_interval=0.1, is_async=True)
+    service = LocalAPIFactory(env=env, engine=engine)
+    engine.service = service
+    assert engine.resume_runs() == [run_id]
+    assert engine.resume_runs() == []
+    assert engine.tasks == {run_id: tasks[0]['workflow_id']}
+    # The workflow finishes successfully. Monitoring information is removed.
+    client.runcount = 0
+    with service(user_id=user_id) as api:
+        run = api.runs().get_run(run_id=run_id)
+    count = 0
+    while run['state'] == st.STATE_RUNNING and count < 100:
+        time.sleep(0.1)
+        count += 1
+        with service(user_id=user_id) as api:
+            run = api.runs().get_run(run_id=run_id)
+    serialize.validate_run_handle(run, state=st.STATE_SUCCESS)
+    with service() as api:
+        assert api.runs().remote_tasks() == []
+    assert not engine.tasks
+
+
 @pytest.mark.parametrize('is_async', [False, True])
 def test_run_remote_workflow(tmpdir, is_async):
     """Execute the remote workflow example synchronized and in asynchronous
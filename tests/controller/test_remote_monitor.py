@@ -0,0 +1,333 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the monitor service that polls the state of all active
+remote workflow runs.
+"""
+
+from contextlib import contextmanager
+from threading import Lock
+
+import os
+import pytest
+import time
+
+from flowserv.controller.remote.client import RemoteClient
+from flowserv.controller.remote.monitor import (
+    BACKOFF, MonitorService, download_options, fetch_results
+)
+from flowserv.model.workflow.state import StatePending
+
+import flowserv.config as config
+import flowserv.error as err
+
+
+class BulkClient(RemoteClient):
+    """Remote client that simulates multiple workflows. Each workflow is
+    running for a given number of state checks before it finishes.
+    """
+    def __init__(self, runcount, fail_bulk=False, errors=None):
+        self.runcount = runcount
+        self.fail_bulk = fail_bulk
+        self.errors = errors if errors is not None else set()
+        self.polls = dict()
+        self.bulk_requests = 0
+        self.requests = 0
+
+    def create_workflow(self, run, template, arguments):
+        pass
+
+    def download_file(self, workflow_id, source, target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'w') as f:
+            f.write(workflow_id)
+
+    def get_workflow_state(self, workflow_id, current_state):
+        self.requests += 1
+        if workflow_id in self.errors:
+            raise ValueError('unknown workflow')
+        count = self.polls.get(workflow_id, 0)
+        self.polls[workflow_id] = count + 1
+        if count == 0:
+            return current_state.start()
+        elif count > self.runcount:
+            return current_state.success()
+        return current_state
+
+    def get_workflow_states(self, workflows):
+        self.bulk_requests += 1
+        if self.fail_bulk:
+            raise ValueError('bulk request failed')
+        return super(BulkClient, self).get_workflow_states(workflows)
+
+    def stop_workflow(self, workflow_id):
+        pass
+
+
+class FlakyClient(BulkClient):
+    """Remote client that fails on the first attempt to download each file.
+    Keeps track of the maximum number of concurrent downloads.
+    """
+    def __init__(self, failures=1):
+        super(FlakyClient, self).__init__(runcount=0)
+        self.failures = failures
+        self.attempts = dict()
+        self.active = 0
+        self.max_active = 0
+        self.lock = Lock()
+
+    def download_file(self, workflow_id, source, target):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.active, self.max_active)
+            count = self.attempts.get(source, 0)
+            self.attempts[source] = count + 1
+        try:
+            time.sleep(0.01)
+            if count < self.failures:
+                raise IOError('connection reset')
+            super(FlakyClient, self).download_file(workflow_id, source, target)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+class PushClient(BulkClient):
+    """Remote client that takes the workflow state from pushed notifications
+    instead of polling the remote engine.
+    """
+    def notification_state(self, workflow_id, current_state, doc):
+        if doc.get('state') == 'running':
+            return current_state.start()
+        return None
+
+
+class RunService(object):
+    """Service API stub that records run state updates and the stored
+    monitoring information for remote tasks.
+    """
+    def __init__(self):
+        self.updates = list()
+        self.tasks = dict()
+
+    def runs(self):
+        return self
+
+    def update_remote_task(self, run_id, workflow_id, output_files, interval, next_poll):
+        self.tasks[run_id] = (workflow_id, interval, next_poll)
+
+    def update_run(self, run_id, state, rundir=None):
+        self.updates.append((run_id, state, rundir))
+
+
+def service_factory(api):
+    """Get context manager for the service API stub."""
+    @contextmanager
+    def service():
+        yield api
+
+    return service
+
+
+def wait_for(tasks, timeout=10):
+    """Wait until the task dictionary is empty."""
+    start = time.monotonic()
+    while tasks and time.monotonic() - start < timeout:
+        time.sleep(0.05)
+
+
+def test_download_options(tmpdir):
+    """Test getting download options from the configuration."""
+    options = download_options(None)
+    assert options['workers'] == config.DEFAULT_REMOTE_WORKERS
+    assert options['retries'] == config.DEFAULT_REMOTE_RETRIES
+    assert options['basedir'] is None
+    env = config.Config().basedir(str(tmpdir)).remote_downloads(workers=2, retries=0)
+    options = download_options(env)
+    assert options['workers'] == 2
+    assert options['retries'] == 0
+    assert options['basedir'] == os.path.join(str(tmpdir), config.DEFAULT_RUNSDIR)
+
+
+def test_fetch_results_with_retries(tmpdir):
+    """Test concurrent download of result files with retries for failed
+    downloads.
+    """
+    files = ['results/{}.txt'.format(i) for i in range(8)]
+    client = FlakyClient(failures=1)
+    state, rundir = fetch_results(
+        workflow_id='W1',
+        state=StatePending().start().success(),
+        output_files=files,
+        client=client,
+        workers=3,
+        retries=1,
+        basedir=str(tmpdir)
+    )
+    assert state.is_success()
+    assert state.files == files
+    assert os.path.dirname(rundir) == str(tmpdir)
+    for key in files:
+        assert os.path.isfile(os.path.join(rundir, key))
+        assert client.attempts[key] == 2
+    assert 1 < client.max_active <= 3
+    # Downloads fail if the number of retries is exceeded. The download
+    # directory is removed.
+    client = FlakyClient(failures=2)
+    with pytest.raises(err.FileTransferError) as ex:
+        fetch_results(
+            workflow_id='W1',
+            state=StatePending().start().success(),
+            output_files=files,
+            client=client,
+            workers=3,
+            retries=1,
+            basedir=str(tmpdir)
+        )
+    assert len(ex.value.errors) == len(files)
+    assert len(os.listdir(str(tmpdir))) == 1
+
+
+def test_monitor_backoff():
+    """Test adaptive poll intervals for runs with unchanged state."""
+    client = BulkClient(runcount=100)
+    api = RunService()
+    monitor = MonitorService(client=client, poll_interval=1, service=service_factory(api), tasks=dict(), max_interval=2)
+    monitor.add(run_id='R1', workflow_id='W1', state=StatePending(), output_files=[])
+    task = monitor.runs['R1']
+    # The first state check starts the run and keeps the poll interval.
+    monitor.update(task, monitor.poll([task])['W1'])
+    assert task.state.is_running()
+    assert task.interval == 1
+    # The interval is increased while the state remains unchanged.
+    monitor.update(task, monitor.poll([task])['W1'])
+    assert task.interval == BACKOFF
+    for _ in range(3):
+        monitor.update(task, monitor.poll([task])['W1'])
+    assert task.interval == 2
+    assert len(api.updates) == 1
+    # The poll schedule is stored when the poll interval changes.
+    assert api.tasks['R1'][:2] == ('W1', 2)
+    # Removed runs are not updated.
+    monitor.remove('R1')
+    monitor.update(task, task.state.success())
+    assert len(api.updates) == 1
+
+
+def test_monitor_bulk_failure():
+    """Test falling back to individual state checks when the bulk request
+    fails.
+    """
+    client = BulkClient(runcount=0, fail_bulk=True, errors={'W2'})
+    api = RunService()
+    tasks = {'R1': 'W1', 'R2': 'W2'}
+    monitor = MonitorService(client=client, poll_interval=0.05, service=service_factory(api), tasks=tasks)
+    monitor.start()
+    for run_id, workflow_id in tasks.items():
+        monitor.add(run_id=run_id, workflow_id=workflow_id, state=StatePending(), output_files=[])
+    wait_for(tasks)
+    assert not tasks
+    states = {run_id: state for run_id, state, _ in api.updates}
+    assert states['R1'].is_success()
+    assert states['R2'].is_error()
+
+
+def test_monitor_notifications():
+    """Test processing runs immediately when the remote engine pushes a
+    notification.
+    """
+    client = BulkClient(runcount=0)
+    api = RunService()
+    tasks = {'R1': 'W1'}
+    monitor = MonitorService(client=client, poll_interval=60, service=service_factory(api), tasks=tasks)
+    monitor.start()
+    monitor.add(run_id='R1', workflow_id='W1', state=StatePending(), output_files=[], delay=60)
+    assert not monitor.notify(run_id='R2', doc={})
+    # The first notification triggers a state check that starts the run. The
+    # second notification triggers the state check that finishes the run.
+    assert monitor.notify(run_id='R1', doc={})
+    start = time.monotonic()
+    while not api.updates and time.monotonic() - start < 10:
+        time.sleep(0.05)
+    assert api.updates[0][1].is_running()
+    assert monitor.notify(run_id='R1', doc={})
+    wait_for(tasks)
+    assert not tasks
+    assert api.updates[-1][1].is_success()
+    assert client.requests == 2
+
+
+def test_monitor_notification_state():
+    """Test taking the run state from pushed notifications without polling
+    the remote engine.
+    """
+    client = PushClient(runcount=100)
+    api = RunService()
+    monitor = MonitorService(client=client, poll_interval=60, service=service_factory(api), tasks=dict())
+    monitor.add(run_id='R1', workflow_id='W1', state=StatePending(), output_files=[])
+    task = monitor.runs['R1']
+    states = monitor.poll([task], pushed={'R1': {'state': 'running'}})
+    assert states['W1'].is_running()
+    assert client.requests == 0
+    # Notifications that cannot be translated into a state trigger a poll.
+    states = monitor.poll([task], pushed={'R1': {'state': 'unknown'}})
+    assert states['W1'].is_running()
+    assert client.requests == 1
+
+
+def test_monitor_multiple_runs():
+    """Test monitoring multiple runs with bulk state checks."""
+    client = BulkClient(runcount=2)
+    api = RunService()
+    tasks = dict()
+    monitor = MonitorService(client=client, poll_interval=0.05, service=service_factory(api), tasks=tasks)
+    monitor.start()
+    for i in range(5):
+        tasks['R{}'.format(i)] = 'W{}'.format(i)
+        monitor.add(
+            run_id='R{}'.format(i),
+            workflow_id='W{}'.format(i),
+            state=StatePending(),
+            output_files=['results/data.txt']
+        )
+    wait_for(tasks)
+    assert not tasks
+    assert not monitor.runs
+    # Each run is updated when it starts and when it finishes.
+    assert len(api.updates) == 10
+    for run_id, state, rundir in api.updates:
+        if state.is_success():
+            assert state.files == ['results/data.txt']
+            with open(os.path.join(rundir, 'results', 'data.txt')) as f:
+                assert f.read() == run_id.replace('R', 'W')
+    # State checks for runs that are due at the same time are batched.
+    assert client.bulk_requests < client.requests
+
+
+def test_monitor_download_error(tmpdir):
+    """Test that runs are set to error state if the result files cannot be
+    downloaded.
+    """
+    client = FlakyClient(failures=2)
+    api = RunService()
+    tasks = {'R1': 'W1'}
+    monitor = MonitorService(
+        client=client,
+        poll_interval=0.05,
+        service=service_factory(api),
+        tasks=tasks,
+        downloads={'retries': 1, 'basedir': str(tmpdir)}
+    )
+    monitor.start()
+    monitor.add(run_id='R1', workflow_id='W1', state=StatePending(), output_files=['results/data.txt'])
+    wait_for(tasks)
+    assert not tasks
+    run_id, state, rundir = api.updates[-1]
+    assert state.is_error()
+    assert rundir is None
+    assert not os.listdir(str(tmpdir))
@@ -0,0 +1,109 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the cache of serial workflow step outputs."""
+
+import os
+
+from flowserv.config import Config
+from flowserv.controller.serial.cache import StepCache
+from flowserv.controller.serial.engine import get_cache, run_workflow
+from flowserv.model.workflow.serial import Step
+from flowserv.model.workflow.state import StatePending
+
+import flowserv.model.workflow.state as serialize
+
+
+def execute(rundir, steps, cache, inputs):
+    """Create a run directory with the given input files and run the workflow
+    steps. Returns the workflow state and the list of progress reports.
+    """
+    os.makedirs(rundir)
+    for filename, text in inputs.items():
+        with open(os.path.join(rundir, filename), 'w') as f:
+            f.write(text)
+    reports = list()
+    _, _, doc = run_workflow('0000', rundir, StatePending(), ['out.txt'], steps, progress=reports.append, cache=cache)
+    return serialize.deserialize_state(doc), reports
+
+
+def read_file(filename):
+    """Read the content of a text file."""
+    with open(filename, 'r') as f:
+        return f.read()
+
+
+def test_cache_eviction(tmpdir):
+    """Test evicting least recently used cache entries."""
+    cache = StepCache(basedir=os.path.join(tmpdir, 'cache'), size=20)
+    steps = [Step(env=None, commands=['echo "0123456789" > out.txt'])]
+    # Outputs larger than the budget are not cached.
+    execute(os.path.join(tmpdir, 'run0'), steps, StepCache(basedir=cache.basedir, size=5), {'in.txt': 'A'})
+    assert not os.path.isdir(cache.basedir)
+    # Cache outputs for three different inputs. The first entry is evicted.
+    for i, data in enumerate(['A', 'B', 'C']):
+        execute(os.path.join(tmpdir, 'run{}'.format(i + 1)), steps, cache, {'in.txt': data})
+    assert len(os.listdir(cache.basedir)) == 1
+    _, reports = execute(os.path.join(tmpdir, 'run4'), steps, cache, {'in.txt': 'C'})
+    assert reports[0]['exit_code'] == 0 and len(reports) == 1
+    _, reports = execute(os.path.join(tmpdir, 'run5'), steps, cache, {'in.txt': 'A'})
+    assert len(reports) == 2
+
+
+def test_get_step_cache(tmpdir):
+    """Test creating the step cache from the configuration."""
+    assert get_cache(Config().basedir(tmpdir)) is None
+    cache = get_cache(Config().basedir(tmpdir).step_cache(size=1024))
+    assert cache.basedir == os.path.join(tmpdir, 'stepcache')
+    assert cache.size == 1024
+    cache = get_cache(Config().basedir(tmpdir).step_cache(size=1024, basedir=os.path.join(tmpdir, 'c')))
+    assert cache.basedir == os.path.join(tmpdir, 'c')
+
+
+def test_restore_cached_steps(tmpdir):
+    """Test restoring the outputs of cached workflow steps."""
+    cache = StepCache(basedir=os.path.join(tmpdir, 'cache'), size=1024 * 1024)
+    calls = os.path.join(tmpdir, 'calls.txt')
+    steps = [
+        Step(
+            env='A',
+            commands=[
+                'echo "1" >> {}'.format(calls),
+                'mkdir -p data && cat in.txt > data/prep.txt && echo "prep"',
+                'rm tmp.txt'
+            ],
+            inputs=['./in.txt', 'tmp.txt']
+        ),
+        Step(env='A', commands=['echo "2" >> {}'.format(calls), 'cat data/prep.txt param.txt > out.txt'])
+    ]
+    # -- First run executes all steps -----------------------------------------
+    rundir = os.path.join(tmpdir, 'run1')
+    state, reports = execute(rundir, steps, cache, {'in.txt': 'A', 'param.txt': 'X', 'tmp.txt': ''})
+    assert state.is_success()
+    assert read_file(calls) == '1\n2\n'
+    assert len(reports) == 10
+    assert len(os.listdir(cache.basedir)) == 2
+    # -- Second run restores all steps ----------------------------------------
+    rundir = os.path.join(tmpdir, 'run2')
+    state, reports = execute(rundir, steps, cache, {'in.txt': 'A', 'param.txt': 'X', 'tmp.txt': ''})
+    assert state.is_success()
+    assert 'out.txt' in state.files
+    assert read_file(calls) == '1\n2\n'
+    assert read_file(os.path.join(rundir, 'out.txt')) == 'AX'
+    assert read_file(os.path.join(rundir, 'data', 'prep.txt')) == 'A'
+    assert read_file(os.path.join(rundir, '.logs', 'step0.out.log')) == 'prep\n'
+    assert not os.path.exists(os.path.join(rundir, 'tmp.txt'))
+    assert [r['pos'] for r in reports] == [0, 1, 2, 3, 4]
+    assert all([r['exit_code'] == 0 for r in reports])
+    # -- Changed inputs for the second step only ------------------------------
+    rundir = os.path.join(tmpdir, 'run3')
+    state, reports = execute(rundir, steps, cache, {'in.txt': 'A', 'param.txt': 'Y', 'tmp.txt': ''})
+    assert state.is_success()
+    assert read_file(calls) == '1\n2\n2\n'
+    assert read_file(os.path.join(rundir, 'out.txt')) == 'AY'
+    assert len(os.listdir(cache.basedir)) == 3
@@ -0,0 +1,144 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for resource limits and resource accounting of workflow
+steps.
+"""
+
+import os
+import pytest
+
+from flowserv.config import Config
+from flowserv.controller.serial.docker import close_sessions, container_limits, docker_run, docker_session_run
+from flowserv.controller.serial.engine import run_workflow
+from flowserv.controller.serial.limits import get_limits, merge_limits, run_command
+from flowserv.model.parameter.string import String
+from flowserv.model.template.base import WorkflowTemplate
+from flowserv.model.template.parameter import ParameterIndex
+from flowserv.model.workflow.serial import SerialWorkflow, Step, to_bytes
+from flowserv.model.workflow.state import StatePending
+from flowserv.tests.docker import FakeDockerClient
+
+import flowserv.error as err
+import flowserv.model.workflow.state as serialize
+
+
+def workflow(resources, steps):
+    """Create a serial workflow with the given resource limits and steps."""
+    spec = {
+        'resources': resources,
+        'workflow': {'type': 'serial', 'specification': {'steps': steps}}
+    }
+    parameters = ParameterIndex.from_dict([String(name='mem', label='M', index=0, default='1m').to_dict()])
+    template = WorkflowTemplate(workflow_spec=spec, parameters=parameters)
+    return SerialWorkflow(template=template, arguments={}, sourcedir='')
+
+
+def test_container_limits():
+    """Test container arguments for resource limits."""
+    assert container_limits({'walltime': 10}) == dict()
+    kwargs = container_limits({'memory': 1024, 'cputime': 1.5})
+    assert kwargs['mem_limit'] == 1024
+    assert kwargs['ulimits'][0]['Name'] == 'cpu'
+    assert kwargs['ulimits'][0]['Soft'] == 2
+
+
+def test_docker_wall_time_limit(tmpdir):
+    """Test killing containers that exceed the wall time limit."""
+    os.makedirs(os.path.join(tmpdir, 'data'))
+    client = FakeDockerClient()
+    steps = [Step(env='alpine', commands=['echo "A"', 'sleep 10'], limits={'walltime': 0.5})]
+    reports = list()
+    _, _, doc = docker_run('0000', str(tmpdir), StatePending(), [], steps, progress=reports.append, client=client)
+    state = serialize.deserialize_state(doc)
+    assert state.is_error()
+    assert 'wall time limit' in '\n'.join(state.messages)
+    assert [r.get('exit_code') for r in reports] == [None, 0, None, 137]
+    assert reports[1]['wall_time'] >= 0
+    assert all([c.removed for c in client.containers.created])
+    # Session containers are killed and not reused.
+    reports = list()
+    _, _, doc = docker_session_run(
+        '0000', str(tmpdir), StatePending(), [], steps, progress=reports.append,
+        client=client, limits={'memory': 1024}
+    )
+    assert serialize.deserialize_state(doc).messages == ['command exceeded wall time limit of 0.5 seconds\n']
+    session = client.containers.created[-1]
+    assert session.removed
+    assert session.limits['mem_limit'] == 1024
+    close_sessions()
+
+
+def test_get_limits():
+    """Test global resource limits from the configuration."""
+    assert get_limits(Config()) == dict()
+    limits = get_limits(Config().step_limits(cputime=10, memory=1024))
+    assert limits == {'cputime': 10, 'memory': 1024}
+    assert merge_limits({'cputime': 5, 'walltime': 60}, limits) == {'cputime': 5, 'memory': 1024, 'walltime': 60}
+    assert merge_limits({'cputime': 20}) == {'cputime': 20}
+
+
+def test_run_command_limits(tmpdir):
+    """Test that CPU time and memory limits are set by the shell that executes
+    the command.
+    """
+    stdout, stderr = os.path.join(tmpdir, 'out.txt'), os.path.join(tmpdir, 'err.txt')
+    with open(stdout, 'wb') as fout, open(stderr, 'wb') as ferr:
+        exit_code, usage = run_command(
+            'ulimit -S -t; ulimit -H -t; ulimit -v; echo "$HOME" > /dev/null',
+            cwd=str(tmpdir),
+            stdout=fout,
+            stderr=ferr,
+            limits={'cputime': 1.5, 'memory': 64 * 1024 * 1024}
+        )
+    assert exit_code == 0
+    with open(stdout) as f:
+        assert f.read().split() == ['2', '3', str(64 * 1024)]
+    assert usage['max_memory'] > 0
+
+
+def test_serial_step_limits(tmpdir):
+    """Test resource limits and resource usage reports for serial workflow
+    steps.
+    """
+    steps = [
+        Step(env=None, commands=['echo "A"']),
+        Step(env=None, commands=['sleep 10'], limits={'walltime': 0.5})
+    ]
+    reports = list()
+    _, _, doc = run_workflow('0000', str(tmpdir), StatePending(), [], steps, progress=reports.append)
+    state = serialize.deserialize_state(doc)
+    assert state.is_error()
+    assert state.messages == ['command exceeded wall time limit of 0.5 seconds\n']
+    for report in [reports[1], reports[3]]:
+        assert report['cpu_time'] >= 0
+        assert report['max_memory'] > 0
+    assert reports[3]['wall_time'] < 10
+    # Commands that exceed the CPU time limit are killed.
+    steps = [Step(env=None, commands=['while true; do :; done'])]
+    _, _, doc = run_workflow('0000', str(tmpdir), StatePending(), [], steps, progress=list().append, limits={'cputime': 1})
+    assert serialize.deserialize_state(doc).is_error()
+
+
+def test_template_resource_limits():
+    """Test resource limits that are declared in workflow templates."""
+    steps = workflow(
+        resources={'cputime': 10, 'memory': '$[[mem]]'},
+        steps=[
+            {'environment': 'python', 'commands': ['ls']},
+            {'environment': 'python', 'commands': ['ls'], 'resources': {'cputime': '5', 'walltime': 60}}
+        ]
+    ).commands()
+    assert steps[0].limits == {'cputime': 10, 'memory': 1024 * 1024}
+    assert steps[1].limits == {'cputime': 5, 'memory': 1024 * 1024, 'walltime': 60}
+    assert to_bytes('2G') == 2 * 1024 ** 3
+    assert to_bytes(512) == 512
+    with pytest.raises(err.InvalidTemplateError):
+        workflow(resources={'cpus': 2}, steps=[{'commands': ['ls']}]).commands()
+    with pytest.raises(err.InvalidTemplateError):
+        workflow(resources={'memory': 'lots'}, steps=[{'commands': ['ls']}]).commands()
@@ -0,0 +1,98 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for writing the output of workflow steps to log files and for
+reporting the progress of workflow commands.
+"""
+
+import os
+
+from flowserv.controller.serial.engine import read_tail, run_workflow
+from flowserv.model.workflow.serial import Step
+from flowserv.model.workflow.state import StatePending
+
+import flowserv.model.workflow.state as serialize
+
+
+def read_file(rundir, key):
+    """Read the content of a file in the run directory."""
+    with open(os.path.join(rundir, key), 'r') as f:
+        return f.read()
+
+
+def test_read_log_tail(tmpdir):
+    """Test reading the tail of a log file."""
+    filename = os.path.join(tmpdir, 'log.txt')
+    with open(filename, 'w') as f:
+        f.write('0123456789')
+    assert read_tail(filename) == '0123456789'
+    assert read_tail(filename, offset=4) == '456789'
+    assert read_tail(filename, offset=4, size=3) == '789'
+    assert read_tail(filename, offset=8, size=5) == '89'
+
+
+def test_step_logs_for_failed_run(tmpdir):
+    """Test error messages for a failed workflow step."""
+    steps = [
+        Step(env=None, commands=['echo "first" 1>&2', 'echo "0123456789" 1>&2 && exit 1']),
+        Step(env=None, commands=['echo "not executed"'])
+    ]
+    _, _, doc = run_workflow('0000', str(tmpdir), StatePending(), [], steps, logtail=6)
+    state = serialize.deserialize_state(doc)
+    assert state.is_error()
+    assert state.messages == ['56789\n']
+    assert read_file(tmpdir, '.logs/step0.err.log') == 'first\n0123456789\n'
+    assert not os.path.exists(os.path.join(tmpdir, '.logs/step1.out.log'))
+    # Without a tail size the complete error output of the failed command is
+    # included in the error message.
+    _, _, doc = run_workflow('0000', str(tmpdir), StatePending(), [], steps, logtail=None)
+    assert serialize.deserialize_state(doc).messages == ['0123456789\n']
+
+
+def test_step_logs_for_successful_run(tmpdir):
+    """Test log files for the output of successful workflow steps."""
+    steps = [
+        Step(env=None, commands=['echo "A"', 'echo "B" 1>&2', 'echo "C" > result.txt']),
+        Step(env=None, commands=['echo "D"'])
+    ]
+    _, _, doc = run_workflow('0000', str(tmpdir), StatePending(), ['result.txt'], steps)
+    state = serialize.deserialize_state(doc)
+    assert state.is_success()
+    assert state.files == [
+        'result.txt',
+        '.logs/step0.out.log',
+        '.logs/step0.err.log',
+        '.logs/step1.out.log',
+        '.logs/step1.err.log'
+    ]
+    assert read_file(tmpdir, '.logs/step0.out.log') == 'A\n'
+    assert read_file(tmpdir, '.logs/step0.err.log') == 'B\n'
+    assert read_file(tmpdir, '.logs/step1.out.log') == 'D\n'
+    assert read_file(tmpdir, '.logs/step1.err.log') == ''
+
+
+def test_step_progress(tmpdir):
+    """Test progress reports for workflow commands."""
+    steps = [
+        Step(env=None, commands=['echo "A"', 'echo "B"']),
+        Step(env=None, commands=['exit 2', 'echo "C"'])
+    ]
+    reports = list()
+    run_workflow('0000', str(tmpdir), StatePending(), [], steps, progress=reports.append)
+    assert [(r['pos'], r['step'], r['command'], r.get('exit_code')) for r in reports] == [
+        (0, 0, 'echo "A"', None),
+        (0, 0, 'echo "A"', 0),
+        (1, 0, 'echo "B"', None),
+        (1, 0, 'echo "B"', 0),
+        (2, 1, 'exit 2', None),
+        (2, 1, 'exit 2', 2)
+    ]
+    for r in reports:
+        assert r['run_id'] == '0000'
+    assert reports[1]['started_at'] == reports[0]['started_at']
+    assert reports[1]['finished_at'] >= reports[1]['started_at']
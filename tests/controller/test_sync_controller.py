@@ -11,6 +11,9 @@
 import os
 import pytest
 
+from flowserv.config import Config
+from flowserv.controller.serial.engine import SerialWorkflowEngine
+from flowserv.service.local import LocalAPIFactory
 from flowserv.service.run.argument import serialize_arg, serialize_fh
 from flowserv.tests.files import io_file
 from flowserv.tests.service import (
@@ -30,6 +33,13 @@ INVALID_TEMPLATE = './template-invalid-cmd.yaml'
 TEMPLATE_WITH_INVALID_CMD = os.path.join(TEMPLATE_DIR, INVALID_TEMPLATE)
 
 
+def exec_success(run_id, rundir, state, output_files, steps):
+    """Workflow execution function without progress reports that returns a
+    success state.
+    """
+    return run_id, rundir, st.serialize_state(state.success())
+
+
 @pytest.mark.parametrize(
     'specfile,state',
     [
@@ -62,15 +72,76 @@ def test_run_helloworld_sync(sync_service, specfile, state):
     with sync_service(user_id=user_id) as api:
         r = api.runs().get_run(run_id)
         serialize.validate_run_handle(r, state=state)
+        # The workflow has a single command.
+        assert len(r['steps']) == 1
+        assert (r['steps'][0]['exitCode'] == 0) == (state == st.STATE_SUCCESS)
         if state == st.STATE_SUCCESS:
             # The run should have the greetings.txt file as a result.
             files = dict()
             for obj in r['files']:
                 files[obj['name']] = obj['id']
-            assert len(files) == 1
+            # In addition to the result file, the output logs of the workflow
+            # step are included in the run files.
+            assert len(files) == 3
+            assert '.logs/step0.out.log' in files
+            assert '.logs/step0.err.log' in files
             fh = api.runs().get_result_file(
                 run_id=run_id,
                 file_id=files['results/greetings.txt']
             )
             value = fh.open().read().decode('utf-8').strip()
             assert value == 'Hello Alice!\nHello Bob!'
+
+
+def test_run_progress_sync(sync_service):
+    """Test that the progress of a synchronous run is written within the
+    session of the caller.
+    """
+    with sync_service() as api:
+        workflow_id = create_workflow(
+            api,
+            source=TEMPLATE_DIR,
+            specfile=TEMPLATE_HELLOWORLD
+        )
+        user_id = create_user(api)
+    with sync_service(user_id=user_id) as api:
+        group_id = create_group(api, workflow_id)
+        names = io_file(data=['Alice', 'Bob'], format='plain/text')
+        file_id = upload_file(api, group_id, names)
+        args = [
+            serialize_arg('names', serialize_fh(file_id, 'data/names.txt')),
+            serialize_arg('sleeptime', 0)
+        ]
+        run_id = start_run(api, group_id, arguments=args)
+        # The step progress is visible within the same session.
+        r = api.runs().get_run(run_id)
+        assert len(r['steps']) == 1
+        assert r['steps'][0]['exitCode'] == 0
+    # All progress reports have been removed from the engine.
+    assert sync_service.pop_progress(run_id) == []
+
+
+def test_run_without_progress_sync(database, tmpdir):
+    """Test synchronous runs with an execution function that does not accept
+    the progress callback.
+    """
+    env = Config().basedir(tmpdir).run_sync().auth()
+    engine = SerialWorkflowEngine(service=env, exec_func=exec_success)
+    service = LocalAPIFactory(env=env, db=database, engine=engine)
+    with service() as api:
+        workflow_id = create_workflow(
+            api,
+            source=TEMPLATE_DIR,
+            specfile=TEMPLATE_HELLOWORLD
+        )
+        user_id = create_user(api)
+    with service(user_id=user_id) as api:
+        group_id = create_group(api, workflow_id)
+        names = io_file(data=['Alice', 'Bob'], format='plain/text')
+        file_id = upload_file(api, group_id, names)
+        args = [serialize_arg('names', serialize_fh(file_id, 'data/names.txt'))]
+        run_id = start_run(api, group_id, arguments=args)
+    with service(user_id=user_id) as api:
+        r = api.runs().get_run(run_id)
+        serialize.validate_run_handle(r, state=st.STATE_SUCCESS)
+        assert r['steps'] == []
@@ -0,0 +1,204 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the worker pool of the serial workflow engine."""
+
+from functools import partial
+
+import os
+import pytest
+import threading
+import time
+
+from flowserv.controller.serial.pool import WorkerPool, on_exit, report
+
+
+# -- Helper functions ---------------------------------------------------------
+
+class Results(object):
+    """Collect task results and errors from the pool callbacks."""
+    def __init__(self):
+        self.done = dict()
+        self.errors = dict()
+        self.started = list()
+        self.cond = threading.Condition()
+
+    def callback(self, result):
+        with self.cond:
+            task_id, pid = result
+            self.done[task_id] = pid
+            self.cond.notify_all()
+
+    def error(self, task_id):
+        def error_callback(messages):
+            with self.cond:
+                self.errors[task_id] = messages
+                self.cond.notify_all()
+        return error_callback
+
+    def start(self, task_id):
+        return lambda: self.started.append(task_id)
+
+    def wait(self, count, timeout=10):
+        """Wait until the given number of tasks finished."""
+        with self.cond:
+            self.cond.wait_for(lambda: len(self.done) + len(self.errors) >= count, timeout)
+
+
+def exit_task(task_id, filename):
+    """Task that registers an exit function for the worker that writes the
+    given file. Sleeps until the worker is terminated.
+    """
+    on_exit(partial(write_file, filename))
+    time.sleep(30)
+    return task_id, os.getpid()
+
+
+def fail_task(task_id):
+    """Task that raises an error."""
+    raise ValueError(task_id)
+
+
+def progress_task(task_id, count):
+    """Task that sends the given number of progress reports."""
+    for i in range(count):
+        report((task_id, i))
+    return task_id, os.getpid()
+
+
+def sleep_task(task_id, seconds):
+    """Task that sleeps for the given time. Returns the task identifier and
+    the process identifier of the worker.
+    """
+    time.sleep(seconds)
+    return task_id, os.getpid()
+
+
+def write_file(filename):
+    """Write an empty file."""
+    open(filename, 'w').close()
+
+
+def submit(pool, results, task_id, seconds=0, func=sleep_task):
+    """Submit a task to the pool."""
+    return pool.submit(
+        task_id=task_id,
+        func=func,
+        args=(task_id, seconds) if func == sleep_task else (task_id,),
+        callback=results.callback,
+        error_callback=results.error(task_id),
+        start_callback=results.start(task_id)
+    )
+
+
+# -- Unit tests ---------------------------------------------------------------
+
+def test_cancel_tasks():
+    """Test canceling queued and running tasks."""
+    pool = WorkerPool(processes=2)
+    results = Results()
+    try:
+        assert submit(pool, results, 'A', seconds=0.5)
+        assert submit(pool, results, 'B', seconds=30)
+        assert not submit(pool, results, 'C', seconds=30)
+        assert not submit(pool, results, 'D')
+        # Cancel a queued task.
+        assert pool.cancel('C')
+        assert pool.pending() == ['D']
+        # Cancel a running task. Only the affected worker is terminated.
+        assert pool.cancel('B')
+        assert not pool.cancel('B')
+        results.wait(2)
+        assert sorted(results.done) == ['A', 'D']
+        assert results.started == ['D']
+        assert results.errors == dict()
+    finally:
+        pool.close()
+
+
+def test_exit_functions(tmpdir):
+    """Test calling the exit functions of workers that are terminated."""
+    pool = WorkerPool(processes=2)
+    results = Results()
+    canceled = os.path.join(tmpdir, 'A')
+    closed = os.path.join(tmpdir, 'B')
+    try:
+        for task_id, filename in [('A', canceled), ('B', closed)]:
+            pool.submit(task_id=task_id, func=exit_task, args=(task_id, filename), callback=results.callback)
+        time.sleep(1)
+        assert pool.cancel('A')
+        assert os.path.isfile(canceled)
+        assert not os.path.isfile(closed)
+    finally:
+        pool.close()
+    assert os.path.isfile(closed)
+    assert results.done == dict()
+
+
+def test_progress_reports():
+    """Test receiving progress reports from task functions."""
+    pool = WorkerPool(processes=1)
+    results = Results()
+    reports = list()
+    try:
+        pool.submit(
+            task_id='A',
+            func=progress_task,
+            args=('A', 3),
+            callback=results.callback,
+            progress_callback=reports.append
+        )
+        results.wait(1)
+        assert reports == [('A', 0), ('A', 1), ('A', 2)]
+        assert 'A' in results.done
+    finally:
+        pool.close()
+    # Reports outside of a worker process are ignored.
+    report(('B', 0))
+
+
+def test_queue_and_recycle_workers():
+    """Test bounded number of workers, task queue, and worker recycling."""
+    pool = WorkerPool(processes=2, max_runs=2)
+    results = Results()
+    try:
+        assert submit(pool, results, 'A', seconds=0.5)
+        assert submit(pool, results, 'B', seconds=0.5)
+        for task_id in ['C', 'D', 'E', 'F']:
+            assert not submit(pool, results, task_id)
+        assert pool.pending() == ['C', 'D', 'E', 'F']
+        assert sorted(pool.running()) == ['A', 'B']
+        with pytest.raises(ValueError):
+            submit(pool, results, 'A')
+        results.wait(6)
+        assert sorted(results.done) == ['A', 'B', 'C', 'D', 'E', 'F']
+        assert sorted(results.started) == ['C', 'D', 'E', 'F']
+        # Each worker executes at most two tasks.
+        pids = list(results.done.values())
+        assert max([pids.count(p) for p in pids]) <= 2
+        assert len(set(pids)) >= 3
+        assert pool.pending() == []
+        assert pool.running() == []
+    finally:
+        pool.close()
+
+
+def test_task_errors():
+    """Test error callbacks for failed tasks."""
+    pool = WorkerPool(processes=1)
+    results = Results()
+    try:
+        submit(pool, results, 'A', func=fail_task)
+        submit(pool, results, 'B')
+        results.wait(2)
+        assert 'A' in results.errors
+        assert 'B' in results.done
+    finally:
+        pool.close()
+    with pytest.raises(ValueError):
+        submit(pool, results, 'C')
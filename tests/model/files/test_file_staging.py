@@ -0,0 +1,116 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for staging files from the file store in run directories."""
+
+import os
+import pytest
+import stat
+
+from io import BytesIO
+
+from flowserv.config import Config
+from flowserv.model.files.base import IOBuffer
+from flowserv.model.files.fs import FileSystemStore, FSFile
+from flowserv.model.files.s3 import BucketStore, TransferManager
+from flowserv.tests.files import DiskBucket
+
+import flowserv.error as err
+
+
+def read_file(filename):
+    """Read the content of a text file."""
+    with open(filename, 'r') as f:
+        return f.read()
+
+
+def store_files(fs, files):
+    """Store the given dictionary of file names and text content in the
+    folder 'static' of the file store.
+    """
+    for key, text in files.items():
+        dirname, filename = os.path.split(os.path.join('static', key))
+        fs.store_files(files=[(IOBuffer(BytesIO(text.encode('utf-8'))), filename)], dst=dirname)
+
+
+def test_bucket_content_cache(tmpdir):
+    """Test copying folders from a bucket store with a local content cache."""
+    failures = dict()
+    cachedir = os.path.join(tmpdir, 'cache')
+    fs = BucketStore(
+        env=Config().s3_cache(cachedir).staging('hardlink'),
+        bucket=DiskBucket(basedir=os.path.join(tmpdir, 'bucket'), failures=failures),
+        transfers=TransferManager(retries=0, backoff=0)
+    )
+    store_files(fs, {'A.txt': 'A', 'data/B.txt': 'B'})
+    fs.copy_folder(key='static', dst=os.path.join(tmpdir, 'run1'))
+    assert len(os.listdir(cachedir)) == 2
+    # Cached objects are not downloaded again.
+    failures['static/A.txt'] = 1
+    failures['static/data/B.txt'] = 1
+    fs.copy_folder(key='static', dst=os.path.join(tmpdir, 'run2'))
+    assert read_file(os.path.join(tmpdir, 'run2', 'A.txt')) == 'A'
+    assert read_file(os.path.join(tmpdir, 'run2', 'data', 'B.txt')) == 'B'
+    # Modified objects are downloaded.
+    failures.clear()
+    store_files(fs, {'A.txt': 'C'})
+    fs.copy_folder(key='static', dst=os.path.join(tmpdir, 'run3'))
+    assert read_file(os.path.join(tmpdir, 'run3', 'A.txt')) == 'C'
+    assert read_file(os.path.join(tmpdir, 'run1', 'A.txt')) == 'A'
+    assert len(os.listdir(cachedir)) == 3
+    # Failed downloads are not added to the cache.
+    store_files(fs, {'A.txt': 'D'})
+    failures['static/A.txt'] = 1
+    with pytest.raises(err.FileTransferError):
+        fs.copy_folder(key='static', dst=os.path.join(tmpdir, 'run4'))
+    assert len(os.listdir(cachedir)) == 3
+
+
+@pytest.mark.parametrize('mode,linked', [('copy', False), ('reflink', False), ('hardlink', True)])
+def test_stage_static_files(mode, linked, tmpdir):
+    """Test staging files from the file system store in different modes."""
+    fs = FileSystemStore(env=Config().basedir(os.path.join(tmpdir, 'store')).staging(mode))
+    store_files(fs, {'A.txt': 'A', 'data/B.txt': 'B', 'data/empty/C.txt': 'C'})
+    rundir = os.path.join(tmpdir, 'run')
+    fs.copy_folder(key='static', dst=rundir)
+    assert read_file(os.path.join(rundir, 'A.txt')) == 'A'
+    assert read_file(os.path.join(rundir, 'data', 'B.txt')) == 'B'
+    assert read_file(os.path.join(rundir, 'data', 'empty', 'C.txt')) == 'C'
+    src = os.stat(os.path.join(tmpdir, 'store', 'static', 'data', 'B.txt'))
+    dst = os.stat(os.path.join(rundir, 'data', 'B.txt'))
+    assert (src.st_ino == dst.st_ino) == linked
+    # Hard-linked files are read-only to protect the files in the store.
+    assert (not dst.st_mode & stat.S_IWUSR) == linked
+    # Files in the store can be replaced after they were staged.
+    store_files(fs, {'data/B.txt': 'D'})
+    fs.copy_folder(key='static', dst=os.path.join(tmpdir, 'run2'))
+    assert read_file(os.path.join(tmpdir, 'run2', 'data', 'B.txt')) == 'D'
+    assert read_file(os.path.join(rundir, 'data', 'B.txt')) == 'B'
+
+
+@pytest.mark.parametrize('mode,linked', [('copy', False), ('hardlink', True)])
+def test_store_local_files(mode, linked, tmpdir):
+    """Test storing files from a local run directory in different modes."""
+    fs = FileSystemStore(env=Config().basedir(os.path.join(tmpdir, 'store')).staging(mode))
+    rundir = os.path.join(tmpdir, 'run')
+    os.makedirs(os.path.join(rundir, 'results'))
+    with open(os.path.join(rundir, 'results', 'A.txt'), 'w') as f:
+        f.write('A')
+    files = [(FSFile(os.path.join(rundir, 'results', 'A.txt')), 'results/A.txt')]
+    fs.store_files(files=files, dst='runs/0000')
+    fs.store_files(files=files, dst='runs/0000')
+    filename = os.path.join(tmpdir, 'store', 'runs', '0000', 'results', 'A.txt')
+    assert read_file(filename) == 'A'
+    src = os.stat(os.path.join(rundir, 'results', 'A.txt'))
+    assert (src.st_ino == os.stat(filename).st_ino) == linked
+
+
+def test_invalid_staging_mode(tmpdir):
+    """Test error for unknown staging modes."""
+    with pytest.raises(err.InvalidArgumentError):
+        FileSystemStore(env=Config().basedir(tmpdir).staging('symlink'))
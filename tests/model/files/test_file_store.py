@@ -10,11 +10,14 @@
 buckets.
 """
 
+from io import BytesIO
+
 import json
 import os
 import pytest
 
 from flowserv.config import Config
+from flowserv.model.files.base import IOBuffer, IOStream
 from flowserv.model.files.fs import FileSystemStore, FSFile, walk
 from flowserv.model.files.s3 import BucketStore
 from flowserv.tests.files import DiskBucket
@@ -87,6 +90,46 @@ def create_store(store_id, basedir):
         return FileSystemStore(env=Config().basedir(basedir))
 
 
+@pytest.mark.parametrize('store_id', ['FILE_SYSTEM', 'BUCKET'])
+def test_chunked_file_io(store_id, tmpdir):
+    """Test reading file contents in chunks and copying files to file
+    objects.
+    """
+    # -- Setup ----------------------------------------------------------------
+    data = os.urandom(10000)
+    fs = create_store(store_id, os.path.join(tmpdir, 'fs'))
+    fs.store_files(files=[(IOBuffer(BytesIO(data)), 'data.bin')], dst='0000')
+    file = fs.load_file(os.path.join('0000', 'data.bin'))
+    # -- Read chunks ----------------------------------------------------------
+    chunks = list(file.iter_chunks(chunk_size=1000))
+    assert len(chunks) == 10
+    assert b''.join(chunks) == data
+    assert b''.join(file.iter_chunks(chunk_size=3000)) == data
+    with file.open_stream() as f:
+        assert f.read(10) == data[:10]
+        assert f.read() == data[10:]
+    if store_id == 'BUCKET':
+        # The content is streamed using a single request for each read.
+        assert fs.bucket.get_requests == 3
+    # -- Copy to file objects -------------------------------------------------
+    buf = BytesIO()
+    file.copy_to(buf)
+    assert buf.getvalue() == data
+    filename = os.path.join(tmpdir, 'copy.bin')
+    with open(filename, 'wb') as f:
+        f.write(b'AB')
+        file.copy_to(f)
+        f.write(b'CD')
+    with open(filename, 'rb') as f:
+        assert f.read() == b'AB' + data + b'CD'
+    # -- Unknown file ---------------------------------------------------------
+    file = fs.load_file(os.path.join('0000', 'unknown.bin'))
+    with pytest.raises(err.UnknownFileError):
+        list(file.iter_chunks())
+    with pytest.raises(err.UnknownFileError):
+        file.copy_to(BytesIO())
+
+
 @pytest.mark.parametrize('store_id', ['FILE_SYSTEM', 'BUCKET'])
 def test_delete_files_and_folders(store_id, tmpdir):
     """Test deleting folders in the file store."""
@@ -138,6 +181,29 @@ def test_file_size(store_id, tmpdir):
     assert fs.load_file(os.path.join(KEY, FILE_DATA)).size() > size_a
 
 
+def test_file_size_from_metadata(tmpdir):
+    """Test getting the size and existence of bucket objects from the object
+    metadata without downloading the object.
+    """
+    # -- Setup ----------------------------------------------------------------
+    bucket = DiskBucket(basedir=os.path.join(tmpdir, 'fs'))
+    fs = BucketStore(env=Config(), bucket=bucket)
+    fs.store_files(files=create_files(os.path.join(tmpdir, 'data')), dst='0000')
+
+    def no_download(key, data):
+        raise AssertionError('unexpected download of {}'.format(key))
+
+    bucket.download_fileobj = no_download
+    # -- Size and existence of stored and unknown objects ---------------------
+    file = fs.load_file(os.path.join('0000', FILE_A))
+    assert file.exists()
+    assert file.size() == os.stat(os.path.join(tmpdir, 'data', FILE_A)).st_size
+    file = fs.load_file(os.path.join('0000', 'unknown.json'))
+    assert not file.exists()
+    with pytest.raises(err.UnknownFileError):
+        file.size()
+
+
 def test_file_system_walk(tmpdir):
     """Test walk function to recursively collect upload files."""
     # -- Setup ----------------------------------------------------------------
@@ -163,6 +229,26 @@ def test_file_system_walk(tmpdir):
     assert os.path.join('run', 'data', 'data.json') in x_files
 
 
+def test_io_stream(tmpdir):
+    """Test reading and storing content that is generated by an IO stream."""
+    file = IOStream(lambda: iter([b'ab', b'', b'cde']))
+    assert file.open().read() == b'abcde'
+    # The size of generated content is unknown.
+    assert file.size() is None
+    stream = file.open_stream()
+    assert stream.read(1) == b'a'
+    assert stream.read() == b'bcde'
+    filename = os.path.join(tmpdir, 'out.txt')
+    file.store(filename)
+    with open(filename, 'rb') as f:
+        assert f.read() == b'abcde'
+    # Open files on disk as streams.
+    with FSFile(filename).open_stream() as f:
+        assert f.read() == b'abcde'
+    with pytest.raises(err.UnknownFileError):
+        FSFile(os.path.join(tmpdir, 'unknown.txt')).open_stream()
+
+
 @pytest.mark.parametrize('store_id', ['FILE_SYSTEM', 'BUCKET'])
 def test_load_file_and_write(store_id, tmpdir):
     """Test getting a previously uploaded file and writing the content to the
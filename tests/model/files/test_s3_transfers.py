@@ -0,0 +1,77 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for parallel object transfers of the bucket store."""
+
+import os
+import pytest
+
+from io import BytesIO
+
+from flowserv.config import Config
+from flowserv.model.files.base import IOBuffer
+from flowserv.model.files.fs import FSFile
+from flowserv.model.files.s3 import BucketStore, TransferManager
+from flowserv.tests.files import DiskBucket
+
+import flowserv.error as err
+
+
+def create_store(basedir, workers=4, retries=2, failures=None):
+    """Create a bucket store with the given transfer settings."""
+    return BucketStore(
+        env=Config(),
+        bucket=DiskBucket(basedir=basedir, failures=failures),
+        transfers=TransferManager(workers=workers, retries=retries, backoff=0)
+    )
+
+
+def upload_files(count):
+    """Get list of files for upload."""
+    return [(IOBuffer(BytesIO(str(i).encode('utf-8'))), 'f{}.txt'.format(i)) for i in range(count)]
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_parallel_transfers(workers, tmpdir):
+    """Test uploading, downloading, and deleting a folder with many files."""
+    fs = create_store(os.path.join(tmpdir, 'bucket'), workers=workers)
+    fs.store_files(files=upload_files(50), dst='data')
+    fs.copy_folder(key='data', dst=os.path.join(tmpdir, 'out'))
+    for i in range(50):
+        with open(os.path.join(tmpdir, 'out', 'f{}.txt'.format(i)), 'rb') as f:
+            assert f.read() == str(i).encode('utf-8')
+    fs.delete_folder('data')
+    assert not fs.load_file('data/f0.txt').exists()
+    # Delete for an empty folder has no effect.
+    fs.delete_folder('data')
+
+
+def test_transfer_errors(tmpdir):
+    """Test retries and aggregated errors for failed transfers."""
+    # -- Transient errors are retried -----------------------------------------
+    failures = {'data/f1.txt': 2, 'data/f2.txt': 1}
+    fs = create_store(os.path.join(tmpdir, 'bucket'), failures=failures)
+    fs.store_files(files=upload_files(5), dst='data')
+    assert fs.load_file('data/f1.txt').open().read() == b'1'
+    # -- Errors are raised after the last retry -------------------------------
+    failures['data/f1.txt'] = 3
+    failures['data/f3.txt'] = 3
+    with pytest.raises(err.FileTransferError) as ex:
+        fs.copy_folder(key='data', dst=os.path.join(tmpdir, 'out'))
+    assert sorted([key for key, _ in ex.value.errors]) == ['data/f1.txt', 'data/f3.txt']
+    # All other files have been downloaded.
+    assert os.path.isfile(os.path.join(tmpdir, 'out', 'f4.txt'))
+    # -- Errors for unknown files are not retried -----------------------------
+    files = [(FSFile(os.path.join(tmpdir, 'unknown.txt')), 'f5.txt')]
+    files.append((IOBuffer(BytesIO(b'6')), 'f6.txt'))
+    with pytest.raises(err.FileTransferError) as ex:
+        fs.store_files(files=files, dst='data')
+    key, error = ex.value.errors[0]
+    assert key == 'data/f5.txt'
+    assert isinstance(error, err.UnknownFileError)
+    assert fs.load_file('data/f6.txt').exists()
@@ -0,0 +1,133 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the cache of run result archives."""
+
+import os
+import pytest
+import tarfile
+
+from flowserv.config import Config
+from flowserv.model.archive import ArchiveCache
+from flowserv.model.base import RunArchive
+from flowserv.model.files.fs import FileSystemStore
+from flowserv.model.run import RunManager
+from flowserv.tests.files import DiskStore
+from flowserv.tests.model import success_run
+
+import flowserv.error as err
+
+
+def archive_members(fh):
+    """Get sorted list of member names for the archive in the file handle."""
+    with tarfile.open(fileobj=fh.open(), mode='r:gz') as tar:
+        return sorted(tar.getnames())
+
+
+def create_runs(database, fs, basedir, count):
+    """Create the given number of successful runs. Returns the list of run
+    identifier.
+    """
+    runs = list()
+    for i in range(count):
+        _, _, run_id, _ = success_run(database, fs, os.path.join(basedir, str(i)))
+        runs.append(run_id)
+    return runs
+
+
+@pytest.mark.parametrize('fscls', [FileSystemStore, DiskStore])
+def test_cache_archive(fscls, database, tmpdir):
+    """Test creating and re-using cached run archives."""
+    # -- Setup ----------------------------------------------------------------
+    fs = fscls(env=Config().basedir(tmpdir))
+    run_id = create_runs(database, fs, tmpdir, 1)[0]
+    members = ['A.json', 'run/results/B.json']
+    # -- Archive is cached on first request -----------------------------------
+    with database.session() as session:
+        fh = RunManager(session=session, fs=fs, archive_cache=1000000).get_runarchive(run_id)
+        assert archive_members(fh) == members
+    with database.session() as session:
+        archive = session.query(RunArchive).one()
+        key, accessed_at = archive.key, archive.accessed_at
+        assert fs.load_file(key).size() == archive.size
+    # -- Cached archive is re-used --------------------------------------------
+    with database.session() as session:
+        fh = RunManager(session=session, fs=fs, archive_cache=1000000).get_runarchive(run_id)
+        assert archive_members(fh) == members
+    with database.session() as session:
+        archive = session.query(RunArchive).one()
+        assert archive.key == key
+        assert archive.accessed_at > accessed_at
+    # -- Archive is deleted with the run --------------------------------------
+    with database.session() as session:
+        RunManager(session=session, fs=fs).delete_run(run_id)
+    with database.session() as session:
+        assert session.query(RunArchive).count() == 0
+    with pytest.raises(err.UnknownFileError):
+        fs.load_file(key).open()
+
+
+def test_cache_eviction(database, tmpdir):
+    """Test evicting archives when the cache size is exceeded."""
+    # -- Setup ----------------------------------------------------------------
+    fs = FileSystemStore(env=Config().basedir(tmpdir))
+    runs = create_runs(database, fs, tmpdir, 3)
+    with database.session() as session:
+        RunManager(session=session, fs=fs, archive_cache=1000000).get_runarchive(runs[0])
+    with database.session() as session:
+        size = session.query(RunArchive).one().size
+    # -- Cache has space for two archives -------------------------------------
+    for run_id in runs:
+        with database.session() as session:
+            manager = RunManager(session=session, fs=fs, archive_cache=2 * size)
+            manager.get_runarchive(run_id)
+    with database.session() as session:
+        archives = session.query(RunArchive).all()
+        assert sorted([a.run_id for a in archives]) == sorted(runs[1:])
+        keys = [a.key for a in archives]
+    # -- Archive files are only deleted after the transaction is committed ----
+    with database.session() as session:
+        cache = ArchiveCache(session=session, fs=fs, size=2 * size)
+        cache.evict(2 * size)
+        assert session.query(RunArchive).count() == 0
+        session.rollback()
+        assert session.query(RunArchive).count() == 2
+        assert cache.obsolete
+        for key in keys:
+            assert fs.load_file(key).size() == size
+    # -- Archives that are larger than the cache are not cached ---------------
+    with database.session() as session:
+        manager = RunManager(session=session, fs=fs, archive_cache=size - 1)
+        fh = manager.get_runarchive(runs[0])
+        assert archive_members(fh) == ['A.json', 'run/results/B.json']
+    with database.session() as session:
+        assert session.query(RunArchive).filter(RunArchive.run_id == runs[0]).count() == 0
+    # -- No caching if disabled -----------------------------------------------
+    with database.session() as session:
+        fh = RunManager(session=session, fs=fs, archive_cache=0).get_runarchive(runs[0])
+        assert archive_members(fh) == ['A.json', 'run/results/B.json']
+    with database.session() as session:
+        assert session.query(RunArchive).count() == 2
+
+
+def test_cache_skip_large_archives(database, monkeypatch, tmpdir):
+    """Test that archives whose files exceed the cache size are not written
+    to the file store.
+    """
+    fs = FileSystemStore(env=Config().basedir(tmpdir))
+    run_id = create_runs(database, fs, tmpdir, 1)[0]
+
+    def store_files(files, dst):
+        raise RuntimeError('archive written to the file store')
+
+    monkeypatch.setattr(fs, 'store_files', store_files)
+    with database.session() as session:
+        fh = RunManager(session=session, fs=fs, archive_cache=1).get_runarchive(run_id)
+        assert archive_members(fh) == ['A.json', 'run/results/B.json']
+    with database.session() as session:
+        assert session.query(RunArchive).count() == 0
@@ -10,10 +10,11 @@
 
 import pytest
 
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.exc import IntegrityError
 
 from flowserv.model.base import User
-from flowserv.model.database import DB, TEST_URL
+from flowserv.model.database import DB, TEST_DB, TEST_URL
 
 
 @pytest.mark.parametrize(
@@ -53,3 +54,30 @@ def test_session_scope():
     # Query all users. Still expects two object in the resulting list.
     with db.session() as session:
         assert len(session.query(User).all()) == 2
+
+
+def test_upgrade_db(tmpdir):
+    """Test upgrading an existing database that is missing indexes, tables,
+    and columns.
+    """
+    connect_url = TEST_DB(tmpdir)
+    db = DB(connect_url=connect_url).init()
+    with db.session() as session:
+        session.add(User(user_id='U', name='U', secret='U', active=True))
+    # Drop the run index, the leaderboard table, and a step column.
+    engine = create_engine(connect_url)
+    with engine.begin() as conn:
+        conn.execute(text('DROP INDEX idx_run_group'))
+        conn.execute(text('DROP TABLE workflow_leaderboard'))
+        conn.execute(text('ALTER TABLE run_step DROP COLUMN wall_time'))
+    assert 'workflow_leaderboard' not in inspect(engine).get_table_names()
+    db = DB(connect_url=connect_url).upgrade()
+    indexes = [ix['name'] for ix in inspect(engine).get_indexes('workflow_run')]
+    assert 'idx_run_group' in indexes
+    assert 'workflow_leaderboard' in inspect(engine).get_table_names()
+    assert 'wall_time' in [col['name'] for col in inspect(engine).get_columns('run_step')]
+    # Existing data is not erased.
+    with db.session() as session:
+        assert len(session.query(User).all()) == 2
+    # Upgrading an up-to-date database has no effect.
+    DB(connect_url=connect_url).upgrade()
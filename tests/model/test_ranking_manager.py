@@ -14,6 +14,7 @@ import pytest
 from datetime import timedelta
 
 from flowserv.config import Config
+from flowserv.model.base import RunResultValue
 from flowserv.model.files.fs import FileSystemStore
 from flowserv.model.parameter.numeric import PARA_FLOAT, PARA_INT
 from flowserv.model.parameter.string import PARA_STRING
@@ -25,6 +26,7 @@ from flowserv.model.template.schema import (
 )
 from flowserv.tests.files import DiskStore
 
+import flowserv.error as err
 import flowserv.model.workflow.state as st
 import flowserv.util as util
 import flowserv.tests.model as model
@@ -178,3 +180,184 @@ def test_multi_success_runs(fscls, database, tmpdir):
         )
         rank_order = [e.run_id for e in ranking]
         assert rank_order == count_order
+
+
+def test_ranking_pagination(database, tmpdir):
+    """Test limit and offset for ranking queries and the handling of missing
+    values in sort columns.
+    """
+    # -- Setup ----------------------------------------------------------------
+    # Set all runs for the first workflow into success state. The optional
+    # 'name' column is only set for every other run.
+    workflows = init(database, tmpdir)
+    fs = FileSystemStore(env=Config().basedir(tmpdir))
+    workflow_id, groups = workflows[0]
+    count = 0
+    run_order = list()
+    named_runs = list()
+    with database.session() as session:
+        for group_id, runs in groups:
+            for run_id in runs:
+                tmprundir = os.path.join(tmpdir, 'runs', run_id)
+                values = {'count': count, 'avg': 1.0}
+                if count % 2 == 0:
+                    values['name'] = 'N{}'.format(count)
+                    named_runs.append(run_id)
+                run_success(
+                    run_manager=RunManager(session=session, fs=fs),
+                    run_id=run_id,
+                    rundir=tmprundir,
+                    values=values
+                )
+                count += 1
+                run_order.append(run_id)
+    run_order = run_order[::-1]
+    # -- Test limit and offset ------------------------------------------------
+    with database.session() as session:
+        wf = WorkflowManager(session=session, fs=fs).get_workflow(workflow_id)
+        rankings = RankingManager(session=session)
+        ranking = rankings.get_ranking(wf, include_all=True, limit=5)
+        assert [e.run_id for e in ranking] == run_order[:5]
+        ranking = rankings.get_ranking(wf, include_all=True, offset=5, limit=5)
+        assert [e.run_id for e in ranking] == run_order[5:10]
+        ranking = rankings.get_ranking(wf, include_all=True, offset=10)
+        assert [e.run_id for e in ranking] == run_order[10:]
+        ranking = rankings.get_ranking(wf, limit=2)
+        assert [e.run_id for e in ranking] == run_order[0:6:3]
+        ranking = rankings.get_ranking(wf, offset=3)
+        assert [e.run_id for e in ranking] == run_order[9:10]
+    # -- Test sort on column with missing values ------------------------------
+    with database.session() as session:
+        wf = WorkflowManager(session=session, fs=fs).get_workflow(workflow_id)
+        rankings = RankingManager(session=session)
+        ranking = rankings.get_ranking(
+            wf,
+            order_by=[SortColumn(column_id='name', sort_desc=False)],
+            include_all=True
+        )
+        rank_order = [e.run_id for e in ranking]
+        assert set(rank_order[:len(named_runs)]) == set(named_runs)
+        assert len(rank_order) == len(run_order)
+        # Error for unknown sort column.
+        with pytest.raises(err.InvalidSortColumnError):
+            rankings.get_ranking(wf, order_by=[SortColumn(column_id='unknown')])
+
+
+def test_typed_result_values(database, tmpdir):
+    """Test maintaining the typed result values that are used to sort and
+    filter workflow rankings.
+    """
+    # -- Setup ----------------------------------------------------------------
+    # Set all runs of the first group for the first workflow into success
+    # state. The value for 'avg' decreases as the value for 'count' increases.
+    workflows = init(database, tmpdir)
+    fs = FileSystemStore(env=Config().basedir(tmpdir))
+    workflow_id, groups = workflows[0]
+    _, runs = groups[0]
+    with database.session() as session:
+        for i, run_id in enumerate(runs):
+            tmprundir = os.path.join(tmpdir, 'runs', run_id)
+            run_success(
+                run_manager=RunManager(session=session, fs=fs),
+                run_id=run_id,
+                rundir=tmprundir,
+                values={'count': i, 'avg': 1.5 - i, 'name': 'R{}'.format(i)}
+            )
+    # -- Test typed values ----------------------------------------------------
+    with database.session() as session:
+        values = session\
+            .query(RunResultValue)\
+            .filter(RunResultValue.run_id == runs[1])\
+            .all()
+        values = {v.column_id: v for v in values}
+        assert values['count'].int_value == 1
+        assert values['count'].float_value is None
+        assert values['avg'].float_value == 0.5
+        assert values['name'].text_value == 'R1'
+        assert values['name'].workflow_id == workflow_id
+    # -- Test ranking after rebuilding typed values ---------------------------
+    with database.session() as session:
+        session.query(RunResultValue).delete()
+    with database.session() as session:
+        wf = WorkflowManager(session=session, fs=fs).get_workflow(workflow_id)
+        RankingManager(session=session).rebuild_result_values(wf)
+    with database.session() as session:
+        wf = WorkflowManager(session=session, fs=fs).get_workflow(workflow_id)
+        rankings = RankingManager(session=session)
+        ranking = rankings.get_ranking(
+            wf,
+            order_by=[SortColumn(column_id='avg')],
+            include_all=True
+        )
+        assert [e.run_id for e in ranking] == runs
+        ranking = rankings.get_ranking(
+            wf,
+            order_by=[SortColumn(column_id='avg', sort_desc=False)],
+            include_all=True
+        )
+        assert [e.run_id for e in ranking] == runs[::-1]
+    # -- Delete run -----------------------------------------------------------
+    with database.session() as session:
+        RunManager(session=session, fs=fs).delete_run(runs[0])
+    with database.session() as session:
+        assert session.query(RunResultValue).count() == 6
+
+
+def test_workflow_leaderboard(database, tmpdir):
+    """Test maintaining the materialized workflow leaderboard when runs
+    succeed or are deleted.
+    """
+    # -- Setup ----------------------------------------------------------------
+    # Set all runs for the second workflow into success state. The schema
+    # sorts runs by the 'min' value in ascending order. The last run in each
+    # group has the lowest value.
+    workflows = init(database, tmpdir)
+    fs = FileSystemStore(env=Config().basedir(tmpdir))
+    workflow_id, groups = workflows[1]
+    with database.session() as session:
+        for group_id, runs in groups:
+            for i, run_id in enumerate(runs):
+                tmprundir = os.path.join(tmpdir, 'runs', run_id)
+                run_success(
+                    run_manager=RunManager(session=session, fs=fs),
+                    run_id=run_id,
+                    rundir=tmprundir,
+                    values={'values': {'min': 10 - i}, 'max': 10}
+                )
+    best_runs = sorted([runs[-1] for _, runs in groups])
+    # -- Test leaderboard entries ---------------------------------------------
+    with database.session() as session:
+        wf = WorkflowManager(session=session, fs=fs).get_workflow(workflow_id)
+        rankings = RankingManager(session=session)
+        assert rankings.get_leaderboard_runs(wf) == best_runs
+        ranking = rankings.get_ranking(wf)
+        assert sorted([e.run_id for e in ranking]) == best_runs
+        # The leaderboard for the first workflow is empty.
+        wf = WorkflowManager(session=session, fs=fs).get_workflow(workflows[0][0])
+        assert rankings.get_leaderboard_runs(wf) == []
+    # -- Delete best run for first group --------------------------------------
+    group_id, runs = groups[0]
+    with database.session() as session:
+        RunManager(session=session, fs=fs).delete_run(runs[-1])
+    best_runs = sorted([runs[-2]] + [runs[-1] for _, runs in groups[1:]])
+    with database.session() as session:
+        wf = WorkflowManager(session=session, fs=fs).get_workflow(workflow_id)
+        rankings = RankingManager(session=session)
+        assert rankings.get_leaderboard_runs(wf) == best_runs
+    # -- Delete all runs for the first group ----------------------------------
+    with database.session() as session:
+        for run_id in runs[:-1]:
+            RunManager(session=session, fs=fs).delete_run(run_id)
+    best_runs = sorted([runs[-1] for _, runs in groups[1:]])
+    with database.session() as session:
+        wf = WorkflowManager(session=session, fs=fs).get_workflow(workflow_id)
+        rankings = RankingManager(session=session)
+        assert rankings.get_leaderboard_runs(wf) == best_runs
+        assert len(rankings.get_ranking(wf)) == 3
+    # -- Rebuild leaderboard --------------------------------------------------
+    with database.session() as session:
+        wf = WorkflowManager(session=session, fs=fs).get_workflow(workflow_id)
+        RankingManager(session=session).rebuild_leaderboard(wf)
+    with database.session() as session:
+        wf = WorkflowManager(session=session, fs=fs).get_workflow(workflow_id)
+        assert RankingManager(session=session).get_leaderboard_runs(wf) == best_runs
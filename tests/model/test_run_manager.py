@@ -8,14 +8,19 @@
 
 """Unit tests for the workflow run manager."""
 
+from io import BytesIO
+
 import json
 import os
 import pytest
+import tarfile
 import time
 
 from flowserv.config import Config
+from flowserv.model.files.base import IOBuffer
 from flowserv.model.files.fs import FileSystemStore
 from flowserv.model.group import WorkflowGroupManager
+from flowserv.model.archive import archive_chunks
 from flowserv.model.run import RunManager
 from flowserv.model.workflow.manager import WorkflowManager
 from flowserv.tests.files import DiskStore
@@ -244,6 +249,43 @@ def test_obsolete_runs(fscls, database, tmpdir):
         runs.get_run(run_id=run_3)
 
 
+def test_archive_chunks():
+    """Test generating a streamed tar archive in small chunks."""
+    data = os.urandom(100000)
+    files = [(IOBuffer(BytesIO(data)), 'data.bin', len(data)), (IOBuffer(BytesIO(b'')), 'empty.txt', 0)]
+    chunks = list(archive_chunks(files, chunk_size=1024))
+    assert len(chunks) > 1
+    tar = tarfile.open(fileobj=BytesIO(b''.join(chunks)), mode='r:gz')
+    assert tar.getnames() == ['data.bin', 'empty.txt']
+    assert tar.extractfile('data.bin').read() == data
+    assert tar.extractfile('empty.txt').read() == b''
+    # Error if a file is smaller than the given file size.
+    files = [(IOBuffer(BytesIO(data)), 'data.bin', len(data) + 1)]
+    with pytest.raises(OSError):
+        list(archive_chunks(files))
+
+
+@pytest.mark.parametrize('fscls', [FileSystemStore, DiskStore])
+def test_run_archive(fscls, database, tmpdir):
+    """Test streaming the archive of run result files."""
+    # -- Setup ----------------------------------------------------------------
+    fs = fscls(env=Config().basedir(tmpdir))
+    _, _, run_id, _ = success_run(database, fs, tmpdir)
+    # -- Read archive as a stream ---------------------------------------------
+    with database.session() as session:
+        fh = RunManager(session=session, fs=fs).get_runarchive(run_id)
+    tar = tarfile.open(fileobj=fh.open_stream(), mode='r|gz')
+    files = {t.name: json.load(tar.extractfile(t)) for t in tar}
+    assert files == {'A.json': {'A': 1}, 'run/results/B.json': {'B': 1}}
+    # -- Store archive --------------------------------------------------------
+    filename = os.path.join(tmpdir, 'run.tar.gz')
+    fh.store(filename)
+    with tarfile.open(filename, mode='r:gz') as tar:
+        assert sorted(tar.getnames()) == ['A.json', 'run/results/B.json']
+    # The size of a streamed archive is unknown.
+    assert fh.size() is None
+
+
 @pytest.mark.parametrize('fscls', [FileSystemStore, DiskStore])
 def test_run_parameters(fscls, database, tmpdir):
     """Test creating run with template arguments."""
@@ -272,6 +314,77 @@ def test_run_parameters(fscls, database, tmpdir):
         assert run.arguments == arguments
 
 
+def test_remote_tasks(database, tmpdir):
+    """Test maintaining monitoring information for remote workflow runs."""
+    # -- Setup ----------------------------------------------------------------
+    fs = FileSystemStore(env=Config().basedir(tmpdir))
+    with database.session() as session:
+        user_id = model.create_user(session, active=True)
+        workflow_id = model.create_workflow(session)
+        group_id = model.create_group(session, workflow_id, users=[user_id])
+        run_1 = model.create_run(session, workflow_id, group_id)
+        run_2 = model.create_run(session, workflow_id, group_id)
+    # -- Register and update remote tasks -------------------------------------
+    with database.session() as session:
+        runs = RunManager(session=session, fs=fs)
+        assert runs.update_remote_task(run_1, workflow_id='W1', output_files=['a.txt'], interval=1, next_poll=20)
+        assert runs.update_remote_task(run_2, workflow_id='W2', output_files=[], interval=1, next_poll=10)
+        assert runs.update_remote_task(run_1, workflow_id='W1', output_files=['a.txt'], interval=2, next_poll=30)
+    with database.session() as session:
+        tasks = RunManager(session=session, fs=fs).remote_tasks()
+        assert [(t.run_id, t.workflow_id, t.interval, t.next_poll) for t in tasks] == [
+            (run_2, 'W2', 1, 10),
+            (run_1, 'W1', 2, 30)
+        ]
+        assert tasks[1].output_files == ['a.txt']
+    # -- Tasks are removed when the run becomes inactive ----------------------
+    with database.session() as session:
+        runs = RunManager(session=session, fs=fs)
+        run = runs.get_run(run_2)
+        runs.update_run(run_id=run_2, state=run.state().cancel())
+        assert not runs.update_remote_task(run_2, workflow_id='W2', output_files=[], interval=1, next_poll=10)
+        assert [t.run_id for t in runs.remote_tasks()] == [run_1]
+        assert runs.get_run(run_2).remote_task is None
+
+
+def test_run_steps(database, tmpdir):
+    """Test maintaining progress information for workflow commands."""
+    # -- Setup ----------------------------------------------------------------
+    fs = FileSystemStore(env=Config().basedir(tmpdir))
+    with database.session() as session:
+        user_id = model.create_user(session, active=True)
+        workflow_id = model.create_workflow(session)
+        group_id = model.create_group(session, workflow_id, users=[user_id])
+        run_id = model.create_run(session, workflow_id, group_id)
+    # -- Report start and end of commands -------------------------------------
+    with database.session() as session:
+        runs = RunManager(session=session, fs=fs)
+        runs.update_step(run_id, pos=1, step=0, command='B', started_at='2')
+        runs.update_step(run_id, pos=0, step=0, command='A', started_at='0')
+        runs.update_step(
+            run_id, pos=0, step=0, command='A', started_at='0', finished_at='1',
+            exit_code=0, cpu_time=0.5, max_memory=1024, wall_time=1.0
+        )
+    with database.session() as session:
+        steps = RunManager(session=session, fs=fs).get_run(run_id).steps
+        assert [(s.pos, s.command, s.finished_at, s.exit_code) for s in steps] == [
+            (0, 'A', '1', 0),
+            (1, 'B', None, None)
+        ]
+        assert (steps[0].cpu_time, steps[0].max_memory, steps[0].wall_time) == (0.5, 1024, 1.0)
+        assert steps[1].cpu_time is None
+    # -- Reports for inactive runs are ignored --------------------------------
+    with database.session() as session:
+        runs = RunManager(session=session, fs=fs)
+        run = runs.get_run(run_id)
+        runs.update_run(run_id=run_id, state=run.state().cancel())
+        runs.update_step(run_id, pos=1, step=0, command='B', started_at='2', finished_at='3', exit_code=1)
+        assert runs.get_run(run_id).steps[1].exit_code is None
+        runs.delete_run(run_id)
+        with pytest.raises(err.UnknownRunError):
+            runs.update_step(run_id, pos=2, step=1, command='C', started_at='4')
+
+
 @pytest.mark.parametrize('fscls', [FileSystemStore, DiskStore])
 def test_success_run(fscls, database, tmpdir):
     """Test life cycle for a successful run."""
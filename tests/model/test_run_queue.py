@@ -0,0 +1,140 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the persistent run queue."""
+
+from flowserv.model.base import RunExecutor, RunObject
+from flowserv.model.queue import RunQueue, is_alive, is_current, process_start, set_executor
+
+import os
+
+import flowserv.model.workflow.state as st
+import flowserv.tests.model as model
+
+
+def init(database):
+    """Create a workflow with two groups. Creates three pending runs for the
+    first group and one pending run for the second group. Returns the list of
+    run identifier for each group.
+    """
+    with database.session() as session:
+        user_id = model.create_user(session)
+        workflow_id = model.create_workflow(session)
+        g1 = model.create_group(session, workflow_id, users=[user_id])
+        g2 = model.create_group(session, workflow_id, users=[user_id])
+        runs_1 = [model.create_run(session, workflow_id, g1) for _ in range(3)]
+        runs_2 = [model.create_run(session, workflow_id, g2)]
+    return runs_1, runs_2
+
+
+def test_fair_share_and_priority(database):
+    """Test the dispatch order for queued runs."""
+    # -- Setup ----------------------------------------------------------------
+    (r1, r2, r3), (r4,) = init(database)
+    with database.session() as session:
+        queue = RunQueue(session)
+        for run_id in [r1, r2, r3, r4]:
+            queue.enqueue(session.query(RunObject).get(run_id))
+        assert queue.size() == 4
+    # -- Fair share between groups --------------------------------------------
+    with database.session() as session:
+        runs = RunQueue(session).next_runs()
+        assert [r.run_id for r in runs] == [r1, r4, r2, r3]
+    # -- Limit the number of active runs --------------------------------------
+    with database.session() as session:
+        queue = RunQueue(session)
+        assert [r.run_id for r in queue.next_runs(limit=2)] == [r1, r4]
+        assert queue.claim(r1)
+        assert not queue.claim(r1)
+        assert queue.active_runs() == {session.query(RunObject).get(r1).group_id: 1}
+        assert [r.run_id for r in queue.next_runs(limit=2)] == [r4]
+        assert queue.next_runs(limit=1) == []
+    # -- Runs with higher priority are dispatched first -----------------------
+    with database.session() as session:
+        queue = RunQueue(session)
+        queue.remove(r3)
+        queue.enqueue(session.query(RunObject).get(r3), priority=1)
+        assert [r.run_id for r in queue.next_runs()] == [r3, r4, r2]
+
+
+def test_executor_alive():
+    """Test identifying live run executors."""
+    executor = set_executor(RunExecutor())
+    assert is_current(executor)
+    assert is_alive(executor)
+    # A process with the identifier of the current process is not alive if it
+    # is a different process (e.g., after a restart of a container).
+    executor.token = 'restarted'
+    assert not is_current(executor)
+    assert not is_alive(executor)
+    # Reused process identifiers are detected by the process start time.
+    started = process_start(os.getppid())
+    executor = RunExecutor(host=executor.host, pid=os.getppid(), token='parent', started=started)
+    assert is_alive(executor)
+    if started is not None:
+        executor.started = started + 1
+        assert not is_alive(executor)
+
+
+def test_orphaned_runs(database):
+    """Test identifying and re-queuing runs whose executor is not alive."""
+    # -- Setup ----------------------------------------------------------------
+    (r1, r2, r3), (r4,) = init(database)
+    with database.session() as session:
+        queue = RunQueue(session)
+        queue.enqueue(session.query(RunObject).get(r1))
+        queue.enqueue(session.query(RunObject).get(r2), priority=2)
+        assert queue.claim(r2)
+        queue.assign(r3, rundir='/tmp/r3')
+        run = session.query(RunObject).get(r3)
+        run.state_type = st.STATE_RUNNING
+        session.commit()
+        assert run.executor.rundir == '/tmp/r3'
+    # -- Only runs without an executor are orphaned ---------------------------
+    with database.session() as session:
+        queue = RunQueue(session)
+        assert [r.run_id for r in queue.orphaned_runs()] == [r4]
+        run = session.query(RunObject).get(r3)
+        # Executors on other hosts are considered alive.
+        run.executor.host = 'unknown.host'
+        run.executor.pid = -1
+        session.commit()
+        assert [r.run_id for r in queue.orphaned_runs()] == [r4]
+    # -- Re-queue orphaned runs -----------------------------------------------
+    with database.session() as session:
+        queue = RunQueue(session)
+        for run in queue.orphaned_runs():
+            queue.requeue(run)
+        assert queue.size() == 2
+        assert queue.orphaned_runs() == []
+    # -- Re-queued runs keep their priority -----------------------------------
+    with database.session() as session:
+        queue = RunQueue(session)
+        run = session.query(RunObject).get(r2)
+        assert run.executor.priority == 2
+        run.executor.token = 'terminated'
+        session.commit()
+        assert [r.run_id for r in queue.orphaned_runs()] == [r2]
+        queue.requeue(run)
+        assert run.queue_entry.priority == 2
+        assert [r.run_id for r in queue.next_runs()][0] == r2
+        assert queue.remove(r2)
+    # -- Inactive runs are not assigned to an executor ------------------------
+    with database.session() as session:
+        queue = RunQueue(session)
+        assert queue.remove(r4)
+        assert not queue.remove(r4)
+        run = session.query(RunObject).get(r4)
+        run.state_type = st.STATE_ERROR
+        session.commit()
+        queue.assign(r4)
+        assert run.executor is None
+        session.delete(session.query(RunObject).get(r1))
+        session.commit()
+    with database.session() as session:
+        assert RunQueue(session).size() == 0
@@ -0,0 +1,148 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for dispatching queued runs to the workflow engine and for
+recovering orphaned runs.
+"""
+
+import os
+import subprocess
+import sys
+
+from flowserv.config import Config
+from flowserv.model.base import RunExecutor
+from flowserv.service.local import LocalAPIFactory
+from flowserv.service.run.argument import serialize_fh
+from flowserv.tests.controller import StateEngine
+from flowserv.tests.files import io_file
+from flowserv.tests.service import create_group, create_user
+
+import flowserv.model.workflow.state as st
+
+
+def kill_executors(database):
+    """Simulate that the executors for all active runs died by assigning the
+    identifier of a terminated process to all run executors.
+    """
+    proc = subprocess.Popen([sys.executable, '-c', 'pass'])
+    proc.wait()
+    with database.session() as session:
+        for executor in session.query(RunExecutor).all():
+            executor.pid = proc.pid
+        session.commit()
+
+
+def start_run(api, group_id):
+    """Start a new run for the Hello World template. Returns the run
+    identifier.
+    """
+    file_id = api.uploads().upload_file(
+        group_id=group_id,
+        file=io_file(data=['Alice', 'Bob'], format='txt/plain'),
+        name='n.txt'
+    )['id']
+    return api.runs().start_run(
+        group_id=group_id,
+        arguments=[{'name': 'names', 'value': serialize_fh(file_id=file_id)}]
+    )['id']
+
+
+def test_dispatch_queued_runs(database, hello_world, tmpdir):
+    """Test dispatching queued runs when the number of active runs is limited
+    and re-queuing runs after a service restart.
+    """
+    # -- Setup ----------------------------------------------------------------
+    env = Config().basedir(tmpdir).auth().max_active_runs(2)
+    engine = StateEngine()
+    service = LocalAPIFactory(env=env, db=database, engine=engine)
+    with service() as api:
+        user_id = create_user(api)
+        workflow_id = hello_world(api).workflow_id
+    with service(user_id=user_id) as api:
+        g1 = create_group(api, workflow_id=workflow_id)
+        g2 = create_group(api, workflow_id=workflow_id)
+        r1, r2, r3, r4 = [start_run(api, g1) for _ in range(4)]
+        r5 = start_run(api, g2)
+    # -- Only two runs are dispatched -----------------------------------------
+    assert sorted(engine.runs) == sorted([r1, r2])
+    with service(user_id=user_id) as api:
+        runs = api.runs().list_runs(group_id=g1, state=st.STATE_PENDING)['runs']
+        assert len(runs) == 4
+    # -- Cancel a run to dispatch the run of the second group -----------------
+    with service(user_id=user_id) as api:
+        api.runs().cancel_run(run_id=r1)
+    assert sorted(engine.runs) == sorted([r1, r2, r5])
+    # -- Finish a run to dispatch the next run of the first group -------------
+    with service(user_id=user_id) as api:
+        api.runs().update_run(run_id=r2, state=engine.error(r2))
+    assert sorted(engine.runs) == sorted([r1, r2, r3, r5])
+    # -- Restart the service with a new engine --------------------------------
+    kill_executors(database)
+    engine = StateEngine()
+    service = LocalAPIFactory(env=env.recover_runs(), db=database, engine=engine)
+    assert sorted(engine.runs) == sorted([r3, r5])
+    with service(user_id=user_id) as api:
+        assert api.runs().run_queue.size() == 1
+    # -- Runs that are queued can be canceled ---------------------------------
+    with service(user_id=user_id) as api:
+        api.runs().cancel_run(run_id=r4)
+        assert api.runs().run_queue.size() == 0
+    assert r4 not in engine.runs
+
+
+def test_recover_orphaned_runs(database, hello_world, tmpdir):
+    """Test recovering running runs whose executor died."""
+    # -- Setup ----------------------------------------------------------------
+    env = Config().basedir(tmpdir).auth()
+    engine = StateEngine()
+    service = LocalAPIFactory(env=env, db=database, engine=engine)
+    with service() as api:
+        user_id = create_user(api)
+        workflow_id = hello_world(api).workflow_id
+    with service(user_id=user_id) as api:
+        group_id = create_group(api, workflow_id=workflow_id)
+        r1, r2, r3 = [start_run(api, group_id) for _ in range(3)]
+        for run_id in [r1, r2]:
+            api.runs().update_run(run_id=run_id, state=engine.start(run_id))
+        # Create run directories for the first run and for a run that no
+        # longer exists.
+        runsdir = os.path.join(tmpdir, 'runs')
+        for run_id in [r1, 'unknown']:
+            os.makedirs(os.path.join(runsdir, run_id))
+        api.runs().run_queue.assign(r1, rundir=os.path.join(runsdir, r1))
+    # -- Runs of a live executor are not recovered ----------------------------
+    with service(user_id=user_id) as api:
+        assert api.runs().recover_runs() == []
+    # -- Recover runs after the executor died ---------------------------------
+    kill_executors(database)
+    engine = StateEngine()
+    service = LocalAPIFactory(env=env, db=database, engine=engine)
+    with service(user_id=user_id) as api:
+        runs = api.runs()
+        assert sorted(runs.recover_runs(runsdir=runsdir)) == sorted([r1, r2, r3])
+        for run_id in [r1, r2]:
+            run = runs.run_manager.get_run(run_id)
+            assert run.is_error()
+            assert run.state().messages == ['run executor terminated unexpectedly']
+            assert run.executor is None
+        assert runs.run_manager.get_run(r3).is_pending()
+        # Queued runs are not dispatched unless requested.
+        assert list(engine.runs) == []
+        runs.dispatch_runs()
+    assert list(engine.runs) == [r3]
+    assert os.listdir(runsdir) == []
+    # -- Re-queue running runs ------------------------------------------------
+    with service(user_id=user_id) as api:
+        api.runs().update_run(run_id=r3, state=engine.start(r3))
+    kill_executors(database)
+    engine = StateEngine()
+    service = LocalAPIFactory(env=env, db=database, engine=engine)
+    with service(user_id=user_id) as api:
+        assert api.runs().recover_runs(requeue=True, dispatch=True) == [r3]
+        assert api.runs().run_manager.get_run(r3).is_pending()
+    assert list(engine.runs) == [r3]
@@ -8,9 +8,12 @@
 
 """Unit test for workflow evaluation rankings."""
 
+import pytest
+
 from flowserv.model.template.schema import SortColumn
 from flowserv.tests.service import create_ranking, create_user
 
+import flowserv.error as err
 import flowserv.tests.serialize as serialize
 
 
@@ -45,3 +48,67 @@ def test_workflow_result_ranking(local_service, hello_world):
         serialize.validate_ranking(r)
         ranking = [e['group']['id'] for e in r['ranking']]
         assert groups == ranking
+
+
+def test_workflow_ranking_pagination(local_service, hello_world):
+    """Test paginating workflow rankings using limit, offset, and cursors."""
+    # -- Setup ----------------------------------------------------------------
+    with local_service() as api:
+        user_1 = create_user(api)
+        workflow_id = hello_world(api).workflow_id
+    with local_service(user_id=user_1) as api:
+        groups = create_ranking(api, workflow_id, 5)
+    groups = groups[::-1]
+    # -- Limit and offset -----------------------------------------------------
+    with local_service() as api:
+        r = api.workflows().get_ranking(workflow_id=workflow_id, limit=2)
+        serialize.validate_ranking(r)
+        assert [e['group']['id'] for e in r['ranking']] == groups[:2]
+        assert 'nextCursor' in r
+        r = api.workflows().get_ranking(workflow_id=workflow_id, offset=3, limit=2)
+        serialize.validate_ranking(r)
+        assert [e['group']['id'] for e in r['ranking']] == groups[3:]
+        assert 'nextCursor' not in r
+    # -- Cursor ---------------------------------------------------------------
+    ranking = list()
+    cursor = None
+    with local_service() as api:
+        while True:
+            r = api.workflows().get_ranking(
+                workflow_id=workflow_id,
+                limit=2,
+                cursor=cursor
+            )
+            ranking.extend([e['group']['id'] for e in r['ranking']])
+            cursor = r.get('nextCursor')
+            if cursor is None:
+                break
+    assert ranking == groups
+    # Use cursor with a different sort order.
+    order_by = [SortColumn('max_len', sort_desc=False)]
+    with local_service() as api:
+        r = api.workflows().get_ranking(
+            workflow_id=workflow_id,
+            order_by=order_by,
+            limit=3
+        )
+        assert [e['group']['id'] for e in r['ranking']] == groups[:3]
+        r = api.workflows().get_ranking(
+            workflow_id=workflow_id,
+            order_by=order_by,
+            cursor=r['nextCursor']
+        )
+        assert [e['group']['id'] for e in r['ranking']] == groups[3:]
+        assert 'nextCursor' not in r
+    # -- Error cases ----------------------------------------------------------
+    with local_service() as api:
+        with pytest.raises(err.InvalidArgumentError):
+            api.workflows().get_ranking(workflow_id=workflow_id, cursor='abc')
+        # The cursor does not match the sort order.
+        cursor = api.workflows().get_ranking(workflow_id=workflow_id, limit=1)['nextCursor']
+        with pytest.raises(err.InvalidArgumentError):
+            api.workflows().get_ranking(
+                workflow_id=workflow_id,
+                order_by=[SortColumn('avg_count'), SortColumn('max_len')],
+                cursor=cursor
+            )
@@ -32,6 +32,12 @@ def test_get_ranking_remote(remote_service, mock_response):
         workflow_id='0000',
         order_by=[SortColumn('A'), SortColumn('B', sort_desc=False)]
     )
+    remote_service.workflows().get_ranking(
+        workflow_id='0000',
+        limit=10,
+        offset=5,
+        cursor='abc'
+    )
 
 
 def test_get_workflow_remote(remote_service, mock_response):
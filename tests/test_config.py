@@ -44,7 +44,27 @@ import flowserv.config as config
         (config.FLOWSERV_WEBAPP, '1', False),
         (config.FLOWSERV_FILESTORE_CLASS, 'CLASS', 'CLASS'),
         (config.FLOWSERV_FILESTORE_MODULE, 'MODULE', 'MODULE'),
-        (config.FLOWSERV_S3BUCKET, 'S3', 'S3')
+        (config.FLOWSERV_S3BUCKET, 'S3', 'S3'),
+        (config.FLOWSERV_S3_WORKERS, '4', 4),
+        (config.FLOWSERV_S3_RETRIES, '0', 0),
+        (config.FLOWSERV_S3_CACHEDIR, 'DIR', 'DIR'),
+        (config.FLOWSERV_STAGING, 'hardlink', 'hardlink'),
+        (config.FLOWSERV_MAX_ACTIVE_RUNS, '5', 5),
+        (config.FLOWSERV_RECOVER_RUNS, 'true', True),
+        (config.FLOWSERV_WORKERS, '2', 2),
+        (config.FLOWSERV_WORKER_MAXRUNS, '10', 10),
+        (config.FLOWSERV_LOG_TAIL, '1024', 1024),
+        (config.FLOWSERV_STEP_CACHE, '2048', 2048),
+        (config.FLOWSERV_STEP_CACHEDIR, 'DIR', 'DIR'),
+        (config.FLOWSERV_DOCKER_SESSIONS, 'true', True),
+        (config.FLOWSERV_DOCKER_IDLE, '2', 2),
+        (config.FLOWSERV_MAX_CPUTIME, '1.5', 1.5),
+        (config.FLOWSERV_MAX_MEMORY, '1024', 1024),
+        (config.FLOWSERV_MAX_WALLTIME, '60', 60),
+        (config.FLOWSERV_REMOTE_WORKERS, '4', 4),
+        (config.FLOWSERV_REMOTE_RETRIES, '0', 0),
+        (config.FLOWSERV_ARCHIVE_CACHE, '1024', 1024),
+        (config.FLOWSERV_ARCHIVE_CACHE, 'ABC', None)
     ]
 )
 def test_config_env(var, value, result):
@@ -65,6 +85,9 @@ def test_config_init():
 def test_config_setter():
     """Test setter methods for configuration parameters."""
     conf = config.Config()
+    # Archive cache size.
+    conf = conf.archive_cache(1024)
+    assert conf[config.FLOWSERV_ARCHIVE_CACHE] == 1024
     # Default authentication.
     conf = conf.auth()
     assert conf[config.FLOWSERV_AUTH] == config.AUTH_DEFAULT
@@ -74,6 +97,13 @@ def test_config_setter():
     # Database
     conf.database('mysql')
     assert conf[config.FLOWSERV_DB] == 'mysql'
+    # Log tail
+    conf = conf.log_tail(1024)
+    assert conf[config.FLOWSERV_LOG_TAIL] == 1024
+    # Run queue
+    conf = conf.max_active_runs(5).recover_runs()
+    assert conf[config.FLOWSERV_MAX_ACTIVE_RUNS] == 5
+    assert conf[config.FLOWSERV_RECOVER_RUNS]
     # Open access
     conf = conf.open_access()
     assert conf[config.FLOWSERV_AUTH] == config.AUTH_OPEN
@@ -81,6 +111,9 @@ def test_config_setter():
     conf = conf.docker_engine()
     assert conf[config.FLOWSERV_BACKEND_MODULE] == 'flowserv.controller.serial.docker'
     assert conf[config.FLOWSERV_BACKEND_CLASS] == 'DockerWorkflowEngine'
+    conf = conf.docker_sessions(idle=2)
+    assert conf[config.FLOWSERV_DOCKER_SESSIONS]
+    assert conf[config.FLOWSERV_DOCKER_IDLE] == 2
     conf = conf.multiprocess_engine()
     assert conf[config.FLOWSERV_BACKEND_MODULE] == 'flowserv.controller.serial.engine'
     assert conf[config.FLOWSERV_BACKEND_CLASS] == 'SerialWorkflowEngine'
@@ -89,17 +122,45 @@ def test_config_setter():
     assert not conf[config.FLOWSERV_ASYNC]
     conf = conf.run_async()
     assert conf[config.FLOWSERV_ASYNC]
+    # Remote downloads
+    conf = conf.remote_downloads(workers=2, retries=0)
+    assert conf[config.FLOWSERV_REMOTE_WORKERS] == 2
+    assert conf[config.FLOWSERV_REMOTE_RETRIES] == 0
     # S3 bucket
     conf = conf.s3('mybucket')
     assert conf[config.FLOWSERV_FILESTORE_MODULE] == 'flowserv.model.files.s3'
     assert conf[config.FLOWSERV_FILESTORE_CLASS] == 'BucketStore'
     assert conf[config.FLOWSERV_S3BUCKET] == 'mybucket'
+    conf = conf.s3_transfers(workers=4, retries=1)
+    assert conf[config.FLOWSERV_S3_WORKERS] == 4
+    assert conf[config.FLOWSERV_S3_RETRIES] == 1
+    conf = conf.s3_cache('/dev/null')
+    assert conf[config.FLOWSERV_S3_CACHEDIR] == '/dev/null'
+    # Staging mode
+    conf = conf.staging(config.STAGING_REFLINK)
+    assert conf[config.FLOWSERV_STAGING] == 'reflink'
+    # Step limits
+    conf = conf.step_limits(cputime=10, walltime=20)
+    assert conf[config.FLOWSERV_MAX_CPUTIME] == 10
+    assert config.FLOWSERV_MAX_MEMORY not in conf
+    assert conf[config.FLOWSERV_MAX_WALLTIME] == 20
+    # Step cache
+    conf = conf.step_cache(size=2048, basedir='/dev/null')
+    assert conf[config.FLOWSERV_STEP_CACHE] == 2048
+    assert conf[config.FLOWSERV_STEP_CACHEDIR] == '/dev/null'
+    # Step workers
+    conf = conf.step_workers(2)
+    assert conf[config.FLOWSERV_STEP_WORKERS] == 2
     # Token timeout
     conf = conf.token_timeout(100)
     assert conf[config.FLOWSERV_AUTH_LOGINTTL] == 100
     # Webapp
     conf = conf.webapp()
     assert conf[config.FLOWSERV_WEBAPP]
+    # Worker pool
+    conf = conf.workers(processes=2, max_runs=10)
+    assert conf[config.FLOWSERV_WORKERS] == 2
+    assert conf[config.FLOWSERV_WORKER_MAXRUNS] == 10
 
 
 def test_config_url():
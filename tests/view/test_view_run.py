@@ -53,11 +53,26 @@ def test_run_serialization(database, tmpdir):
         run = runs.get_run(run_id)
         doc = view.run_handle(run)
         validator('RunHandle').validate(doc)
-        # Create error run.
+        # Create error run with progress information.
         run = runs.create_run(group=groups.get_group(group_id))
         run_id = run.run_id
         state = run.state()
         runs.update_run(run_id=run_id, state=state)
+        runs.update_step(
+            run_id, pos=0, step=0, command='ls', started_at='A', finished_at='B',
+            exit_code=0, cpu_time=0.5, wall_time=1.5
+        )
+        runs.update_step(run_id, pos=1, step=0, command='ls', started_at='C')
+        run = runs.get_run(run_id)
+        doc = view.run_handle(run)
+        validator('RunHandle').validate(doc)
+        assert doc[labels.RUN_STEPS] == [
+            {
+                'pos': 0, 'step': 0, 'command': 'ls', 'startedAt': 'A', 'finishedAt': 'B',
+                'exitCode': 0, 'cpuTime': 0.5, 'wallTime': 1.5
+            },
+            {'pos': 1, 'step': 0, 'command': 'ls', 'startedAt': 'C'}
+        ]
         messages = ['There', 'were', 'many errors']
         runs.update_run(run_id=run_id, state=state.error(messages))
         run = runs.get_run(run_id)
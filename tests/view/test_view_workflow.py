@@ -71,6 +71,9 @@ def test_workflow_leaderboard_serialization(database, tmpdir):
         )]
         doc = view.workflow_leaderboard(workflow, ranking=ranking)
         schema.validate(doc)
+        doc = view.workflow_leaderboard(workflow, ranking=ranking, cursor='abc')
+        schema.validate(doc)
+        assert doc[labels.RANKING_CURSOR] == 'abc'
 
 
 def test_workflow_listing_serialization(database, tmpdir):
@@ -0,0 +1,180 @@
+# This file is part of the Reproducible and Reusable Data Analysis Workflow
+# Server (flowServ).
+#
+# Copyright (C) 2019-2021 NYU.
+#
+# flowServ is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Benchmark for the database indexes that are defined by the flowserv model.
+Creates a SQLite database with a large number of workflow runs and measures
+the execution time for the workflow ranking, run listing, obsolete run listing,
+and authentication queries with and without the managed database indexes.
+"""
+
+import datetime
+import sys
+import tempfile
+import time
+
+from flowserv.model.auth import DefaultAuthPolicy
+from flowserv.model.base import (
+    APIKey, Base, GroupObject, RunObject, RunResultValue, User, WorkflowObject
+)
+from flowserv.model.database import DB, TEST_DB
+from flowserv.model.parameter.numeric import PARA_FLOAT
+from flowserv.model.ranking import RankingManager
+from flowserv.model.run import RunManager
+from flowserv.model.template.parameter import ParameterIndex
+from flowserv.model.template.schema import ResultColumn, ResultSchema, SortColumn
+
+import flowserv.model.workflow.state as st
+
+
+"""Default size of the generated database."""
+RUNS = 100000
+WORKFLOWS = 10
+GROUPS = 100
+USERS = 1000
+REPEAT = 10
+
+SCHEMA = ResultSchema(
+    result_file='results.json',
+    columns=[ResultColumn('score', 'Score', PARA_FLOAT)],
+    order_by=[SortColumn(column_id='score')]
+)
+
+
+def create_database(db, runs):
+    """Populate the database with users, workflows, groups, and runs. Half of
+    the runs are in success state and have a result value. Returns the list of
+    identifier for workflows, groups, and API keys.
+    """
+    start = datetime.datetime(2021, 1, 1)
+    expires = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    with db.session() as session:
+        users = [{'user_id': 'U{}'.format(i), 'name': 'user{}'.format(i), 'secret': 'X', 'active': True} for i in range(USERS)]
+        session.bulk_insert_mappings(User, users)
+        keys = [{'user_id': u['user_id'], 'value': 'K{}'.format(i), 'expires': expires} for i, u in enumerate(users)]
+        session.bulk_insert_mappings(APIKey, keys)
+        workflows = ['W{}'.format(i) for i in range(WORKFLOWS)]
+        for workflow_id in workflows:
+            session.add(
+                WorkflowObject(
+                    workflow_id=workflow_id,
+                    name=workflow_id,
+                    workflow_spec=dict(),
+                    result_schema=SCHEMA
+                )
+            )
+        groups = list()
+        for i in range(GROUPS * WORKFLOWS):
+            groups.append({
+                'group_id': 'G{}'.format(i),
+                'name': 'G{}'.format(i),
+                'workflow_id': workflows[i % WORKFLOWS],
+                'owner_id': users[i % USERS]['user_id'],
+                'parameters': ParameterIndex(),
+                'workflow_spec': dict()
+            })
+        session.bulk_insert_mappings(GroupObject, groups)
+        rows, values = list(), list()
+        for i in range(runs):
+            group = groups[i % len(groups)]
+            run_id = 'R{}'.format(i)
+            state = st.STATE_SUCCESS if i % 2 == 0 else st.STATE_ERROR
+            score = (i * 7919) % 1000 / 10.0
+            rows.append({
+                'run_id': run_id,
+                'workflow_id': group['workflow_id'],
+                'group_id': group['group_id'],
+                'state_type': state,
+                'created_at': (start + datetime.timedelta(seconds=i)).isoformat(),
+                'started_at': start.isoformat(),
+                'ended_at': start.isoformat(),
+                'result': {'score': score} if state == st.STATE_SUCCESS else None
+            })
+            if state == st.STATE_SUCCESS:
+                values.append({
+                    'run_id': run_id,
+                    'workflow_id': group['workflow_id'],
+                    'column_id': 'score',
+                    'float_value': score
+                })
+        session.bulk_insert_mappings(RunObject, rows)
+        session.bulk_insert_mappings(RunResultValue, values)
+    with db.session() as session:
+        rankings = RankingManager(session=session)
+        for workflow in session.query(WorkflowObject).all():
+            rankings.rebuild_leaderboard(workflow)
+    date = (start + datetime.timedelta(seconds=runs // 100)).isoformat()
+    return workflows, [g['group_id'] for g in groups], [k['value'] for k in keys], date
+
+
+def run_queries(db, workflows, groups, keys, date):
+    """Run each benchmark query REPEAT times. Returns a dictionary with the
+    average execution time (in milliseconds) for each query.
+    """
+    queries = {
+        'ranking': lambda s, i: RankingManager(s).get_ranking(
+            s.query(WorkflowObject).get(workflows[i % len(workflows)]),
+            limit=10
+        ),
+        'ranking (all runs)': lambda s, i: RankingManager(s).get_ranking(
+            s.query(WorkflowObject).get(workflows[i % len(workflows)]),
+            include_all=True,
+            limit=10
+        ),
+        'list_runs': lambda s, i: RunManager(s, fs=None).list_runs(groups[i * 37 % len(groups)]),
+        'list_obsolete_runs': lambda s, i: RunManager(s, fs=None).list_obsolete_runs(date),
+        'authenticate': lambda s, i: DefaultAuthPolicy(s).authenticate(keys[i * 37 % len(keys)])
+    }
+    timings = dict()
+    for name, query in queries.items():
+        elapsed = 0
+        for i in range(REPEAT):
+            with db.session() as session:
+                start = time.perf_counter()
+                query(session, i)
+                elapsed += time.perf_counter() - start
+        timings[name] = elapsed / REPEAT * 1000
+    return timings
+
+
+def main(args):
+    """Run the benchmark. Expects an optional argument that specifies the
+    number of workflow runs in the generated database.
+
+    Parameters
+    ----------
+    args: list(string)
+        List of command line arguments.
+    """
+    if len(args) > 1:
+        print('Usage: {<number-of-runs>}')
+        sys.exit(-1)
+    runs = int(args[0]) if args else RUNS
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = DB(connect_url=TEST_DB(tmpdir)).init()
+        print('Create database with {} runs ...'.format(runs))
+        objects = create_database(db, runs)
+        # Drop all managed indexes to get the baseline timings. The indexes
+        # are re-created as they would be when upgrading an existing database.
+        engine = db._engine
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.drop(engine)
+        before = run_queries(db, *objects)
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(engine)
+        after = run_queries(db, *objects)
+    print()
+    print('{:<20} {:>14} {:>14}'.format('Query', 'Before (ms)', 'After (ms)'))
+    print('{:<20} {:>14} {:>14}'.format('-' * 20, '-' * 14, '-' * 14))
+    for name in before:
+        print('{:<20} {:>14.2f} {:>14.2f}'.format(name, before[name], after[name]))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])